@@ -0,0 +1,57 @@
+"""
+Management command to finalize queued PayMongo webhook events.
+
+The webhook endpoint only stores events in PaymentWebhookEvent; run this
+as a worker to apply them:
+
+    python manage.py drain_payment_webhooks            # drain what is due, then exit
+    python manage.py drain_payment_webhooks --loop     # keep polling
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from bufia.views.payment_views import drain_paymongo_webhook_inbox
+
+
+class Command(BaseCommand):
+    help = 'Finalize queued PayMongo webhook events in batches with retry'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Number of events to claim per batch (default: 50)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new events instead of exiting when the inbox is empty'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls when the inbox is empty (default: 5)'
+        )
+
+    def handle(self, *args, **options):
+        totals = {}
+        while True:
+            outcomes = drain_paymongo_webhook_inbox(batch_size=options['batch_size'])
+            for outcome, count in outcomes.items():
+                totals[outcome] = totals.get(outcome, 0) + count
+            if any(outcomes.values()):
+                self.stdout.write(', '.join(f'{count} {outcome}' for outcome, count in outcomes.items()))
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                'Webhook inbox drained: ' + ', '.join(f'{count} {outcome}' for outcome, count in totals.items())
+            )
+        )
@@ -54,56 +54,65 @@ class Command(BaseCommand):
         
         processed = 0
         errors = 0
+        # Rows that stay without an ID (dry run, errors) are skipped over
+        unassigned = 0
+        # Dry run: next sequence number per year, without touching the counter
+        simulated_next = {}
         
         # Process payments in batches
         while True:
-            batch = list(payments_without_ids[:batch_size])
+            batch = list(payments_without_ids[unassigned:unassigned + batch_size])
             
             if not batch:
                 break
             
+            # Group the batch by the year of each payment's created_at and
+            # reserve one block of sequence numbers per year.
+            batch_by_year = {}
             for payment in batch:
+                if payment.created_at:
+                    year = payment.created_at.year
+                else:
+                    # Fallback to current year if no timestamp
+                    year = timezone.now().year
+                    logger.warning(
+                        f'Payment #{payment.id} has no created_at timestamp, '
+                        f'using current year {year}'
+                    )
+                batch_by_year.setdefault(year, []).append(payment)
+            
+            for year, payments in sorted(batch_by_year.items()):
                 try:
                     if dry_run:
-                        # Just simulate ID generation
-                        transaction_id = TransactionIDGenerator.generate()
-                        self.stdout.write(
-                            f'Would assign {transaction_id} to Payment #{payment.id}'
-                        )
-                    else:
-                        # Generate and assign transaction ID
-                        with transaction.atomic():
-                            # Use the payment's created_at year for the transaction ID
-                            if payment.created_at:
-                                year = payment.created_at.year
-                            else:
-                                # Fallback to current year if no timestamp
-                                year = timezone.now().year
-                                logger.warning(
-                                    f'Payment #{payment.id} has no created_at timestamp, '
-                                    f'using current year {year}'
-                                )
-                            
-                            # Get next sequence number for this year
-                            sequence = TransactionIDGenerator.get_next_sequence_number(year)
+                        # Simulate without consuming sequence numbers
+                        if year not in simulated_next:
+                            simulated_next[year] = TransactionIDGenerator.peek_next_sequence_number(year)
+                        for payment in payments:
                             transaction_id = TransactionIDGenerator._format_transaction_id(
-                                year, sequence
+                                year, simulated_next[year]
                             )
-                            
-                            # Assign to payment
-                            payment.internal_transaction_id = transaction_id
-                            payment.save(update_fields=['internal_transaction_id'])
-                    
-                    processed += 1
+                            simulated_next[year] += 1
+                            self.stdout.write(
+                                f'Would assign {transaction_id} to Payment #{payment.id}'
+                            )
+                    else:
+                        with transaction.atomic():
+                            transaction_ids = TransactionIDGenerator.reserve(len(payments), year=year)
+                            for payment, transaction_id in zip(payments, transaction_ids):
+                                payment.internal_transaction_id = transaction_id
+                            Payment.objects.bulk_update(payments, ['internal_transaction_id'])
                     
-                    if processed % 100 == 0:
-                        self.stdout.write(f'Processed {processed}/{total_count} payments...')
+                    processed += len(payments)
+                    if dry_run:
+                        unassigned += len(payments)
+                    self.stdout.write(f'Processed {processed}/{total_count} payments...')
                 
                 except Exception as e:
-                    errors += 1
-                    logger.error(f'Error processing Payment #{payment.id}: {str(e)}')
+                    errors += len(payments)
+                    unassigned += len(payments)
+                    logger.error(f'Error processing {year} payments: {str(e)}')
                     self.stdout.write(
-                        self.style.ERROR(f'Error processing Payment #{payment.id}: {str(e)}')
+                        self.style.ERROR(f'Error processing {year} payments: {str(e)}')
                     )
             
             # Refresh the queryset for next batch
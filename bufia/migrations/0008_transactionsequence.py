@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:28
+
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    Payment = apps.get_model('bufia', 'Payment')
+    TransactionSequence = apps.get_model('bufia', 'TransactionSequence')
+
+    last_values = {}
+    for transaction_id in Payment.objects.filter(
+        internal_transaction_id__startswith='BUF-TXN-',
+    ).values_list('internal_transaction_id', flat=True).iterator():
+        parts = transaction_id.split('-')
+        try:
+            year, sequence = int(parts[2]), int(parts[-1])
+        except (ValueError, IndexError):
+            continue
+        last_values[year] = max(last_values.get(year, 0), sequence)
+
+    TransactionSequence.objects.bulk_create([
+        TransactionSequence(year=year, last_value=last_value)
+        for year, last_value in sorted(last_values.items())
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bufia', '0007_alter_payment_payment_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField(unique=True)),
+                ('last_value', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['year'],
+            },
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:32
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bufia', '0008_transactionsequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentWebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(default='paymongo', max_length=20)),
+                ('dedupe_key', models.CharField(max_length=255, unique=True)),
+                ('event_id', models.CharField(blank=True, max_length=100)),
+                ('event_type', models.CharField(blank=True, max_length=100)),
+                ('session_id', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('payload', models.JSONField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('processed', 'Processed'), ('ignored', 'Ignored'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['received_at', 'pk'],
+                'indexes': [models.Index(fields=['status', 'available_at'], name='bufia_payme_status_576762_idx')],
+            },
+        ),
+    ]
@@ -1,10 +1,13 @@
+import hashlib
+from datetime import timedelta
 from decimal import Decimal
 
-from django.core.exceptions import ValidationError
-from django.db import models
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -101,10 +104,50 @@ class Payment(models.Model):
     
     def save(self, *args, **kwargs):
         """Override save to auto-generate internal transaction ID"""
+        adding = self._state.adding
         if not self.internal_transaction_id:
             from bufia.utils.transaction_id import TransactionIDGenerator
             self.internal_transaction_id = TransactionIDGenerator.generate()
         super().save(*args, **kwargs)
+        if adding:
+            # A new payment is always the newest one for its object.
+            linked_model = self._linked_model()
+            if linked_model is not None:
+                linked_model._default_manager.filter(pk=self.object_id).update(latest_payment=self)
+                if type(self).content_object.is_cached(self):
+                    linked = self.content_object
+                    if linked is not None and linked.pk == self.object_id:
+                        linked.latest_payment = self
+
+    def delete(self, *args, **kwargs):
+        linked_model = self._linked_model()
+        content_type_id, object_id = self.content_type_id, self.object_id
+        result = super().delete(*args, **kwargs)
+        if linked_model is not None:
+            self.sync_latest_payment(linked_model, content_type_id, object_id)
+        return result
+
+    def _linked_model(self):
+        """Model class of the linked object when it keeps a ``latest_payment`` pointer."""
+        if not self.content_type_id:
+            return None
+        model = ContentType.objects.get_for_id(self.content_type_id).model_class()
+        if model is None:
+            return None
+        try:
+            model._meta.get_field('latest_payment')
+        except FieldDoesNotExist:
+            return None
+        return model
+
+    @classmethod
+    def sync_latest_payment(cls, linked_model, content_type_id, object_id):
+        """Re-point ``linked_model`` row ``object_id`` at its newest remaining payment."""
+        latest_id = cls.objects.filter(
+            content_type_id=content_type_id,
+            object_id=object_id,
+        ).order_by('-created_at', '-pk').values_list('pk', flat=True).first()
+        linked_model._default_manager.filter(pk=object_id).update(latest_payment_id=latest_id)
     
     def get_display_transaction_id(self) -> str:
         """Return the user-facing transaction ID"""
@@ -290,3 +333,156 @@ class Refund(models.Model):
 
     def __str__(self):
         return f"Refund #{self.pk or 'new'} for payment #{self.payment_id}"
+
+
+class TransactionSequence(models.Model):
+    """Last internal transaction sequence number handed out for a year."""
+    year = models.PositiveIntegerField(unique=True)
+    last_value = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['year']
+
+    def __str__(self):
+        return f"{self.year}: {self.last_value}"
+
+
+class PaymentWebhookEvent(models.Model):
+    """
+    Inbox of payment gateway webhook deliveries.
+
+    The webhook view only stores the event and acknowledges it; the
+    ``drain_payment_webhooks`` command finalizes the payments in batches.
+    ``dedupe_key`` is unique so a gateway retry of an event that is already
+    queued or processed is stored once.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_PROCESSED = 'processed'
+    STATUS_IGNORED = 'ignored'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_PROCESSED, 'Processed'),
+        (STATUS_IGNORED, 'Ignored'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    MAX_ATTEMPTS = 8
+    RETRY_BASE_DELAY = timedelta(minutes=1)
+    RETRY_MAX_DELAY = timedelta(hours=1)
+    # A claim older than this belongs to a worker that died mid-batch.
+    STALE_CLAIM_AFTER = timedelta(minutes=10)
+
+    provider = models.CharField(max_length=20, default='paymongo')
+    dedupe_key = models.CharField(max_length=255, unique=True)
+    event_id = models.CharField(max_length=100, blank=True)
+    event_type = models.CharField(max_length=100, blank=True)
+    session_id = models.CharField(max_length=255, blank=True, db_index=True)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['received_at', 'pk']
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} {self.event_type or 'event'} {self.dedupe_key} ({self.status})"
+
+    @classmethod
+    def build_dedupe_key(cls, provider, *, event_type, session_id=None, event_id=None, raw_payload=b''):
+        """A paid checkout session is finalized once however many events report it."""
+        if session_id:
+            return f"{provider}:{event_type}:{session_id}"
+        if event_id:
+            return f"{provider}:{event_id}"
+        return f"{provider}:sha256:{hashlib.sha256(raw_payload).hexdigest()}"
+
+    @classmethod
+    def enqueue(cls, provider, payload, *, event_type, session_id=None, event_id=None, raw_payload=b''):
+        """Store a delivery unless its key is already queued. Returns ``(event, created)``."""
+        dedupe_key = cls.build_dedupe_key(
+            provider,
+            event_type=event_type,
+            session_id=session_id,
+            event_id=event_id,
+            raw_payload=raw_payload,
+        )
+        try:
+            with transaction.atomic():
+                return cls.objects.create(
+                    provider=provider,
+                    dedupe_key=dedupe_key,
+                    event_id=event_id or '',
+                    event_type=event_type or '',
+                    session_id=session_id or '',
+                    payload=payload,
+                ), True
+        except IntegrityError:
+            return cls.objects.get(dedupe_key=dedupe_key), False
+
+    @classmethod
+    def claim_batch(cls, limit, *, provider=None):
+        """
+        Mark up to ``limit`` due events as processing and return them.
+
+        Rows locked by another worker are skipped, so several drains can run
+        side by side without picking the same event.
+        """
+        now = timezone.now()
+        due = models.Q(status=cls.STATUS_PENDING, available_at__lte=now) | models.Q(
+            status=cls.STATUS_PROCESSING,
+            claimed_at__lt=now - cls.STALE_CLAIM_AFTER,
+        )
+        queryset = cls.objects.filter(due)
+        if provider:
+            queryset = queryset.filter(provider=provider)
+        with transaction.atomic():
+            ids = list(
+                queryset.select_for_update(skip_locked=True)
+                .order_by('available_at', 'pk')
+                .values_list('pk', flat=True)[:limit]
+            )
+            if not ids:
+                return []
+            cls.objects.filter(pk__in=ids).update(
+                status=cls.STATUS_PROCESSING,
+                claimed_at=now,
+                attempts=models.F('attempts') + 1,
+            )
+        return list(cls.objects.filter(pk__in=ids).order_by('available_at', 'pk'))
+
+    def _finish(self, status, error=''):
+        self.status = status
+        self.last_error = error
+        self.claimed_at = None
+        self.processed_at = timezone.now()
+        self.save(update_fields=['status', 'last_error', 'claimed_at', 'processed_at'])
+
+    def mark_processed(self):
+        self._finish(self.STATUS_PROCESSED)
+
+    def mark_ignored(self, reason):
+        self._finish(self.STATUS_IGNORED, reason)
+
+    def mark_failed(self, error, *, retry=True):
+        """Schedule another attempt with exponential backoff, or give up."""
+        if not retry or self.attempts >= self.MAX_ATTEMPTS:
+            self._finish(self.STATUS_FAILED, error)
+            return
+        delay = min(self.RETRY_BASE_DELAY * (2 ** max(self.attempts - 1, 0)), self.RETRY_MAX_DELAY)
+        self.status = self.STATUS_PENDING
+        self.last_error = error
+        self.claimed_at = None
+        self.available_at = timezone.now() + delay
+        self.save(update_fields=['status', 'last_error', 'claimed_at', 'available_at'])
@@ -29,6 +29,7 @@ def upsert_payment_record(
         content_type=content_type,
         object_id=content_object.pk,
         defaults={
+            'content_object': content_object,
             'user': user,
             'payment_type': payment_type,
             'amount': amount,
@@ -86,8 +87,15 @@ def create_user_notification(user, notification_type, message, related_object_id
 def notify_staff(notification_type, message, related_object_id):
     user_model = get_user_model()
     admins = list(user_model.objects.filter(is_staff=True))
-    for admin in admins:
-        create_user_notification(admin, notification_type, message, related_object_id)
+    UserNotification.bulk_create_notifications(
+        UserNotification(
+            user=admin,
+            notification_type=notification_type,
+            message=message,
+            related_object_id=related_object_id,
+        )
+        for admin in admins
+    )
     return admins
 
 
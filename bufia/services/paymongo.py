@@ -2,17 +2,30 @@ import base64
 import base64
 import hashlib
 import hmac
+import http.client
 import json
+import logging
+import random
+import socket
+import threading
+import time
 from decimal import Decimal
-from urllib import error, request
+from urllib.parse import urlsplit
 
 from django.conf import settings
 
 
+logger = logging.getLogger('bufia.payments.paymongo')
+
+
 class PayMongoAPIError(Exception):
     """Raised when PayMongo returns an API or transport error."""
 
 
+class PayMongoUnavailableError(PayMongoAPIError):
+    """Raised without calling PayMongo while the circuit breaker is open."""
+
+
 def is_configured() -> bool:
     secret_key = (getattr(settings, 'PAYMONGO_SECRET_KEY', '') or '').strip()
     public_key = (getattr(settings, 'PAYMONGO_PUBLIC_KEY', '') or '').strip()
@@ -34,7 +47,211 @@ def _authorization_header():
     return f'Basic {token}'
 
 
+class _ConnectionPool:
+    """Idle keep-alive connections per (scheme, host, port), reused across calls."""
+
+    def __init__(self, max_idle=4):
+        self.max_idle = max_idle
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, origin, timeout):
+        """Return ``(connection, reused)``."""
+        with self._lock:
+            idle = self._idle.get(origin) or []
+            connection = idle.pop() if idle else None
+        if connection is not None:
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+            return connection, True
+        scheme, host, port = origin
+        connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return connection_class(host, port, timeout=timeout), False
+
+    def release(self, origin, connection):
+        with self._lock:
+            idle = self._idle.setdefault(origin, [])
+            if len(idle) < self.max_idle:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def clear(self):
+        with self._lock:
+            connections = [connection for idle in self._idle.values() for connection in idle]
+            self._idle = {}
+        for connection in connections:
+            connection.close()
+
+
+class _CircuitBreaker:
+    """
+    Fail fast while PayMongo is down.
+
+    After ``threshold`` consecutive failed calls the breaker opens and calls
+    raise ``PayMongoUnavailableError`` without touching the network. Once
+    ``reset_seconds`` pass a single probe call is let through; its outcome
+    closes or re-opens the breaker.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+
+    def before_call(self, reset_seconds):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= reset_seconds:
+                self.state = self.HALF_OPEN
+                return
+        raise PayMongoUnavailableError('PayMongo is temporarily unavailable. Please try again in a few minutes.')
+
+    def record_success(self):
+        with self._lock:
+            self.reset()
+
+    def record_failure(self, threshold):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+_pool = _ConnectionPool()
+_breaker = _CircuitBreaker()
+_metrics_lock = threading.Lock()
+_metrics = {}
+
+# Server-side statuses worth another attempt. A POST is only retried when
+# PayMongo did not start processing it.
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+_POST_RETRY_STATUSES = {429, 503}
+_RETRY_BACKOFF_BASE = 0.2
+_RETRY_BACKOFF_MAX = 2.0
+
+
+def _record(**increments):
+    with _metrics_lock:
+        for key, value in increments.items():
+            if key == 'latency_ms':
+                _metrics['latency_ms_total'] = _metrics.get('latency_ms_total', 0.0) + value
+                _metrics['latency_ms_max'] = max(_metrics.get('latency_ms_max', 0.0), value)
+            elif key == 'last_error':
+                _metrics['last_error'] = value
+            else:
+                _metrics[key] = _metrics.get(key, 0) + value
+
+
+def client_metrics():
+    """Per-process counters and latency of PayMongo API calls, plus the breaker state."""
+    with _metrics_lock:
+        snapshot = {
+            'attempts': 0,
+            'calls': 0,
+            'successes': 0,
+            'failures': 0,
+            'retries': 0,
+            'short_circuited': 0,
+            'reused_connections': 0,
+            'latency_ms_total': 0.0,
+            'latency_ms_max': 0.0,
+            'last_error': '',
+        }
+        snapshot.update(_metrics)
+    snapshot['latency_ms_avg'] = (
+        round(snapshot['latency_ms_total'] / snapshot['attempts'], 1) if snapshot['attempts'] else 0.0
+    )
+    snapshot['circuit_state'] = _breaker.state
+    return snapshot
+
+
+def reset_client():
+    """Drop pooled connections, metrics and breaker state (tests, settings changes)."""
+    _pool.clear()
+    _breaker.reset()
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def _api_origin():
+    parts = urlsplit(getattr(settings, 'PAYMONGO_API_BASE', 'https://api.paymongo.com'))
+    scheme = parts.scheme or 'https'
+    port = parts.port or (443 if scheme == 'https' else 80)
+    return (scheme, parts.hostname, port), parts.path.rstrip('/')
+
+
+def _send(origin, method, path, body, headers, timeout):
+    """One HTTP exchange over a pooled connection. Returns ``(status, body bytes)``."""
+    connection, reused = _pool.acquire(origin, timeout)
+    if reused:
+        _record(reused_connections=1)
+    try:
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        response_body = response.read()
+    except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+        connection.close()
+        if not reused:
+            raise
+        # The server dropped an idle keep-alive connection before reading the
+        # request, so it is safe to send it again on a fresh one.
+        return _send(origin, method, path, body, headers, timeout)
+    except BaseException:
+        connection.close()
+        raise
+    if response.will_close:
+        connection.close()
+    else:
+        _pool.release(origin, connection)
+    return response.status, response_body
+
+
+def _error_detail(response_body, status):
+    text = response_body.decode('utf-8', errors='replace')
+    try:
+        errors = json.loads(text).get('errors') or []
+        detail = '; '.join(
+            item.get('detail') or item.get('code') or 'Unknown PayMongo error'
+            for item in errors
+        )
+    except Exception:
+        detail = text or f'HTTP {status}'
+    return detail or 'PayMongo request failed.'
+
+
 def _api_request(method, endpoint, payload=None):
+    """
+    Call the PayMongo API and return the decoded JSON body.
+
+    Connections are kept alive and reused. Each attempt gets at most
+    ``PAYMONGO_TIMEOUT`` seconds and the whole call, retries included, at
+    most ``PAYMONGO_DEADLINE``. Transport errors and 5xx/429 answers are
+    retried up to ``PAYMONGO_MAX_RETRIES`` times with jittered exponential
+    backoff (a POST only when PayMongo cannot have acted on it).
+    """
+    timeout = float(getattr(settings, 'PAYMONGO_TIMEOUT', 5.0))
+    deadline = time.monotonic() + float(getattr(settings, 'PAYMONGO_DEADLINE', 10.0))
+    max_retries = int(getattr(settings, 'PAYMONGO_MAX_RETRIES', 2))
+    threshold = int(getattr(settings, 'PAYMONGO_CIRCUIT_FAILURE_THRESHOLD', 5))
+
+    try:
+        _breaker.before_call(float(getattr(settings, 'PAYMONGO_CIRCUIT_RESET_SECONDS', 30.0)))
+    except PayMongoUnavailableError:
+        _record(short_circuited=1)
+        raise
+
     headers = {
         'Accept': 'application/json',
         'Authorization': _authorization_header(),
@@ -44,30 +261,49 @@ def _api_request(method, endpoint, payload=None):
         data = json.dumps(payload).encode('utf-8')
         headers['Content-Type'] = 'application/json'
 
-    api_request = request.Request(
-        url=f'https://api.paymongo.com{endpoint}',
-        data=data,
-        headers=headers,
-        method=method,
-    )
-
-    try:
-        with request.urlopen(api_request, timeout=30) as response:
-            return json.loads(response.read().decode('utf-8'))
-    except error.HTTPError as exc:
-        body = exc.read().decode('utf-8', errors='replace')
+    origin, base_path = _api_origin()
+    _record(calls=1)
+    attempt = 0
+    while True:
+        attempt += 1
+        remaining = deadline - time.monotonic()
+        started = time.monotonic()
+        retryable = False
         try:
-            payload = json.loads(body)
-            errors = payload.get('errors') or []
-            detail = '; '.join(
-                item.get('detail') or item.get('code') or 'Unknown PayMongo error'
-                for item in errors
+            if remaining <= 0:
+                raise socket.timeout('deadline exceeded')
+            status, response_body = _send(
+                origin, method, f'{base_path}{endpoint}', data, headers, min(timeout, remaining)
             )
-        except Exception:
-            detail = body or exc.reason
-        raise PayMongoAPIError(detail or 'PayMongo request failed.') from exc
-    except error.URLError as exc:
-        raise PayMongoAPIError(f'Unable to reach PayMongo: {exc.reason}') from exc
+        except (OSError, http.client.HTTPException) as exc:
+            failure = PayMongoAPIError(f'Unable to reach PayMongo: {exc}')
+            failure.__cause__ = exc
+            # Nothing reached PayMongo when the connection could not be opened.
+            retryable = method == 'GET' or isinstance(exc, (ConnectionRefusedError, socket.gaierror))
+        else:
+            if status < 400:
+                _record(attempts=1, successes=1, latency_ms=(time.monotonic() - started) * 1000)
+                _breaker.record_success()
+                return json.loads(response_body.decode('utf-8'))
+            failure = PayMongoAPIError(_error_detail(response_body, status))
+            if status not in _RETRY_STATUSES:
+                # PayMongo answered; the request itself is at fault.
+                _record(attempts=1, latency_ms=(time.monotonic() - started) * 1000)
+                _breaker.record_success()
+                raise failure
+            retryable = status in (_RETRY_STATUSES if method == 'GET' else _POST_RETRY_STATUSES)
+
+        _record(attempts=1, latency_ms=(time.monotonic() - started) * 1000, last_error=str(failure))
+        delay = random.uniform(0, min(_RETRY_BACKOFF_MAX, _RETRY_BACKOFF_BASE * 2 ** (attempt - 1)))
+        if not retryable or attempt > max_retries or time.monotonic() + delay >= deadline:
+            break
+        _record(retries=1)
+        time.sleep(delay)
+
+    _record(failures=1)
+    _breaker.record_failure(threshold)
+    logger.warning('PayMongo %s %s failed after %s attempt(s): %s', method, endpoint, attempt, failure)
+    raise failure
 
 
 def create_checkout_session(
@@ -350,6 +350,14 @@ PAYMONGO_PUBLIC_KEY = config('PAYMONGO_PUBLIC_KEY', default='')
 PAYMONGO_SECRET_KEY = config('PAYMONGO_SECRET_KEY', default='')
 PAYMONGO_WEBHOOK_SECRET = config('PAYMONGO_WEBHOOK_SECRET', default='')
 PAYMONGO_PAYMENT_METHODS = _split_csv(config('PAYMONGO_PAYMENT_METHODS', default='gcash'))
+PAYMONGO_API_BASE = config('PAYMONGO_API_BASE', default='https://api.paymongo.com').rstrip('/')
+# Per-attempt socket timeout and overall budget (seconds) for one PayMongo call.
+PAYMONGO_TIMEOUT = config('PAYMONGO_TIMEOUT', default=5.0, cast=float)
+PAYMONGO_DEADLINE = config('PAYMONGO_DEADLINE', default=10.0, cast=float)
+PAYMONGO_MAX_RETRIES = config('PAYMONGO_MAX_RETRIES', default=2, cast=int)
+# Stop calling PayMongo for a while after this many consecutive failed calls.
+PAYMONGO_CIRCUIT_FAILURE_THRESHOLD = config('PAYMONGO_CIRCUIT_FAILURE_THRESHOLD', default=5, cast=int)
+PAYMONGO_CIRCUIT_RESET_SECONDS = config('PAYMONGO_CIRCUIT_RESET_SECONDS', default=30.0, cast=float)
 
 # Payment amounts (in cents for Stripe)
 RENTAL_PAYMENT_AMOUNT = 5000  # $50.00 - adjust as needed
@@ -392,6 +400,31 @@ else:
         }
     }
 
+# Navbar notification badge counters live in the default cache for this long.
+# A change drops them and the next page recounts; with the per-process LocMem
+# cache this bounds how stale another worker's badge can be, while
+# USE_DB_CACHE shares them across workers.
+NOTIFICATION_BADGE_CACHE_SECONDS = config('NOTIFICATION_BADGE_CACHE_SECONDS', default=60, cast=int)
+
+# Dispatched notification outbox events (notifications.OutboxEvent) are kept
+# this many days for troubleshooting, then pruned.
+OUTBOX_RETENTION_DAYS = config('OUTBOX_RETENTION_DAYS', default=7, cast=int)
+
+# Background report exports (reports.ReportExportJob) reuse a stored file for
+# the same report and filters while the underlying tables look unchanged, but
+# never for longer than this. Older jobs are pruned along with their files.
+REPORT_EXPORT_MAX_AGE_SECONDS = config('REPORT_EXPORT_MAX_AGE_SECONDS', default=900, cast=int)
+# Rendered exports hold payment and member data, so they are stored outside
+# the publicly served MEDIA_ROOT and only handed out by the download view.
+REPORT_EXPORT_ROOT = config(
+    'REPORT_EXPORT_ROOT',
+    default=os.path.join(render_disk_path, 'report_exports') if render_disk_path else os.path.join(BASE_DIR, 'report_exports'),
+)
+# Set when a ``run_report_exports --loop`` worker shares REPORT_EXPORT_ROOT
+# with the web service. Without one, export buttons render the queued job in the
+# request instead of leaving it pending.
+REPORT_EXPORT_WORKER = config('REPORT_EXPORT_WORKER', default=False, cast=bool)
+
 # Session storage defaults to signed cookies so fresh deploys don't depend on
 # the django_session table being available before the first login.
 if USE_DB_SESSIONS:
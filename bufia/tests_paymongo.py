@@ -3,13 +3,17 @@ import hmac
 import json
 import time
 from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 
 from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
 from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
-from bufia.models import Payment
+from bufia.models import Payment, PaymentWebhookEvent
+from bufia.views.payment_views import drain_paymongo_webhook_inbox
 from users.models import MembershipApplication
 from django.contrib.auth import get_user_model
 
@@ -132,25 +136,14 @@ class PayMongoMembershipFlowTests(TestCase):
         self.assertEqual(payment.stripe_payment_intent_id, 'pi_paymongo_membership_2')
         self.assertEqual(payment.stripe_charge_id, 'pay_paymongo_membership_2')
 
-    def test_paymongo_webhook_marks_membership_paid(self):
-        payment = Payment.objects.create(
-            user=self.user,
-            payment_type='membership',
-            amount=Decimal('500.00'),
-            currency='PHP',
-            status='pending',
-            payment_provider='paymongo',
-            stripe_session_id='cs_paymongo_membership_3',
-            content_type=ContentType.objects.get_for_model(MembershipApplication),
-            object_id=self.membership.pk,
-        )
-
-        payload = {
+    def _webhook_payload(self, session_id, transaction_id, **metadata):
+        return {
             'data': {
+                'id': f'evt_{session_id}',
                 'attributes': {
                     'type': 'checkout_session.payment.paid',
                     'data': {
-                        'id': 'cs_paymongo_membership_3',
+                        'id': session_id,
                         'type': 'checkout_session',
                         'attributes': {
                             'metadata': {
@@ -158,7 +151,8 @@ class PayMongoMembershipFlowTests(TestCase):
                                 'item_id': str(self.membership.pk),
                                 'membership_id': str(self.membership.pk),
                                 'user_id': str(self.user.pk),
-                                'internal_transaction_id': payment.internal_transaction_id,
+                                'internal_transaction_id': transaction_id,
+                                **metadata,
                             },
                             'payment_intent': {
                                 'id': 'pi_paymongo_membership_3',
@@ -180,6 +174,8 @@ class PayMongoMembershipFlowTests(TestCase):
                 },
             },
         }
+
+    def _post_webhook(self, payload):
         payload_bytes = json.dumps(payload).encode('utf-8')
         timestamp = str(int(time.time()))
         signature = hmac.new(
@@ -188,19 +184,91 @@ class PayMongoMembershipFlowTests(TestCase):
             hashlib.sha256,
         ).hexdigest()
 
-        response = self.client.post(
+        return self.client.post(
             reverse('paymongo_webhook'),
             data=payload_bytes,
             content_type='application/json',
             HTTP_PAYMONGO_SIGNATURE=f't={timestamp},te={signature}',
         )
 
+    def _create_pending_payment(self, session_id):
+        return Payment.objects.create(
+            user=self.user,
+            payment_type='membership',
+            amount=Decimal('500.00'),
+            currency='PHP',
+            status='pending',
+            payment_provider='paymongo',
+            stripe_session_id=session_id,
+            content_type=ContentType.objects.get_for_model(MembershipApplication),
+            object_id=self.membership.pk,
+        )
+
+    def test_paymongo_webhook_marks_membership_paid(self):
+        payment = self._create_pending_payment('cs_paymongo_membership_3')
+
+        response = self._post_webhook(
+            self._webhook_payload('cs_paymongo_membership_3', payment.internal_transaction_id)
+        )
+
         self.assertEqual(response.status_code, 200)
+        self.membership.refresh_from_db()
+        self.assertEqual(self.membership.payment_status, 'pending')
+        event = PaymentWebhookEvent.objects.get()
+        self.assertEqual(event.status, PaymentWebhookEvent.STATUS_PENDING)
+        self.assertEqual(event.session_id, 'cs_paymongo_membership_3')
+
+        call_command('drain_payment_webhooks', stdout=StringIO())
+
         self.membership.refresh_from_db()
         payment.refresh_from_db()
+        event.refresh_from_db()
 
+        self.assertEqual(event.status, PaymentWebhookEvent.STATUS_PROCESSED)
         self.assertEqual(self.membership.payment_status, 'paid')
         self.assertEqual(payment.status, 'completed')
         self.assertEqual(payment.payment_provider, 'paymongo')
         self.assertEqual(payment.stripe_payment_intent_id, 'pi_paymongo_membership_3')
         self.assertEqual(payment.stripe_charge_id, 'pay_paymongo_membership_3')
+
+    def test_paymongo_webhook_retries_are_queued_once(self):
+        payment = self._create_pending_payment('cs_paymongo_membership_4')
+        payload = self._webhook_payload('cs_paymongo_membership_4', payment.internal_transaction_id)
+
+        self.assertEqual(self._post_webhook(payload).status_code, 200)
+        call_command('drain_payment_webhooks', stdout=StringIO())
+        retry = self._webhook_payload('cs_paymongo_membership_4', payment.internal_transaction_id)
+        retry['data']['id'] = 'evt_gateway_retry'
+        self.assertEqual(self._post_webhook(retry).status_code, 200)
+
+        event = PaymentWebhookEvent.objects.get()
+        self.assertEqual(event.status, PaymentWebhookEvent.STATUS_PROCESSED)
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(PaymentWebhookEvent.claim_batch(10), [])
+
+    def test_drain_backs_off_after_transient_errors(self):
+        payment = self._create_pending_payment('cs_paymongo_membership_5')
+        self._post_webhook(self._webhook_payload('cs_paymongo_membership_5', payment.internal_transaction_id))
+
+        with patch('bufia.views.payment_views._finalize_payment', side_effect=RuntimeError('database is busy')):
+            outcomes = drain_paymongo_webhook_inbox()
+
+        self.assertEqual(outcomes['retried'], 1)
+        event = PaymentWebhookEvent.objects.get()
+        self.assertEqual(event.status, PaymentWebhookEvent.STATUS_PENDING)
+        self.assertIn('database is busy', event.last_error)
+        self.assertGreater(event.available_at, timezone.now())
+        self.assertEqual(drain_paymongo_webhook_inbox()['processed'], 0)
+
+        PaymentWebhookEvent.objects.update(available_at=timezone.now())
+        self.assertEqual(drain_paymongo_webhook_inbox()['processed'], 1)
+        self.membership.refresh_from_db()
+        self.assertEqual(self.membership.payment_status, 'paid')
+
+    def test_drain_ignores_events_without_payment_context(self):
+        self._post_webhook(self._webhook_payload('cs_paymongo_unknown', 'BUF-TXN-2000-99999', user_id='', item_id=''))
+
+        self.assertEqual(drain_paymongo_webhook_inbox()['ignored'], 1)
+        event = PaymentWebhookEvent.objects.get()
+        self.assertEqual(event.status, PaymentWebhookEvent.STATUS_IGNORED)
+        self.assertIn('Unable to resolve', event.last_error)
@@ -0,0 +1,123 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import SimpleTestCase, override_settings
+
+from bufia.services import paymongo
+from bufia.services.paymongo import PayMongoAPIError, PayMongoUnavailableError
+
+
+class _StubPayMongo(BaseHTTPRequestHandler):
+    """Replays ``server.responses`` (status, body, delay) and records each request."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        self.server.requests.append((self.command, self.path, self.client_address[1]))
+        status, body, delay = self.server.responses.pop(0) if self.server.responses else (200, {'data': {}}, 0)
+        if delay:
+            time.sleep(delay)
+        payload = json.dumps(body).encode('utf-8')
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up waiting.
+            self.close_connection = True
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PayMongoClientTests(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _StubPayMongo)
+        self.server.daemon_threads = True
+        self.server.requests = []
+        self.server.responses = []
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        settings_override = override_settings(
+            PAYMONGO_SECRET_KEY='sk_test_fake',
+            PAYMONGO_API_BASE=f'http://127.0.0.1:{self.server.server_address[1]}',
+            PAYMONGO_TIMEOUT=0.5,
+            PAYMONGO_DEADLINE=2.0,
+            PAYMONGO_MAX_RETRIES=2,
+            PAYMONGO_CIRCUIT_FAILURE_THRESHOLD=2,
+            PAYMONGO_CIRCUIT_RESET_SECONDS=60,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        paymongo.reset_client()
+        self.addCleanup(paymongo.reset_client)
+
+    def test_calls_reuse_one_keep_alive_connection(self):
+        for _ in range(3):
+            paymongo.retrieve_checkout_session('cs_1')
+
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(len({port for _, _, port in self.server.requests}), 1)
+        metrics = paymongo.client_metrics()
+        self.assertEqual(metrics['successes'], 3)
+        self.assertEqual(metrics['reused_connections'], 2)
+
+    def test_get_is_retried_after_a_server_error(self):
+        self.server.responses = [(503, {'errors': [{'detail': 'busy'}]}, 0), (200, {'data': {'id': 'cs_2'}}, 0)]
+
+        self.assertEqual(paymongo.retrieve_checkout_session('cs_2'), {'id': 'cs_2'})
+        self.assertEqual(paymongo.client_metrics()['retries'], 1)
+
+    def test_post_is_not_retried_once_paymongo_may_have_acted(self):
+        self.server.responses = [(500, {'errors': [{'detail': 'internal error'}]}, 0)]
+
+        with self.assertRaisesMessage(PayMongoAPIError, 'internal error'):
+            paymongo._api_request('POST', '/v1/checkout_sessions', {'data': {}})
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_client_errors_are_raised_without_retry(self):
+        self.server.responses = [(400, {'errors': [{'detail': 'amount is invalid'}]}, 0)]
+
+        with self.assertRaisesMessage(PayMongoAPIError, 'amount is invalid'):
+            paymongo.retrieve_checkout_session('cs_3')
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(paymongo.client_metrics()['circuit_state'], 'closed')
+
+    def test_slow_gateway_is_cut_off_by_the_deadline(self):
+        self.server.responses = [(200, {'data': {}}, 1.5)] * 3
+
+        started = time.monotonic()
+        with self.assertRaisesMessage(PayMongoAPIError, 'Unable to reach PayMongo'):
+            paymongo.retrieve_checkout_session('cs_4')
+        self.assertLess(time.monotonic() - started, 2.5)
+
+    def test_breaker_opens_after_repeated_failures_and_probes_after_reset(self):
+        self.server.responses = [(503, {}, 0)] * 6
+
+        for _ in range(2):
+            with self.assertRaises(PayMongoAPIError):
+                paymongo.retrieve_checkout_session('cs_5')
+        requests_sent = len(self.server.requests)
+
+        with self.assertRaises(PayMongoUnavailableError):
+            paymongo.retrieve_checkout_session('cs_5')
+        self.assertEqual(len(self.server.requests), requests_sent)
+        self.assertEqual(paymongo.client_metrics()['short_circuited'], 1)
+
+        self.server.responses = []
+        with override_settings(PAYMONGO_CIRCUIT_RESET_SECONDS=0):
+            paymongo.retrieve_checkout_session('cs_5')
+        self.assertEqual(paymongo.client_metrics()['circuit_state'], 'closed')
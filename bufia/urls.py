@@ -35,6 +35,7 @@ urlpatterns = [
     path('admin/payments/export/', payment_views.export_payments, name='export_payments'),
     path('admin/payments/export/excel/', payment_views.export_payments_excel, name='export_payments_excel'),
     path('admin/payments/export/pdf/', payment_views.export_payments_pdf, name='export_payments_pdf'),
+    path('admin/payments/gateway-status/', payment_views.payment_gateway_status, name='payment_gateway_status'),
     
     path('admin/', admin.site.urls),
     path('accounts/', include('allauth.urls')),
@@ -0,0 +1,117 @@
+"""
+Field change tracking for models.
+
+A model that mixes in ``FieldTrackerMixin`` and lists ``tracked_fields``
+remembers those values when it is loaded from the database and again after
+each save, so signal handlers can tell what changed without re-reading the
+row.
+
+The remembered values are only as fresh as the instance. Handlers that keep
+counters in step with the row read ``locked_stored_values()`` instead: saves
+run in a transaction, so the row stays locked until the counters are
+updated.
+"""
+from django.db import router, transaction
+
+
+class FieldTrackerMixin:
+    """Remember the stored values of ``tracked_fields`` on each instance."""
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.reset_tracked_fields()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self.reset_tracked_fields(fields)
+
+    def save_base(self, *args, update_fields=None, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        # pre_save and post_save handlers share one transaction, so a row
+        # locked in pre_save stays locked until post_save is done.
+        with transaction.atomic(using=using, savepoint=False):
+            super().save_base(*args, update_fields=update_fields, **kwargs)
+        self.reset_tracked_fields(update_fields)
+
+    def reset_tracked_fields(self, fields=None):
+        """
+        Treat the current values as stored.
+
+        Call after writing instances with ``bulk_update``. ``fields`` limits
+        the reset to those names, as with ``save(update_fields=...)``.
+        """
+        stored = self.__dict__.setdefault('_tracked_values', {})
+        deferred = self.get_deferred_fields()
+        for name in self.tracked_fields:
+            attname = self._meta.get_field(name).attname
+            if attname in deferred:
+                continue
+            if fields is None or name in fields or attname in fields:
+                stored[name] = getattr(self, attname)
+
+    @classmethod
+    def touches_tracked_fields(cls, update_fields, names=None):
+        """Whether a save with ``update_fields`` can write any of ``names`` (default: all tracked fields)."""
+        if update_fields is None:
+            return True
+        names = cls.tracked_fields if names is None else names
+        update_fields = set(update_fields)
+        return any(
+            name in update_fields or cls._meta.get_field(name).attname in update_fields
+            for name in names
+        )
+
+    def stored_value(self, name):
+        """
+        The value of ``name`` as last loaded or saved; ``None`` for unsaved instances.
+
+        Instances built by hand or loaded with the field deferred fall back
+        to one query for the missing tracked values.
+        """
+        if self._state.adding or self.pk is None:
+            return None
+        stored = self.__dict__.setdefault('_tracked_values', {})
+        if name not in stored:
+            missing = [field for field in self.tracked_fields if field not in stored]
+            attnames = {field: self._meta.get_field(field).attname for field in missing}
+            row = type(self)._base_manager.filter(pk=self.pk).values(*attnames.values()).first()
+            if row is None:
+                return None
+            stored.update({field: row[attname] for field, attname in attnames.items()})
+        return stored[name]
+
+    def locked_stored_values(self, names=None):
+        """
+        Map ``names`` (default: all tracked fields) to their values in the
+        database, locking the row with ``select_for_update()``.
+
+        Call inside the save or delete transaction. ``None`` for unsaved
+        instances and rows deleted meanwhile.
+        """
+        if self._state.adding or self.pk is None:
+            return None
+        names = self.tracked_fields if names is None else names
+        attnames = {name: self._meta.get_field(name).attname for name in names}
+        row = (
+            type(self)._base_manager.using(self._state.db)
+            .select_for_update()
+            .filter(pk=self.pk)
+            .values(*attnames.values())
+            .first()
+        )
+        if row is None:
+            return None
+        return {name: row[attname] for name, attname in attnames.items()}
+
+    def changed_fields(self):
+        """Map each tracked field whose value differs from the stored one to its stored value."""
+        changes = {}
+        for name in self.tracked_fields:
+            previous = self.stored_value(name)
+            if previous != getattr(self, self._meta.get_field(name).attname):
+                changes[name] = previous
+        return changes
@@ -5,9 +5,9 @@ Generates unique internal transaction IDs in the format: BUF-TXN-YYYY-NNNNN
 where YYYY is the current year and NNNNN is a zero-padded sequential number.
 """
 
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from django.utils import timezone
-from datetime import datetime
 
 
 class TransactionIDGenerator:
@@ -23,23 +23,38 @@ class TransactionIDGenerator:
         
         Returns:
             str: Generated transaction ID (e.g., "BUF-TXN-2026-00045")
-        
-        Raises:
-            Exception: If unable to generate unique ID after retries
         """
-        current_year = timezone.now().year
+        return cls.reserve(1)[0]
+
+    @classmethod
+    def reserve(cls, count: int, year: int = None) -> list:
+        """
+        Reserve ``count`` consecutive transaction IDs for ``year`` at once
         
-        # Use database transaction to ensure atomicity
-        with transaction.atomic():
-            sequence_number = cls.get_next_sequence_number(current_year)
-            transaction_id = cls._format_transaction_id(current_year, sequence_number)
+        The per-year counter row is advanced with a single UPDATE, so the
+        cost does not grow with the number of payments and concurrent
+        callers only wait on that one row until their transaction ends.
+        
+        Args:
+            count: How many IDs to hand out
+            year: Year of the IDs (defaults to the current year)
             
-        return transaction_id
+        Returns:
+            list: Transaction IDs in ascending order
+        """
+        if count <= 0:
+            return []
+        year = year or timezone.now().year
+        last_value = cls._advance(year, count)
+        return [
+            cls._format_transaction_id(year, sequence)
+            for sequence in range(last_value - count + 1, last_value + 1)
+        ]
     
     @classmethod
     def get_next_sequence_number(cls, year: int) -> int:
         """
-        Get the next sequential number for the given year
+        Allocate the next sequential number for the given year
         
         Args:
             year: The year for which to get the sequence number
@@ -47,32 +62,52 @@ class TransactionIDGenerator:
         Returns:
             int: Next sequence number (1-based)
         """
+        return cls._advance(year, 1)
+
+    @classmethod
+    def peek_next_sequence_number(cls, year: int) -> int:
+        """Next sequence number for ``year`` without allocating it."""
+        from bufia.models import TransactionSequence
+
+        last_value = TransactionSequence.objects.filter(year=year).values_list('last_value', flat=True).first()
+        if last_value is None:
+            last_value = cls._max_existing_sequence(year)
+        return last_value + 1
+
+    @classmethod
+    def _advance(cls, year: int, count: int) -> int:
+        """Move the year's counter forward by ``count`` and return its new value."""
+        from bufia.models import TransactionSequence
+
+        with transaction.atomic():
+            sequences = TransactionSequence.objects.filter(year=year)
+            if not sequences.update(last_value=F('last_value') + count, updated_at=timezone.now()):
+                try:
+                    # First ID of the year: continue after any IDs issued
+                    # before the counter existed.
+                    with transaction.atomic():
+                        TransactionSequence.objects.create(
+                            year=year,
+                            last_value=cls._max_existing_sequence(year) + count,
+                        )
+                except IntegrityError:
+                    sequences.update(last_value=F('last_value') + count, updated_at=timezone.now())
+            return sequences.values_list('last_value', flat=True).get()
+
+    @classmethod
+    def _max_existing_sequence(cls, year: int) -> int:
         from bufia.models import Payment
-        
-        # Lock the table to prevent race conditions
-        # Get the highest sequence number for this year
+
         year_prefix = f"{cls.PREFIX}-{year}-"
-        
-        payments = Payment.objects.filter(
-            internal_transaction_id__startswith=year_prefix
-        ).select_for_update()
-        
-        if not payments.exists():
-            return 1
-        
-        # Extract sequence numbers and find the maximum
         max_sequence = 0
-        for payment in payments:
-            if payment.internal_transaction_id:
-                try:
-                    # Extract the sequence part (last 5 digits)
-                    sequence_str = payment.internal_transaction_id.split('-')[-1]
-                    sequence_num = int(sequence_str)
-                    max_sequence = max(max_sequence, sequence_num)
-                except (ValueError, IndexError):
-                    continue
-        
-        return max_sequence + 1
+        for transaction_id in Payment.objects.filter(
+            internal_transaction_id__startswith=year_prefix
+        ).values_list('internal_transaction_id', flat=True).iterator():
+            try:
+                max_sequence = max(max_sequence, int(transaction_id.split('-')[-1]))
+            except (ValueError, IndexError):
+                continue
+        return max_sequence
     
     @classmethod
     def _format_transaction_id(cls, year: int, sequence: int) -> str:
@@ -10,15 +10,16 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib.contenttypes.models import ContentType
 from django.core.paginator import Paginator
-from django.db.models import Q, Sum
-from django.http import HttpResponse
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import NoReverseMatch, reverse
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 
 from bufia.forms import RefundForm
-from bufia.models import Payment
+from bufia.models import Payment, PaymentWebhookEvent
 from bufia.services.payments import (
     create_user_notification,
     notify_named_user,
@@ -29,7 +30,9 @@ from bufia.services.payments import (
 )
 from bufia.services.paymongo import (
     PayMongoAPIError,
+    PayMongoUnavailableError,
     checkout_session_is_successful as paymongo_checkout_session_is_successful,
+    client_metrics as paymongo_client_metrics,
     create_checkout_session as paymongo_create_checkout_session,
     extract_paid_amount as paymongo_extract_paid_amount,
     extract_payment_id as paymongo_extract_payment_id,
@@ -41,7 +44,7 @@ from bufia.services.paymongo import (
 )
 from irrigation.models import IrrigationSeasonRecord
 from machines.models import DryerRental, Rental, RiceMillAppointment
-from reports.export_utils import build_pdf_bytes, build_xlsx_bytes
+from reports.export_utils import XLSX_CONTENT_TYPE, build_pdf_bytes, iter_xlsx_chunks
 from reports.models import RiceSale
 from users.activity import log_activity
 from users.models import MembershipApplication
@@ -237,6 +240,7 @@ def _get_or_create_payment_record(content_object, user, payment_type, amount, *,
         content_type=content_type,
         object_id=content_object.pk,
         defaults={
+            'content_object': content_object,
             'user': user,
             'payment_type': payment_type,
             'amount': Decimal(str(amount)).quantize(Decimal('0.01')),
@@ -1281,12 +1285,34 @@ def paymongo_webhook(request):
         logger.error('Invalid PayMongo webhook payload: %s', exc)
         return HttpResponse(status=400)
 
-    event_attributes = payload.get('data', {}).get('attributes', {})
+    event_payload = payload.get('data') or {}
+    event_attributes = event_payload.get('attributes') or {}
     event_type = event_attributes.get('type')
     if event_type != 'checkout_session.payment.paid':
         logger.info('Ignoring unsupported PayMongo webhook event: %s', event_type)
         return HttpResponse(status=200)
 
+    # Acknowledge right away; ``drain_payment_webhooks`` finalizes the payment.
+    event, created = PaymentWebhookEvent.enqueue(
+        'paymongo',
+        payload,
+        event_type=event_type,
+        session_id=(event_attributes.get('data') or {}).get('id'),
+        event_id=event_payload.get('id'),
+        raw_payload=raw_payload,
+    )
+    if not created:
+        logger.info('Duplicate PayMongo webhook delivery for %s (%s).', event.dedupe_key, event.status)
+    return HttpResponse(status=200)
+
+
+class _PermanentWebhookError(Exception):
+    """The event can never be applied; retrying would not help."""
+
+
+def _process_paymongo_webhook_event(event):
+    """Finalize the payment reported by a queued ``checkout_session.payment.paid`` event."""
+    event_attributes = (event.payload.get('data') or {}).get('attributes') or {}
     session_payload = event_attributes.get('data') or {}
     session_attributes = session_payload.get('attributes') or {}
     metadata = session_attributes.get('metadata') or {}
@@ -1300,9 +1326,9 @@ def paymongo_webhook(request):
 
     payment_record = None
     if transaction_id:
-        payment_record = Payment.objects.filter(internal_transaction_id=transaction_id).first()
+        payment_record = Payment.objects.select_related('user').filter(internal_transaction_id=transaction_id).first()
     if payment_record is None and session_id:
-        payment_record = Payment.objects.filter(stripe_session_id=session_id).first()
+        payment_record = Payment.objects.select_related('user').filter(stripe_session_id=session_id).first()
 
     user = payment_record.user if payment_record else None
     user_id = metadata.get('user_id')
@@ -1310,17 +1336,13 @@ def paymongo_webhook(request):
         user = get_user_model().objects.filter(pk=user_id).first()
 
     if not payment_type or not item_id or user is None:
-        logger.error(
-            'Unable to resolve PayMongo webhook payment context. type=%s item_id=%s transaction_id=%s session_id=%s',
-            payment_type,
-            item_id,
-            transaction_id,
-            session_id,
+        raise _PermanentWebhookError(
+            'Unable to resolve PayMongo webhook payment context. '
+            f'type={payment_type} item_id={item_id} transaction_id={transaction_id} session_id={session_id}'
         )
-        return HttpResponse(status=200)
 
     try:
-        result = _finalize_payment(
+        return _finalize_payment(
             payment_type,
             item_id,
             user,
@@ -1330,21 +1352,66 @@ def paymongo_webhook(request):
             external_payment_id=external_payment_id,
             notify=True,
         )
+    except PayMongoUnavailableError:
+        raise
+    except (Http404, PayMongoAPIError) as exc:
+        raise _PermanentWebhookError(str(exc) or exc.__class__.__name__) from exc
+
+
+def drain_paymongo_webhook_inbox(batch_size=50):
+    """
+    Finalize one batch of queued PayMongo webhook events.
+
+    Each event runs in its own transaction. Transient errors are retried
+    with backoff; events that cannot be applied are ignored or failed.
+    Returns a count per outcome.
+    """
+    logger = logging.getLogger('bufia.payments.paymongo')
+    outcomes = {'processed': 0, 'ignored': 0, 'retried': 0, 'failed': 0}
+    for event in PaymentWebhookEvent.claim_batch(batch_size, provider='paymongo'):
+        try:
+            with transaction.atomic():
+                result = _process_paymongo_webhook_event(event)
+        except _PermanentWebhookError as exc:
+            logger.error('PayMongo webhook event %s skipped: %s', event.dedupe_key, exc)
+            if isinstance(exc.__cause__, PayMongoAPIError):
+                event.mark_failed(str(exc), retry=False)
+                outcomes['failed'] += 1
+            else:
+                event.mark_ignored(str(exc))
+                outcomes['ignored'] += 1
+            continue
+        except Exception as exc:
+            logger.exception('Error processing PayMongo webhook event %s: %s', event.dedupe_key, exc)
+            event.mark_failed(f'{exc.__class__.__name__}: {exc}')
+            if event.status == PaymentWebhookEvent.STATUS_FAILED:
+                outcomes['failed'] += 1
+            else:
+                outcomes['retried'] += 1
+            continue
+
+        event.mark_processed()
+        outcomes['processed'] += 1
         logger.info(
-            'PayMongo webhook processed successfully: %s %s %s',
-            payment_type,
+            'PayMongo webhook processed successfully: %s %s',
             result['payment'].internal_transaction_id if result.get('payment') else 'N/A',
-            session_id,
+            event.session_id,
         )
-    except Exception as exc:
-        logger.exception('Error processing PayMongo webhook: %s', exc)
-
-    return HttpResponse(status=200)
+    return outcomes
 
 
 stripe_webhook = paymongo_webhook
 
 
+@staff_member_required
+def payment_gateway_status(request):
+    """PayMongo client metrics of this worker process and the webhook inbox backlog."""
+    inbox = dict(
+        PaymentWebhookEvent.objects.values_list('status').annotate(total=Count('pk')).order_by()
+    )
+    return JsonResponse({'paymongo': paymongo_client_metrics(), 'webhook_inbox': inbox})
+
+
 @login_required
 def payment_success(request):
     session_id = request.GET.get('session_id')
@@ -1870,10 +1937,9 @@ def _payment_export_filter_details(filters):
 
 
 def _payment_export_rows(payments):
-    rows = []
     for payment in payments:
         member_name = payment.user.get_full_name().strip() or payment.user.username
-        rows.append([
+        yield [
             payment.internal_transaction_id or 'N/A',
             payment.created_at.strftime('%Y-%m-%d %H:%M:%S'),
             member_name,
@@ -1886,8 +1952,7 @@ def _payment_export_rows(payments):
             (payment.processed_by.get_full_name().strip() or payment.processed_by.username) if payment.processed_by_id else 'N/A',
             payment.get_status_display(),
             payment.provider_display_name,
-        ])
-    return rows
+        ]
 
 
 def _payment_export_filename(prefix, extension):
@@ -2043,17 +2108,18 @@ def export_payments_excel(request):
     payments = _filtered_payments_queryset(filters)
     headers = ['Transaction ID', 'Date', 'Member', 'Email', 'Type', 'Amount', 'Status', 'Provider']
     headers = ['Transaction ID', 'Date', 'Member', 'Email', 'Type', 'Amount Due', 'Cash Received', 'Change Given', 'Channel', 'Processed By', 'Status', 'Provider']
-    rows = _payment_export_rows(payments)
-    response = HttpResponse(
-        build_xlsx_bytes(
+    rows = _payment_export_rows(payments.iterator(chunk_size=500))
+    response = StreamingHttpResponse(
+        iter_xlsx_chunks(
             title='Payment Transactions Filtered Report',
             filter_details=_payment_export_filter_details(filters),
             headers=headers,
             rows=rows,
             column_widths=[21, 18, 20, 24, 14, 14, 14, 14, 16, 18, 12, 14],
             sheet_name='Payments',
+            total_results=payments.count(),
         ),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        content_type=XLSX_CONTENT_TYPE,
     )
     response['Content-Disposition'] = f'attachment; filename="{_payment_export_filename("payments_export", "xlsx")}"'
     return response
@@ -2064,7 +2130,7 @@ def export_payments_pdf(request):
     filters = _payment_filters_from_request(request)
     payments = _filtered_payments_queryset(filters)
     headers = ['Transaction ID', 'Date', 'Member', 'Email', 'Type', 'Amount Due', 'Cash Received', 'Change Given', 'Channel', 'Processed By', 'Status', 'Provider']
-    rows = _payment_export_rows(payments)
+    rows = list(_payment_export_rows(payments))
     response = HttpResponse(
         build_pdf_bytes(
             title='Payment Transactions Filtered Report',
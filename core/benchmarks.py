@@ -0,0 +1,348 @@
+"""
+Cost benchmarks for the rental workflow pages.
+
+``seed_dataset`` fills the database with a realistic spread of machines,
+members, operators, rentals, payments and notifications covering several
+cropping seasons. ``run_benchmarks`` then requests every scenario in
+``SCENARIOS`` and records the number of queries, wall time and peak Python
+memory of each response. ``compare_to_budgets`` checks the measurements
+against ``benchmark_budgets.json`` so a regression fails loudly.
+
+The ``benchmark_views`` management command runs the whole harness against a
+throwaway test database; ``tests/test_view_budgets.py`` guards the query
+budgets of the small profile on every test run.
+"""
+
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import OuterRef, Subquery
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+
+BUDGETS_PATH = Path(__file__).with_name('benchmark_budgets.json')
+
+PROFILES = {
+    'small': {'machines': 12, 'members': 8, 'operators': 2, 'rentals_per_machine': 10, 'notifications_per_member': 5},
+    'default': {'machines': 1500, 'members': 400, 'operators': 20, 'rentals_per_machine': 4, 'notifications_per_member': 30},
+}
+
+MACHINE_TYPES = ('tractor_4wd', 'hand_tractor', 'transplanter_walking', 'precision_seeder', 'harvester', 'thresher')
+
+
+@dataclass
+class BenchmarkDataset:
+    admin: object
+    member: object
+    machine: object
+    counts: dict = field(default_factory=dict)
+
+
+@dataclass
+class Measurement:
+    scenario: str
+    status_code: int
+    queries: int
+    seconds: float
+    peak_mb: float
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'seconds': round(self.seconds, 4),
+            'peak_mb': round(self.peak_mb, 2),
+        }
+
+
+def _rental_state(day_offset, index):
+    """Status fields for a rental starting ``day_offset`` days from today."""
+    if day_offset < -30:
+        if index % 9 == 0:
+            return {'status': 'cancelled', 'workflow_state': 'cancelled', 'payment_status': 'pending'}
+        if index % 11 == 0:
+            return {'status': 'rejected', 'workflow_state': 'cancelled', 'payment_status': 'pending'}
+        return {'status': 'completed', 'workflow_state': 'completed', 'payment_status': 'paid', 'payment_verified': True}
+    if day_offset < 0:
+        return {'status': 'approved', 'workflow_state': 'in_progress', 'payment_status': 'paid', 'payment_verified': True}
+    if index % 3 == 0:
+        return {'status': 'pending', 'workflow_state': 'requested', 'payment_status': 'to_be_determined'}
+    return {'status': 'approved', 'workflow_state': 'approved', 'payment_status': 'pending'}
+
+
+def seed_dataset(profile='small', *, today=None):
+    """Insert a benchmark dataset with bulk writes and return its anchors."""
+    from bufia.models import Payment
+    from machines.models import Machine, Rental
+    from notifications.models import UserNotification
+
+    sizes = PROFILES[profile]
+    today = today or timezone.localdate()
+    User = get_user_model()
+
+    admin = User.objects.create_user(
+        username='bench-admin',
+        email='bench-admin@example.com',
+        password='bench-secret',
+        is_staff=True,
+        is_superuser=True,
+    )
+    User.objects.bulk_create([
+        User(
+            username=f'bench-member-{index}',
+            email=f'bench-member-{index}@example.com',
+            first_name='Bench',
+            last_name=f'Member {index}',
+            password='!',
+            is_verified=True,
+        )
+        for index in range(sizes['members'])
+    ] + [
+        User(
+            username=f'bench-operator-{index}',
+            email=f'bench-operator-{index}@example.com',
+            first_name='Bench',
+            last_name=f'Operator {index}',
+            password='!',
+            role=User.OPERATOR,
+        )
+        for index in range(sizes['operators'])
+    ])
+    members = list(User.objects.filter(username__startswith='bench-member-').order_by('pk'))
+    operators = list(User.objects.filter(username__startswith='bench-operator-').order_by('pk'))
+
+    Machine.objects.bulk_create([
+        Machine(
+            name=f'Bench {MACHINE_TYPES[index % len(MACHINE_TYPES)].replace("_", " ").title()} {index:04d}',
+            machine_type=MACHINE_TYPES[index % len(MACHINE_TYPES)],
+            machine_category=Machine.resolve_machine_category(MACHINE_TYPES[index % len(MACHINE_TYPES)]),
+            status='available',
+            rental_fee_per_day=Decimal('1500.00'),
+            current_price='1500/day',
+        )
+        for index in range(sizes['machines'])
+    ])
+    machines = list(Machine.objects.filter(name__startswith='Bench ').order_by('pk'))
+
+    # Rentals march back from today across roughly three seasons, one
+    # non-overlapping slot after another on every machine.
+    rentals = []
+    span = 540 // max(sizes['rentals_per_machine'], 1)
+    for machine_index, machine in enumerate(machines):
+        for slot in range(sizes['rentals_per_machine']):
+            day_offset = 60 - (slot + 1) * span + machine_index % 5
+            index = machine_index * sizes['rentals_per_machine'] + slot
+            start_date = today + timedelta(days=day_offset)
+            values = {
+                'machine': machine,
+                'user': members[index % len(members)],
+                'start_date': start_date,
+                'end_date': start_date + timedelta(days=index % 3),
+                'payment_type': 'in_kind' if index % 7 == 0 else 'cash',
+                'payment_amount': Decimal('1500.00') * (index % 3 + 1),
+                'purpose': 'Land preparation',
+                'field_location': f'Sector {index % 12 + 1}',
+            }
+            values.update(_rental_state(day_offset, index))
+            if values['payment_type'] == 'in_kind':
+                values['settlement_type'] = 'after_harvest'
+                values['settlement_status'] = 'paid' if values['status'] == 'completed' else 'waiting_for_delivery'
+            if values['status'] == 'approved' and operators and index % 4 == 0:
+                values['assigned_operator'] = operators[index % len(operators)]
+            rentals.append(Rental(**values))
+    Rental.objects.bulk_create(rentals, batch_size=500)
+
+    rental_type = ContentType.objects.get_for_model(Rental)
+    paid_rentals = Rental.objects.filter(
+        machine__in=machines,
+        payment_type='cash',
+        status__in=['approved', 'completed'],
+    ).values_list('pk', 'user_id', 'payment_amount', 'payment_status')
+    year = today.year
+    Payment.objects.bulk_create([
+        Payment(
+            internal_transaction_id=f'BUF-TXN-{year}-B{sequence:07d}',
+            content_type=rental_type,
+            object_id=rental_id,
+            user_id=user_id,
+            payment_type='rental',
+            amount=amount,
+            currency='PHP',
+            status='completed' if payment_status == 'paid' else 'pending',
+            payment_provider='manual',
+        )
+        for sequence, (rental_id, user_id, amount, payment_status) in enumerate(paid_rentals, start=1)
+    ], batch_size=500)
+    Rental.objects.filter(machine__in=machines).update(
+        latest_payment=Subquery(
+            Payment.objects.filter(
+                content_type=rental_type,
+                object_id=OuterRef('pk'),
+            ).order_by('-created_at', '-pk').values('pk')[:1]
+        )
+    )
+
+    UserNotification.objects.bulk_create([
+        UserNotification(
+            user=member,
+            notification_type='rental_approved',
+            title='Rental Request Approved',
+            category='rental',
+            priority='important',
+            message=f'Benchmark notification {index} for {member.username}.',
+            is_read=index % 3 == 0,
+        )
+        for member in members
+        for index in range(sizes['notifications_per_member'])
+    ], batch_size=500)
+
+    busiest_member = members[0]
+    return BenchmarkDataset(
+        admin=admin,
+        member=busiest_member,
+        machine=machines[0],
+        counts={
+            'machines': len(machines),
+            'members': len(members),
+            'rentals': len(rentals),
+            'payments': Payment.objects.filter(content_type=rental_type).count(),
+            'notifications': len(members) * sizes['notifications_per_member'],
+        },
+    )
+
+
+def _scenarios(dataset):
+    today = timezone.localdate()
+    probe_day = (today + timedelta(days=30)).isoformat()
+    return [
+        ('admin_rental_dashboard', dataset.admin, 'get', reverse('machines:admin_rental_dashboard'), None),
+        ('rental_list', dataset.member, 'get', reverse('machines:rental_list'), None),
+        ('machine_list', dataset.member, 'get', reverse('machines:machine_list'), None),
+        (
+            'machine_calendar_events',
+            dataset.member,
+            'get',
+            reverse('machines:machine_calendar_events', args=[dataset.machine.pk]),
+            None,
+        ),
+        ('all_machines_calendar_events', dataset.admin, 'get', reverse('machines:all_machines_calendar_events'), None),
+        (
+            'check_date_availability',
+            dataset.member,
+            'post',
+            reverse('machines:check_date_availability'),
+            {'machine_id': dataset.machine.pk, 'start_date': probe_day, 'end_date': probe_day},
+        ),
+        (
+            'next_available_slots',
+            dataset.member,
+            'get',
+            f"{reverse('machines:next_available_slots')}?category=tractor&days=3",
+            None,
+        ),
+        ('operator_overview', dataset.admin, 'get', reverse('machines:operator_overview'), None),
+    ]
+
+
+SCENARIOS = (
+    'admin_rental_dashboard',
+    'rental_list',
+    'machine_list',
+    'machine_calendar_events',
+    'all_machines_calendar_events',
+    'check_date_availability',
+    'next_available_slots',
+    'operator_overview',
+)
+
+
+def _request(client, method, url, payload):
+    if method == 'post':
+        return client.post(url, data=json.dumps(payload), content_type='application/json')
+    return client.get(url)
+
+
+def run_benchmarks(dataset, *, only=None, repeat=1):
+    """
+    Measure every scenario once warm and return ``{name: Measurement}``.
+
+    A first untimed request fills lazily built snapshots and daily syncs so
+    the numbers describe the steady state. With ``repeat`` above one the
+    fastest run is kept, and the highest query count and memory peak.
+    """
+    results = {}
+    for name, user, method, url, payload in _scenarios(dataset):
+        if only and name not in only:
+            continue
+        client = Client()
+        client.force_login(user)
+        _request(client, method, url, payload)
+
+        best = None
+        for _ in range(max(repeat, 1)):
+            tracemalloc.start()
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                response = _request(client, method, url, payload)
+                if getattr(response, 'streaming', False):
+                    b''.join(response.streaming_content)
+            seconds = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            measurement = Measurement(name, response.status_code, len(queries), seconds, peak / (1024 * 1024))
+            if best is None:
+                best = measurement
+            else:
+                best = Measurement(
+                    name,
+                    measurement.status_code,
+                    max(best.queries, measurement.queries),
+                    min(best.seconds, measurement.seconds),
+                    max(best.peak_mb, measurement.peak_mb),
+                )
+        results[name] = best
+    return results
+
+
+def load_budgets(path=BUDGETS_PATH):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def compare_to_budgets(results, budgets, *, metrics=('queries', 'seconds', 'peak_mb')):
+    """Return human-readable regressions of ``results`` against ``budgets``."""
+    regressions = []
+    for name, measurement in results.items():
+        if measurement.status_code != 200:
+            regressions.append(f'{name}: HTTP {measurement.status_code}')
+        budget = budgets.get(name)
+        if budget is None:
+            regressions.append(f'{name}: no budget recorded')
+            continue
+        measured = measurement.as_dict()
+        for metric in metrics:
+            if metric in budget and measured[metric] > budget[metric]:
+                regressions.append(f'{name}: {metric} {measured[metric]} > budget {budget[metric]}')
+    return regressions
+
+
+def budgets_from_results(results, *, headroom=Decimal('1.5')):
+    """Suggest budgets: exact query counts, ``headroom`` times the time and memory seen."""
+    return {
+        name: {
+            'queries': measurement.queries,
+            'seconds': round(float(Decimal(str(measurement.seconds)) * headroom), 3),
+            'peak_mb': round(float(Decimal(str(measurement.peak_mb)) * headroom), 1),
+        }
+        for name, measurement in sorted(results.items())
+    }
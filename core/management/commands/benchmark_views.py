@@ -0,0 +1,78 @@
+"""
+Management command to benchmark the rental workflow pages.
+
+Seeds a throwaway test database with a benchmark profile, measures query
+count, wall time and peak memory for each page and fails when a page goes
+over the budgets stored in core/benchmark_budgets.json.
+
+    python manage.py benchmark_views
+    python manage.py benchmark_views --profile small --only rental_list
+    python manage.py benchmark_views --write-budgets
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.benchmarks import (
+    BUDGETS_PATH,
+    PROFILES,
+    SCENARIOS,
+    budgets_from_results,
+    compare_to_budgets,
+    load_budgets,
+    run_benchmarks,
+    seed_dataset,
+)
+
+
+class Command(BaseCommand):
+    help = 'Measure query count, time and memory of the rental workflow pages against stored budgets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', choices=sorted(PROFILES), default='default')
+        parser.add_argument('--only', action='append', choices=SCENARIOS, help='Run this scenario only (repeatable)')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per scenario')
+        parser.add_argument(
+            '--write-budgets',
+            action='store_true',
+            help='Store the measurements (with headroom) as the new budgets for this profile',
+        )
+        parser.add_argument('--json', action='store_true', help='Print the measurements as JSON')
+
+    def handle(self, *args, **options):
+        profile = options['profile']
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            dataset = seed_dataset(profile)
+            self.stdout.write(
+                'Seeded ' + ', '.join(f'{count} {label}' for label, count in dataset.counts.items())
+            )
+            results = run_benchmarks(dataset, only=options['only'], repeat=options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['json']:
+            self.stdout.write(json.dumps({name: result.as_dict() for name, result in results.items()}, indent=2))
+        else:
+            self.stdout.write(f"{'scenario':<30} {'queries':>8} {'seconds':>9} {'peak MB':>8}")
+            for name, result in results.items():
+                self.stdout.write(
+                    f'{name:<30} {result.queries:>8} {result.seconds:>9.3f} {result.peak_mb:>8.1f}'
+                )
+
+        if options['write_budgets']:
+            budgets = load_budgets() if BUDGETS_PATH.exists() else {}
+            budgets.setdefault(profile, {}).update(budgets_from_results(results))
+            BUDGETS_PATH.write_text(json.dumps(budgets, indent=2, sort_keys=True) + '\n', encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(f'Wrote {profile} budgets to {BUDGETS_PATH}'))
+            return
+
+        regressions = compare_to_budgets(results, load_budgets().get(profile, {}))
+        if regressions:
+            raise CommandError('Benchmark budgets exceeded:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('All pages within budget.'))
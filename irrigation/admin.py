@@ -73,7 +73,18 @@ class CroppingSeasonAdmin(admin.ModelAdmin):
     list_display = ('name', 'planting_date', 'harvest_date', 'irrigation_rate_per_hectare', 'status', 'billing_generated_at')
     list_filter = ('status', 'planting_date', 'harvest_date')
     search_fields = ('name',)
-    readonly_fields = ('irrigation_rate_per_hectare', 'billing_generated_at', 'closed_at', 'created_at', 'updated_at')
+    readonly_fields = (
+        'irrigation_rate_per_hectare',
+        'billing_generated_at',
+        'closed_at',
+        'next_transition_on',
+        'total_billed_amount',
+        'total_paid_amount',
+        'record_count',
+        'settled_record_count',
+        'created_at',
+        'updated_at',
+    )
 
     def get_changeform_initial_data(self, request):
         return {
@@ -0,0 +1,66 @@
+"""
+Bulk operations for cropping season billing.
+
+``CroppingSeason.generate_billing`` prices the records themselves; the
+helpers here cover the work around it that used to run one row at a time:
+assigning farmers to a season and writing the billing activity entries.
+"""
+from users.activity import build_activity
+from users.models import ActivityLog
+
+from .models import BILLING_BATCH_SIZE, IrrigationSeasonRecord
+
+
+def assign_farmers(season, farmers):
+    """
+    Create planned records for ``farmers`` not yet in ``season``.
+
+    Farmers already assigned are skipped. Returns the number of records
+    created.
+    """
+    farmers = farmers.exclude(pk__in=season.records.values('farmer_id')).select_related(
+        'membership_application__assigned_sector',
+        'membership_application__sector',
+    )
+
+    records = []
+    for farmer in farmers:
+        membership = getattr(farmer, 'membership_application', None)
+        record = IrrigationSeasonRecord(
+            season=season,
+            farmer=farmer,
+            membership=membership,
+            sector=getattr(membership, 'assigned_sector', None) or getattr(membership, 'sector', None),
+            farm_area=getattr(membership, 'farm_size', 0) or 0,
+            irrigation_rate=season.irrigation_rate_per_hectare,
+            status=IrrigationSeasonRecord.STATUS_PLANNED,
+        )
+        record.total_fee = record.calculate_total_fee()
+        records.append(record)
+
+    IrrigationSeasonRecord.objects.bulk_create(
+        records,
+        batch_size=BILLING_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    season.refresh_totals()
+    return len(records)
+
+
+def log_billing_activities(season, actor=None, billed_at=None):
+    """Write one billing activity entry per billed record; returns the number written."""
+    records = season.records.filter(total_fee__gt=0).select_related('farmer').order_by('pk')
+    activities = [
+        build_activity(
+            activity_type='billing',
+            actor=actor,
+            subject_user=record.farmer,
+            title=f'Irrigation billing generated for {record.farmer.get_full_name() or record.farmer.username}',
+            description=f'{season.name}: PHP {record.total_fee} billed for {record.farm_area} ha.',
+            related_object=record,
+            created_at=record.billed_at or billed_at,
+        )
+        for record in records.iterator(chunk_size=BILLING_BATCH_SIZE)
+    ]
+    ActivityLog.objects.bulk_create(activities, batch_size=BILLING_BATCH_SIZE)
+    return len(activities)
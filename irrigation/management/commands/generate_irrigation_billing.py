@@ -0,0 +1,55 @@
+"""
+Management command to generate irrigation billing for cropping seasons.
+
+Bills the given seasons the same way the season page button does and
+reports progress per batch, for seasons too large to bill in a request:
+
+    python manage.py generate_irrigation_billing 12
+    python manage.py generate_irrigation_billing 12 13 --batch-size 1000
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from irrigation.billing import log_billing_activities
+from irrigation.models import BILLING_BATCH_SIZE, CroppingSeason
+
+
+class Command(BaseCommand):
+    help = 'Generate irrigation billing for the given cropping seasons'
+
+    def add_arguments(self, parser):
+        parser.add_argument('season_ids', nargs='+', type=int, help='Cropping season IDs to bill')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BILLING_BATCH_SIZE,
+            help=f'Records written per batch (default: {BILLING_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        for season_id in options['season_ids']:
+            try:
+                season = CroppingSeason.objects.get(pk=season_id)
+            except CroppingSeason.DoesNotExist:
+                raise CommandError(f'Cropping season {season_id} does not exist.')
+            if season.status == CroppingSeason.STATUS_CLOSED:
+                self.stdout.write(self.style.WARNING(f'{season.name}: closed, skipped.'))
+                continue
+            if season.billing_generated_at:
+                self.stdout.write(self.style.WARNING(f'{season.name}: already billed, skipped.'))
+                continue
+            if timezone.localdate() < season.harvest_date:
+                self.stdout.write(self.style.WARNING(f'{season.name}: harvest date not reached, skipped.'))
+                continue
+
+            def report(billed, total, name=season.name):
+                self.stdout.write(f'{name}: {billed}/{total} record(s) billed')
+
+            if not season.generate_billing(progress=report, batch_size=options['batch_size']):
+                self.stdout.write(self.style.WARNING(f'{season.name}: no farmers assigned, skipped.'))
+                continue
+            logged = log_billing_activities(season, billed_at=season.billing_generated_at)
+            self.stdout.write(
+                self.style.SUCCESS(f'{season.name}: billing generated, {logged} activity entr(ies) written.')
+            )
@@ -0,0 +1,24 @@
+"""
+Management command to apply date-driven cropping season status changes.
+
+Seasons store the date of their next planting/harvest transition. Irrigation
+pages apply due transitions lazily; run this daily (e.g. shortly after
+midnight) so seasons move on, and harvest billing is generated, even when
+nobody opens those pages:
+
+    python manage.py sync_irrigation_seasons
+"""
+
+from django.core.management.base import BaseCommand
+
+from irrigation.models import CroppingSeason
+
+
+class Command(BaseCommand):
+    help = 'Apply planting/harvest status transitions to cropping seasons that are due'
+
+    def handle(self, *args, **options):
+        changed = CroppingSeason.sync_due_seasons()
+        self.stdout.write(
+            self.style.SUCCESS(f'Synced cropping seasons: {changed} status change(s).')
+        )
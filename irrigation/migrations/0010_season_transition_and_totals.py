@@ -0,0 +1,69 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:59
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_season_state(apps, schema_editor):
+    CroppingSeason = apps.get_model('irrigation', 'CroppingSeason')
+
+    seasons = CroppingSeason.objects.annotate(
+        billed=Sum('records__total_fee'),
+        paid=Sum('records__amount_paid'),
+        records_total=Count('records'),
+        settled=Count('records', filter=Q(records__status__in=['paid', 'closed'])),
+    )
+    for season in seasons.iterator():
+        season.total_billed_amount = season.billed or Decimal('0.00')
+        season.total_paid_amount = season.paid or Decimal('0.00')
+        season.record_count = season.records_total
+        season.settled_record_count = season.settled
+        # Unbilled open seasons are due once their planting date has
+        # passed; the first sync stores the real next transition.
+        if season.status != 'closed' and not season.billing_generated_at:
+            season.next_transition_on = season.planting_date
+        season.save(update_fields=[
+            'total_billed_amount',
+            'total_paid_amount',
+            'record_count',
+            'settled_record_count',
+            'next_transition_on',
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('irrigation', '0009_alter_irrigationseasonrecord_payment_method'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='croppingseason',
+            name='next_transition_on',
+            field=models.DateField(blank=True, db_index=True, help_text='Date from which the status must be re-derived; empty once only payments can change it.', null=True),
+        ),
+        migrations.AddField(
+            model_name='croppingseason',
+            name='record_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='croppingseason',
+            name='settled_record_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='croppingseason',
+            name='total_billed_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='croppingseason',
+            name='total_paid_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12),
+        ),
+        migrations.RunPython(backfill_season_state, migrations.RunPython.noop),
+    ]
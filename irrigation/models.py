@@ -1,12 +1,28 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, DateTimeField, Q, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from bufia.utils.field_tracker import FieldTrackerMixin
 from users.models import CustomUser, MembershipApplication, Sector
 from decimal import Decimal
 
 
 IRRIGATION_RATE_PER_HECTARE = Decimal('1500.00')
+BILLING_BATCH_SIZE = 500
+BILLING_UPDATE_FIELDS = [
+    'membership',
+    'sector',
+    'farm_area',
+    'irrigation_rate',
+    'total_fee',
+    'billed_at',
+    'status',
+    'updated_at',
+]
+
+class WaterIrrigationRequest(FieldTrackerMixin, models.Model):
+    tracked_fields = ('farmer', 'requested_date')
 
-class WaterIrrigationRequest(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('approved', 'Approved'),
@@ -134,6 +150,17 @@ class CroppingSeason(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PLANNED)
     billing_generated_at = models.DateTimeField(null=True, blank=True)
     closed_at = models.DateTimeField(null=True, blank=True)
+    next_transition_on = models.DateField(
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text='Date from which the status must be re-derived; empty once only payments can change it.',
+    )
+    # Maintained from the records by refresh_totals().
+    total_billed_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    total_paid_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    record_count = models.PositiveIntegerField(default=0)
+    settled_record_count = models.PositiveIntegerField(default=0)
     notes = models.TextField(blank=True)
     created_by = models.ForeignKey(
         CustomUser,
@@ -145,62 +172,149 @@ class CroppingSeason(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # record_count matters once harvest has passed: farmers assigned to an
+    # unbilled season after that make it due for billing again.
+    TRANSITION_FIELDS = {'planting_date', 'harvest_date', 'status', 'billing_generated_at', 'record_count'}
+
     class Meta:
         ordering = ['-planting_date', '-created_at']
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or self.TRANSITION_FIELDS.intersection(update_fields):
+            self.next_transition_on = self.next_transition_date()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'next_transition_on'}
+        super().save(*args, **kwargs)
+
     @property
     def is_harvest_due(self):
         return timezone.localdate() >= self.harvest_date
 
     @property
-    def total_billed_amount(self):
-        return sum((record.total_fee for record in self.records.all()), Decimal('0.00'))
+    def all_records_paid(self):
+        return self.record_count > 0 and self.settled_record_count == self.record_count
+
+    def next_transition_date(self):
+        """
+        The first date on which ``sync_status`` can change this season.
+
+        Today when the stored status is already out of date or records
+        assigned after harvest still need billing, ``None`` when only
+        payments can move the season on.
+        """
+        if self.status == self.STATUS_CLOSED or self.billing_generated_at:
+            return None
+        today = timezone.localdate()
+        if today < self.planting_date:
+            expected_status, boundary = self.STATUS_PLANNED, self.planting_date
+        elif today < self.harvest_date:
+            expected_status, boundary = self.STATUS_ACTIVE, self.harvest_date
+        elif self.status in [self.STATUS_HARVESTED, self.STATUS_PAID] and not self.record_count:
+            # Harvest passed without records to bill.
+            return None
+        else:
+            return today
+        return boundary if self.status == expected_status else today
+
+    def refresh_totals(self):
+        """
+        Store the record totals and, once billed, the paid/harvested status.
+
+        Record saves call this through a signal; call it after writing
+        records with ``bulk_create``, ``bulk_update`` or ``update``.
+        """
+        zero = Value(Decimal('0.00'), output_field=models.DecimalField(max_digits=12, decimal_places=2))
+        totals = self.records.aggregate(
+            billed=Coalesce(Sum('total_fee'), zero),
+            paid=Coalesce(Sum('amount_paid'), zero),
+            records=Count('pk'),
+            settled=Count('pk', filter=Q(status__in=IrrigationSeasonRecord.SETTLED_STATUSES)),
+        )
+        self.total_billed_amount = totals['billed']
+        self.total_paid_amount = totals['paid']
+        self.record_count = totals['records']
+        self.settled_record_count = totals['settled']
+        update_fields = [
+            'total_billed_amount',
+            'total_paid_amount',
+            'record_count',
+            'settled_record_count',
+            'updated_at',
+        ]
+        if self.billing_generated_at and self.status != self.STATUS_CLOSED:
+            self.status = self.STATUS_PAID if self.all_records_paid else self.STATUS_HARVESTED
+            update_fields.append('status')
+        self.save(update_fields=update_fields)
 
-    @property
-    def total_paid_amount(self):
-        return sum((record.amount_paid for record in self.records.all()), Decimal('0.00'))
+    def generate_billing(self, progress=None, batch_size=BILLING_BATCH_SIZE):
+        """
+        Bill every record of the season in bulk.
+
+        Paid and closed records only receive a missing ``billed_at``. The
+        others are refreshed from their membership, priced at the season
+        rate and moved to harvested with one ``bulk_update`` per
+        ``batch_size`` records. ``progress`` is called with
+        ``(billed, total)`` after each batch.
+        """
+        settled_statuses = IrrigationSeasonRecord.SETTLED_STATUSES
+        records = self.records.order_by('pk')
+        total = records.count()
+        if not total:
+            return False
 
-    @property
-    def all_records_paid(self):
-        records = self.records.all()
-        return records.exists() and not records.exclude(
-            status__in=[IrrigationSeasonRecord.STATUS_PAID, IrrigationSeasonRecord.STATUS_CLOSED]
-        ).exists()
-
-    def generate_billing(self):
-        generated = False
-        for record in self.records.select_related('membership').all():
-            if record.status in [
-                IrrigationSeasonRecord.STATUS_PAID,
-                IrrigationSeasonRecord.STATUS_CLOSED,
-            ]:
-                if not record.billed_at:
-                    record.billed_at = record.paid_at or timezone.now()
-                    record.save(update_fields=['billed_at', 'updated_at'])
-                generated = True
-                continue
-
-            record.refresh_from_membership(commit=False)
-            record.irrigation_rate = self.irrigation_rate_per_hectare
-            record.total_fee = record.calculate_total_fee()
-            record.billed_at = record.billed_at or timezone.now()
-            if record.status in [
-                IrrigationSeasonRecord.STATUS_PLANNED,
-                IrrigationSeasonRecord.STATUS_ACTIVE,
-            ]:
-                record.status = IrrigationSeasonRecord.STATUS_HARVESTED
-            record.save()
-            generated = True
-
-        if generated:
-            self.billing_generated_at = self.billing_generated_at or timezone.now()
+        now = timezone.now()
+        with transaction.atomic():
+            settled = records.filter(status__in=settled_statuses)
+            settled.filter(billed_at__isnull=True).update(
+                billed_at=Coalesce('paid_at', Value(now, output_field=DateTimeField())),
+                updated_at=now,
+            )
+            billed = settled.count()
+            if progress:
+                progress(billed, total)
+
+            open_records = records.exclude(status__in=settled_statuses).select_related(
+                'membership__assigned_sector',
+                'membership__sector',
+                'farmer__membership_application__assigned_sector',
+                'farmer__membership_application__sector',
+            )
+            batch = []
+            for record in open_records.iterator(chunk_size=batch_size):
+                record.season = self
+                record.refresh_from_membership(commit=False)
+                record.total_fee = record.calculate_total_fee()
+                record.billed_at = record.billed_at or now
+                if record.status in [
+                    IrrigationSeasonRecord.STATUS_PLANNED,
+                    IrrigationSeasonRecord.STATUS_ACTIVE,
+                ]:
+                    record.status = IrrigationSeasonRecord.STATUS_HARVESTED
+                record.updated_at = now
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    billed += self._save_billed_records(batch, progress, billed, total)
+                    batch = []
+            if batch:
+                billed += self._save_billed_records(batch, progress, billed, total)
+
+            self.billing_generated_at = self.billing_generated_at or now
             if self.status != self.STATUS_CLOSED:
                 self.status = self.STATUS_HARVESTED
             self.save(update_fields=['billing_generated_at', 'status', 'updated_at'])
-        return generated
+            self.refresh_totals()
+        return True
+
+    @staticmethod
+    def _save_billed_records(batch, progress, billed, total):
+        IrrigationSeasonRecord.objects.bulk_update(batch, BILLING_UPDATE_FIELDS)
+        if progress:
+            progress(billed + len(batch), total)
+        return len(batch)
 
     def sync_status(self):
         today = timezone.localdate()
@@ -225,10 +339,24 @@ class CroppingSeason(models.Model):
             self.generate_billing()
             self.status = self.STATUS_PAID if self.all_records_paid else self.STATUS_HARVESTED
 
-        if self.status != original_status:
+        if self.status != original_status or self.next_transition_on != self.next_transition_date():
             self.save(update_fields=['status', 'updated_at'])
-            return True
-        return False
+        return self.status != original_status
+
+    @classmethod
+    def sync_due_seasons(cls, today=None):
+        """
+        Run ``sync_status`` for the seasons whose next transition date has passed.
+
+        One indexed query when nothing is due. Returns the number of seasons
+        whose status changed.
+        """
+        today = today or timezone.localdate()
+        changed = 0
+        for season in cls.objects.filter(next_transition_on__lte=today):
+            if season.sync_status():
+                changed += 1
+        return changed
 
 
 class IrrigationSeasonRecord(models.Model):
@@ -252,6 +380,7 @@ class IrrigationSeasonRecord(models.Model):
         (STATUS_PAID, 'Paid'),
         (STATUS_CLOSED, 'Closed'),
     ]
+    SETTLED_STATUSES = [STATUS_PAID, STATUS_CLOSED]
 
     season = models.ForeignKey(CroppingSeason, on_delete=models.CASCADE, related_name='records')
     farmer = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='irrigation_season_records')
@@ -1,7 +1,7 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import WaterIrrigationRequest
+from .models import CroppingSeason, IrrigationSeasonRecord, WaterIrrigationRequest
 from notifications.models import UserNotification
 
 User = get_user_model()
@@ -86,3 +86,17 @@ def notify_irrigation_status_change(sender, instance, created, **kwargs):
                     message=f'Your irrigation request for {instance.area_size} hectares on {instance.requested_date.strftime("%B %d, %Y")} has been cancelled.',
                     related_object_id=instance.id
                 )
+
+
+SEASON_TOTAL_FIELDS = {'season', 'total_fee', 'amount_paid', 'status'}
+
+
+@receiver(post_save, sender=IrrigationSeasonRecord)
+@receiver(post_delete, sender=IrrigationSeasonRecord)
+def refresh_season_totals(sender, instance, update_fields=None, **kwargs):
+    """Keep the season's stored billed/paid totals and record counts current."""
+    if update_fields is not None and not SEASON_TOTAL_FIELDS.intersection(update_fields):
+        return
+    season = CroppingSeason.objects.filter(pk=instance.season_id).first()
+    if season:
+        season.refresh_totals()
@@ -1,16 +1,19 @@
 from datetime import timedelta
 from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
 from django.utils import timezone
 
 from bufia.models import Payment
+from irrigation.billing import assign_farmers
 from irrigation.models import CroppingSeason, IrrigationSeasonRecord
-from users.models import MembershipApplication, Sector
+from users.models import ActivityLog, MembershipApplication, Sector
 
 
 User = get_user_model()
@@ -468,6 +471,101 @@ class IrrigationAdminPageTests(TestCase):
         self.assertEqual(self.record.amount_paid, Decimal('3000.00'))
         self.assertIsNotNone(self.record.billed_at)
 
+    def test_billing_command_bills_in_batches_and_logs_activity(self):
+        for farmer in [self.available_farmer, self.other_farmer]:
+            IrrigationSeasonRecord.objects.create(
+                season=self.season,
+                farmer=farmer,
+                status=IrrigationSeasonRecord.STATUS_ACTIVE,
+            )
+        self.season.harvest_date = timezone.localdate() - timedelta(days=1)
+        self.season.save(update_fields=['harvest_date', 'updated_at'])
+
+        out = StringIO()
+        call_command('generate_irrigation_billing', str(self.season.pk), '--batch-size', '2', stdout=out)
+
+        self.assertIn('2/3 record(s) billed', out.getvalue())
+        self.assertIn('3/3 record(s) billed', out.getvalue())
+        self.season.refresh_from_db()
+        self.assertEqual(self.season.status, CroppingSeason.STATUS_HARVESTED)
+        records = {record.farmer_id: record for record in self.season.records.all()}
+        self.assertEqual(records[self.available_farmer.pk].farm_area, Decimal('1.75'))
+        self.assertEqual(records[self.available_farmer.pk].total_fee, Decimal('2100.00'))
+        self.assertEqual(records[self.other_farmer.pk].sector, self.other_sector)
+        self.assertTrue(all(
+            record.status == IrrigationSeasonRecord.STATUS_HARVESTED and record.billed_at
+            for record in records.values()
+        ))
+        self.assertEqual(
+            ActivityLog.objects.filter(activity_type='billing', related_model='irrigation.IrrigationSeasonRecord').count(),
+            3,
+        )
+
+        call_command('generate_irrigation_billing', str(self.season.pk), stdout=out)
+        self.assertIn('already billed, skipped', out.getvalue())
+
+    def test_season_transitions_apply_only_once_a_boundary_has_passed(self):
+        self.season.sync_status()
+        self.assertEqual(self.season.status, CroppingSeason.STATUS_ACTIVE)
+        self.assertEqual(self.season.next_transition_on, self.season.harvest_date)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(CroppingSeason.sync_due_seasons(), 0)
+
+        harvest_date = self.season.harvest_date
+        with patch('irrigation.models.timezone.localdate', return_value=harvest_date):
+            call_command('sync_irrigation_seasons', stdout=StringIO())
+
+        self.season.refresh_from_db()
+        self.assertEqual(self.season.status, CroppingSeason.STATUS_HARVESTED)
+        self.assertIsNotNone(self.season.billing_generated_at)
+        self.assertIsNone(self.season.next_transition_on)
+        self.assertEqual(self.season.total_billed_amount, Decimal('3000.00'))
+        self.assertEqual(self.season.record_count, 1)
+
+    def test_farmers_assigned_after_an_empty_harvest_are_billed_on_next_sync(self):
+        today = timezone.localdate()
+        season = CroppingSeason.objects.create(
+            name='Late Assignment Season',
+            planting_date=today - timedelta(days=40),
+            harvest_date=today - timedelta(days=1),
+            irrigation_rate_per_hectare=Decimal('1200.00'),
+            created_by=self.admin,
+        )
+        CroppingSeason.sync_due_seasons()
+        season.refresh_from_db()
+        self.assertEqual(season.status, CroppingSeason.STATUS_HARVESTED)
+        self.assertIsNone(season.billing_generated_at)
+        self.assertIsNone(season.next_transition_on)
+
+        assign_farmers(season, User.objects.filter(pk=self.available_farmer.pk))
+        season.refresh_from_db()
+        self.assertEqual(season.next_transition_on, today)
+
+        CroppingSeason.sync_due_seasons()
+        season.refresh_from_db()
+        self.assertIsNotNone(season.billing_generated_at)
+        self.assertIsNone(season.next_transition_on)
+        self.assertEqual(season.total_billed_amount, Decimal('2100.00'))
+
+    def test_season_totals_follow_record_payments(self):
+        self.season.harvest_date = timezone.localdate() - timedelta(days=1)
+        self.season.save(update_fields=['harvest_date', 'updated_at'])
+        self.season.generate_billing()
+        self.record.refresh_from_db()
+
+        self.record.record_payment(confirmed_by=self.admin, amount=Decimal('1000.00'))
+        self.season.refresh_from_db()
+        self.assertEqual(self.season.total_paid_amount, Decimal('1000.00'))
+        self.assertFalse(self.season.all_records_paid)
+        self.assertEqual(self.season.status, CroppingSeason.STATUS_HARVESTED)
+
+        self.record.record_payment(confirmed_by=self.admin, amount=Decimal('2000.00'))
+        self.season.refresh_from_db()
+        self.assertEqual(self.season.total_paid_amount, Decimal('3000.00'))
+        self.assertTrue(self.season.all_records_paid)
+        self.assertEqual(self.season.status, CroppingSeason.STATUS_PAID)
+
     def test_record_details_are_not_editable_from_record_page(self):
         response = self.client.post(
             reverse('irrigation:admin_irrigation_record_edit', args=[self.record.pk]),
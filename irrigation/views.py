@@ -13,6 +13,7 @@ from .forms import (
     IrrigationSeasonRecordAdminForm,
     IrrigationSeasonAssignmentForm,
 )
+from .billing import assign_farmers, log_billing_activities
 from .models import CroppingSeason, IrrigationSeasonRecord
 from users.activity import log_activity
 
@@ -22,8 +23,9 @@ def is_admin_or_president(user):
 
 
 def _sync_irrigation_seasons():
-    for season in CroppingSeason.objects.exclude(status=CroppingSeason.STATUS_CLOSED):
-        season.sync_status()
+    # Only seasons whose next transition date has passed; the
+    # sync_irrigation_seasons command applies the same changes on a schedule.
+    CroppingSeason.sync_due_seasons()
 
 
 def _normalize_irrigation_record_status(record):
@@ -112,6 +114,7 @@ def _sync_irrigation_payment_record(record, payment_method):
         content_type=content_type,
         object_id=record.id,
         defaults={
+            'content_object': record,
             'user': record.farmer,
             'payment_type': 'irrigation',
             'amount': amount_due,
@@ -176,6 +179,7 @@ def _finalize_irrigation_payment_record(record, payment_method, *, session_id=No
         content_type=content_type,
         object_id=record.id,
         defaults={
+            'content_object': record,
             'user': record.farmer,
             'payment_type': 'irrigation',
             'amount': paid_amount,
@@ -601,24 +605,7 @@ def admin_irrigation_assign_farmers(request, pk):
         messages.error(request, error_message)
         return redirect(redirect_target)
 
-    created_count = 0
-    for farmer in form.cleaned_data['farmers']:
-        membership = getattr(farmer, 'membership_application', None)
-        record, created = IrrigationSeasonRecord.objects.get_or_create(
-            season=season,
-            farmer=farmer,
-            defaults={
-                'membership': membership,
-                'sector': getattr(membership, 'assigned_sector', None) or getattr(membership, 'sector', None),
-                'farm_area': getattr(membership, 'farm_size', 0) or 0,
-                'irrigation_rate': season.irrigation_rate_per_hectare,
-                'status': IrrigationSeasonRecord.STATUS_PLANNED,
-            }
-        )
-        if created:
-            record.total_fee = record.calculate_total_fee()
-            record.save(update_fields=['total_fee', 'updated_at'])
-            created_count += 1
+    created_count = assign_farmers(season, form.cleaned_data['farmers'])
 
     if created_count:
         messages.success(request, f'{created_count} farmer(s) assigned to {season.name}.')
@@ -642,19 +629,7 @@ def admin_irrigation_generate_billing(request, pk):
             messages.error(request, 'Billing can only be generated on or after the harvest date.')
         else:
             season.generate_billing()
-            billed_timestamp = season.billing_generated_at or timezone.now()
-            for billed_record in season.records.select_related('farmer'):
-                if (billed_record.total_fee or 0) <= 0:
-                    continue
-                log_activity(
-                    activity_type='billing',
-                    actor=request.user,
-                    subject_user=billed_record.farmer,
-                    title=f'Irrigation billing generated for {billed_record.farmer.get_full_name() or billed_record.farmer.username}',
-                    description=f'{season.name}: PHP {billed_record.total_fee} billed for {billed_record.farm_area} ha.',
-                    related_object=billed_record,
-                    created_at=billed_record.billed_at or billed_timestamp,
-                )
+            log_billing_activities(season, actor=request.user, billed_at=season.billing_generated_at)
             messages.success(request, 'Harvest date reached. Irrigation billing was generated automatically based on farm area.')
     return redirect('irrigation:admin_irrigation_request_detail', pk=season.pk)
 
@@ -942,6 +917,7 @@ def admin_irrigation_close_season(request, pk):
             season.closed_at = timezone.now()
             season.save(update_fields=['status', 'closed_at', 'updated_at'])
             season.records.update(status=IrrigationSeasonRecord.STATUS_CLOSED)
+            season.refresh_totals()
             messages.success(request, f'{season.name} has been closed.')
     return redirect('irrigation:admin_irrigation_request_detail', pk=season.pk)
 
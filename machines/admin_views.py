@@ -10,18 +10,21 @@ from django.utils import timezone
 from django.utils.http import url_has_allowed_host_and_scheme
 from django.utils.dateparse import parse_datetime
 from django.http import JsonResponse, FileResponse, Http404
-from django.db.models import Q, Count, Case, When, Value, IntegerField
+from django.db.models import Q, Count, Case, When, Value, IntegerField, Exists, OuterRef, Subquery, Sum, F, DecimalField
+from django.db.models.functions import Coalesce
 from decimal import Decimal
 from datetime import timedelta
 from django.core.exceptions import ValidationError
 
-from .models import Rental, Machine, Maintenance, HarvestReport, Settlement, RentalPackage, RentalPackageItem
+from .models import Rental, Machine, Maintenance, HarvestReport, Settlement, RentalPackage, RentalPackageItem, prefetch_latest_payments
+from .signals import dispatch_rental_status_changes
 from .forms_enhanced import (
     AdminRentalApprovalForm,
     HarvestReportForm,
     ConfirmRiceReceivedForm,
     FaceToFacePaymentForm,
 )
+from notifications import outbox
 from notifications.models import UserNotification
 from notifications.notification_helpers import create_notification
 from notifications.operator_notifications import (
@@ -104,6 +107,7 @@ def _ensure_rental_payment_record(
         content_type=content_type,
         object_id=rental.id,
         defaults={
+            'content_object': rental,
             'user': rental.user,
             'payment_type': 'rental',
             'amount': amount if amount is not None else (rental.payment_amount or 0),
@@ -226,20 +230,16 @@ def _build_purpose_details(purpose_text):
 def _get_rental_payments_map(rentals):
     """Fetch linked payment records for a batch of rentals."""
     from bufia.models import Payment
-    from django.contrib.contenttypes.models import ContentType
-
-    rentals = list(rentals)
-    if not rentals:
-        return {}
 
-    rental_ids = [rental.id for rental in rentals]
-    rental_content_type = ContentType.objects.get_for_model(Rental)
-    payments = Payment.objects.filter(
-        content_type=rental_content_type,
-        object_id__in=rental_ids,
-    ).select_related('user', 'processed_by').prefetch_related('refunds')
-
-    return {payment.object_id: payment for payment in payments}
+    rentals = prefetch_latest_payments(
+        rentals,
+        queryset=Payment.objects.select_related('user', 'processed_by').prefetch_related('refunds'),
+    )
+    return {
+        rental.id: rental.latest_payment
+        for rental in rentals
+        if rental.latest_payment is not None
+    }
 
 
 def _hydrate_dashboard_rentals(rentals):
@@ -259,17 +259,16 @@ def _hydrate_dashboard_rentals(rentals):
         rental.dashboard_is_overdue = rental.workflow_state == 'overdue'
         rental.dashboard_is_conflict_review = rental.workflow_state == 'conflict_review'
 
-        if rental.status in {'pending', 'approved'} and rental.workflow_state != 'cancelled':
-            is_available, conflicts = Rental.check_availability_for_approval(
-                rental.machine,
-                rental.start_date,
-                rental.end_date,
-                exclude_rental_id=rental.id,
-            )
-            if not is_available:
-                rental.dashboard_conflicts = list(conflicts)
-                rental.dashboard_conflict_count = len(rental.dashboard_conflicts)
-                rental.dashboard_has_conflicts = rental.dashboard_conflict_count > 0
+    conflicts_map = Rental.bulk_check_availability_for_approval([
+        rental for rental in rentals
+        if rental.status in {'pending', 'approved'} and rental.workflow_state != 'cancelled'
+    ])
+    for rental in rentals:
+        conflicts = conflicts_map.get(rental.id)
+        if conflicts:
+            rental.dashboard_conflicts = conflicts
+            rental.dashboard_conflict_count = len(conflicts)
+            rental.dashboard_has_conflicts = True
 
     return rentals
 
@@ -283,60 +282,97 @@ def _refund_queue_items(rentals):
     ]
 
 
-def _auto_cancel_conflicting_pending_rentals(approved_rental, admin_user):
-    """Cancel overlapping pending rentals after one request is approved."""
-    conflicting_rentals = list(
-        Rental.objects.select_for_update().select_related('machine', 'user').filter(
-            machine=approved_rental.machine,
-            status='pending',
-            start_date__lte=approved_rental.end_date,
-            end_date__gte=approved_rental.start_date,
-        ).exclude(pk=approved_rental.pk)
-    )
+AUTO_CANCEL_UPDATE_FIELDS = [
+    'status',
+    'workflow_state',
+    'cancellation_type',
+    'cancel_reason',
+    'system_note',
+    'follow_up_admin_note',
+    'state_changed_by',
+    'updated_at',
+]
 
-    if not conflicting_rentals:
-        return []
 
-    schedule_label = (
-        f'{approved_rental.start_date:%B %d, %Y} to {approved_rental.end_date:%B %d, %Y}'
-    )
-    system_note = (
-        f'Automatically cancelled due to conflict with approved rental #{approved_rental.id} '
-        f'for {approved_rental.machine.name} ({schedule_label}).'
-    )
+def _cancel_pending_overlaps(approved_rentals, admin_user):
+    """
+    Cancel pending rentals that overlap any of ``approved_rentals``.
 
-    for conflicting in conflicting_rentals:
+    Overlaps are found with one locking query and written with one
+    ``bulk_update``. Returns ``(cancelled_rentals, conflict_notifications)``,
+    the notifications as ``outbox.notification`` payloads; the caller hands
+    both to ``dispatch_rental_status_changes``.
+    """
+    approved_by_machine = {}
+    for approved_rental in approved_rentals:
+        approved_by_machine.setdefault(approved_rental.machine_id, []).append(approved_rental)
+    if not approved_by_machine:
+        return [], []
+
+    candidates = Rental.objects.select_for_update().select_related('machine', 'user').filter(
+        machine_id__in=approved_by_machine,
+        status='pending',
+        start_date__lte=max(rental.end_date for rental in approved_rentals),
+        end_date__gte=min(rental.start_date for rental in approved_rentals),
+    ).exclude(pk__in=[rental.pk for rental in approved_rentals]).order_by('pk')
+
+    now = timezone.now()
+    cancelled = []
+    notifications = []
+    for conflicting in candidates:
+        approved_rental = next(
+            (
+                rental for rental in approved_by_machine[conflicting.machine_id]
+                if rental.start_date <= conflicting.end_date and rental.end_date >= conflicting.start_date
+            ),
+            None,
+        )
+        if approved_rental is None:
+            continue
+        schedule_label = (
+            f'{approved_rental.start_date:%B %d, %Y} to {approved_rental.end_date:%B %d, %Y}'
+        )
         conflicting.mark_cancelled(
             cancellation_type='auto_conflict',
             cancel_reason='Cancelled due to scheduling conflict with an approved rental.',
-            system_note=system_note,
+            system_note=(
+                f'Automatically cancelled due to conflict with approved rental #{approved_rental.id} '
+                f'for {approved_rental.machine.name} ({schedule_label}).'
+            ),
             admin_note=f'Conflict resolved automatically after approving rental #{approved_rental.id}.',
         )
         conflicting.state_changed_by = admin_user
-        conflicting.save(update_fields=[
-            'status',
-            'workflow_state',
-            'cancellation_type',
-            'cancel_reason',
-            'system_note',
-            'follow_up_admin_note',
-            'state_changed_by',
-            'updated_at',
-        ])
-        
-        UserNotification.objects.create(
+        conflicting.updated_at = now
+        cancelled.append(conflicting)
+        notifications.append(outbox.notification(
             user=conflicting.user,
             notification_type='rental_conflict',
             message='Your booking was cancelled due to a conflict with an approved rental. Please choose whether you want a refund or reschedule.',
             related_object_id=conflicting.id
-        )
+        ))
+
+    if cancelled:
+        Rental.objects.bulk_update(cancelled, AUTO_CANCEL_UPDATE_FIELDS)
+        for rental in cancelled:
+            rental.reset_tracked_fields(AUTO_CANCEL_UPDATE_FIELDS)
+        prefetch_latest_payments(cancelled)
+    return cancelled, notifications
+
 
-    return conflicting_rentals
+def _auto_cancel_conflicting_pending_rentals(approved_rental, admin_user):
+    """Cancel overlapping pending rentals after one request is approved."""
+    cancelled, notifications = _cancel_pending_overlaps([approved_rental], admin_user)
+    if cancelled:
+        dispatch_rental_status_changes(
+            [(rental, 'pending') for rental in cancelled],
+            notifications,
+        )
+    return cancelled
 
 
 def _sync_rental_schedule_states():
-    """Keep overdue and conflict-review workflow states aligned with today's schedule."""
-    return Rental.sync_overdue_workflow_states()
+    """Roll overdue and conflict-review workflow states forward once per day."""
+    return Rental.ensure_schedule_states_current()
 
 
 def _append_system_note(rental, note):
@@ -426,47 +462,85 @@ def _parse_local_datetime_input(raw_value):
     return parsed
 
 
+def _in_kind_settlement_queue_q():
+    """Non-cash rentals still waiting on harvest reporting or rice delivery."""
+    return (
+        Q(payment_type='in_kind') &
+        ~(Q(settlement_status='paid') | Q(status='cancelled')) &
+        (
+            Q(workflow_state='harvest_report_submitted') |
+            Q(organization_share_required__isnull=False) |
+            Q(workflow_state='in_progress')
+        )
+    )
+
+
+def _refundable_payment_exists():
+    """SQL test for a completed rental payment that still has a refundable balance."""
+    from bufia.models import Payment, Refund
+    from django.contrib.contenttypes.models import ContentType
+
+    refunded_total = Refund.objects.filter(
+        payment=OuterRef('pk'),
+        status='refunded',
+    ).order_by().values('payment').annotate(total=Sum('amount')).values('total')
+    return Exists(
+        Payment.objects.filter(
+            content_type=ContentType.objects.get_for_model(Rental),
+            object_id=OuterRef('pk'),
+            status='completed',
+        ).annotate(
+            refunded_total=Coalesce(Subquery(refunded_total), Value(Decimal('0.00')), output_field=DecimalField()),
+        ).filter(amount__gt=F('refunded_total'))
+    )
+
+
+def _refund_queue_q():
+    """Cancelled cash rentals with a payment that can still be refunded."""
+    return Q(status='cancelled') & ~Q(payment_type='in_kind') & Q(_refundable_payment_exists())
+
+
+def _dashboard_header_counts(dashboard_rentals, *, filter_q, in_kind_queue_q):
+    """Count every dashboard tab and queue badge with one conditional-aggregation query."""
+    return dashboard_rentals.order_by().aggregate(
+        pending=Count('pk', filter=filter_q & Q(status='pending')),
+        approved=Count('pk', filter=filter_q & _approved_dashboard_q()),
+        in_progress=Count('pk', filter=filter_q & _in_progress_dashboard_q()),
+        completed=Count('pk', filter=filter_q & _completed_dashboard_q()),
+        overdue=Count('pk', filter=filter_q & Q(workflow_state='overdue')),
+        in_kind_queue=Count('pk', filter=in_kind_queue_q),
+        refund_queue=Count('pk', filter=_refund_queue_q()),
+    )
+
+
 def _build_conflict_dashboard_counts(*, base_queryset=None, today=None):
     today = today or timezone.localdate()
     rental_queryset = base_queryset if base_queryset is not None else Rental.objects.all()
     rental_queryset = rental_queryset.select_related('machine', 'user')
 
-    all_approved = rental_queryset.filter(
+    all_approved = list(rental_queryset.filter(
         status='approved',
         end_date__gte=today,
-    ).order_by('start_date')
-
-    conflicts = []
-    for rental in all_approved:
-        is_available, overlapping = Rental.check_availability_for_approval(
-            rental.machine,
-            rental.start_date,
-            rental.end_date,
-            exclude_rental_id=rental.id,
-        )
-        if not is_available:
-            conflicts.append({
-                'rental': rental,
-                'conflicts_with': list(overlapping),
-            })
-
-    pending_conflicts = []
-    pending_rentals = rental_queryset.filter(
+    ).order_by('start_date'))
+    pending_rentals = list(rental_queryset.filter(
         status='pending',
         payment_verified=True,
+    ))
+    conflicts_map = Rental.bulk_check_availability_for_approval(
+        all_approved + pending_rentals,
+        today=today,
     )
-    for rental in pending_rentals:
-        is_available, conf = Rental.check_availability_for_approval(
-            rental.machine,
-            rental.start_date,
-            rental.end_date,
-            exclude_rental_id=rental.id,
-        )
-        if not is_available:
-            pending_conflicts.append({
-                'rental': rental,
-                'conflicts_with': list(conf),
-            })
+
+    conflicts = [
+        {'rental': rental, 'conflicts_with': conflicts_map[rental.id]}
+        for rental in all_approved
+        if conflicts_map.get(rental.id)
+    ]
+    pending_conflicts = [
+        {'rental': rental, 'conflicts_with': conflicts_map[rental.id]}
+        for rental in pending_rentals
+        if conflicts_map.get(rental.id)
+    ]
 
     conflict_review_rentals = list(
         rental_queryset.filter(
@@ -513,58 +587,56 @@ def admin_rental_dashboard(request):
     # Package-linked rentals are managed from the package workflow screens,
     # not the direct admin rental dashboard, to keep queues separated.
     dashboard_rentals = Rental.objects.select_related('machine', 'user').filter(package_item__isnull=True)
-    filtered_rentals = dashboard_rentals
+    filter_q = Q()
 
     if status_filter and status_filter != 'all':
-        filtered_rentals = filtered_rentals.filter(status=status_filter)
+        filter_q &= Q(status=status_filter)
 
     if payment_filter == 'verified':
-        filtered_rentals = filtered_rentals.filter(payment_verified=True)
+        filter_q &= Q(payment_verified=True)
     elif payment_filter == 'unverified':
-        filtered_rentals = filtered_rentals.filter(payment_verified=False)
+        filter_q &= Q(payment_verified=False)
     elif payment_filter == 'online':
-        filtered_rentals = filtered_rentals.filter(payment_method='online')
+        filter_q &= Q(payment_method='online')
     elif payment_filter == 'face_to_face':
-        filtered_rentals = filtered_rentals.filter(payment_method='face_to_face')
+        filter_q &= Q(payment_method='face_to_face')
     elif payment_filter == 'in_kind':
-        filtered_rentals = filtered_rentals.filter(payment_type='in_kind')
+        filter_q &= Q(payment_type='in_kind')
 
+    renter_type_q = Q()
     if renter_type_filter == 'member':
-        filtered_rentals = filtered_rentals.exclude(user__username='system')
+        renter_type_q = ~Q(user__username='system')
     elif renter_type_filter == 'non_member':
-        filtered_rentals = filtered_rentals.filter(user__username='system')
+        renter_type_q = Q(user__username='system')
+    filter_q &= renter_type_q
 
     # Date filter
     today = timezone.localdate()
     if date_filter == 'today':
-        filtered_rentals = filtered_rentals.filter(
+        filter_q &= (
             Q(start_date=today) | Q(end_date=today) | 
             Q(start_date__lte=today, end_date__gte=today)
         )
     elif date_filter == 'tomorrow':
         tomorrow = today + timedelta(days=1)
-        filtered_rentals = filtered_rentals.filter(
+        filter_q &= (
             Q(start_date=tomorrow) | Q(end_date=tomorrow) |
             Q(start_date__lte=tomorrow, end_date__gte=tomorrow)
         )
     elif date_filter == 'this_week':
         week_start = today - timedelta(days=today.weekday())
         week_end = week_start + timedelta(days=6)
-        filtered_rentals = filtered_rentals.filter(
-            Q(start_date__lte=week_end, end_date__gte=week_start)
-        )
+        filter_q &= Q(start_date__lte=week_end, end_date__gte=week_start)
     elif date_filter == 'this_month':
         month_start = today.replace(day=1)
         if today.month == 12:
             month_end = today.replace(year=today.year + 1, month=1, day=1) - timedelta(days=1)
         else:
             month_end = today.replace(month=today.month + 1, day=1) - timedelta(days=1)
-        filtered_rentals = filtered_rentals.filter(
-            Q(start_date__lte=month_end, end_date__gte=month_start)
-        )
+        filter_q &= Q(start_date__lte=month_end, end_date__gte=month_start)
 
     if search_query:
-        filtered_rentals = filtered_rentals.filter(
+        filter_q &= (
             Q(customer_name__icontains=search_query) |
             Q(customer_contact_number__icontains=search_query) |
             Q(customer_address__icontains=search_query) |
@@ -574,15 +646,21 @@ def admin_rental_dashboard(request):
             Q(machine__name__icontains=search_query)
         )
 
+    filtered_rentals = dashboard_rentals.filter(filter_q)
+
     approved_dashboard_q = _approved_dashboard_q()
     in_progress_dashboard_q = _in_progress_dashboard_q()
     completed_dashboard_q = _completed_dashboard_q()
+    in_kind_queue_q = renter_type_q & _in_kind_settlement_queue_q()
 
+    header_counts = _dashboard_header_counts(
+        dashboard_rentals,
+        filter_q=filter_q,
+        in_kind_queue_q=in_kind_queue_q,
+    )
     tab_counts = {
-        'pending': filtered_rentals.filter(status='pending').count(),
-        'approved': filtered_rentals.filter(approved_dashboard_q).count(),
-        'in_progress': filtered_rentals.filter(in_progress_dashboard_q).count(),
-        'completed': filtered_rentals.filter(completed_dashboard_q).count(),
+        tab: header_counts[tab]
+        for tab in ('pending', 'approved', 'in_progress', 'completed')
     }
 
     if active_tab not in tab_counts:
@@ -617,21 +695,7 @@ def admin_rental_dashboard(request):
         )
     ).order_by('-created_at', 'status_priority')
 
-    harvest_settlement_queue = Rental.objects.select_related('machine', 'user').filter(
-        package_item__isnull=True,
-        payment_type='in_kind'
-    ).exclude(
-        Q(settlement_status='paid') | Q(status='cancelled')
-    ).filter(
-        Q(workflow_state='harvest_report_submitted') |
-        Q(organization_share_required__isnull=False) |
-        Q(workflow_state='in_progress')
-    ).order_by('-created_at')
-
-    if renter_type_filter == 'member':
-        harvest_settlement_queue = harvest_settlement_queue.exclude(user__username='system')
-    elif renter_type_filter == 'non_member':
-        harvest_settlement_queue = harvest_settlement_queue.filter(user__username='system')
+    harvest_settlement_queue = dashboard_rentals.filter(in_kind_queue_q).order_by('-created_at')
 
     from django.core.paginator import Paginator
     paginator = Paginator(rentals, 20)
@@ -639,16 +703,13 @@ def admin_rental_dashboard(request):
     page_obj = paginator.get_page(page_number)
     page_obj.object_list = _hydrate_dashboard_rentals(page_obj.object_list)
 
-    overdue_rentals = filtered_rentals.filter(workflow_state='overdue').order_by('end_date', 'start_date')
     conflict_counts = _build_conflict_dashboard_counts(base_queryset=filtered_rentals, today=today)
     package_requests = RentalPackage.objects.select_related('user', 'approved_by').prefetch_related('items').order_by('-created_at')
-    refund_queue_count = len(_refund_queue_items(
-        dashboard_rentals.filter(
-            status='cancelled',
-        ).exclude(
-            payment_type='in_kind',
-        ).order_by('-updated_at', '-created_at')
-    ))
+    package_counts = package_requests.aggregate(
+        total=Count('pk'),
+        pending=Count('pk', filter=Q(status='pending')),
+        active=Count('pk', filter=~Q(status__in=['completed', 'cancelled'])),
+    )
 
     context = {
         'page_obj': page_obj,
@@ -660,18 +721,18 @@ def admin_rental_dashboard(request):
         'active_tab': active_tab,
         'tab_counts': tab_counts,
         'in_kind_verification_queue': harvest_settlement_queue[:10],
-        'in_kind_verification_count': harvest_settlement_queue.count(),
-        'overdue_rentals_count': overdue_rentals.count(),
+        'in_kind_verification_count': header_counts['in_kind_queue'],
+        'overdue_rentals_count': header_counts['overdue'],
         'conflict_review_rentals': conflict_counts['conflict_review_rentals'][:10],
         'conflict_review_count': conflict_counts['conflict_review_count'],
         'conflict_alert_count': conflict_counts['conflict_alert_count'],
-        'refund_queue_count': refund_queue_count,
+        'refund_queue_count': header_counts['refund_queue'],
         'schedule_sync_count': len(synced_rental_ids),
         'today': timezone.localdate(),
         'package_requests': package_requests[:6],
-        'package_total_count': package_requests.count(),
-        'package_pending_count': package_requests.filter(status='pending').count(),
-        'package_active_count': package_requests.exclude(status__in=['completed', 'cancelled']).count(),
+        'package_total_count': package_counts['total'],
+        'package_pending_count': package_counts['pending'],
+        'package_active_count': package_counts['active'],
     }
 
     return render(request, 'machines/admin/rental_dashboard.html', context)
@@ -1943,7 +2004,7 @@ def admin_conflicts_report(request):
     Show potential conflicts and scheduling issues
     """
     today = timezone.now().date()
-    Rental.sync_overdue_workflow_states(today=today)
+    Rental.ensure_schedule_states_current(today=today)
     conflict_counts = _build_conflict_dashboard_counts(today=today)
     conflicts = conflict_counts['conflicts']
     pending_conflicts = conflict_counts['pending_conflicts']
@@ -1977,101 +2038,6 @@ def admin_conflicts_report(request):
     return render(request, 'machines/admin/conflicts_report.html', context)
 
 
-@login_required
-@user_passes_test(_is_admin)
-def bulk_approve_rentals(request):
-    """
-    Bulk approve multiple rentals at once
-    """
-    if request.method != 'POST':
-        return redirect('machines:admin_rental_dashboard')
-    
-    # Get rental IDs from either format
-    rental_ids = request.POST.getlist('rental_ids')
-    if not rental_ids:
-        rental_ids_input = request.POST.get('rental_ids_input', '')
-        if rental_ids_input:
-            rental_ids = [rid.strip() for rid in rental_ids_input.split(',') if rid.strip()]
-    
-    if not rental_ids:
-        messages.warning(request, 'No rentals selected')
-        return redirect('machines:admin_rental_dashboard')
-    
-    approved_count = 0
-    failed_count = 0
-    
-    for rental_id in rental_ids:
-        try:
-            with transaction.atomic():
-                rental = Rental.objects.select_for_update().get(pk=rental_id)
-                
-                if rental.status != 'pending':
-                    messages.warning(
-                        request,
-                        f'Skipped Rental #{rental_id}: Only pending rentals can be approved'
-                    )
-                    failed_count += 1
-                    continue
-                
-                # Check for conflicts
-                is_available, conflicts = Rental.check_availability_for_approval(
-                    rental.machine,
-                    rental.start_date,
-                    rental.end_date,
-                    exclude_rental_id=rental.id
-                )
-                
-                if not is_available:
-                    messages.warning(
-                        request,
-                        f'Skipped Rental #{rental_id}: Has conflicts'
-                    )
-                    failed_count += 1
-                    continue
-                
-                # Approve and initialize the next workflow step.
-                rental.status = 'approved'
-                rental.workflow_state = 'approved'
-                rental.verified_by = None
-                rental.verification_date = None
-                if rental.payment_type == 'in_kind':
-                    rental.payment_status = 'pending'
-                    rental.settlement_type = 'after_harvest'
-                    rental.settlement_status = (
-                        'waiting_for_delivery'
-                        if rental.organization_share_required and rental.organization_share_required > 0
-                        else 'pending'
-                    )
-                else:
-                    rental.payment_status = 'pending'
-                rental.save()
-
-                if rental.payment_type != 'in_kind':
-                    _ensure_rental_payment_record(rental, status='pending', amount=rental.payment_amount)
-                
-                # Notify user
-                UserNotification.objects.create(
-                    user=rental.user,
-                    notification_type='rental_approved',
-                    message=f'Your rental for {rental.machine.name} has been approved!',
-                    related_object_id=rental.id
-                )
-                
-                approved_count += 1
-                
-        except Exception as e:
-            messages.error(request, f'Error approving Rental #{rental_id}: {str(e)}')
-            failed_count += 1
-    
-    if approved_count > 0:
-        messages.success(request, f'Successfully approved {approved_count} rental(s)')
-    
-    if failed_count > 0:
-        messages.warning(request, f'Failed to approve {failed_count} rental(s)')
-    
-    return redirect('machines:admin_rental_dashboard')
-
-
 @login_required
 @user_passes_test(_is_admin)
 def bulk_delete_rentals(request):
@@ -2447,9 +2413,190 @@ def admin_complete_rental_early(request, rental_id):
     )
 
 
+APPROVAL_UPDATE_FIELDS = [
+    'status',
+    'workflow_state',
+    'payment_verified',
+    'verified_by',
+    'verification_date',
+    'payment_status',
+    'settlement_type',
+    'settlement_status',
+    'updated_at',
+]
+
+
+def _ensure_pending_rental_payments(rentals):
+    """Bulk form of ``_ensure_rental_payment_record(rental, status='pending', amount=rental.payment_amount)``."""
+    from bufia.models import Payment
+    from bufia.utils.transaction_id import TransactionIDGenerator
+    from django.contrib.contenttypes.models import ContentType
+
+    if not rentals:
+        return
+    content_type = ContentType.objects.get_for_model(Rental)
+    payments_by_rental = {}
+    for payment in Payment.objects.filter(
+        content_type=content_type,
+        object_id__in=[rental.id for rental in rentals],
+    ).order_by('pk'):
+        payments_by_rental.setdefault(payment.object_id, payment)
+
+    new_payments = []
+    changed_payments = []
+    changed_fields = set()
+    for rental in rentals:
+        target_provider = 'paymongo' if rental.payment_method == 'online' else 'manual'
+        payment = payments_by_rental.get(rental.id)
+        if payment is None:
+            new_payments.append(Payment(
+                content_type=content_type,
+                object_id=rental.id,
+                user=rental.user,
+                payment_type='rental',
+                amount=rental.payment_amount or 0,
+                currency='PHP',
+                status='pending',
+                payment_provider=target_provider,
+            ))
+            continue
+
+        targets = {
+            'user_id': rental.user_id,
+            'payment_type': 'rental',
+            'currency': 'PHP',
+            'status': 'pending',
+            'payment_provider': target_provider,
+        }
+        if rental.payment_amount is not None:
+            targets['amount'] = rental.payment_amount
+        updates = [
+            field_name for field_name, value in targets.items()
+            if getattr(payment, field_name) != value
+        ]
+        if updates:
+            for field_name in updates:
+                setattr(payment, field_name, targets[field_name])
+            changed_fields.update('user' if field_name == 'user_id' else field_name for field_name in updates)
+            payment.updated_at = timezone.now()
+            changed_payments.append(payment)
+
+    if changed_payments:
+        Payment.objects.bulk_update(changed_payments, sorted(changed_fields | {'updated_at'}))
+
+    if new_payments:
+        transaction_ids = TransactionIDGenerator.reserve(len(new_payments))
+        for payment, transaction_id in zip(new_payments, transaction_ids):
+            payment.internal_transaction_id = transaction_id
+        Payment.objects.bulk_create(new_payments)
+        # bulk_create skips Payment.save, so point the rentals at their new rows here.
+        Rental.objects.filter(pk__in=[payment.object_id for payment in new_payments]).update(
+            latest_payment=Subquery(
+                Payment.objects.filter(
+                    content_type=content_type,
+                    object_id=OuterRef('pk'),
+                ).order_by('-created_at', '-pk').values('pk')[:1]
+            )
+        )
+
+
+def _bulk_approve_pending_rentals(rental_ids, admin_user):
+    """
+    Approve a selection of pending rentals as one batch.
+
+    The selection is ordered by request time, so when two selected requests
+    overlap the earlier one wins and the later one is auto-cancelled along
+    with every other overlapping pending request. Blocking conflicts are read
+    once for the whole batch, rows are written with ``bulk_update`` and the
+    status-change side effects run as one post-commit batch.
+
+    Returns ``(approved, skipped, cancelled)`` where ``skipped`` holds
+    ``(rental_id, reason)`` pairs.
+    """
+    requested_ids = []
+    skipped = []
+    for rental_id in rental_ids:
+        try:
+            requested_ids.append(int(rental_id))
+        except (TypeError, ValueError):
+            skipped.append((rental_id, 'Invalid rental ID'))
+
+    rentals = list(
+        Rental.objects.select_for_update().select_related('machine', 'user').filter(
+            pk__in=requested_ids,
+        ).order_by('created_at', 'pk')
+    )
+    found_ids = {rental.id for rental in rentals}
+    skipped.extend(
+        (rental_id, 'Rental not found') for rental_id in dict.fromkeys(requested_ids) if rental_id not in found_ids
+    )
+
+    candidates = []
+    for rental in rentals:
+        if rental.status != 'pending':
+            skipped.append((rental.id, 'Only pending rentals can be approved'))
+        else:
+            candidates.append(rental)
+
+    blocking_conflicts = Rental.bulk_check_availability_for_approval(candidates)
+    approved = []
+    accepted_by_machine = {}
+    for rental in candidates:
+        if blocking_conflicts.get(rental.id):
+            skipped.append((rental.id, 'Has conflicts'))
+            continue
+        if any(
+            other.start_date <= rental.end_date and other.end_date >= rental.start_date
+            for other in accepted_by_machine.get(rental.machine_id, [])
+        ):
+            # Left pending here; the auto-cancel pass below resolves it.
+            continue
+        accepted_by_machine.setdefault(rental.machine_id, []).append(rental)
+        approved.append(rental)
+
+    now = timezone.now()
+    for rental in approved:
+        rental.status = 'approved'
+        rental.workflow_state = 'approved'
+        rental.payment_verified = False
+        rental.verified_by = None
+        rental.verification_date = None
+        rental.payment_status = 'pending'
+        if rental.payment_type == 'in_kind':
+            rental.settlement_type = 'after_harvest'
+            rental.settlement_status = (
+                'waiting_for_delivery'
+                if rental.organization_share_required and rental.organization_share_required > 0
+                else 'pending'
+            )
+        rental.updated_at = now
+    if approved:
+        Rental.objects.bulk_update(approved, APPROVAL_UPDATE_FIELDS)
+        for rental in approved:
+            rental.reset_tracked_fields(APPROVAL_UPDATE_FIELDS)
+        _ensure_pending_rental_payments([rental for rental in approved if rental.payment_type != 'in_kind'])
+
+    cancelled, notifications = _cancel_pending_overlaps(approved, admin_user)
+    for rental in approved:
+        notifications.append(outbox.notification(
+            user=rental.user,
+            notification_type='rental_approved',
+            message=(
+                f'Your rental for {rental.machine.name} has been approved. '
+                f'Payment type: {rental.workflow_payment_type_display}.'
+            ),
+            related_object_id=rental.id
+        ))
+
+    dispatch_rental_status_changes(
+        [(rental, 'pending') for rental in approved + cancelled],
+        notifications,
+    )
+    return approved, skipped, cancelled
+
+
 @login_required
 @user_passes_test(_is_admin)
-@transaction.atomic
 def bulk_approve_rentals(request):
     """Bulk-approve pending rentals using the same approval-first workflow."""
     if request.method != 'POST':
@@ -2465,68 +2612,21 @@ def bulk_approve_rentals(request):
         messages.warning(request, 'No rentals selected')
         return redirect('machines:admin_rental_dashboard')
 
-    approved_count = 0
-    failed_count = 0
-
-    for rental_id in rental_ids:
-        try:
-            rental = Rental.objects.select_for_update().get(pk=rental_id)
-            if rental.status != 'pending':
-                failed_count += 1
-                messages.warning(request, f'Skipped Rental #{rental_id}: Only pending rentals can be approved')
-                continue
-
-            is_available, _ = Rental.check_availability_for_approval(
-                rental.machine,
-                rental.start_date,
-                rental.end_date,
-                exclude_rental_id=rental.id
-            )
-            if not is_available:
-                failed_count += 1
-                messages.warning(request, f'Skipped Rental #{rental_id}: Has conflicts')
-                continue
-
-            rental.status = 'approved'
-            rental.workflow_state = 'approved'
-            rental.payment_verified = False
-            rental.verified_by = None
-            rental.verification_date = None
-
-            if rental.payment_type == 'in_kind':
-                rental.payment_status = 'pending'
-                rental.settlement_type = 'after_harvest'
-                rental.settlement_status = (
-                    'waiting_for_delivery'
-                    if rental.organization_share_required and rental.organization_share_required > 0
-                    else 'pending'
-                )
-            else:
-                rental.payment_status = 'pending'
+    with transaction.atomic():
+        approved, skipped, cancelled = _bulk_approve_pending_rentals(rental_ids, request.user)
 
-            rental.save()
-
-            if rental.payment_type != 'in_kind':
-                _ensure_rental_payment_record(rental, status='pending', amount=rental.payment_amount)
-
-            UserNotification.objects.create(
-                user=rental.user,
-                notification_type='rental_approved',
-                message=(
-                    f'Your rental for {rental.machine.name} has been approved. '
-                    f'Payment type: {rental.workflow_payment_type_display}.'
-                ),
-                related_object_id=rental.id
-            )
-            approved_count += 1
-        except Exception as exc:
-            failed_count += 1
-            messages.error(request, f'Error approving Rental #{rental_id}: {exc}')
-
-    if approved_count:
-        messages.success(request, f'Successfully approved {approved_count} rental(s)')
-    if failed_count:
-        messages.warning(request, f'Failed to approve {failed_count} rental(s)')
+    for rental_id, reason in skipped:
+        messages.warning(request, f'Skipped Rental #{rental_id}: {reason}')
+    if approved:
+        messages.success(request, f'Successfully approved {len(approved)} rental(s)')
+    if cancelled:
+        messages.info(
+            request,
+            f'{len(cancelled)} overlapping pending request'
+            f'{"s were" if len(cancelled) != 1 else " was"} automatically cancelled.'
+        )
+    if skipped:
+        messages.warning(request, f'Failed to approve {len(skipped)} rental(s)')
 
     return redirect('machines:admin_rental_dashboard')
 
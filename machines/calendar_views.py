@@ -6,41 +6,38 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
-from datetime import datetime, timedelta
-from .models import Machine, Rental, Maintenance
+from django.utils.cache import get_conditional_response, patch_cache_control
+from datetime import date, datetime, timedelta
+from .models import Machine, MachineCalendarSnapshot
 
 
-def _calendar_rental_title(rental):
-    if (rental.purpose or '').startswith('Package:'):
-        return 'Package Reserve'
-    return 'Approved Booking' if rental.status == 'approved' else 'Pending Request'
-
-
-def _calendar_user_can_view_private_statuses(request, rental):
+def _calendar_user_can_view_private_statuses(request, period):
     return (
         request.user.is_staff or
         request.user.is_superuser or
-        rental.user_id == request.user.id
+        period['user_id'] == request.user.id
     )
 
 
-def _get_schedule_blocking_rentals(*, machine=None, start_date=None, end_date=None):
-    rentals = Rental.objects.filter(status='approved').exclude(
-        workflow_state__in=['completed', 'cancelled']
-    ).select_related('user', 'machine')
+def _calendar_viewer_scope(request):
+    if request.user.is_staff or request.user.is_superuser:
+        return 'staff'
+    return f'user:{request.user.id}'
 
-    if machine is not None:
-        rentals = rentals.filter(machine=machine)
-    if end_date is not None:
-        rentals = rentals.filter(start_date__lte=end_date)
 
-    if start_date is None or end_date is None:
-        return [rental for rental in rentals if rental.is_schedule_blocking]
+def _exclusive_end(iso_date):
+    # FullCalendar end is exclusive
+    return (date.fromisoformat(iso_date) + timedelta(days=1)).isoformat()
 
-    return [
-        rental for rental in rentals
-        if rental.is_schedule_blocking and rental.overlaps_schedule(start_date, end_date)
-    ]
+
+def _conditional_json(request, etag, build_events):
+    """Answer with 304 when the client's ETag still matches, else render the events."""
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse(build_events(), safe=False)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
 @login_required
@@ -65,112 +62,90 @@ def machine_calendar_events(request, machine_id):
             start_date = timezone.now().date()
             end_date = start_date + timedelta(days=90)
         
-        events = []
-        
-        approved_rentals = _get_schedule_blocking_rentals(
-            machine=machine,
-            start_date=start_date,
-            end_date=end_date,
-        )
+        snapshot = MachineCalendarSnapshot.for_machine(machine)
+        etag = snapshot.etag(start_date, end_date, _calendar_viewer_scope(request))
 
-        for rental in approved_rentals:
-            events.append({
-                'id': f'rental-{rental.id}',
-                'title': _calendar_rental_title(rental),
-                'start': rental.start_date.isoformat(),
-                'end': ((rental.effective_end_date or rental.end_date) + timedelta(days=1)).isoformat(),  # FullCalendar end is exclusive
-                'backgroundColor': '#16a34a',
-                'borderColor': '#16a34a',
-                'textColor': '#ffffff',
-                'extendedProps': {
-                    'type': 'rental',
-                    'status': 'approved',
-                    'rentalId': rental.id,
-                    'userName': rental.customer_display_name,
-                    'visibility': 'shared',
-                }
-            })
-        
-        # Get pending rentals (shown differently)
-        pending_rentals = Rental.objects.filter(
-            machine=machine,
-            status='pending',
-            start_date__lte=end_date,
-            end_date__gte=start_date
-        ).select_related('user')
-
-        for rental in pending_rentals:
-            events.append({
-                'id': f'rental-pending-{rental.id}',
-                'title': _calendar_rental_title(rental),
-                'start': rental.start_date.isoformat(),
-                'end': (rental.end_date + timedelta(days=1)).isoformat(),
-                'backgroundColor': '#facc15',
-                'borderColor': '#eab308',
-                'textColor': '#422006',
-                'extendedProps': {
-                    'type': 'rental',
-                    'status': 'pending',
-                    'rentalId': rental.id,
-                    'userName': rental.customer_display_name,
-                    'visibility': 'shared',
-                }
-            })
+        def build_events():
+            events = []
 
-        private_status_rentals = Rental.objects.filter(
-            machine=machine,
-            status__in=['rejected', 'cancelled'],
-            start_date__lte=end_date,
-            end_date__gte=start_date
-        ).select_related('user')
-
-        for rental in private_status_rentals:
-            if not _calendar_user_can_view_private_statuses(request, rental):
-                continue
-
-            is_rejected = rental.status == 'rejected'
-            events.append({
-                'id': f'rental-private-{rental.id}',
-                'title': 'Rejected Request' if is_rejected else 'Cancelled Request',
-                'start': rental.start_date.isoformat(),
-                'end': (rental.end_date + timedelta(days=1)).isoformat(),
-                'backgroundColor': '#ef4444' if is_rejected else '#94a3b8',
-                'borderColor': '#dc2626' if is_rejected else '#64748b',
-                'textColor': '#ffffff',
-                'extendedProps': {
-                    'type': 'rental',
-                    'status': rental.status,
-                    'rentalId': rental.id,
-                    'userName': rental.customer_display_name,
-                    'visibility': 'private',
-                }
-            })
-        
-        # Get maintenance schedules
-        maintenances = Maintenance.objects.filter(
-            machine=machine,
-            status__in=['scheduled', 'in_progress'],
-            start_date__date__lte=end_date,
-            end_date__date__gte=start_date
-        )
-        
-        for maintenance in maintenances:
-            events.append({
-                'id': f'maintenance-{maintenance.id}',
-                'title': f'Maintenance: {maintenance.get_maintenance_type_display()}',
-                'start': maintenance.start_date.date().isoformat(),
-                'end': (maintenance.end_date.date() + timedelta(days=1)).isoformat() if maintenance.end_date else None,
-                'backgroundColor': '#fd7e14',  # Orange for maintenance
-                'borderColor': '#fd7e14',
-                'textColor': '#ffffff',
-                'extendedProps': {
-                    'type': 'maintenance',
-                    'maintenanceId': maintenance.id,
-                    'maintenanceType': maintenance.maintenance_type,
-                }
-            })
-        
-        return JsonResponse(events, safe=False)
+            for period in snapshot.overlapping(start_date, end_date, kinds={'rental'}, blocking=True, effective=True):
+                events.append({
+                    'id': f"rental-{period['id']}",
+                    'title': period['title'],
+                    'start': period['start'],
+                    'end': _exclusive_end(period['effective_end']),
+                    'backgroundColor': '#16a34a',
+                    'borderColor': '#16a34a',
+                    'textColor': '#ffffff',
+                    'extendedProps': {
+                        'type': 'rental',
+                        'status': 'approved',
+                        'rentalId': period['id'],
+                        'userName': period['customer_name'],
+                        'visibility': 'shared',
+                    }
+                })
+
+            # Pending rentals are shown differently
+            for period in snapshot.overlapping(start_date, end_date, kinds={'rental'}, statuses={'pending'}):
+                events.append({
+                    'id': f"rental-pending-{period['id']}",
+                    'title': period['title'],
+                    'start': period['start'],
+                    'end': _exclusive_end(period['end']),
+                    'backgroundColor': '#facc15',
+                    'borderColor': '#eab308',
+                    'textColor': '#422006',
+                    'extendedProps': {
+                        'type': 'rental',
+                        'status': 'pending',
+                        'rentalId': period['id'],
+                        'userName': period['customer_name'],
+                        'visibility': 'shared',
+                    }
+                })
+
+            for period in snapshot.overlapping(start_date, end_date, kinds={'rental'}, statuses={'rejected', 'cancelled'}):
+                if not _calendar_user_can_view_private_statuses(request, period):
+                    continue
+
+                is_rejected = period['status'] == 'rejected'
+                events.append({
+                    'id': f"rental-private-{period['id']}",
+                    'title': 'Rejected Request' if is_rejected else 'Cancelled Request',
+                    'start': period['start'],
+                    'end': _exclusive_end(period['end']),
+                    'backgroundColor': '#ef4444' if is_rejected else '#94a3b8',
+                    'borderColor': '#dc2626' if is_rejected else '#64748b',
+                    'textColor': '#ffffff',
+                    'extendedProps': {
+                        'type': 'rental',
+                        'status': period['status'],
+                        'rentalId': period['id'],
+                        'userName': period['customer_name'],
+                        'visibility': 'private',
+                    }
+                })
+
+            for period in snapshot.overlapping(start_date, end_date, kinds={'maintenance'}):
+                events.append({
+                    'id': f"maintenance-{period['id']}",
+                    'title': f"Maintenance: {period['maintenance_type_display']}",
+                    'start': period['start'],
+                    'end': _exclusive_end(period['end']),
+                    'backgroundColor': '#fd7e14',  # Orange for maintenance
+                    'borderColor': '#fd7e14',
+                    'textColor': '#ffffff',
+                    'extendedProps': {
+                        'type': 'maintenance',
+                        'maintenanceId': period['id'],
+                        'maintenanceType': period['maintenance_type'],
+                    }
+                })
+
+            return events
+
+        return _conditional_json(request, etag, build_events)
         
     except Machine.DoesNotExist:
         return JsonResponse({'error': 'Machine not found'}, status=404)
@@ -196,57 +171,62 @@ def all_machines_calendar_events(request):
             start_date = timezone.now().date()
             end_date = start_date + timedelta(days=90)
         
-        events = []
-        
-        approved_rentals = _get_schedule_blocking_rentals(
-            start_date=start_date,
-            end_date=end_date,
+        snapshots = MachineCalendarSnapshot.for_machines()
+        machine_names = dict(Machine.objects.values_list('pk', 'name'))
+        etag = MachineCalendarSnapshot.combined_etag(
+            snapshots.values(),
+            start_date,
+            end_date,
+            sorted(machine_names.items()),
         )
-        pending_rentals = Rental.objects.filter(
-            status='pending',
-            start_date__lte=end_date,
-            end_date__gte=start_date
-        ).select_related('user', 'machine')
-
-        for rental in approved_rentals:
-            events.append({
-                'id': f'rental-{rental.id}',
-                'title': f'{rental.machine.name} - {_calendar_rental_title(rental)}',
-                'start': rental.start_date.isoformat(),
-                'end': ((rental.effective_end_date or rental.end_date) + timedelta(days=1)).isoformat(),
-                'backgroundColor': '#16a34a',
-                'borderColor': '#16a34a',
-                'textColor': '#ffffff',
-                'extendedProps': {
-                    'type': 'rental',
-                    'status': 'approved',
-                    'machineId': rental.machine.id,
-                    'machineName': rental.machine.name,
-                    'rentalId': rental.id,
-                    'userName': rental.customer_display_name,
-                }
-            })
 
-        for rental in pending_rentals:
-            events.append({
-                'id': f'rental-pending-{rental.id}',
-                'title': f'{rental.machine.name} - {_calendar_rental_title(rental)}',
-                'start': rental.start_date.isoformat(),
-                'end': (rental.end_date + timedelta(days=1)).isoformat(),
-                'backgroundColor': '#facc15',
-                'borderColor': '#eab308',
-                'textColor': '#422006',
-                'extendedProps': {
-                    'type': 'rental',
-                    'status': 'pending',
-                    'machineId': rental.machine.id,
-                    'machineName': rental.machine.name,
-                    'rentalId': rental.id,
-                    'userName': rental.customer_display_name,
-                }
-            })
-        
-        return JsonResponse(events, safe=False)
+        def build_events():
+            # One rebuild for every machine when the range reaches past the snapshot window.
+            MachineCalendarSnapshot.load_history(snapshots.values(), start_date)
+            approved_events = []
+            pending_events = []
+            for machine_id, snapshot in sorted(snapshots.items()):
+                machine_name = machine_names.get(machine_id, '')
+                for period in snapshot.overlapping(start_date, end_date, kinds={'rental'}, blocking=True, effective=True):
+                    approved_events.append({
+                        'id': f"rental-{period['id']}",
+                        'title': f"{machine_name} - {period['title']}",
+                        'start': period['start'],
+                        'end': _exclusive_end(period['effective_end']),
+                        'backgroundColor': '#16a34a',
+                        'borderColor': '#16a34a',
+                        'textColor': '#ffffff',
+                        'extendedProps': {
+                            'type': 'rental',
+                            'status': 'approved',
+                            'machineId': machine_id,
+                            'machineName': machine_name,
+                            'rentalId': period['id'],
+                            'userName': period['customer_name'],
+                        }
+                    })
+
+                for period in snapshot.overlapping(start_date, end_date, kinds={'rental'}, statuses={'pending'}):
+                    pending_events.append({
+                        'id': f"rental-pending-{period['id']}",
+                        'title': f"{machine_name} - {period['title']}",
+                        'start': period['start'],
+                        'end': _exclusive_end(period['end']),
+                        'backgroundColor': '#facc15',
+                        'borderColor': '#eab308',
+                        'textColor': '#422006',
+                        'extendedProps': {
+                            'type': 'rental',
+                            'status': 'pending',
+                            'machineId': machine_id,
+                            'machineName': machine_name,
+                            'rentalId': period['id'],
+                            'userName': period['customer_name'],
+                        }
+                    })
+            return approved_events + pending_events
+
+        return _conditional_json(request, etag, build_events)
         
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
@@ -303,50 +283,41 @@ def check_date_availability(request):
         else:
             exclude_rental_id = None
 
-        is_available, approved_conflicts = Rental.check_availability(
-            machine=machine,
-            start_date=start_date,
-            end_date=end_date,
-            exclude_rental_id=exclude_rental_id,
-        )
+        snapshot = MachineCalendarSnapshot.for_machine(machine)
+
+        def other_rentals(**filters):
+            return [
+                period for period in snapshot.overlapping(start_date, end_date, kinds={'rental'}, **filters)
+                if period['id'] != exclude_rental_id
+            ]
 
-        if not is_available:
-            conflict = approved_conflicts.first()
-            conflict_end = conflict.effective_end_date or conflict.end_date
+        approved_conflicts = other_rentals(blocking=True, effective=True)
+        if approved_conflicts:
+            conflict = approved_conflicts[0]
             return JsonResponse({
                 'available': False,
-                'message': f'Machine is already booked from {conflict.start_date} to {conflict_end}',
+                'message': f"Machine is already booked from {conflict['start']} to {conflict['effective_end']}",
                 'conflict': {
-                    'start_date': conflict.start_date.isoformat(),
-                    'end_date': conflict_end.isoformat(),
+                    'start_date': conflict['start'],
+                    'end_date': conflict['effective_end'],
                     'status': 'approved',
-                    'title': _calendar_rental_title(conflict),
+                    'title': conflict['title'],
                 }
             })
 
-        pending_conflicts = Rental.get_pending_overlaps(
-            machine=machine,
-            start_date=start_date,
-            end_date=end_date,
-            exclude_rental_id=exclude_rental_id,
-        )
+        pending_conflicts = other_rentals(statuses={'pending'})
         
         # Check maintenance
-        maintenance_conflicts = Maintenance.objects.filter(
-            machine=machine,
-            status__in=['scheduled', 'in_progress'],
-            start_date__date__lte=end_date,
-            end_date__date__gte=start_date
-        )
+        maintenance_conflicts = snapshot.overlapping(start_date, end_date, kinds={'maintenance'})
         
-        if maintenance_conflicts.exists():
-            maintenance = maintenance_conflicts.first()
+        if maintenance_conflicts:
+            maintenance = maintenance_conflicts[0]
             return JsonResponse({
                 'available': False,
                 'message': 'Machine has scheduled maintenance during this period',
                 'maintenance': {
-                    'start_date': maintenance.start_date.date().isoformat(),
-                    'end_date': maintenance.end_date.date().isoformat() if maintenance.end_date else None,
+                    'start_date': maintenance['start'],
+                    'end_date': maintenance['end'],
                 }
             })
         
@@ -356,9 +327,9 @@ def check_date_availability(request):
             'rental_days': (end_date - start_date).days + 1,
             'warning': (
                 'This date has a pending request. It may not be available.'
-                if pending_conflicts.exists() else ''
+                if pending_conflicts else ''
             ),
-            'pending_conflict_count': pending_conflicts.count(),
+            'pending_conflict_count': len(pending_conflicts),
         })
         
     except Machine.DoesNotExist:
@@ -371,3 +342,57 @@ def check_date_availability(request):
             'available': False,
             'message': f'Error: {str(e)}'
         }, status=500)
+
+
+@login_required
+@require_http_methods(["GET"])
+def next_available_slots(request):
+    """
+    Suggest the earliest free start on every machine of a category
+    Used by the rental form to offer alternatives when a date is taken
+    """
+    from .utils import AvailabilityChecker
+
+    category = request.GET.get('category', '').strip()
+    machine_id = request.GET.get('machine_id', '').strip()
+
+    try:
+        duration_days = int(request.GET.get('days') or 1)
+        start_str = request.GET.get('start')
+        start_date = datetime.strptime(start_str, '%Y-%m-%d').date() if start_str else None
+    except ValueError:
+        return JsonResponse({'error': 'Invalid days or start date'}, status=400)
+
+    if duration_days < 1 or duration_days > 60:
+        return JsonResponse({'error': 'Duration must be between 1 and 60 days'}, status=400)
+
+    if machine_id:
+        machine = Machine.objects.filter(pk=machine_id).first() if machine_id.isdigit() else None
+        if machine is None:
+            return JsonResponse({'error': 'Machine not found'}, status=404)
+        category = machine.resolved_machine_category
+    if not category:
+        return JsonResponse({'error': 'A machine category or machine_id is required'}, status=400)
+
+    today = timezone.localdate()
+    if start_date is None or start_date < today:
+        start_date = today
+
+    result = AvailabilityChecker.find_next_available_slots(category, duration_days, start_date=start_date)
+
+    def serialize(slot):
+        return {
+            'machine_id': slot['machine'].pk,
+            'machine_name': slot['machine'].name,
+            'start_date': slot['start_date'].isoformat(),
+            'end_date': slot['end_date'].isoformat(),
+        }
+
+    return JsonResponse({
+        'category': result['category'],
+        'category_label': result['category_label'],
+        'duration_days': result['duration_days'],
+        'start_date': result['start_date'].isoformat(),
+        'best': serialize(result['best']) if result['best'] else None,
+        'machines': [serialize(slot) for slot in result['slots']],
+    })
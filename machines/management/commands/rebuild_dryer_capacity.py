@@ -0,0 +1,28 @@
+"""
+Management command to rebuild the per-day dryer capacity ledger.
+
+The ledger is maintained by DryerRental signals; run this after bulk
+imports or raw queryset updates that bypass them.
+"""
+
+from django.core.management.base import BaseCommand
+from machines.models import DryerCapacityDay
+
+
+class Command(BaseCommand):
+    help = 'Recompute DryerCapacityDay rows from approved and active dryer bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--machine',
+            type=int,
+            action='append',
+            dest='machine_ids',
+            help='Only rebuild this dryer (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        row_count = DryerCapacityDay.rebuild(machine_ids=options['machine_ids'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {row_count} dryer capacity day row(s).')
+        )
@@ -2,11 +2,14 @@
 Management command to sync overdue rental workflow states.
 This command identifies rentals that have passed their end date
 but are not yet completed and marks them as overdue.
+
+Schedule it shortly after midnight so the date rollover is handled here
+instead of by the first admin page view of the day.
 """
 
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from machines.models import Rental
+from machines.models import Rental, RentalScheduleSync
 
 
 class Command(BaseCommand):
@@ -46,6 +49,7 @@ class Command(BaseCommand):
         # Use the existing sync method
         if not dry_run:
             updated_ids = Rental.sync_overdue_workflow_states(today=target_date)
+            RentalScheduleSync.claim(target_date)
             updated_count = len(updated_ids) if updated_ids else 0
             self.stdout.write(
                 self.style.SUCCESS(f'Updated {updated_count} rental(s) workflow states')
@@ -6,8 +6,10 @@ Usage:
     python manage.py update_rental_status
 """
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
-from machines.models import Rental, Machine
+from machines.models import Rental, Machine, MachineCalendarSnapshot
+from users.models import DashboardMonthlyCount
 from django.db.models import Q
 
 
@@ -41,7 +43,17 @@ class Command(BaseCommand):
                 self.stdout.write(f'  - {rental.machine.name}: {rental.start_date} to {rental.end_date}')
             
             if not dry_run:
-                expired_rentals.update(status='completed')
+                expired_machine_ids = set(expired_rentals.values_list('machine_id', flat=True))
+                count_keys = [
+                    DashboardMonthlyCount.key_for(DashboardMonthlyCount.ENTITY_RENTAL, rental)
+                    for rental in expired_rentals
+                ]
+                with transaction.atomic():
+                    expired_rentals.update(status='completed')
+                    DashboardMonthlyCount.apply_changes(
+                        (key, key._replace(status='completed')) for key in count_keys if key
+                    )
+                MachineCalendarSnapshot.invalidate(expired_machine_ids)
                 self.stdout.write(self.style.SUCCESS(f'✓ Marked {expired_count} rentals as completed'))
         else:
             self.stdout.write('No expired rentals found')
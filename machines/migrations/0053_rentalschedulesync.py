@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machines', '0052_alter_ricemillappointment_booking_source'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RentalScheduleSync',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(default='rental_schedule', max_length=50, unique=True)),
+                ('synced_on', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Rental Schedule Sync',
+                'verbose_name_plural': 'Rental Schedule Syncs',
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machines', '0053_rentalschedulesync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MachineCalendarSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('built_version', models.PositiveIntegerField(blank=True, null=True)),
+                ('built_on', models.DateField(blank=True, null=True)),
+                ('periods', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('machine', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='calendar_snapshot', to='machines.machine')),
+            ],
+            options={
+                'verbose_name': 'Machine Calendar Snapshot',
+                'verbose_name_plural': 'Machine Calendar Snapshots',
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_latest_payment(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Payment = apps.get_model('bufia', 'Payment')
+
+    for model_name in ('rental', 'ricemillappointment', 'dryerrental'):
+        content_type = ContentType.objects.filter(app_label='machines', model=model_name).first()
+        if content_type is None:
+            continue
+        newest_payment = Payment.objects.filter(
+            content_type=content_type,
+            object_id=models.OuterRef('pk'),
+        ).order_by('-created_at', '-pk').values('pk')[:1]
+        apps.get_model('machines', model_name).objects.update(
+            latest_payment=models.Subquery(newest_payment),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('bufia', '0007_alter_payment_payment_type'),
+        ('machines', '0054_machinecalendarsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dryerrental',
+            name='latest_payment',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Newest linked payment, kept in sync by Payment.save()/delete().', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='bufia.payment'),
+        ),
+        migrations.AddField(
+            model_name='rental',
+            name='latest_payment',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Newest linked payment, kept in sync by Payment.save()/delete().', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='bufia.payment'),
+        ),
+        migrations.AddField(
+            model_name='ricemillappointment',
+            name='latest_payment',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Newest linked payment, kept in sync by Payment.save()/delete().', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='bufia.payment'),
+        ),
+        migrations.RunPython(backfill_latest_payment, migrations.RunPython.noop),
+    ]
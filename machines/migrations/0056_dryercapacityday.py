@@ -0,0 +1,85 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:14
+
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+CAPACITY_LOCKED_STATUSES = ('approved', 'in_progress', 'paid', 'confirmed', 'ongoing')
+
+
+def _quantity_in_sacks(raw_quantity):
+    # Mirrors DryerRental.parse_quantity_to_sacks at the time of this migration.
+    raw = str(raw_quantity or '').strip().lower().replace(',', '')
+    match = re.search(r'(\d+(?:\.\d+)?)\s*(?:sacks?|bags?)', raw) or re.search(r'(\d+(?:\.\d+)?)', raw)
+    if not match:
+        return None
+    try:
+        return Decimal(match.group(1)).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError, TypeError):
+        return None
+
+
+def backfill_dryer_capacity(apps, schema_editor):
+    DryerRental = apps.get_model('machines', 'DryerRental')
+    DryerCapacityDay = apps.get_model('machines', 'DryerCapacityDay')
+
+    totals = {}
+    rentals = DryerRental.objects.filter(
+        rental_type='until_dried',
+        status__in=CAPACITY_LOCKED_STATUSES,
+    ).select_related('machine')
+    for rental in rentals.iterator():
+        sacks = _quantity_in_sacks(rental.quantity)
+        if sacks is None or sacks <= 0:
+            continue
+        last_day = rental.estimated_end_date or rental.rental_date
+        if not rental.estimated_end_date and rental.machine.machine_type == 'solar_dryer' and rental.estimated_drying_days:
+            last_day = rental.rental_date + timedelta(days=max(rental.estimated_drying_days - 1, 0))
+        day = rental.rental_date
+        while day <= last_day:
+            used, count = totals.get((rental.machine_id, day), (Decimal('0.00'), 0))
+            totals[(rental.machine_id, day)] = (used + sacks, count + 1)
+            day += timedelta(days=1)
+
+    DryerCapacityDay.objects.bulk_create(
+        [
+            DryerCapacityDay(machine_id=machine_id, day=day, used_sacks=used, rental_count=count)
+            for (machine_id, day), (used, count) in sorted(totals.items())
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machines', '0055_rental_latest_payment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DryerCapacityDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('used_sacks', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('rental_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('machine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dryer_capacity_days', to='machines.machine')),
+            ],
+            options={
+                'verbose_name': 'Dryer Capacity Day',
+                'verbose_name_plural': 'Dryer Capacity Days',
+                'ordering': ['machine', 'day'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dryercapacityday',
+            constraint=models.UniqueConstraint(fields=('machine', 'day'), name='unique_dryer_capacity_day'),
+        ),
+        migrations.RunPython(backfill_dryer_capacity, migrations.RunPython.noop),
+    ]
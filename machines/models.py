@@ -1,8 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+import hashlib
 import math
 import os
 from django.utils.text import slugify
@@ -10,7 +11,9 @@ import random
 import re
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from datetime import timedelta
-from django.db.models import Q, Sum
+from django.db.models import F, Prefetch, Q, Sum, prefetch_related_objects
+
+from bufia.utils.field_tracker import FieldTrackerMixin
 
 
 def _format_quantity_display(value):
@@ -80,7 +83,48 @@ def machine_image_upload_path(instance, filename):
     # Return the file path
     return os.path.join(directory, f"{filename}.{ext}")
 
-class Machine(models.Model):
+
+def prefetch_latest_payments(objects, queryset=None):
+    """
+    Resolve ``latest_payment`` for a batch of rentals, appointments or dryer
+    rentals with one query, so per-row payment lookups hit no database.
+    """
+    objects = list(objects)
+    if objects:
+        lookup = Prefetch('latest_payment', queryset=queryset) if queryset is not None else 'latest_payment'
+        prefetch_related_objects(objects, lookup)
+    return objects
+
+
+def get_linked_payment(instance):
+    """
+    Newest payment for ``instance``, read through its denormalized pointer.
+
+    ``Payment.save()`` sets the pointer on the row and on the linked object
+    when it is loaded, so a null pointer means no payment and costs no query.
+    """
+    return instance.latest_payment
+
+
+class LatestPaymentPointerMixin:
+    """
+    Leave ``latest_payment`` out of the UPDATE of a full save.
+
+    ``Payment.save()``/``delete()`` move the pointer with a direct update, so
+    an instance loaded before that would write its stale value back. Only a
+    save naming the pointer in ``update_fields`` writes it.
+    """
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        if update_fields is None:
+            values = [value for value in values if value[0].name != 'latest_payment']
+        return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
+
+class Machine(FieldTrackerMixin, models.Model):
+    # Stored values read by the status-tracking signals in machines.signals.
+    tracked_fields = ('status',)
+
     MACHINE_CATEGORY_CHOICES = [
         ('tractor', 'Tractor'),
         ('transplanter', 'Transplanter'),
@@ -698,14 +742,18 @@ class Machine(models.Model):
     
     def get_display_image_url(self):
         """Return the URL of the primary image or the first available image"""
+        # Read the images once so a prefetched ``images`` relation is reused
+        images = list(self.images.all())
+
         # First, check if there's a primary image
-        for image in self.images.filter(is_primary=True):
-            image_url = self._safe_file_url(image.image)
-            if image_url:
-                return image_url
+        for image in images:
+            if image.is_primary:
+                image_url = self._safe_file_url(image.image)
+                if image_url:
+                    return image_url
         
         # If no primary image, check if there are any other images
-        for image in self.images.all():
+        for image in images:
             image_url = self._safe_file_url(image.image)
             if image_url:
                 return image_url
@@ -782,7 +830,9 @@ class MachineImage(models.Model):
             print(f"Error saving MachineImage: {e}")
             raise
 
-class Rental(models.Model):
+class Rental(FieldTrackerMixin, LatestPaymentPointerMixin, models.Model):
+    tracked_fields = ('status', 'machine', 'user')
+
     STATUS_CHOICES = [
         ('pending', 'Pending Approval'),
         ('approved', 'Approved'),
@@ -912,6 +962,15 @@ class Rental(models.Model):
     amount_paid = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, help_text="Actual amount received")
     or_number = models.CharField(max_length=100, blank=True, help_text="Official Receipt Number")
     payment_notes = models.TextField(blank=True, help_text="Payment recording notes")
+    latest_payment = models.ForeignKey(
+        'bufia.Payment',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        help_text="Newest linked payment, kept in sync by Payment.save()/delete().",
+    )
     
     field_location = models.CharField(max_length=255, blank=True, null=True)
     settlement_type = models.CharField(max_length=20, choices=Machine.SETTLEMENT_TYPE_CHOICES, default='immediate')
@@ -1649,7 +1708,7 @@ class Rental(models.Model):
         return pending_overlaps
     
     @classmethod
-    def check_availability(cls, machine, start_date, end_date, exclude_rental_id=None):
+    def check_availability(cls, machine, start_date, end_date, exclude_rental_id=None, schedule_index=None):
         """
         Check if a machine is available for the given date range.
         Only approved bookings should hard-block new requests.
@@ -1659,6 +1718,7 @@ class Rental(models.Model):
             start_date: Proposed rental start date
             end_date: Proposed rental end date
             exclude_rental_id: Rental ID to exclude (for updates)
+            schedule_index: Prebuilt MachineScheduleIndex to reuse across probes
         
         Returns:
             tuple: (is_available: bool, conflicting_rentals: QuerySet)
@@ -1668,6 +1728,7 @@ class Rental(models.Model):
             start_date,
             end_date,
             exclude_rental_id=exclude_rental_id,
+            schedule_index=schedule_index,
         )
 
     @classmethod
@@ -1770,26 +1831,6 @@ class Rental(models.Model):
             return (today - self.end_date).days
         return 0
     
-    @property
-    def get_transaction_id(self):
-        """Get the internal transaction ID from associated payment"""
-        from bufia.models import Payment
-        from django.contrib.contenttypes.models import ContentType
-        
-        try:
-            content_type = ContentType.objects.get_for_model(self)
-            payment = Payment.objects.filter(
-                content_type=content_type,
-                object_id=self.id
-            ).first()
-            
-            if payment and payment.internal_transaction_id:
-                return payment.internal_transaction_id
-        except Exception:
-            pass
-        
-        return None
-    
     @property
     def blocks_machine(self):
         """
@@ -1815,7 +1856,7 @@ class Rental(models.Model):
         return not is_available
     
     @classmethod
-    def check_availability_for_approval(cls, machine, start_date, end_date, exclude_rental_id=None):
+    def check_availability_for_approval(cls, machine, start_date, end_date, exclude_rental_id=None, schedule_index=None):
         """
         Check availability considering only APPROVED rentals
         Used when admin is approving a new rental
@@ -1825,95 +1866,187 @@ class Rental(models.Model):
             start_date,
             end_date,
             exclude_rental_id=exclude_rental_id,
+            schedule_index=schedule_index,
+        )
+
+    @classmethod
+    def schedule_blocking_q(cls):
+        """Database filter matching ``is_schedule_blocking``."""
+        return (
+            Q(status='approved')
+            & ~Q(workflow_state__in=['completed', 'cancelled'])
+            & ~Q(payment_type='in_kind', settlement_status='paid')
         )
 
     @classmethod
-    def _check_machine_schedule_availability(cls, machine, start_date, end_date, exclude_rental_id=None):
-        from django.db.models import Q
+    def blocking_overlaps(cls, machine, start_date, end_date, exclude_rental_id=None, *, today=None):
+        """
+        Approved rentals blocking ``[start_date, end_date]`` on ``machine``.
+
+        Single-probe counterpart of ``MachineScheduleIndex.blocking_rental_ids``:
+        one query on ``rental_availability_idx``, with unreturned overdue
+        rentals extending to ``today``.
+        """
+        if start_date is None or end_date is None:
+            return cls.objects.none()
 
-        latest_relevant_start = max(end_date, timezone.localdate())
-        candidates = cls.objects.filter(
+        today = today or timezone.localdate()
+        reaches_start = Q(end_date__gte=start_date)
+        if today >= start_date:
+            reaches_start |= Q(end_date__lt=today, actual_return_at__isnull=True)
+        overlapping = cls.objects.filter(
+            cls.schedule_blocking_q(),
+            reaches_start,
             machine=machine,
-            status='approved',
-            start_date__lte=latest_relevant_start,
-        ).exclude(
-            Q(status__in=['completed', 'cancelled', 'rejected']) |
-            Q(workflow_state__in=['completed', 'cancelled'])
+            start_date__lte=end_date,
         )
-
         if exclude_rental_id:
-            candidates = candidates.exclude(id=exclude_rental_id)
+            overlapping = overlapping.exclude(id=exclude_rental_id)
+        return overlapping.select_related('machine', 'user').order_by('start_date', 'end_date', 'id')
 
-        overlapping_ids = [
-            rental.id for rental in candidates
-            if rental.is_schedule_blocking and rental.overlaps_schedule(start_date, end_date)
-        ]
+    @classmethod
+    def _check_machine_schedule_availability(cls, machine, start_date, end_date, exclude_rental_id=None, schedule_index=None):
+        if schedule_index is None:
+            # A single probe is one indexed query; batch callers pass an index.
+            overlapping = cls.blocking_overlaps(machine, start_date, end_date, exclude_rental_id=exclude_rental_id)
+            return not overlapping.exists(), overlapping
+
+        overlapping_ids = schedule_index.blocking_rental_ids(
+            machine,
+            start_date,
+            end_date,
+            exclude_rental_id=exclude_rental_id,
+        )
         overlapping = cls.objects.filter(id__in=overlapping_ids).select_related('machine', 'user')
         return not overlapping_ids, overlapping
 
     @classmethod
-    def sync_overdue_workflow_states(cls, *, today=None):
-        today = today or timezone.localdate()
-        active_rentals = list(
-            cls.objects.select_related('machine', 'user').filter(status='approved').exclude(
-                Q(status__in=['completed', 'cancelled', 'rejected']) |
-                Q(workflow_state__in=['completed', 'cancelled'])
-            )
-        )
-
-        updated_ids = []
+    def bulk_check_availability_for_approval(cls, rentals, *, today=None):
+        """
+        Batch form of ``check_availability_for_approval``.
 
-        def _set_workflow_state(rental, new_state):
-            if rental.workflow_state == new_state:
-                return
-            cls.objects.filter(pk=rental.pk).update(
-                workflow_state=new_state,
-                updated_at=timezone.now(),
-            )
-            rental.workflow_state = new_state
-            updated_ids.append(rental.id)
+        Returns ``{rental_id: [conflicting Rental, ...]}`` for every rental in
+        ``rentals`` using two queries regardless of the batch size: one to load
+        the schedule of the machines involved and one to fetch the conflicts.
+        """
+        from .schedule_index import MachineScheduleIndex
 
-        overdue_rentals = []
-        for rental in active_rentals:
-            if rental.actual_return_at:
-                continue
-            if rental.end_date and today > rental.end_date:
-                overdue_rentals.append(rental)
-                _set_workflow_state(rental, 'overdue')
+        rentals = [rental for rental in rentals if rental.pk]
+        if not rentals:
+            return {}
 
-        overdue_by_machine = {}
-        for rental in overdue_rentals:
-            overdue_by_machine.setdefault(rental.machine_id, []).append(rental)
+        schedule_index = MachineScheduleIndex.build(
+            {rental.machine_id for rental in rentals},
+            today=today,
+        )
+        conflict_ids = schedule_index.blocking_conflicts(rentals)
+        needed_ids = {rental_id for ids in conflict_ids.values() for rental_id in ids}
+        conflicts_by_id = {}
+        if needed_ids:
+            conflicts_by_id = cls.objects.select_related('machine', 'user').in_bulk(needed_ids)
+
+        return {
+            rental.id: [
+                conflicts_by_id[conflict_id]
+                for conflict_id in conflict_ids.get(rental.id, [])
+                if conflict_id in conflicts_by_id
+            ]
+            for rental in rentals
+        }
 
-        for rental in active_rentals:
-            if rental.id in updated_ids:
-                rental.workflow_state = 'overdue'
+    @classmethod
+    def sync_overdue_workflow_states(cls, *, today=None, machine_ids=None):
+        """
+        Align overdue and conflict-review workflow states with ``today``.
 
-            if rental.is_terminal_state or rental.status != 'approved':
+        Only lightweight columns are loaded, target states are computed in
+        memory, and changed rows are written with one UPDATE per target state.
+        Pass ``machine_ids`` to limit the sync to machines whose schedule
+        changed. Returns the ids whose workflow state changed.
+        """
+        today = today or timezone.localdate()
+        active_rentals = cls.objects.filter(status='approved').exclude(
+            workflow_state__in=['completed', 'cancelled']
+        )
+        if machine_ids is not None:
+            active_rentals = active_rentals.filter(machine_id__in=machine_ids)
+
+        rows = list(active_rentals.values(
+            'id',
+            'machine_id',
+            'workflow_state',
+            'start_date',
+            'end_date',
+            'actual_return_at',
+            'payment_type',
+            'settlement_status',
+        ).order_by())
+
+        target_states = {row['id']: row['workflow_state'] for row in rows}
+        overdue_by_machine = {}
+        for row in rows:
+            if row['actual_return_at'] or not row['end_date']:
                 continue
+            if today > row['end_date']:
+                target_states[row['id']] = 'overdue'
+                overdue_by_machine.setdefault(row['machine_id'], []).append(row)
 
-            if rental.machine_id not in overdue_by_machine:
-                if rental.workflow_state == 'conflict_review':
-                    _set_workflow_state(rental, 'approved')
+        for row in rows:
+            if row['payment_type'] == 'in_kind' and row['settlement_status'] == 'paid':
                 continue
 
-            if any(
-                overdue.id != rental.id and overdue.overlaps_schedule(rental.start_date, rental.end_date)
-                for overdue in overdue_by_machine[rental.machine_id]
-            ):
-                _set_workflow_state(rental, 'conflict_review')
-            elif rental.workflow_state == 'conflict_review':
-                _set_workflow_state(rental, 'approved')
+            current_state = target_states[row['id']]
+            machine_overdue = overdue_by_machine.get(row['machine_id'], [])
+            # Overdue rentals keep the machine busy until today.
+            blocked = any(
+                overdue['id'] != row['id']
+                and overdue['start_date'] <= row['end_date']
+                and today >= row['start_date']
+                for overdue in machine_overdue
+            )
+            if blocked:
+                target_states[row['id']] = 'conflict_review'
+            elif current_state == 'conflict_review':
+                target_states[row['id']] = 'approved'
+
+        changes = {}
+        for row in rows:
+            new_state = target_states[row['id']]
+            if new_state != row['workflow_state']:
+                changes.setdefault(new_state, []).append(row['id'])
+
+        updated_ids = []
+        now = timezone.now()
+        for new_state, rental_ids in changes.items():
+            for offset in range(0, len(rental_ids), 500):
+                batch = rental_ids[offset:offset + 500]
+                cls.objects.filter(pk__in=batch).update(
+                    workflow_state=new_state,
+                    updated_at=now,
+                )
+            updated_ids.extend(rental_ids)
 
         return updated_ids
+
+    @classmethod
+    def ensure_schedule_states_current(cls, *, today=None):
+        """
+        Run the full overdue sync once per day, on the first call after the
+        date rolls over. Saves in between resync their own machine from the
+        rental post_save signal, so pages can read the stored workflow states.
+        The claim commits with the sync, so a failed sync leaves the day
+        unclaimed for the next caller.
+        """
+        today = today or timezone.localdate()
+        with transaction.atomic():
+            if not RentalScheduleSync.claim(today):
+                return []
+            return cls.sync_overdue_workflow_states(today=today)
     
     @property
     def payment(self):
         """Get associated payment record"""
-        from bufia.models import Payment
-        from django.contrib.contenttypes.models import ContentType
-        ct = ContentType.objects.get_for_model(self)
-        return Payment.objects.filter(content_type=ct, object_id=self.id).first()
+        return get_linked_payment(self)
     
     @property
     def transaction_id(self):
@@ -2139,7 +2272,9 @@ class PriceHistory(models.Model):
         ordering = ['-start_date']
         verbose_name_plural = 'Price Histories'
 
-class RiceMillAppointment(models.Model):
+class RiceMillAppointment(FieldTrackerMixin, LatestPaymentPointerMixin, models.Model):
+    tracked_fields = ('status',)
+
     BOOKING_SOURCE_MEMBER = 'member'
     BOOKING_SOURCE_NON_MEMBER = 'non_member'
     BOOKING_SOURCE_BUFIA_RICE_SHARE = 'bufia_rice_share'
@@ -2197,6 +2332,15 @@ class RiceMillAppointment(models.Model):
         null=True,
         blank=True
     )
+    latest_payment = models.ForeignKey(
+        'bufia.Payment',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        help_text="Newest linked payment, kept in sync by Payment.save()/delete().",
+    )
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
@@ -2241,20 +2385,9 @@ class RiceMillAppointment(models.Model):
     
     def get_transaction_id(self):
         """Get the internal transaction ID from associated payment"""
-        from bufia.models import Payment
-        from django.contrib.contenttypes.models import ContentType
-        
-        try:
-            content_type = ContentType.objects.get_for_model(self)
-            payment = Payment.objects.filter(
-                content_type=content_type,
-                object_id=self.id
-            ).first()
-            
-            if payment and payment.internal_transaction_id:
-                return payment.internal_transaction_id
-        except:
-            pass
+        payment = get_linked_payment(self)
+        if payment and payment.internal_transaction_id:
+            return payment.internal_transaction_id
 
         return None
 
@@ -2383,7 +2516,18 @@ class RiceMillAppointment(models.Model):
         super().save(*args, **kwargs)
 
 
-class DryerRental(models.Model):
+class DryerRental(FieldTrackerMixin, LatestPaymentPointerMixin, models.Model):
+    # Status plus the inputs of capacity_contribution().
+    tracked_fields = (
+        'status',
+        'machine',
+        'rental_date',
+        'rental_type',
+        'quantity',
+        'estimated_end_date',
+        'estimated_drying_days',
+    )
+
     FLATBED_MAX_CAPACITY_SACKS = Decimal('150.00')
     CAPACITY_LOCKED_STATUSES = ('approved', 'in_progress', 'paid', 'confirmed', 'ongoing')
     RENTAL_TYPE_CHOICES = [
@@ -2441,6 +2585,15 @@ class DryerRental(models.Model):
     )
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     payment_method = models.CharField(max_length=20, choices=PAYMENT_METHOD_CHOICES, null=True, blank=True)
+    latest_payment = models.ForeignKey(
+        'bufia.Payment',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        help_text="Newest linked payment, kept in sync by Payment.save()/delete().",
+    )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     parent_rental = models.ForeignKey(
         'self',
@@ -2659,6 +2812,20 @@ class DryerRental(models.Model):
     def uses_flatbed_capacity(self):
         return self.uses_shared_capacity
 
+    def capacity_contribution(self):
+        """Return ``(machine_id, first_day, last_day, sacks)`` while this booking holds shared dryer capacity."""
+        if (
+            not self.machine_id
+            or not self.rental_date
+            or self.rental_type != 'until_dried'
+            or self.status not in self.CAPACITY_LOCKED_STATUSES
+        ):
+            return None
+        quantity_in_sacks = self.quantity_in_sacks
+        if quantity_in_sacks is None or quantity_in_sacks <= 0:
+            return None
+        return self.machine_id, self.rental_date, self.estimated_service_end_date, quantity_in_sacks
+
     @classmethod
     def capacity_rentals_for_date(cls, machine, target_date, exclude_pk=None):
         if not machine or not machine.is_dryer_service() or not target_date:
@@ -2683,12 +2850,72 @@ class DryerRental(models.Model):
                 active_rentals.append(rental)
         return active_rentals
 
+    @classmethod
+    def used_dryer_capacity_by_day(cls, machine, start_date, end_date=None, exclude_pk=None):
+        """Sacks booked on each day of ``start_date..end_date``, read from the capacity ledger."""
+        if not machine or not machine.is_dryer_service() or not start_date:
+            return {}
+
+        end_date = max(end_date or start_date, start_date)
+        ledger = DryerCapacityDay.usage_by_day(machine.pk, start_date, end_date)
+        usage = {}
+        target_date = start_date
+        while target_date <= end_date:
+            usage[target_date] = ledger.get(target_date, Decimal('0.00'))
+            target_date += timedelta(days=1)
+
+        if exclude_pk:
+            excluded = cls.objects.select_related('machine').filter(pk=exclude_pk, machine_id=machine.pk).first()
+            contribution = excluded.capacity_contribution() if excluded else None
+            if contribution:
+                _, first_day, last_day, quantity_in_sacks = contribution
+                for target_date in usage:
+                    if first_day <= target_date <= last_day:
+                        usage[target_date] -= quantity_in_sacks
+
+        return {
+            target_date: max(used, Decimal('0.00')).quantize(Decimal('0.01'))
+            for target_date, used in usage.items()
+        }
+
+    @classmethod
+    def available_dryer_capacity_by_day(cls, machine, start_date, end_date=None, exclude_pk=None):
+        if not machine or not machine.is_dryer_service() or not start_date:
+            return {}
+        limit = machine.get_dryer_capacity_limit_sacks()
+        return {
+            target_date: max(limit - used, Decimal('0.00')).quantize(Decimal('0.01'))
+            for target_date, used in cls.used_dryer_capacity_by_day(
+                machine,
+                start_date,
+                end_date,
+                exclude_pk=exclude_pk,
+            ).items()
+        }
+
+    @classmethod
+    def first_capacity_shortfall(cls, machine, requested_sacks, start_date, end_date=None, exclude_pk=None):
+        """Return ``(date, available_sacks)`` for the first day that cannot fit ``requested_sacks``."""
+        if requested_sacks is None or requested_sacks <= 0:
+            return None
+        available_by_day = cls.available_dryer_capacity_by_day(
+            machine,
+            start_date,
+            end_date,
+            exclude_pk=exclude_pk,
+        )
+        for target_date in sorted(available_by_day):
+            if requested_sacks > available_by_day[target_date]:
+                return target_date, available_by_day[target_date]
+        return None
+
     @classmethod
     def used_dryer_capacity_for_date(cls, machine, target_date, exclude_pk=None):
-        used_capacity = Decimal('0.00')
-        for rental in cls.capacity_rentals_for_date(machine, target_date, exclude_pk=exclude_pk):
-            used_capacity += rental.quantity_in_sacks or Decimal('0.00')
-        return used_capacity.quantize(Decimal('0.01'))
+        return cls.used_dryer_capacity_by_day(
+            machine,
+            target_date,
+            exclude_pk=exclude_pk,
+        ).get(target_date, Decimal('0.00'))
 
     @classmethod
     def used_flatbed_capacity_for_date(cls, machine, target_date, exclude_pk=None):
@@ -2721,9 +2948,14 @@ class DryerRental(models.Model):
             return None
 
         requested_sacks = Decimal(str(requested_sacks)).quantize(Decimal('0.01'))
-        for offset in range(max(horizon_days, 0) + 1):
-            target_date = start_date + timedelta(days=offset)
-            if cls.available_dryer_capacity_for_date(machine, target_date, exclude_pk=exclude_pk) >= requested_sacks:
+        available_by_day = cls.available_dryer_capacity_by_day(
+            machine,
+            start_date,
+            start_date + timedelta(days=max(horizon_days, 0)),
+            exclude_pk=exclude_pk,
+        )
+        for target_date in sorted(available_by_day):
+            if available_by_day[target_date] >= requested_sacks:
                 return target_date
         return None
 
@@ -2757,16 +2989,9 @@ class DryerRental(models.Model):
         return self.status in ['pending', 'waiting_confirmation', 'approved'] and self.rental_date >= timezone.now().date()
 
     def get_transaction_id(self):
-        from bufia.models import Payment
-        from django.contrib.contenttypes.models import ContentType
-
-        try:
-            content_type = ContentType.objects.get_for_model(self)
-            payment = Payment.objects.filter(content_type=content_type, object_id=self.id).first()
-            if payment and payment.internal_transaction_id:
-                return payment.internal_transaction_id
-        except Exception:
-            pass
+        payment = get_linked_payment(self)
+        if payment and payment.internal_transaction_id:
+            return payment.internal_transaction_id
         return None
 
     def save(self, *args, **kwargs):
@@ -2890,6 +3115,8 @@ class RentalPackage(models.Model):
 
     @property
     def included_items_count(self):
+        if 'items' in getattr(self, '_prefetched_objects_cache', {}):
+            return sum(1 for item in self.items.all() if item.status != 'not_included')
         return self.items.exclude(status='not_included').count()
 
     @property
@@ -3412,6 +3639,392 @@ class Settlement(models.Model):
         return f"Settlement {self.settlement_reference} - {self.bufia_share} sacks"
 
 
+class RentalScheduleSync(models.Model):
+    """
+    Records the last day the rental overdue/conflict-review sync ran, so the
+    date-rollover sync is claimed by exactly one request or job per day.
+    """
+    key = models.CharField(max_length=50, unique=True, default='rental_schedule')
+    synced_on = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    DEFAULT_KEY = 'rental_schedule'
+
+    class Meta:
+        verbose_name = _('Rental Schedule Sync')
+        verbose_name_plural = _('Rental Schedule Syncs')
+
+    def __str__(self):
+        return f"{self.key}: {self.synced_on or 'never'}"
+
+    @classmethod
+    def claim(cls, today, key=DEFAULT_KEY):
+        """Atomically mark ``today`` as synced. Returns True for the caller that won."""
+        claimed = cls.objects.filter(key=key).filter(
+            Q(synced_on__isnull=True) | Q(synced_on__lt=today)
+        ).update(synced_on=today, updated_at=timezone.now())
+        if claimed:
+            return True
+        _, created = cls.objects.get_or_create(key=key, defaults={'synced_on': today})
+        return created
+
+
+class MachineCalendarSnapshot(models.Model):
+    """
+    Materialized blocked-date periods for one machine.
+
+    Calendar feeds and availability probes read ``periods`` instead of
+    rebuilding them from rentals and maintenance on every request. Rental and
+    maintenance signals bump ``version``; the payload is rebuilt lazily on the
+    next read, and once per day because overdue bookings stretch to today.
+
+    Only periods ending within ``LOOKBACK_DAYS`` of the build day are kept,
+    and approved rentals that no longer block (completed, cancelled or
+    settled in kind) are left out, since no feed shows them. Reads reaching
+    further back use periods rebuilt from the tables by ``load_history``,
+    once per request for every snapshot involved.
+    """
+    machine = models.OneToOneField(Machine, on_delete=models.CASCADE, related_name='calendar_snapshot')
+    version = models.PositiveIntegerField(default=1)
+    built_version = models.PositiveIntegerField(null=True, blank=True)
+    built_on = models.DateField(null=True, blank=True)
+    periods = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    RENTAL_STATUSES = ('approved', 'pending', 'rejected', 'cancelled')
+    MAINTENANCE_STATUSES = ('scheduled', 'in_progress')
+    LOOKBACK_DAYS = 90
+
+    class Meta:
+        verbose_name = _('Machine Calendar Snapshot')
+        verbose_name_plural = _('Machine Calendar Snapshots')
+
+    def __str__(self):
+        return f"{self.machine_id} v{self.version}"
+
+    def is_current(self, today):
+        return self.built_version == self.version and self.built_on == today
+
+    @classmethod
+    def invalidate(cls, machine_ids):
+        """Mark the snapshots of ``machine_ids`` stale so the next read rebuilds them."""
+        machine_ids = {machine_id for machine_id in machine_ids if machine_id}
+        if not machine_ids:
+            return 0
+        return cls.objects.filter(machine_id__in=machine_ids).update(
+            version=F('version') + 1,
+            updated_at=timezone.now(),
+        )
+
+    @staticmethod
+    def _rental_title(rental):
+        if (rental.purpose or '').startswith('Package:'):
+            return 'Package Reserve'
+        return 'Approved Booking' if rental.status == 'approved' else 'Pending Request'
+
+    @classmethod
+    def window_start(cls, today):
+        return today - timedelta(days=cls.LOOKBACK_DAYS)
+
+    @classmethod
+    def build_periods(cls, machine_ids, *, since):
+        """
+        Return ``{machine_id: [period, ...]}`` for periods ending on or after
+        ``since``, built with one query per source table.
+        """
+        periods = {machine_id: [] for machine_id in machine_ids}
+        if not periods:
+            return periods
+
+        # An approved rental never returned may still block today however
+        # long ago it was booked to end.
+        rentals = Rental.objects.filter(
+            Q(end_date__gte=since) | Q(status='approved', actual_return_at__isnull=True),
+            machine_id__in=periods,
+            status__in=cls.RENTAL_STATUSES,
+        ).exclude(
+            Q(status='approved')
+            & (Q(workflow_state__in=['completed', 'cancelled']) | Q(payment_type='in_kind', settlement_status='paid'))
+        ).select_related('user').order_by('start_date', 'pk')
+        for rental in rentals:
+            if not rental.start_date or not rental.end_date:
+                continue
+            effective_end = rental.effective_end_date or rental.end_date
+            if effective_end < since:
+                continue
+            periods[rental.machine_id].append({
+                'kind': 'rental',
+                'id': rental.id,
+                'status': rental.status,
+                'start': rental.start_date.isoformat(),
+                'end': rental.end_date.isoformat(),
+                'effective_end': effective_end.isoformat(),
+                'blocking': rental.is_schedule_blocking,
+                'title': cls._rental_title(rental),
+                'status_display': rental.get_status_display(),
+                'customer_name': rental.customer_display_name,
+                'user_id': rental.user_id,
+                'user_full_name': rental.user.get_full_name() if rental.user_id else 'Unknown',
+            })
+
+        maintenances = Maintenance.objects.filter(
+            Q(end_date__isnull=True) | Q(end_date__date__gte=since),
+            machine_id__in=periods,
+            status__in=cls.MAINTENANCE_STATUSES,
+        ).order_by('start_date', 'pk')
+        for maintenance in maintenances:
+            start = timezone.localtime(maintenance.start_date).date()
+            end = timezone.localtime(maintenance.end_date).date() if maintenance.end_date else None
+            periods[maintenance.machine_id].append({
+                'kind': 'maintenance',
+                'id': maintenance.id,
+                'status': maintenance.status,
+                'start': start.isoformat(),
+                'end': end.isoformat() if end else None,
+                'effective_end': end.isoformat() if end else None,
+                'blocking': True,
+                'maintenance_type': maintenance.maintenance_type,
+                'maintenance_type_display': maintenance.get_maintenance_type_display(),
+                'description': maintenance.description,
+            })
+        return periods
+
+    def covers(self, since):
+        """Whether ``overlapping`` can answer ranges starting on ``since`` without another query."""
+        if self.built_on is not None and since >= self.window_start(self.built_on):
+            return True
+        history = getattr(self, '_history', None)
+        return history is not None and since >= history[0]
+
+    @classmethod
+    def load_history(cls, snapshots, since):
+        """
+        Rebuild periods back to ``since`` for the ``snapshots`` whose window
+        starts later, with one ``build_periods`` call, and keep them on the
+        instances for ``overlapping``.
+        """
+        older = [snapshot for snapshot in snapshots if not snapshot.covers(since)]
+        if not older:
+            return
+        rebuilt = cls.build_periods([snapshot.machine_id for snapshot in older], since=since)
+        for snapshot in older:
+            snapshot._history = (since, rebuilt[snapshot.machine_id])
+
+    @classmethod
+    def for_machines(cls, machines=None, *, today=None):
+        """
+        Return ``{machine_id: snapshot}`` for ``machines`` (instances or ids,
+        all machines when None), rebuilding only the stale ones.
+        """
+        today = today or timezone.localdate()
+        if machines is None:
+            machine_ids = set(Machine.objects.values_list('pk', flat=True))
+        else:
+            machine_ids = {getattr(machine, 'pk', machine) for machine in machines}
+        if not machine_ids:
+            return {}
+
+        snapshots = {
+            snapshot.machine_id: snapshot
+            for snapshot in cls.objects.filter(machine_id__in=machine_ids)
+        }
+        missing_ids = machine_ids - set(snapshots)
+        if missing_ids:
+            cls.objects.bulk_create(
+                [cls(machine_id=machine_id) for machine_id in missing_ids],
+                ignore_conflicts=True,
+            )
+            snapshots.update({
+                snapshot.machine_id: snapshot
+                for snapshot in cls.objects.filter(machine_id__in=missing_ids)
+            })
+
+        stale = [snapshot for snapshot in snapshots.values() if not snapshot.is_current(today)]
+        if stale:
+            rebuilt = cls.build_periods(
+                [snapshot.machine_id for snapshot in stale],
+                since=cls.window_start(today),
+            )
+            now = timezone.now()
+            for snapshot in stale:
+                snapshot.periods = rebuilt[snapshot.machine_id]
+                snapshot.built_version = snapshot.version
+                snapshot.built_on = today
+                # Skip the write if a signal bumped the version while we were
+                # reading; the next request rebuilds from the newer rows.
+                cls.objects.filter(pk=snapshot.pk, version=snapshot.version).update(
+                    periods=snapshot.periods,
+                    built_version=snapshot.version,
+                    built_on=today,
+                    updated_at=now,
+                )
+        return snapshots
+
+    @classmethod
+    def for_machine(cls, machine, *, today=None):
+        machine_id = getattr(machine, 'pk', machine)
+        return cls.for_machines([machine_id], today=today)[machine_id]
+
+    def overlapping(self, start_date, end_date, *, kinds=None, statuses=None, blocking=None, effective=False):
+        """
+        Periods intersecting ``[start_date, end_date]`` in start order.
+
+        ``effective`` compares against the overdue-adjusted end date instead of
+        the booked one. Periods without an end date never match, mirroring the
+        ``end_date__date__gte`` filters they replace. A range starting before
+        the snapshot's window reads the periods from ``load_history``, which
+        runs here if the caller did not load them up front.
+        """
+        start_key = start_date.isoformat()
+        end_key = end_date.isoformat()
+        end_field = 'effective_end' if effective else 'end'
+        periods = self.periods
+        if self.built_on is None or start_date < self.window_start(self.built_on):
+            self.load_history([self], start_date)
+            periods = self._history[1]
+        return [
+            period for period in periods
+            if (kinds is None or period['kind'] in kinds)
+            and (statuses is None or period['status'] in statuses)
+            and (blocking is None or period['blocking'] == blocking)
+            and period[end_field] is not None
+            and period['start'] <= end_key
+            and period[end_field] >= start_key
+        ]
+
+    def etag(self, *parts):
+        """Quoted ETag for a response derived from this snapshot and ``parts``."""
+        return self.combined_etag([self], *parts)
+
+    @staticmethod
+    def combined_etag(snapshots, *parts):
+        tokens = [
+            f'{snapshot.machine_id}:{snapshot.version}:{snapshot.built_on}'
+            for snapshot in sorted(snapshots, key=lambda snapshot: snapshot.machine_id)
+        ]
+        tokens.extend(str(part) for part in parts)
+        digest = hashlib.md5('|'.join(tokens).encode('utf-8'), usedforsecurity=False).hexdigest()
+        return f'"{digest}"'
+
+
+class DryerCapacityDay(models.Model):
+    """
+    Sacks of shared dryer capacity booked per machine and day.
+
+    ``DryerRental`` signals apply each booking's contribution as an atomic
+    delta whenever it starts or stops holding capacity, so availability over
+    any window is one range read. ``rebuild`` recomputes rows from the
+    bookings themselves for backfills and repairs.
+    """
+    machine = models.ForeignKey(Machine, on_delete=models.CASCADE, related_name='dryer_capacity_days')
+    day = models.DateField()
+    used_sacks = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    rental_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['machine', 'day']
+        constraints = [
+            models.UniqueConstraint(fields=['machine', 'day'], name='unique_dryer_capacity_day'),
+        ]
+        verbose_name = _('Dryer Capacity Day')
+        verbose_name_plural = _('Dryer Capacity Days')
+
+    def __str__(self):
+        return f"{self.machine_id} {self.day}: {self.used_sacks} sacks"
+
+    @staticmethod
+    def _days(first_day, last_day):
+        days = []
+        day = first_day
+        while day <= last_day:
+            days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    @classmethod
+    def lock_machine(cls, machine_id):
+        """Serialize capacity checks for one dryer until the surrounding transaction ends."""
+        list(Machine.objects.select_for_update().filter(pk=machine_id).values_list('pk', flat=True))
+
+    @classmethod
+    def usage_by_day(cls, machine_id, start_date, end_date):
+        return dict(
+            cls.objects.filter(
+                machine_id=machine_id,
+                day__range=(start_date, end_date),
+            ).values_list('day', 'used_sacks')
+        )
+
+    @classmethod
+    def usage_for_machines(cls, machine_ids, day):
+        return dict(
+            cls.objects.filter(machine_id__in=machine_ids, day=day).values_list('machine_id', 'used_sacks')
+        )
+
+    @classmethod
+    def apply_change(cls, previous, current):
+        """
+        Move a booking's contribution from ``previous`` to ``current``.
+
+        Both are ``DryerRental.capacity_contribution()`` tuples or ``None``.
+        Updates use ``F()`` expressions so concurrent bookings never lose
+        each other's deltas.
+        """
+        if previous == current:
+            return
+        with transaction.atomic():
+            if previous:
+                machine_id, first_day, last_day, sacks = previous
+                cls.objects.filter(machine_id=machine_id, day__range=(first_day, last_day)).update(
+                    used_sacks=F('used_sacks') - sacks,
+                    rental_count=F('rental_count') - 1,
+                    updated_at=timezone.now(),
+                )
+            if current:
+                machine_id, first_day, last_day, sacks = current
+                cls.objects.bulk_create(
+                    [cls(machine_id=machine_id, day=day) for day in cls._days(first_day, last_day)],
+                    ignore_conflicts=True,
+                )
+                cls.objects.filter(machine_id=machine_id, day__range=(first_day, last_day)).update(
+                    used_sacks=F('used_sacks') + sacks,
+                    rental_count=F('rental_count') + 1,
+                    updated_at=timezone.now(),
+                )
+
+    @classmethod
+    def rebuild(cls, machine_ids=None):
+        """Recompute the ledger from dryer bookings; returns the number of rows written."""
+        rentals = DryerRental.objects.filter(
+            rental_type='until_dried',
+            status__in=DryerRental.CAPACITY_LOCKED_STATUSES,
+        ).select_related('machine')
+        ledger = cls.objects.all()
+        if machine_ids is not None:
+            rentals = rentals.filter(machine_id__in=machine_ids)
+            ledger = ledger.filter(machine_id__in=machine_ids)
+
+        totals = {}
+        for rental in rentals.iterator():
+            contribution = rental.capacity_contribution()
+            if not contribution:
+                continue
+            machine_id, first_day, last_day, sacks = contribution
+            for day in cls._days(first_day, last_day):
+                used, count = totals.get((machine_id, day), (Decimal('0.00'), 0))
+                totals[(machine_id, day)] = (used + sacks, count + 1)
+
+        rows = [
+            cls(machine_id=machine_id, day=day, used_sacks=used, rental_count=count)
+            for (machine_id, day), (used, count) in sorted(totals.items())
+        ]
+        with transaction.atomic():
+            ledger.delete()
+            cls.objects.bulk_create(rows, batch_size=500)
+        return len(rows)
+
+
 class RentalStateChange(models.Model):
     """
     Audit trail for rental workflow state transitions.
@@ -46,7 +46,7 @@ def _notify_admins(message, rental_id, *, exclude_user_id=None):
         for admin in admins
     ]
     if notifications:
-        UserNotification.objects.bulk_create(notifications)
+        UserNotification.bulk_create_notifications(notifications)
 
 
 @login_required
@@ -18,7 +18,7 @@ from notifications.operator_notifications import (
     get_operator_notification_count,
 )
 
-from .models import HarvestReport, Machine, Rental
+from .models import HarvestReport, Machine, MachineCalendarSnapshot, Rental
 
 
 User = get_user_model()
@@ -43,7 +43,7 @@ def _notify_admins(message, rental_id, *, exclude_user_id=None):
         for admin in admins
     ]
     if notifications:
-        UserNotification.objects.bulk_create(notifications)
+        UserNotification.bulk_create_notifications(notifications)
 
 
 def _redirect_after_operator_action(request, rental):
@@ -384,6 +384,7 @@ def assign_operator(request, rental_id):
         update_values['operator_last_update_at'] = rental.operator_last_update_at
 
     Rental.objects.filter(pk=rental.pk).update(**update_values)
+    MachineCalendarSnapshot.invalidate([rental.machine_id])
 
     if operator:
         # Notify the operator about the assignment
@@ -0,0 +1,303 @@
+"""
+Interval index over the blocking schedule of one or more machines.
+
+Availability checks used to load every approved rental for a machine and
+filter it in Python on each probe. The index below is built from a single
+values() query per source table and answers date-range probes in
+O(log n + k) using an augmented interval tree laid out over a sorted list.
+"""
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import timedelta
+import heapq
+
+from django.db.models import Q
+from django.utils import timezone
+
+
+ScheduleInterval = namedtuple(
+    'ScheduleInterval',
+    ['start', 'end', 'kind', 'object_id', 'machine_id', 'status'],
+)
+
+
+def _local_date(value):
+    if value is None:
+        return None
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date()
+
+
+def earliest_fit(intervals, earliest, duration_days):
+    """Return the first start on or after ``earliest`` that fits ``duration_days``.
+
+    ``intervals`` are inclusive ``(start, end)`` date pairs in any order.
+    Walking them in start order merges overlapping blocks on the fly, so the
+    first gap wide enough for the request ends the scan.
+    """
+    candidate = earliest
+    span = timedelta(days=max(duration_days, 1) - 1)
+    for start, end in sorted(intervals):
+        if end < candidate:
+            continue
+        if start > candidate + span:
+            break
+        candidate = end + timedelta(days=1)
+    return candidate
+
+
+class IntervalIndex:
+    """Static interval tree over inclusive ``[start, end]`` date ranges.
+
+    Intervals are sorted by start date and treated as an implicit balanced
+    binary tree (the midpoint of each slice is the subtree root). Every node
+    stores the largest end date found in its subtree so whole branches can be
+    skipped when they finish before the probe window opens.
+    """
+
+    def __init__(self, intervals=()):
+        self._intervals = sorted(intervals, key=lambda interval: (interval.start, interval.end))
+        self._starts = [interval.start for interval in self._intervals]
+        self._max_end = [None] * len(self._intervals)
+        self._build(0, len(self._intervals))
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def __iter__(self):
+        return iter(self._intervals)
+
+    def _build(self, lo, hi):
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        max_end = self._intervals[mid].end
+        for child_max in (self._build(lo, mid), self._build(mid + 1, hi)):
+            if child_max is not None and child_max > max_end:
+                max_end = child_max
+        self._max_end[mid] = max_end
+        return max_end
+
+    def overlapping(self, start, end):
+        """Return intervals intersecting ``[start, end]`` ordered by start date."""
+        if not self._intervals or start is None or end is None:
+            return []
+
+        # Nothing starting after the probe window can overlap it.
+        start_limit = bisect_right(self._starts, end)
+        matches = []
+        stack = [(0, len(self._intervals))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi or lo >= start_limit:
+                continue
+            mid = (lo + hi) // 2
+            if self._max_end[mid] < start:
+                continue
+            interval = self._intervals[mid]
+            if mid < start_limit and interval.end >= start:
+                matches.append((mid, interval))
+            stack.append((lo, mid))
+            if mid + 1 < start_limit:
+                stack.append((mid + 1, hi))
+
+        matches.sort(key=lambda item: item[0])
+        return [interval for _, interval in matches]
+
+    def sweep(self, probes):
+        """Pair every probe with the intervals it overlaps in one sweep-line pass.
+
+        ``probes`` are ``(start, end, key)`` tuples. Both sides are walked in
+        start-date order; each side keeps a min-heap of still-open entries
+        keyed by end date, so an arriving entry overlaps exactly the entries
+        left open on the other side. Returns ``{key: [interval, ...]}``.
+        """
+        probes = sorted(
+            (probe for probe in probes if probe[0] is not None and probe[1] is not None),
+            key=lambda probe: (probe[0], probe[1]),
+        )
+        matches = {probe[2]: [] for probe in probes}
+        open_probes = []
+        open_intervals = []
+        probe_pos = interval_pos = 0
+        sequence = 0
+
+        while probe_pos < len(probes) or interval_pos < len(self._intervals):
+            take_interval = interval_pos < len(self._intervals) and (
+                probe_pos >= len(probes)
+                or self._intervals[interval_pos].start <= probes[probe_pos][0]
+            )
+            if take_interval:
+                interval = self._intervals[interval_pos]
+                interval_pos += 1
+                while open_probes and open_probes[0][0] < interval.start:
+                    heapq.heappop(open_probes)
+                for _, _, probe in open_probes:
+                    matches[probe[2]].append((interval_pos, interval))
+                heapq.heappush(open_intervals, (interval.end, interval_pos, interval))
+            else:
+                probe = probes[probe_pos]
+                probe_pos += 1
+                while open_intervals and open_intervals[0][0] < probe[0]:
+                    heapq.heappop(open_intervals)
+                for _, position, interval in open_intervals:
+                    matches[probe[2]].append((position, interval))
+                sequence += 1
+                heapq.heappush(open_probes, (probe[1], sequence, probe))
+
+        return {
+            key: [interval for _, interval in sorted(found, key=lambda item: item[0])]
+            for key, found in matches.items()
+        }
+
+
+class MachineScheduleIndex:
+    """Per-machine interval indexes of rentals and maintenance windows.
+
+    ``approved`` rentals use the same blocking rules as
+    ``Rental.is_schedule_blocking`` and extend to today while overdue.
+    ``pending`` rentals and active ``maintenance`` windows are only loaded
+    when requested because approval checks ignore them.
+    """
+
+    def __init__(self, intervals=(), *, today=None):
+        self.today = today or timezone.localdate()
+        grouped = {}
+        for interval in intervals:
+            grouped.setdefault(interval.machine_id, []).append(interval)
+        self._indexes = {
+            machine_id: IntervalIndex(machine_intervals)
+            for machine_id, machine_intervals in grouped.items()
+        }
+
+    @staticmethod
+    def _machine_ids(machines):
+        if machines is None:
+            return None
+        if hasattr(machines, 'pk') or isinstance(machines, int):
+            machines = [machines]
+        return {getattr(machine, 'pk', machine) for machine in machines}
+
+    @classmethod
+    def rental_intervals(cls, machine_ids=None, *, today=None, include_pending=False):
+        from .models import Rental
+
+        today = today or timezone.localdate()
+        status_q = Rental.schedule_blocking_q()
+        if include_pending:
+            status_q |= Q(status='pending')
+
+        rows = Rental.objects.filter(status_q)
+        if machine_ids is not None:
+            rows = rows.filter(machine_id__in=machine_ids)
+
+        intervals = []
+        for rental_id, machine_id, status, start_date, end_date, actual_return_at in rows.values_list(
+            'id', 'machine_id', 'status', 'start_date', 'end_date', 'actual_return_at',
+        ).order_by():
+            if not start_date or not end_date:
+                continue
+            effective_end = end_date
+            if status == 'approved' and not actual_return_at and today > end_date:
+                effective_end = today
+            intervals.append(ScheduleInterval(
+                start_date, effective_end, 'rental', rental_id, machine_id, status,
+            ))
+        return intervals
+
+    @classmethod
+    def maintenance_intervals(cls, machine_ids=None):
+        from .models import Maintenance
+
+        rows = Maintenance.objects.filter(status__in=['scheduled', 'in_progress'])
+        if machine_ids is not None:
+            rows = rows.filter(machine_id__in=machine_ids)
+
+        intervals = []
+        for maintenance_id, machine_id, status, start_at, end_at in rows.values_list(
+            'id', 'machine_id', 'status', 'start_date', 'end_date',
+        ).order_by():
+            start = _local_date(start_at)
+            end = _local_date(end_at) or start
+            intervals.append(ScheduleInterval(
+                start, end, 'maintenance', maintenance_id, machine_id, status,
+            ))
+        return intervals
+
+    @classmethod
+    def build(cls, machines=None, *, today=None, include_pending=False, include_maintenance=False):
+        """Load the schedule for ``machines`` (instances, ids, or all when None)."""
+        today = today or timezone.localdate()
+        machine_ids = cls._machine_ids(machines)
+        if machine_ids is not None and not machine_ids:
+            return cls(today=today)
+
+        intervals = cls.rental_intervals(
+            machine_ids,
+            today=today,
+            include_pending=include_pending,
+        )
+        if include_maintenance:
+            intervals.extend(cls.maintenance_intervals(machine_ids))
+        return cls(intervals, today=today)
+
+    def intervals_for(self, machine):
+        index = self._indexes.get(getattr(machine, 'pk', machine))
+        return list(index) if index is not None else []
+
+    def overlapping(self, machine, start_date, end_date, *, kinds=None, statuses=None, exclude_rental_id=None):
+        index = self._indexes.get(getattr(machine, 'pk', machine))
+        if index is None:
+            return []
+        return [
+            interval for interval in index.overlapping(start_date, end_date)
+            if (kinds is None or interval.kind in kinds)
+            and (statuses is None or interval.status in statuses)
+            and not (
+                exclude_rental_id
+                and interval.kind == 'rental'
+                and interval.object_id == exclude_rental_id
+            )
+        ]
+
+    def blocking_conflicts(self, rentals):
+        """Map each rental id to the ids of other approved rentals blocking its dates.
+
+        Rentals are grouped by machine and matched against that machine's
+        schedule with a single sweep-line pass per machine.
+        """
+        probes_by_machine = {}
+        for rental in rentals:
+            probes_by_machine.setdefault(rental.machine_id, []).append(
+                (rental.start_date, rental.end_date, rental.id)
+            )
+
+        conflicts = {}
+        for machine_id, probes in probes_by_machine.items():
+            index = self._indexes.get(machine_id)
+            if index is None:
+                conflicts.update({probe[2]: [] for probe in probes})
+                continue
+            for rental_id, intervals in index.sweep(probes).items():
+                conflicts[rental_id] = [
+                    interval.object_id for interval in intervals
+                    if interval.kind == 'rental'
+                    and interval.status == 'approved'
+                    and interval.object_id != rental_id
+                ]
+        return conflicts
+
+    def blocking_rental_ids(self, machine, start_date, end_date, exclude_rental_id=None):
+        """Ids of approved rentals that block ``[start_date, end_date]`` on ``machine``."""
+        return [
+            interval.object_id
+            for interval in self.overlapping(
+                machine,
+                start_date,
+                end_date,
+                kinds={'rental'},
+                statuses={'approved'},
+                exclude_rental_id=exclude_rental_id,
+            )
+        ]
@@ -1,25 +1,34 @@
-from django.db.models.signals import post_save, pre_save
+import copy
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from decimal import Decimal
-from .models import Rental, RiceMillAppointment, DryerRental, Machine
+from .models import (
+    DryerCapacityDay,
+    DryerRental,
+    Machine,
+    MachineCalendarSnapshot,
+    Maintenance,
+    Rental,
+    RiceMillAppointment,
+)
+from notifications import outbox
 from notifications.models import UserNotification
 from users.activity import log_activity
+from users.models import DashboardMonthlyCount
 
 User = get_user_model()
 
 
 @receiver(pre_save, sender=Machine)
-def track_machine_status_change(sender, instance, **kwargs):
+def track_machine_status_change(sender, instance, update_fields=None, **kwargs):
     """Track status changes for machines before saving"""
-    if instance.pk:
-        try:
-            old_instance = Machine.objects.get(pk=instance.pk)
-            instance._old_status = old_instance.status
-        except Machine.DoesNotExist:
-            instance._old_status = None
-    else:
+    if not Machine.touches_tracked_fields(update_fields, ['status']):
         instance._old_status = None
+        return
+    instance._old_status = instance.stored_value('status')
 
 
 @receiver(post_save, sender=Machine)
@@ -91,23 +100,23 @@ def notify_machine_maintenance(sender, instance, **kwargs):
 
 
 @receiver(pre_save, sender=Rental)
-def track_rental_status_change(sender, instance, **kwargs):
+def track_rental_status_change(sender, instance, update_fields=None, **kwargs):
     """Track status changes for rentals before saving"""
-    if instance.pk:
-        try:
-            old_instance = Rental.objects.get(pk=instance.pk)
-            instance._old_status = old_instance.status
-        except Rental.DoesNotExist:
-            instance._old_status = None
-    else:
-        instance._old_status = None
+    instance._old_status = None
+    instance._old_machine_id = None
+    if Rental.touches_tracked_fields(update_fields, ['status']):
+        instance._old_status = instance.stored_value('status')
+    if Rental.touches_tracked_fields(update_fields, ['machine']):
+        instance._old_machine_id = instance.stored_value('machine')
 
 
 @receiver(post_save, sender=Rental)
 def notify_rental_status_change(sender, instance, created, **kwargs):
     """Send notification when rental status changes"""
+    activities = []
+    notifications = []
     if created:
-        log_activity(
+        activities.append(outbox.activity(
             activity_type='submit',
             actor=instance.user,
             subject_user=instance.user,
@@ -115,149 +124,239 @@ def notify_rental_status_change(sender, instance, created, **kwargs):
             description=f'{instance.machine.name} from {instance.start_date:%b %d, %Y} to {instance.end_date:%b %d, %Y}.',
             related_object=instance,
             created_at=instance.created_at,
-        )
+        ))
 
         # Notify user that rental request was submitted
-        UserNotification.objects.create(
+        notifications.append(outbox.notification(
             user=instance.user,
             notification_type='rental_submitted',
             message=f'Your rental request for {instance.machine.name} from {instance.start_date.strftime("%B %d, %Y")} to {instance.end_date.strftime("%B %d, %Y")} has been submitted and is pending approval.',
             related_object_id=instance.id
-        )
+        ))
         
         # Notify all admins about new rental request
-        admins = User.objects.filter(is_staff=True, is_active=True).exclude(role='operator')
-        for admin in admins:
-            UserNotification.objects.create(
-                user=admin,
-                notification_type='rental_new_request',
-                message=f'New rental request from {instance.user.get_full_name()} for {instance.machine.name} from {instance.start_date.strftime("%B %d, %Y")} to {instance.end_date.strftime("%B %d, %Y")}.',
-                related_object_id=instance.id
-            )
+        notifications.append(outbox.staff_notification(
+            notification_type='rental_new_request',
+            message=f'New rental request from {instance.user.get_full_name()} for {instance.machine.name} from {instance.start_date.strftime("%B %d, %Y")} to {instance.end_date.strftime("%B %d, %Y")}.',
+            related_object_id=instance.id
+        ))
     else:
-        # Check if status changed
-        old_status = getattr(instance, '_old_status', None)
-        if old_status and old_status != instance.status:
-            if instance.status == 'approved':
-                log_activity(
-                    activity_type='approve',
-                    subject_user=instance.user,
-                    title=f'{instance.machine.name} rental was approved for {instance.user.get_full_name() or instance.user.username}',
-                    description=f'Schedule: {instance.start_date:%b %d, %Y} to {instance.end_date:%b %d, %Y}.',
-                    related_object=instance,
-                    created_at=getattr(instance, 'updated_at', None),
-                )
-            elif instance.status == 'rejected':
-                log_activity(
-                    activity_type='reject',
-                    subject_user=instance.user,
-                    title=f'{instance.machine.name} rental was rejected for {instance.user.get_full_name() or instance.user.username}',
-                    description=f'Requested schedule was {instance.start_date:%b %d, %Y} to {instance.end_date:%b %d, %Y}.',
-                    related_object=instance,
-                    created_at=getattr(instance, 'updated_at', None),
-                )
-            elif instance.status == 'completed':
-                log_activity(
-                    activity_type='schedule',
-                    subject_user=instance.user,
-                    title=f'{instance.machine.name} rental was completed',
-                    description=f'Rental for {instance.user.get_full_name() or instance.user.username} has been closed.',
-                    related_object=instance,
-                    created_at=getattr(instance, 'updated_at', None),
-                )
-            elif instance.status == 'cancelled':
-                if instance.cancellation_type == 'auto_conflict':
-                    cancel_description = (
-                        f'Auto-cancelled due to conflict with an approved rental. '
-                        f'Schedule: {instance.start_date:%b %d, %Y} to {instance.end_date:%b %d, %Y}.'
-                    )
-                else:
-                    cancel_description = (
-                        f'Cancelled schedule: {instance.start_date:%b %d, %Y} to {instance.end_date:%b %d, %Y}.'
-                    )
-                log_activity(
-                    activity_type='other',
-                    subject_user=instance.user,
-                    title=f'{instance.machine.name} rental was cancelled',
-                    description=cancel_description,
-                    related_object=instance,
-                    created_at=getattr(instance, 'updated_at', None),
-                )
+        activity, notification = _rental_status_change_effects(instance, getattr(instance, '_old_status', None))
+        if activity:
+            activities.append(outbox.activity(**activity))
+        if notification:
+            notifications.append(outbox.notification(**notification))
+
+    outbox.record('rental', activities=activities, notifications=notifications)
 
-            # Notify user about status change
-            if instance.status == 'approved':
-                UserNotification.objects.create(
-                    user=instance.user,
-                    notification_type='rental_approved',
-                    message=f'Your rental request for {instance.machine.name} from {instance.start_date.strftime("%B %d, %Y")} to {instance.end_date.strftime("%B %d, %Y")} has been approved!',
-                    related_object_id=instance.id
-                )
-            elif instance.status == 'rejected':
-                UserNotification.objects.create(
-                    user=instance.user,
-                    notification_type='rental_rejected',
-                    message=f'Your rental request for {instance.machine.name} from {instance.start_date.strftime("%B %d, %Y")} to {instance.end_date.strftime("%B %d, %Y")} has been rejected.',
-                    related_object_id=instance.id
-                )
-            elif instance.status == 'completed':
-                UserNotification.objects.create(
-                    user=instance.user,
-                    notification_type='rental_completed',
-                    message=f'Your rental of {instance.machine.name} has been marked as completed. Thank you for using our services!',
-                    related_object_id=instance.id
-                )
-            elif instance.status == 'cancelled':
-                payment = instance.payment_record if hasattr(instance, 'payment_record') else instance.payment
-                if instance.cancellation_type == 'auto_conflict':
-                    message = (
-                        f'Your rental request for {instance.machine.name} from '
-                        f'{instance.start_date.strftime("%B %d, %Y")} to {instance.end_date.strftime("%B %d, %Y")} '
-                        f'was automatically cancelled because another overlapping request was approved first. '
-                        f'Open the rental record to request a refund or reschedule.'
-                    )
-                elif instance.cancel_reason:
-                    message = (
-                        f'Your rental request for {instance.machine.name} from '
-                        f'{instance.start_date.strftime("%B %d, %Y")} to {instance.end_date.strftime("%B %d, %Y")} '
-                        f'has been cancelled. Reason: {instance.cancel_reason}'
-                    )
-                else:
-                    message = (
-                        f'Your rental request for {instance.machine.name} from '
-                        f'{instance.start_date.strftime("%B %d, %Y")} to {instance.end_date.strftime("%B %d, %Y")} '
-                        f'has been cancelled.'
-                    )
-                if payment and payment.can_accept_refunds:
-                    message = (
-                        f'{message} Your payment is eligible for refund review. '
-                        f'Please open the rental record to request or track the refund.'
-                    )
-                UserNotification.objects.create(
-                    user=instance.user,
-                    notification_type='rental_cancelled',
-                    message=message,
-                    related_object_id=instance.id
-                )
+
+def _rental_status_change_effects(instance, old_status):
+    """Return the ``(activity, notification)`` kwargs for a rental whose status moved off ``old_status``."""
+    activity = notification = None
+    if not old_status or old_status == instance.status:
+        return activity, notification
+
+    if instance.status == 'approved':
+        activity = dict(
+            activity_type='approve',
+            subject_user=instance.user,
+            title=f'{instance.machine.name} rental was approved for {instance.user.get_full_name() or instance.user.username}',
+            description=f'Schedule: {instance.start_date:%b %d, %Y} to {instance.end_date:%b %d, %Y}.',
+            related_object=instance,
+            created_at=getattr(instance, 'updated_at', None),
+        )
+    elif instance.status == 'rejected':
+        activity = dict(
+            activity_type='reject',
+            subject_user=instance.user,
+            title=f'{instance.machine.name} rental was rejected for {instance.user.get_full_name() or instance.user.username}',
+            description=f'Requested schedule was {instance.start_date:%b %d, %Y} to {instance.end_date:%b %d, %Y}.',
+            related_object=instance,
+            created_at=getattr(instance, 'updated_at', None),
+        )
+    elif instance.status == 'completed':
+        activity = dict(
+            activity_type='schedule',
+            subject_user=instance.user,
+            title=f'{instance.machine.name} rental was completed',
+            description=f'Rental for {instance.user.get_full_name() or instance.user.username} has been closed.',
+            related_object=instance,
+            created_at=getattr(instance, 'updated_at', None),
+        )
+    elif instance.status == 'cancelled':
+        if instance.cancellation_type == 'auto_conflict':
+            cancel_description = (
+                f'Auto-cancelled due to conflict with an approved rental. '
+                f'Schedule: {instance.start_date:%b %d, %Y} to {instance.end_date:%b %d, %Y}.'
+            )
+        else:
+            cancel_description = (
+                f'Cancelled schedule: {instance.start_date:%b %d, %Y} to {instance.end_date:%b %d, %Y}.'
+            )
+        activity = dict(
+            activity_type='other',
+            subject_user=instance.user,
+            title=f'{instance.machine.name} rental was cancelled',
+            description=cancel_description,
+            related_object=instance,
+            created_at=getattr(instance, 'updated_at', None),
+        )
+
+    # Notify user about status change
+    if instance.status == 'approved':
+        notification = dict(
+            user=instance.user,
+            notification_type='rental_approved',
+            message=f'Your rental request for {instance.machine.name} from {instance.start_date.strftime("%B %d, %Y")} to {instance.end_date.strftime("%B %d, %Y")} has been approved!',
+            related_object_id=instance.id
+        )
+    elif instance.status == 'rejected':
+        notification = dict(
+            user=instance.user,
+            notification_type='rental_rejected',
+            message=f'Your rental request for {instance.machine.name} from {instance.start_date.strftime("%B %d, %Y")} to {instance.end_date.strftime("%B %d, %Y")} has been rejected.',
+            related_object_id=instance.id
+        )
+    elif instance.status == 'completed':
+        notification = dict(
+            user=instance.user,
+            notification_type='rental_completed',
+            message=f'Your rental of {instance.machine.name} has been marked as completed. Thank you for using our services!',
+            related_object_id=instance.id
+        )
+    elif instance.status == 'cancelled':
+        payment = instance.payment_record if hasattr(instance, 'payment_record') else instance.payment
+        if instance.cancellation_type == 'auto_conflict':
+            message = (
+                f'Your rental request for {instance.machine.name} from '
+                f'{instance.start_date.strftime("%B %d, %Y")} to {instance.end_date.strftime("%B %d, %Y")} '
+                f'was automatically cancelled because another overlapping request was approved first. '
+                f'Open the rental record to request a refund or reschedule.'
+            )
+        elif instance.cancel_reason:
+            message = (
+                f'Your rental request for {instance.machine.name} from '
+                f'{instance.start_date.strftime("%B %d, %Y")} to {instance.end_date.strftime("%B %d, %Y")} '
+                f'has been cancelled. Reason: {instance.cancel_reason}'
+            )
+        else:
+            message = (
+                f'Your rental request for {instance.machine.name} from '
+                f'{instance.start_date.strftime("%B %d, %Y")} to {instance.end_date.strftime("%B %d, %Y")} '
+                f'has been cancelled.'
+            )
+        if payment and payment.can_accept_refunds:
+            message = (
+                f'{message} Your payment is eligible for refund review. '
+                f'Please open the rental record to request or track the refund.'
+            )
+        notification = dict(
+            user=instance.user,
+            notification_type='rental_cancelled',
+            message=message,
+            related_object_id=instance.id
+        )
+    return activity, notification
+
+
+def _dashboard_count_moves(changes):
+    for rental, old_status in changes:
+        current = DashboardMonthlyCount.key_for(DashboardMonthlyCount.ENTITY_RENTAL, rental)
+        if current:
+            yield current._replace(status=old_status or ''), current
+
+
+def dispatch_rental_status_changes(changes, notifications=()):
+    """
+    Batched post_save side effects for rentals written with ``bulk_update``.
+
+    ``changes`` holds ``(rental, old_status)`` pairs. Calendar snapshots are
+    invalidated right away. Activity entries and notifications (status-change
+    ones plus any extra ``outbox.notification`` payloads in
+    ``notifications``) are recorded as one outbox event, so they share the
+    per-save retry guarantees; the schedule-state resync runs after commit.
+    """
+    changes = list(changes)
+    notifications = list(notifications)
+    machine_ids = sorted({rental.machine_id for rental, _ in changes})
+    MachineCalendarSnapshot.invalidate(machine_ids)
+    DashboardMonthlyCount.apply_changes(_dashboard_count_moves(changes))
+
+    activities = []
+    for rental, old_status in changes:
+        activity, notification = _rental_status_change_effects(rental, old_status)
+        if activity:
+            activities.append(outbox.activity(**activity))
+        if notification:
+            notifications.append(outbox.notification(**notification))
+    outbox.record('rental_bulk_status', activities=activities, notifications=notifications)
+
+    transaction.on_commit(lambda: Rental.sync_overdue_workflow_states(machine_ids=machine_ids))
+
+
+# In-kind rentals stop blocking once settled, so payment_type and
+# settlement_status feed is_schedule_blocking as much as status does.
+SCHEDULE_STATE_FIELDS = {
+    'machine',
+    'status',
+    'workflow_state',
+    'start_date',
+    'end_date',
+    'actual_return_at',
+    'payment_type',
+    'settlement_status',
+}
+
+
+@receiver(post_save, sender=Rental)
+def resync_machine_schedule_states(sender, instance, created, update_fields=None, **kwargs):
+    """Re-derive overdue/conflict-review states for the saved rental's machine after commit."""
+    if update_fields is not None and not SCHEDULE_STATE_FIELDS.intersection(update_fields):
+        return
+    machine_id = instance.machine_id
+    transaction.on_commit(
+        lambda: Rental.sync_overdue_workflow_states(machine_ids=[machine_id])
+    )
+
+
+CALENDAR_FIELDS = SCHEDULE_STATE_FIELDS | {'user', 'customer_name', 'purpose'}
+
+
+@receiver(post_save, sender=Rental)
+@receiver(post_delete, sender=Rental)
+def invalidate_rental_calendar_snapshot(sender, instance, update_fields=None, **kwargs):
+    """Bump the calendar snapshot version of the machine(s) the rental touches."""
+    if update_fields is not None and not CALENDAR_FIELDS.intersection(update_fields):
+        return
+    MachineCalendarSnapshot.invalidate([
+        instance.machine_id,
+        getattr(instance, '_old_machine_id', None),
+    ])
+
+
+@receiver(post_save, sender=Maintenance)
+@receiver(post_delete, sender=Maintenance)
+def invalidate_maintenance_calendar_snapshot(sender, instance, **kwargs):
+    """Maintenance windows block dates, so any change stales the machine calendar."""
+    MachineCalendarSnapshot.invalidate([instance.machine_id])
 
 
 @receiver(pre_save, sender=RiceMillAppointment)
-def track_appointment_status_change(sender, instance, **kwargs):
+def track_appointment_status_change(sender, instance, update_fields=None, **kwargs):
     """Track status changes for rice mill appointments before saving"""
-    if instance.pk:
-        try:
-            old_instance = RiceMillAppointment.objects.get(pk=instance.pk)
-            instance._old_status = old_instance.status
-        except RiceMillAppointment.DoesNotExist:
-            instance._old_status = None
-    else:
+    if not RiceMillAppointment.touches_tracked_fields(update_fields, ['status']):
         instance._old_status = None
+        return
+    instance._old_status = instance.stored_value('status')
 
 
 @receiver(post_save, sender=RiceMillAppointment)
 def notify_appointment_status_change(sender, instance, created, **kwargs):
     """Send notification when rice mill appointment status changes"""
+    activities = []
+    notifications = []
     if created:
-        log_activity(
+        activities.append(outbox.activity(
             activity_type='submit',
             actor=instance.user,
             subject_user=instance.user,
@@ -265,85 +364,82 @@ def notify_appointment_status_change(sender, instance, created, **kwargs):
             description=f'{instance.machine.name} on {instance.appointment_date:%b %d, %Y} ({instance.display_time_range}).',
             related_object=instance,
             created_at=instance.created_at,
-        )
+        ))
 
         # Notify user that appointment was submitted
-        UserNotification.objects.create(
+        notifications.append(outbox.notification(
             user=instance.user,
             notification_type='appointment_submitted',
             message=f'Your rice mill appointment for {instance.machine.name} on {instance.appointment_date.strftime("%B %d, %Y")} ({instance.display_time_range}) has been submitted and is pending approval. Reference: {instance.reference_number}',
             related_object_id=instance.id
-        )
+        ))
         
         # Notify all admins about new appointment
-        admins = User.objects.filter(is_staff=True, is_active=True).exclude(role='operator')
-        for admin in admins:
-            UserNotification.objects.create(
-                user=admin,
-                notification_type='appointment_new_request',
-                message=f'New rice mill appointment from {instance.user.get_full_name()} for {instance.machine.name} on {instance.appointment_date.strftime("%B %d, %Y")} ({instance.display_time_range}). Sacks: {instance.sacks}. Reference: {instance.reference_number}',
-                related_object_id=instance.id
-            )
+        notifications.append(outbox.staff_notification(
+            notification_type='appointment_new_request',
+            message=f'New rice mill appointment from {instance.user.get_full_name()} for {instance.machine.name} on {instance.appointment_date.strftime("%B %d, %Y")} ({instance.display_time_range}). Sacks: {instance.sacks}. Reference: {instance.reference_number}',
+            related_object_id=instance.id
+        ))
     else:
         # Check if status changed
         old_status = getattr(instance, '_old_status', None)
         if old_status and old_status != instance.status:
             if instance.status == 'approved':
-                log_activity(
+                activities.append(outbox.activity(
                     activity_type='approve',
                     subject_user=instance.user,
                     title=f'Rice mill appointment approved for {instance.user.get_full_name() or instance.user.username}',
                     description=f'{instance.machine.name} on {instance.appointment_date:%b %d, %Y}.',
                     related_object=instance,
                     created_at=getattr(instance, 'updated_at', None),
-                )
+                ))
             elif instance.status in ['paid', 'confirmed']:
-                log_activity(
+                activities.append(outbox.activity(
                     activity_type='payment',
                     subject_user=instance.user,
                     title=f'Rice mill payment recorded for {instance.user.get_full_name() or instance.user.username}',
                     description=f'Total amount: PHP {instance.total_amount}.',
                     related_object=instance,
                     created_at=getattr(instance, 'updated_at', None),
-                )
+                ))
             elif instance.status == 'rejected':
-                log_activity(
+                activities.append(outbox.activity(
                     activity_type='reject',
                     subject_user=instance.user,
                     title=f'Rice mill appointment rejected for {instance.user.get_full_name() or instance.user.username}',
                     description=f'{instance.machine.name} on {instance.appointment_date:%b %d, %Y}.',
                     related_object=instance,
                     created_at=getattr(instance, 'updated_at', None),
-                )
+                ))
             elif instance.status == 'completed':
-                log_activity(
+                activities.append(outbox.activity(
                     activity_type='schedule',
                     subject_user=instance.user,
                     title=f'Rice mill appointment completed for {instance.user.get_full_name() or instance.user.username}',
                     description=f'{instance.machine.name} appointment is fully completed.',
                     related_object=instance,
                     created_at=getattr(instance, 'updated_at', None),
-                )
+                ))
             elif instance.status == 'cancelled':
-                log_activity(
+                activities.append(outbox.activity(
                     activity_type='other',
                     subject_user=instance.user,
                     title=f'Rice mill appointment cancelled for {instance.user.get_full_name() or instance.user.username}',
                     description=f'{instance.machine.name} on {instance.appointment_date:%b %d, %Y}.',
                     related_object=instance,
                     created_at=getattr(instance, 'updated_at', None),
-                )
+                ))
 
             # Notify user about status change
             if instance.status == 'approved':
-                UserNotification.objects.create(
+                notifications.append(outbox.notification(
                     user=instance.user,
                     notification_type='appointment_approved',
                     message=f'Your rice mill appointment for {instance.machine.name} on {instance.appointment_date.strftime("%B %d, %Y")} ({instance.display_time_range}) has been approved! Reference: {instance.reference_number}',
                     related_object_id=instance.id
-                )
+                ))
             elif instance.status == 'paid':
-                UserNotification.objects.create(
+                notifications.append(outbox.notification(
                     user=instance.user,
                     notification_type='appointment_confirmed',
                     message=(
@@ -352,9 +448,9 @@ def notify_appointment_status_change(sender, instance, created, **kwargs):
                         f'Total amount: PHP {instance.total_amount}. Reference: {instance.reference_number}'
                     ),
                     related_object_id=instance.id
-                )
+                ))
             elif instance.status == 'confirmed':
-                UserNotification.objects.create(
+                notifications.append(outbox.notification(
                     user=instance.user,
                     notification_type='appointment_payment_completed',
                     message=(
@@ -362,48 +458,92 @@ def notify_appointment_status_change(sender, instance, created, **kwargs):
                         f'Total settled amount: PHP {instance.total_amount}. Reference: {instance.reference_number}'
                     ),
                     related_object_id=instance.id
-                )
+                ))
             elif instance.status == 'rejected':
-                UserNotification.objects.create(
+                notifications.append(outbox.notification(
                     user=instance.user,
                     notification_type='appointment_rejected',
                     message=f'Your rice mill appointment for {instance.machine.name} on {instance.appointment_date.strftime("%B %d, %Y")} ({instance.display_time_range}) has been rejected. Reference: {instance.reference_number}',
                     related_object_id=instance.id
-                )
+                ))
             elif instance.status == 'completed':
-                UserNotification.objects.create(
+                notifications.append(outbox.notification(
                     user=instance.user,
                     notification_type='appointment_completed',
                     message=f'Your rice mill appointment for {instance.machine.name} has been marked as completed. Thank you for using our services! Reference: {instance.reference_number}',
                     related_object_id=instance.id
-                )
+                ))
             elif instance.status == 'cancelled':
-                UserNotification.objects.create(
+                notifications.append(outbox.notification(
                     user=instance.user,
                     notification_type='appointment_cancelled',
                     message=f'Your rice mill appointment for {instance.machine.name} on {instance.appointment_date.strftime("%B %d, %Y")} ({instance.display_time_range}) has been cancelled. Reference: {instance.reference_number}',
                     related_object_id=instance.id
-                )
+                ))
+
+    outbox.record('rice_mill_appointment', activities=activities, notifications=notifications)
+
+def _locked_capacity_contribution(instance):
+    """
+    ``capacity_contribution()`` of the booking as its database row stands.
+
+    The ledger only moves by deltas, so the old contribution is read from
+    the row, locked until the save or delete commits, never from values a
+    stale instance remembers.
+    """
+    stored_values = instance.locked_stored_values()
+    if stored_values is None:
+        return None
+    stored = copy.copy(instance)
+    for name, value in stored_values.items():
+        # Assigning a different machine_id drops the cached machine.
+        setattr(stored, DryerRental._meta.get_field(name).attname, value)
+    return stored.capacity_contribution()
 
 
 @receiver(pre_save, sender=DryerRental)
-def track_dryer_rental_status_change(sender, instance, **kwargs):
+def track_dryer_rental_status_change(sender, instance, update_fields=None, **kwargs):
     """Track status changes for dryer rentals before saving."""
-    if instance.pk:
-        try:
-            old_instance = DryerRental.objects.get(pk=instance.pk)
-            instance._old_status = old_instance.status
-        except DryerRental.DoesNotExist:
-            instance._old_status = None
-    else:
-        instance._old_status = None
+    instance._old_status = None
+    instance._old_capacity = None
+    instance._capacity_may_change = DryerRental.touches_tracked_fields(update_fields)
+    if not instance._capacity_may_change:
+        return
+    if DryerRental.touches_tracked_fields(update_fields, ['status']):
+        instance._old_status = instance.stored_value('status')
+    instance._old_capacity = _locked_capacity_contribution(instance)
+
+
+@receiver(post_save, sender=DryerRental)
+def update_dryer_capacity_ledger(sender, instance, **kwargs):
+    """Move the booking's sacks in the per-day capacity ledger when its window or status changes."""
+    if not getattr(instance, '_capacity_may_change', True):
+        return
+    DryerCapacityDay.apply_change(
+        getattr(instance, '_old_capacity', None),
+        instance.capacity_contribution(),
+    )
+
+
+@receiver(pre_delete, sender=DryerRental)
+def track_deleted_dryer_capacity(sender, instance, **kwargs):
+    """Read the sacks a deleted booking holds from its row before it goes."""
+    instance._deleted_capacity = _locked_capacity_contribution(instance)
+
+
+@receiver(post_delete, sender=DryerRental)
+def release_dryer_capacity_ledger(sender, instance, **kwargs):
+    """Give a deleted booking's sacks back to the capacity ledger."""
+    DryerCapacityDay.apply_change(getattr(instance, '_deleted_capacity', None), None)
 
 
 @receiver(post_save, sender=DryerRental)
 def notify_dryer_rental_status_change(sender, instance, created, **kwargs):
     """Send notifications when dryer rental status changes."""
+    activities = []
+    notifications = []
     if created:
-        log_activity(
+        activities.append(outbox.activity(
             activity_type='submit',
             actor=instance.user,
             subject_user=instance.user,
@@ -411,9 +551,9 @@ def notify_dryer_rental_status_change(sender, instance, created, **kwargs):
             description=f'{instance.machine.name} on {instance.rental_date:%b %d, %Y} ({instance.display_time_range}).',
             related_object=instance,
             created_at=instance.created_at,
-        )
+        ))
 
-        UserNotification.objects.create(
+        notifications.append(outbox.notification(
             user=instance.user,
             notification_type='dryer_submitted',
             message=(
@@ -422,80 +562,77 @@ def notify_dryer_rental_status_change(sender, instance, created, **kwargs):
                 f'has been submitted and is pending approval. Reference: {instance.reference_number}'
             ),
             related_object_id=instance.id
-        )
+        ))
 
-        admins = User.objects.filter(is_staff=True, is_active=True).exclude(role='operator')
-        for admin in admins:
-            UserNotification.objects.create(
-                user=admin,
-                notification_type='dryer_new_request',
-                message=(
-                    f'New dryer rental from {instance.user.get_full_name()} for {instance.machine.name} on '
-                    f'{instance.rental_date.strftime("%B %d, %Y")} ({instance.display_time_range}). '
-                    f'Duration: {instance.duration_hours:.2f} hour(s). Reference: {instance.reference_number}'
-                ),
-                related_object_id=instance.id
-            )
+        notifications.append(outbox.staff_notification(
+            notification_type='dryer_new_request',
+            message=(
+                f'New dryer rental from {instance.user.get_full_name()} for {instance.machine.name} on '
+                f'{instance.rental_date.strftime("%B %d, %Y")} ({instance.display_time_range}). '
+                f'Duration: {instance.duration_hours:.2f} hour(s). Reference: {instance.reference_number}'
+            ),
+            related_object_id=instance.id
+        ))
     else:
         old_status = getattr(instance, '_old_status', None)
         if old_status and old_status != instance.status:
             if instance.status in ['approved', 'in_progress']:
-                log_activity(
+                activities.append(outbox.activity(
                     activity_type='approve',
                     subject_user=instance.user,
                     title=f'Dryer request approved for {instance.user.get_full_name() or instance.user.username}',
                     description=f'{instance.machine.name} scheduled for {instance.rental_date:%b %d, %Y} ({instance.display_time_range}).',
                     related_object=instance,
                     created_at=getattr(instance, 'updated_at', None),
-                )
+                ))
             elif instance.status == 'paid':
-                log_activity(
+                activities.append(outbox.activity(
                     activity_type='payment',
                     subject_user=instance.user,
                     title=f'Dryer payment recorded for {instance.user.get_full_name() or instance.user.username}',
                     description=f'Amount due: PHP {instance.total_amount}.',
                     related_object=instance,
                     created_at=getattr(instance, 'updated_at', None),
-                )
+                ))
             elif instance.status == 'rejected':
-                log_activity(
+                activities.append(outbox.activity(
                     activity_type='reject',
                     subject_user=instance.user,
                     title=f'Dryer request rejected for {instance.user.get_full_name() or instance.user.username}',
                     description=f'{instance.machine.name} on {instance.rental_date:%b %d, %Y}.',
                     related_object=instance,
                     created_at=getattr(instance, 'updated_at', None),
-                )
+                ))
             elif instance.status == 'confirmed':
-                log_activity(
+                activities.append(outbox.activity(
                     activity_type='schedule',
                     subject_user=instance.user,
                     title=f'Dryer service confirmed for {instance.user.get_full_name() or instance.user.username}',
                     description=f'{instance.machine.name} booking is ready to proceed.',
                     related_object=instance,
                     created_at=getattr(instance, 'updated_at', None),
-                )
+                ))
             elif instance.status == 'completed':
-                log_activity(
+                activities.append(outbox.activity(
                     activity_type='schedule',
                     subject_user=instance.user,
                     title=f'Dryer service completed for {instance.user.get_full_name() or instance.user.username}',
                     description=f'{instance.machine.name} request has been completed.',
                     related_object=instance,
                     created_at=getattr(instance, 'updated_at', None),
-                )
+                ))
             elif instance.status == 'cancelled':
-                log_activity(
+                activities.append(outbox.activity(
                     activity_type='other',
                     subject_user=instance.user,
                     title=f'Dryer request cancelled for {instance.user.get_full_name() or instance.user.username}',
                     description=f'{instance.machine.name} on {instance.rental_date:%b %d, %Y}.',
                     related_object=instance,
                     created_at=getattr(instance, 'updated_at', None),
-                )
+                ))
 
             if instance.status == 'approved':
-                UserNotification.objects.create(
+                notifications.append(outbox.notification(
                     user=instance.user,
                     notification_type='dryer_approved',
                     message=(
@@ -504,9 +641,9 @@ def notify_dryer_rental_status_change(sender, instance, created, **kwargs):
                         f'has been approved. Please choose your payment method. Reference: {instance.reference_number}'
                     ),
                     related_object_id=instance.id
-                )
+                ))
             elif instance.status == 'rejected':
-                UserNotification.objects.create(
+                notifications.append(outbox.notification(
                     user=instance.user,
                     notification_type='dryer_rejected',
                     message=(
@@ -515,9 +652,9 @@ def notify_dryer_rental_status_change(sender, instance, created, **kwargs):
                         f'has been rejected. Reference: {instance.reference_number}'
                     ),
                     related_object_id=instance.id
-                )
+                ))
             elif instance.status == 'confirmed':
-                UserNotification.objects.create(
+                notifications.append(outbox.notification(
                     user=instance.user,
                     notification_type='dryer_confirmed',
                     message=(
@@ -526,9 +663,9 @@ def notify_dryer_rental_status_change(sender, instance, created, **kwargs):
                         f'is now confirmed. Reference: {instance.reference_number}'
                     ),
                     related_object_id=instance.id
-                )
+                ))
             elif instance.status == 'completed':
-                UserNotification.objects.create(
+                notifications.append(outbox.notification(
                     user=instance.user,
                     notification_type='dryer_completed',
                     message=(
@@ -536,9 +673,9 @@ def notify_dryer_rental_status_change(sender, instance, created, **kwargs):
                         f'Thank you for using BUFIA services. Reference: {instance.reference_number}'
                     ),
                     related_object_id=instance.id
-                )
+                ))
             elif instance.status == 'cancelled':
-                UserNotification.objects.create(
+                notifications.append(outbox.notification(
                     user=instance.user,
                     notification_type='dryer_cancelled',
                     message=(
@@ -547,4 +684,6 @@ def notify_dryer_rental_status_change(sender, instance, created, **kwargs):
                         f'has been cancelled. Reference: {instance.reference_number}'
                     ),
                     related_object_id=instance.id
-                )
+                ))
+
+    outbox.record('dryer_rental', activities=activities, notifications=notifications)
@@ -2963,6 +2963,20 @@ class MachineMaintenanceVisibilityTestCase(TestCase):
         self.assertContains(response, 'TRX-9000')
         self.assertContains(response, '88.50 HP')
 
+    def test_machine_list_paginates_the_directory(self):
+        for index in range(13):
+            self._create_available_machine(name=f'Paged Tractor {index}')
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse('machines:machine_list'), {'type': 'tractor_4wd'})
+        second_page = self.client.get(reverse('machines:machine_list'), {'type': 'tractor_4wd', 'page': 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['machines']), 12)
+        self.assertContains(response, '14 items')
+        self.assertContains(response, '?page=2&q=&type=tractor_4wd&availability=', html=False)
+        self.assertEqual(len(second_page.context['machines']), 2)
+
     def test_machine_delete_actions_require_confirm_text(self):
         self.client.force_login(self.admin)
 
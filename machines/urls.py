@@ -50,6 +50,7 @@ urlpatterns = [
     path('api/calendar/<int:machine_id>/events/', calendar_views.machine_calendar_events, name='machine_calendar_events'),
     path('api/calendar/all-events/', calendar_views.all_machines_calendar_events, name='all_machines_calendar_events'),
     path('api/check-availability/', calendar_views.check_date_availability, name='check_date_availability'),
+    path('api/availability/next-slot/', calendar_views.next_available_slots, name='next_available_slots'),
     path('api/member-search/', views.member_autocomplete, name='member_autocomplete'),
     
     # Calendar-based rental creation (NEW)
@@ -4,8 +4,9 @@ Utility functions for machine rental availability checking and management
 from django.db import transaction
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from datetime import timedelta
-from .models import Rental, Machine, Maintenance, HarvestReport, Settlement, RentalStateChange
+from datetime import date, timedelta
+from .models import Rental, Machine, MachineCalendarSnapshot, Maintenance, HarvestReport, Settlement, RentalStateChange
+from .schedule_index import MachineScheduleIndex, earliest_fit
 
 
 class AvailabilityChecker:
@@ -29,43 +30,29 @@ class AvailabilityChecker:
         if not end_date:
             end_date = start_date + timedelta(days=90)
         
+        snapshot = MachineCalendarSnapshot.for_machine(machine)
         blocked_periods = []
-        
+
         # Add rental periods (both approved and pending)
-        rentals = Rental.objects.filter(
-            machine=machine,
-            status__in=['approved', 'pending'],
-            start_date__lte=end_date,
-            end_date__gte=start_date
-        ).order_by('start_date')
-        
-        for rental in rentals:
+        for period in snapshot.overlapping(start_date, end_date, kinds={'rental'}, statuses={'approved', 'pending'}):
             blocked_periods.append({
-                'start': rental.start_date,
-                'end': rental.end_date,
+                'start': date.fromisoformat(period['start']),
+                'end': date.fromisoformat(period['end']),
                 'type': 'rental',
-                'status': rental.status,
-                'user': rental.user.get_full_name() if rental.user else 'Unknown'
+                'status': period['status'],
+                'user': period['user_full_name']
             })
-        
+
         # Add maintenance periods
-        maintenances = Maintenance.objects.filter(
-            machine=machine,
-            status__in=['scheduled', 'in_progress'],
-            start_date__date__lte=end_date,
-            end_date__date__gte=start_date
-        ).order_by('start_date')
-        
-        for maintenance in maintenances:
-            end = maintenance.end_date.date() if maintenance.end_date else maintenance.start_date.date()
+        for period in snapshot.overlapping(start_date, end_date, kinds={'maintenance'}):
             blocked_periods.append({
-                'start': maintenance.start_date.date(),
-                'end': end,
+                'start': date.fromisoformat(period['start']),
+                'end': date.fromisoformat(period['end']),
                 'type': 'maintenance',
-                'status': maintenance.status,
-                'description': maintenance.description
+                'status': period['status'],
+                'description': period['description']
             })
-        
+
         return blocked_periods
     
     @staticmethod
@@ -101,38 +88,44 @@ class AvailabilityChecker:
         if machine.status == 'maintenance':
             return False, "Machine is currently under maintenance"
         
-        # Use select_for_update to lock the rows we're checking (prevents race conditions)
-        overlapping_rentals = Rental.objects.select_for_update().filter(
-            machine=machine,
-            status__in=['approved', 'pending'],  # Check both approved AND pending
-            start_date__lte=end_date,
-            end_date__gte=start_date
+        # Lock the machine row so concurrent checks for the same machine
+        # serialize on one row instead of every overlapping rental.
+        Machine.objects.select_for_update().filter(pk=machine.pk).first()
+        schedule_index = MachineScheduleIndex.build(
+            machine,
+            today=today,
+            include_pending=True,
+            include_maintenance=True,
         )
         
-        if exclude_rental_id:
-            overlapping_rentals = overlapping_rentals.exclude(id=exclude_rental_id)
-        
-        if overlapping_rentals.exists():
-            conflict = overlapping_rentals.first()
+        # Check both approved AND pending rentals
+        rental_conflicts = schedule_index.overlapping(
+            machine,
+            start_date,
+            end_date,
+            kinds={'rental'},
+            exclude_rental_id=exclude_rental_id,
+        )
+        if rental_conflicts:
+            conflict = rental_conflicts[0]
+            status_label = dict(Rental.STATUS_CHOICES).get(conflict.status, conflict.status)
             return False, (
-                f"Machine is already booked from {conflict.start_date} to {conflict.end_date}. "
-                f"Status: {conflict.get_status_display()}"
+                f"Machine is already booked from {conflict.start} to {conflict.end}. "
+                f"Status: {status_label}"
             )
         
         # Check maintenance schedule
-        maintenance_conflicts = Maintenance.objects.filter(
-            machine=machine,
-            status__in=['scheduled', 'in_progress'],
-            start_date__date__lte=end_date,
-            end_date__date__gte=start_date
+        maintenance_conflicts = schedule_index.overlapping(
+            machine,
+            start_date,
+            end_date,
+            kinds={'maintenance'},
         )
-        
-        if maintenance_conflicts.exists():
-            maintenance = maintenance_conflicts.first()
-            end_date_str = maintenance.end_date.date() if maintenance.end_date else maintenance.start_date.date()
+        if maintenance_conflicts:
+            maintenance = maintenance_conflicts[0]
             return False, (
                 f"Machine has scheduled maintenance from "
-                f"{maintenance.start_date.date()} to {end_date_str}"
+                f"{maintenance.start} to {maintenance.end}"
             )
         
         return True, "Machine is available for the selected dates"
@@ -151,30 +144,86 @@ class AvailabilityChecker:
         """
         if not preferred_start_date:
             preferred_start_date = timezone.now().date()
-        
-        # Get all blocked periods for next 90 days
-        blocked_periods = AvailabilityChecker.get_available_dates(
-            machine,
-            start_date=preferred_start_date,
-            end_date=preferred_start_date + timedelta(days=90)
+
+        snapshot = MachineCalendarSnapshot.for_machine(machine)
+        next_date = earliest_fit(
+            AvailabilityChecker._snapshot_blocked_intervals(snapshot),
+            preferred_start_date,
+            1,
         )
-        
-        # Sort by start date
-        blocked_periods.sort(key=lambda x: x['start'])
-        
-        # Find first gap
-        current_date = preferred_start_date
-        for period in blocked_periods:
-            if current_date < period['start']:
-                return current_date
-            current_date = max(current_date, period['end'] + timedelta(days=1))
-        
-        # If we've checked all blocked periods and current_date is still reasonable
-        if (current_date - preferred_start_date).days <= 90:
-            return current_date
-        
+        if (next_date - preferred_start_date).days <= 90:
+            return next_date
+
         return None
 
+    @staticmethod
+    def _snapshot_blocked_intervals(snapshot, include_pending=True):
+        """Inclusive (start, end) date pairs that keep a machine from being booked."""
+        intervals = []
+        for period in snapshot.periods:
+            if period['kind'] == 'maintenance':
+                end = period['end'] or period['start']
+            elif period['blocking']:
+                end = period['effective_end']
+            elif include_pending and period['status'] == 'pending':
+                end = period['end']
+            else:
+                continue
+            intervals.append((date.fromisoformat(period['start']), date.fromisoformat(end)))
+        return intervals
+
+    @staticmethod
+    def find_next_available_slots(category, duration_days, start_date=None, include_pending=True):
+        """
+        Find the earliest start on every machine of a category for a booking of
+        ``duration_days`` days.
+
+        Args:
+            category: Machine category value, or a machine type to resolve
+            duration_days: Number of consecutive days needed
+            start_date: Earliest acceptable start (default: today)
+            include_pending: Treat pending requests as taken
+
+        Returns:
+            Dictionary with the resolved category, per-machine ``slots`` ordered
+            by start date, and the ``best`` slot (or None)
+        """
+        if not start_date:
+            start_date = timezone.localdate()
+        if not Machine.is_machine_category_value(category):
+            category = Machine.resolve_machine_category(category)
+        duration_days = max(int(duration_days), 1)
+
+        machines = list(
+            Machine.objects.filter(machine_category=category)
+            .exclude(status='maintenance')
+            .exclude(machine_type__in=['rice_mill', *Machine.DRYER_MACHINE_TYPES])
+            .order_by('name', 'pk')
+        )
+        snapshots = MachineCalendarSnapshot.for_machines(machines)
+
+        slots = []
+        for machine in machines:
+            slot_start = earliest_fit(
+                AvailabilityChecker._snapshot_blocked_intervals(snapshots[machine.pk], include_pending),
+                start_date,
+                duration_days,
+            )
+            slots.append({
+                'machine': machine,
+                'start_date': slot_start,
+                'end_date': slot_start + timedelta(days=duration_days - 1),
+            })
+        slots.sort(key=lambda slot: slot['start_date'])
+
+        return {
+            'category': category,
+            'category_label': Machine.get_machine_category_label(category),
+            'duration_days': duration_days,
+            'start_date': start_date,
+            'slots': slots,
+            'best': slots[0] if slots else None,
+        }
 
 
 # IN-KIND Rental Workflow Utilities
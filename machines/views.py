@@ -12,8 +12,11 @@ from .models import (
     MachineImage,
     RiceMillAppointment,
     DryerRental,
+    DryerCapacityDay,
     RentalPackage,
     RentalPackageItem,
+    get_linked_payment,
+    prefetch_latest_payments,
 )
 from .forms import (MachineForm, MachineImageForm, MachineImageFormSet, RentalForm, 
                    MaintenanceForm, MaintenanceCompletionForm, MaintenancePartFormSet,
@@ -33,6 +36,7 @@ from django.conf import settings
 from django.utils.text import slugify
 from notifications.models import UserNotification
 from notifications.notification_helpers import create_notification as create_system_notification
+from notifications import counters as badge_counters
 from django.contrib.auth import get_user_model
 from users.decorators import verified_member_required
 from datetime import datetime, timedelta, time
@@ -421,15 +425,21 @@ def _build_dryer_availability_activity_item(rental, *, current_pk=None, next_loc
 
 def _build_dryer_availability_rows(dryers):
     now = timezone.localtime()
+    dryers = list(dryers)
     rows = []
+    rentals_by_dryer = {dryer.pk: [] for dryer in dryers}
+    for rental in DryerRental.objects.filter(
+        machine_id__in=rentals_by_dryer,
+        status__in=DRYER_VISIBLE_STATUSES,
+    ).select_related('user', 'machine').order_by('rental_date', 'start_time', 'created_at', 'pk'):
+        rentals_by_dryer[rental.machine_id].append(rental)
+    used_capacity_by_dryer = DryerCapacityDay.usage_for_machines(
+        [dryer.pk for dryer in dryers if dryer.is_dryer_service()],
+        timezone.localdate(),
+    )
 
     for dryer in dryers:
-        visible_rentals = list(
-            DryerRental.objects.filter(
-                machine=dryer,
-                status__in=DRYER_VISIBLE_STATUSES,
-            ).select_related('user', 'machine').order_by('rental_date', 'start_time', 'created_at', 'pk')
-        )
+        visible_rentals = rentals_by_dryer[dryer.pk]
         locked_rentals = list(
             rental for rental in visible_rentals if rental.status in DRYER_LOCKED_STATUSES
         )
@@ -447,7 +457,7 @@ def _build_dryer_availability_rows(dryers):
 
         current_sacks = current_rental.quantity_in_sacks if current_rental else Decimal('0.00')
         freed_sacks_label = f"{_format_sack_value(current_sacks)} sacks"
-        used_capacity = DryerRental.used_dryer_capacity_for_date(dryer, timezone.localdate())
+        used_capacity = used_capacity_by_dryer.get(dryer.pk, Decimal('0.00'))
         total_capacity = dryer.get_dryer_capacity_limit_sacks()
         remaining_capacity = max(total_capacity - used_capacity, Decimal('0.00')).quantize(Decimal('0.01'))
         pending_count = sum(1 for rental in visible_rentals if rental.status == 'pending')
@@ -712,30 +722,16 @@ def _member_search_payload(user):
 
 
 def _get_appointment_payment(appointment):
-    from django.contrib.contenttypes.models import ContentType
-    from bufia.models import Payment
-
-    content_type = ContentType.objects.get_for_model(RiceMillAppointment)
-    return Payment.objects.filter(
-        content_type=content_type,
-        object_id=appointment.id
-    ).first()
+    return get_linked_payment(appointment)
 
 
 def _get_appointment_payment_map(appointments):
-    from django.contrib.contenttypes.models import ContentType
-    from bufia.models import Payment
-
-    appointment_ids = [appointment.id for appointment in appointments if appointment.id]
-    if not appointment_ids:
-        return {}
-
-    content_type = ContentType.objects.get_for_model(RiceMillAppointment)
-    payments = Payment.objects.filter(
-        content_type=content_type,
-        object_id__in=appointment_ids,
-    )
-    return {payment.object_id: payment for payment in payments}
+    appointments = prefetch_latest_payments(appointment for appointment in appointments if appointment.id)
+    return {
+        appointment.id: appointment.latest_payment
+        for appointment in appointments
+        if appointment.latest_payment is not None
+    }
 
 
 def _reset_over_counter_payment(payment):
@@ -788,6 +784,7 @@ def _sync_appointment_face_to_face_payment_record(appointment):
         content_type=content_type,
         object_id=appointment.id,
         defaults={
+            'content_object': appointment,
             'user': appointment.user,
             'payment_type': 'appointment',
             'amount': appointment.total_amount,
@@ -844,14 +841,7 @@ def _sync_appointment_face_to_face_payment_record(appointment):
 
 
 def _get_dryer_payment(dryer_rental):
-    from django.contrib.contenttypes.models import ContentType
-    from bufia.models import Payment
-
-    content_type = ContentType.objects.get_for_model(DryerRental)
-    return Payment.objects.filter(
-        content_type=content_type,
-        object_id=dryer_rental.id
-    ).first()
+    return get_linked_payment(dryer_rental)
 
 
 def _sync_dryer_payment_record(dryer_rental, payment_method):
@@ -863,6 +853,7 @@ def _sync_dryer_payment_record(dryer_rental, payment_method):
         content_type=content_type,
         object_id=dryer_rental.id,
         defaults={
+            'content_object': dryer_rental,
             'user': dryer_rental.user,
             'payment_type': 'dryer',
             'amount': dryer_rental.total_amount,
@@ -933,6 +924,7 @@ def _ensure_service_payment_record(service_object, payment_type, *, status='pend
         content_type=content_type,
         object_id=service_object.id,
         defaults={
+            'content_object': service_object,
             'user': service_object.user,
             'payment_type': payment_type,
             'amount': amount,
@@ -1163,6 +1155,23 @@ def machine_update(request, pk):
 #     
 #     return render(request, 'machines/machine_confirm_delete.html', {'machine': machine})
 
+def _rental_alternative_slots(form):
+    """Earliest open dates on machines of the same category for a rejected booking."""
+    from .utils import AvailabilityChecker
+
+    machine = form.cleaned_data.get('machine')
+    start_date = form.cleaned_data.get('start_date')
+    end_date = form.cleaned_data.get('end_date')
+    if not (machine and start_date and end_date) or end_date < start_date:
+        return None
+
+    return AvailabilityChecker.find_next_available_slots(
+        machine.resolved_machine_category,
+        (end_date - start_date).days + 1,
+        start_date=max(start_date, timezone.localdate()),
+    )
+
+
 @login_required
 @verified_member_required
 def rental_create(request, machine_pk=None):
@@ -1175,6 +1184,7 @@ def rental_create(request, machine_pk=None):
             messages.info(request, 'Rice mill uses a separate milling appointment process.')
             return redirect('machines:ricemill_appointment_create_for_machine', machine_id=selected_machine.pk)
 
+    alternative_slots = None
     if request.method == 'POST':
         form = RentalForm(request.POST, user=request.user)
         if form.is_valid():
@@ -1197,6 +1207,7 @@ def rental_create(request, machine_pk=None):
                     content_type=content_type,
                     object_id=rental.id,
                     defaults={
+                        'content_object': rental,
                         'user': request.user,
                         'payment_type': 'rental',
                         'amount': rental.payment_amount or 0,
@@ -1218,6 +1229,8 @@ def rental_create(request, machine_pk=None):
         else:
             # Detect overlap/conflict and notify the requester
             error_text = str(form.errors) + " " + " ".join(e for e in form.non_field_errors())
+            if 'already booked' in error_text.lower():
+                alternative_slots = _rental_alternative_slots(form)
             if 'already rented' in error_text.lower():
                 messages.error(request, 'This machine is already rented for the selected dates. Please rent this on another day.')
                 try:
@@ -1298,6 +1311,7 @@ def rental_create(request, machine_pk=None):
         'available_machines': available_machines,
         'all_machines': all_machines,
         'machine': machine,
+        'alternative_slots': alternative_slots,
     })
 
 @login_required
@@ -1488,32 +1502,17 @@ def rental_list(request):
         return redirect('machines:admin_rental_dashboard')
     
     today = date.today()
-    Rental.sync_overdue_workflow_states(today=today)
+    Rental.ensure_schedule_states_current(today=today)
     search_query = request.GET.get('search', '').strip()
     status_filter = request.GET.get('status', 'all').strip().lower()
     valid_status_filters = {'all', 'pending', 'approved', 'in_progress', 'past', 'cancelled'}
     if status_filter not in valid_status_filters:
         status_filter = 'all'
 
-    user_rentals = Rental.objects.filter(user=request.user).select_related('machine')
-    
-    # Add payment information to context for each rental efficiently
-    from django.contrib.contenttypes.models import ContentType
-    from bufia.models import Payment
-    
-    rental_ct = ContentType.objects.get_for_model(Rental)
-    rental_ids = list(user_rentals.values_list('id', flat=True))
-    
-    # Prefetch payments for all rentals to avoid N+1 queries
-    payments_dict = {}
-    if rental_ids:
-        payments = Payment.objects.filter(
-            content_type=rental_ct,
-            object_id__in=rental_ids
-        ).select_related('user')
-        
-        for payment in payments:
-            payments_dict[payment.object_id] = payment
+    # Payments ride along on the denormalized pointer to avoid N+1 queries
+    user_rentals = Rental.objects.filter(user=request.user).select_related(
+        'machine', 'latest_payment', 'latest_payment__user',
+    )
 
     if search_query:
         user_rentals = user_rentals.filter(
@@ -1583,14 +1582,11 @@ def rental_list(request):
     approved_rentals = list(approved_rentals)
     in_progress_rentals = list(in_progress_rentals)
 
-    for rental in pending_rentals:
-        rental.payment_record = payments_dict.get(rental.id)
-    for rental in approved_rentals:
-        rental.payment_record = payments_dict.get(rental.id)
-    for rental in in_progress_rentals:
-        rental.payment_record = payments_dict.get(rental.id)
-    for rental in history_page_obj.object_list:
-        rental.payment_record = payments_dict.get(rental.id)
+    payments_dict = {}
+    for rental in [*pending_rentals, *approved_rentals, *in_progress_rentals, *history_page_obj.object_list]:
+        rental.payment_record = rental.latest_payment
+        if rental.latest_payment is not None:
+            payments_dict[rental.id] = rental.latest_payment
 
     pending_cash_rentals = [rental for rental in pending_rentals if rental.payment_type != 'in_kind']
     pending_in_kind_rentals = [rental for rental in pending_rentals if rental.payment_type == 'in_kind']
@@ -1828,6 +1824,7 @@ def _sync_package_rental_payment(rental):
         content_type=content_type,
         object_id=rental.id,
         defaults={
+            'content_object': rental,
             'user': rental.user,
             'payment_type': 'rental',
             'amount': rental.payment_amount or Decimal('0.00'),
@@ -2508,6 +2505,7 @@ def rental_package_list(request):
     if not _package_management_access(request.user):
         viewed_at = timezone.now()
         RentalPackage.objects.filter(user=request.user).update(member_last_viewed_at=viewed_at)
+        badge_counters.forget([request.user.pk], unread=False)
         for package in packages:
             package.member_last_viewed_at = viewed_at
 
@@ -2825,12 +2823,13 @@ class MachineListView(LoginRequiredMixin, ListView):
     model = Machine
     template_name = 'machines/machine_list.html'
     context_object_name = 'machines'
+    paginate_by = 12
     
     def get_queryset(self):
         """Return all machines excluding rice mills, filtered by search query or type if provided."""
         # Exclude rice mills from the machines list
         today = timezone.localdate()
-        queryset = _machine_rental_queryset().prefetch_related(
+        queryset = _machine_rental_queryset().order_by('-created_at', '-pk').prefetch_related(
             'images',
             Prefetch(
                 'maintenance_records',
@@ -3637,6 +3636,7 @@ class RentalCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
                 content_type=content_type,
                 object_id=self.object.id,
                 defaults={
+                    'content_object': self.object,
                     'user': form.instance.user,
                     'payment_type': 'rental',
                     'amount': self.object.payment_amount or 0,
@@ -4498,6 +4498,7 @@ def record_ricemill_final_weight(request, pk):
         content_type=content_type,
         object_id=appointment.id,
         defaults={
+            'content_object': appointment,
             'user': appointment.user,
             'payment_type': 'appointment',
             'amount': appointment.total_amount,
@@ -4572,6 +4573,7 @@ def confirm_ricemill_payment(request, pk):
         content_type=content_type,
         object_id=appointment.id,
         defaults={
+            'content_object': appointment,
             'user': appointment.user,
             'payment_type': 'appointment',
             'amount': appointment.total_amount,
@@ -5032,29 +5034,32 @@ def approve_dryer_rental(request, pk):
         estimated_end_time = form.cleaned_data.get('estimated_end_time')
         target_end_date = estimated_end_date or dryer_rental.rental_date
         requested_sacks = dryer_rental.quantity_in_sacks
-        if estimated_end_date and requested_sacks is not None and requested_sacks > 0:
-            date_cursor = dryer_rental.rental_date
-            while date_cursor <= target_end_date:
-                available_capacity = DryerRental.available_dryer_capacity_for_date(
+        with transaction.atomic():
+            # Hold the dryer row so two approvals cannot both claim the last sacks.
+            DryerCapacityDay.lock_machine(dryer_rental.machine_id)
+            if estimated_end_date and requested_sacks is not None and requested_sacks > 0:
+                shortfall = DryerRental.first_capacity_shortfall(
                     dryer_rental.machine,
-                    date_cursor,
+                    requested_sacks,
+                    dryer_rental.rental_date,
+                    target_end_date,
                     exclude_pk=dryer_rental.pk,
                 )
-                if requested_sacks > available_capacity:
+                if shortfall:
+                    short_date, available_capacity = shortfall
                     messages.error(
                         request,
                         f'This dryer only has {available_capacity:,.2f} sack(s) remaining on '
-                        f'{date_cursor:%B %d, %Y}. Reduce the quantity or shorten the service window.'
+                        f'{short_date:%B %d, %Y}. Reduce the quantity or shorten the service window.'
                     )
                     return redirect('machines:dryer_rental_detail', pk=dryer_rental.pk)
-                date_cursor += timedelta(days=1)
 
-        dryer_rental.admin_note = form.cleaned_data.get('admin_note') or ''
-        dryer_rental.estimated_end_date = estimated_end_date
-        dryer_rental.estimated_end_time = estimated_end_time
-        dryer_rental.payment_method = 'face_to_face'
-        dryer_rental.status = 'in_progress' if estimated_end_date and estimated_end_time else 'waiting_confirmation'
-        dryer_rental.save(update_fields=['admin_note', 'estimated_end_date', 'estimated_end_time', 'payment_method', 'status', 'updated_at'])
+            dryer_rental.admin_note = form.cleaned_data.get('admin_note') or ''
+            dryer_rental.estimated_end_date = estimated_end_date
+            dryer_rental.estimated_end_time = estimated_end_time
+            dryer_rental.payment_method = 'face_to_face'
+            dryer_rental.status = 'in_progress' if estimated_end_date and estimated_end_time else 'waiting_confirmation'
+            dryer_rental.save(update_fields=['admin_note', 'estimated_end_date', 'estimated_end_time', 'payment_method', 'status', 'updated_at'])
         if estimated_end_date:
             schedule_label = _format_estimated_service_schedule(dryer_rental)
             messages.success(
@@ -5164,6 +5169,7 @@ def confirm_dryer_payment(request, pk):
             content_type=content_type,
             object_id=dryer_rental.id,
             defaults={
+                'content_object': dryer_rental,
                 'user': dryer_rental.user,
                 'payment_type': 'dryer',
                 'amount': dryer_rental.total_amount,
@@ -5610,6 +5616,7 @@ def admin_rental_create(request, machine_pk=None):
                     content_type=content_type,
                     object_id=rental.id,
                     defaults={
+                        'content_object': rental,
                         'user': rental.user,
                         'payment_type': 'rental',
                         'amount': rental.payment_amount or 0,
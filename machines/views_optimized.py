@@ -13,7 +13,7 @@ from django.core.exceptions import ValidationError
 from datetime import datetime, timedelta
 import json
 
-from .models import Machine, Rental, Maintenance
+from .models import Machine, MachineCalendarSnapshot, Rental, Maintenance
 from .forms import RentalForm
 from notifications.models import UserNotification
 
@@ -294,44 +294,29 @@ def get_blocked_dates(machine, start_date, end_date):
     """
     Helper function to get all blocked dates for a machine
     """
+    snapshot = MachineCalendarSnapshot.for_machine(machine)
     blocked_dates = []
-    
-    # Get rentals
-    rentals = Rental.objects.filter(
-        machine=machine,
-        status__in=['approved', 'pending'],
-        start_date__lte=end_date,
-        end_date__gte=start_date
-    ).order_by('start_date')
-    
-    for rental in rentals:
+
+    for period in snapshot.overlapping(start_date, end_date, kinds={'rental'}, statuses={'approved', 'pending'}):
         blocked_dates.append({
-            'start': rental.start_date.isoformat(),
-            'end': rental.end_date.isoformat(),
+            'start': period['start'],
+            'end': period['end'],
             'type': 'rental',
-            'status': rental.status,
-            'title': f'Rented ({rental.get_status_display()})',
-            'color': '#dc3545' if rental.status == 'approved' else '#ffc107'
+            'status': period['status'],
+            'title': f"Rented ({period['status_display']})",
+            'color': '#dc3545' if period['status'] == 'approved' else '#ffc107'
         })
-    
-    # Get maintenance
-    maintenances = Maintenance.objects.filter(
-        machine=machine,
-        status__in=['scheduled', 'in_progress'],
-        start_date__date__lte=end_date,
-        end_date__date__gte=start_date
-    ).order_by('start_date')
-    
-    for maintenance in maintenances:
+
+    for period in snapshot.overlapping(start_date, end_date, kinds={'maintenance'}):
         blocked_dates.append({
-            'start': maintenance.start_date.date().isoformat(),
-            'end': maintenance.end_date.date().isoformat() if maintenance.end_date else maintenance.start_date.date().isoformat(),
+            'start': period['start'],
+            'end': period['end'],
             'type': 'maintenance',
-            'status': maintenance.status,
-            'title': f'Maintenance ({maintenance.get_maintenance_type_display()})',
+            'status': period['status'],
+            'title': f"Maintenance ({period['maintenance_type_display']})",
             'color': '#fd7e14'
         })
-    
+
     return blocked_dates
 
 
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserNotification, MachineAlert, RiceMillSchedulingAlert
+from .models import OutboxEvent, UserNotification, MachineAlert, RiceMillSchedulingAlert
 
 
 @admin.register(UserNotification)
@@ -24,3 +24,10 @@ class RiceMillSchedulingAlertAdmin(admin.ModelAdmin):
     list_filter = ('is_resolved', 'alert_type', 'timestamp')
     search_fields = ('schedule_id', 'user__username', 'user__email', 'message')
     date_hierarchy = 'timestamp'
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'event_type', 'status', 'attempts', 'created_at', 'dispatched_at')
+    list_filter = ('status', 'event_type', 'created_at')
+    readonly_fields = ('payload', 'attempts', 'last_error', 'claimed_at', 'dispatched_at', 'created_at')
@@ -0,0 +1,114 @@
+"""
+Cached per-user notification badge counters.
+
+The navbar shows two numbers on every page: unread notifications and
+package updates. Both are kept in the default cache and dropped when
+notifications are created, marked read or deleted and when rental packages
+change, so a page render normally reads them with one cache lookup and the
+first render after a change recounts them. Counters are never adjusted in
+place: the default LocMem cache is per process, and an increment there
+would leave the other workers' copies wrong instead of merely stale.
+Entries expire after ``NOTIFICATION_BADGE_CACHE_SECONDS``, which bounds how
+long another process can show an old count.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import F, Q
+
+logger = logging.getLogger(__name__)
+
+UNREAD_KEY = 'notifications:badge:unread:{}'
+PACKAGE_KEY = 'notifications:badge:package:{}'
+PACKAGE_NOTIFICATION_PREFIX = 'rental_package_'
+
+
+def _timeout():
+    return getattr(settings, 'NOTIFICATION_BADGE_CACHE_SECONDS', 300)
+
+
+def count_unread(user):
+    from .models import UserNotification
+
+    return UserNotification.objects.filter(user=user, is_read=False).count()
+
+
+def count_package_updates(user):
+    from .models import UserNotification
+
+    unread_package_notification_ids = set(
+        UserNotification.objects.filter(
+            user=user,
+            is_read=False,
+            notification_type__startswith=PACKAGE_NOTIFICATION_PREFIX,
+            related_object_id__isnull=False,
+        ).values_list('related_object_id', flat=True)
+    )
+
+    if getattr(user, 'is_staff', False) or getattr(user, 'is_superuser', False):
+        return len(unread_package_notification_ids)
+
+    from machines.models import RentalPackage
+
+    updated_package_ids = set(
+        RentalPackage.objects.filter(user=user).filter(
+            Q(member_last_viewed_at__isnull=True) |
+            Q(updated_at__gt=F('member_last_viewed_at'))
+        ).values_list('id', flat=True)
+    )
+    return len(updated_package_ids | unread_package_notification_ids)
+
+
+def badge_counts(user):
+    """
+    Return ``{'unread': ..., 'package': ...}`` for ``user``.
+
+    Missing counters are computed and cached. A database error yields zeros
+    and caches nothing.
+    """
+    keys = {'unread': UNREAD_KEY.format(user.pk), 'package': PACKAGE_KEY.format(user.pk)}
+    cached = cache.get_many(keys.values())
+    counts = {name: cached.get(key) for name, key in keys.items()}
+
+    missing = {}
+    try:
+        if counts['unread'] is None:
+            counts['unread'] = missing[keys['unread']] = count_unread(user)
+        if counts['package'] is None:
+            counts['package'] = missing[keys['package']] = count_package_updates(user)
+    except DatabaseError as exc:
+        logger.warning("Notification badge counts unavailable for user %s: %s", user.pk, exc)
+        return {'unread': 0, 'package': 0}
+
+    if missing:
+        cache.set_many(missing, _timeout())
+    return counts
+
+
+def notification_created(notification):
+    if notification.is_read:
+        return
+    forget(
+        [notification.user_id],
+        package=(notification.notification_type or '').startswith(PACKAGE_NOTIFICATION_PREFIX),
+    )
+
+
+def forget(user_ids, *, unread=True, package=True):
+    """Drop cached counters of ``user_ids`` so the next read recounts them."""
+    keys = []
+    for user_id in set(user_ids):
+        if unread:
+            keys.append(UNREAD_KEY.format(user_id))
+        if package:
+            keys.append(PACKAGE_KEY.format(user_id))
+    if keys:
+        cache.delete_many(keys)
+
+
+def read_state_changed(flipped):
+    """Drop the counters of ``[{'user_id', 'packages'}]`` rows whose read state changed."""
+    forget([row['user_id'] for row in flipped], package=False)
+    forget([row['user_id'] for row in flipped if row['packages']], unread=False)
@@ -0,0 +1,61 @@
+"""
+Management command to write queued notification outbox events.
+
+Events are normally dispatched right after the transaction that recorded
+them commits. Run this as a worker to pick up events whose dispatch failed
+or never ran. Each pass that finds nothing due also prunes events
+dispatched more than OUTBOX_RETENTION_DAYS ago:
+
+    python manage.py dispatch_outbox            # dispatch what is due, then exit
+    python manage.py dispatch_outbox --loop     # keep polling
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.models import OutboxEvent
+from notifications.outbox import DISPATCH_BATCH_SIZE, dispatch_outbox_events
+
+
+class Command(BaseCommand):
+    help = 'Write queued notification and activity outbox events in batches with retry'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DISPATCH_BATCH_SIZE,
+            help=f'Number of events to claim per batch (default: {DISPATCH_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new events instead of exiting when the outbox is empty'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls when the outbox is empty (default: 5)'
+        )
+
+    def handle(self, *args, **options):
+        totals = {}
+        while True:
+            outcomes = dispatch_outbox_events(batch_size=options['batch_size'])
+            for outcome, count in outcomes.items():
+                totals[outcome] = totals.get(outcome, 0) + count
+            if any(outcomes.values()):
+                self.stdout.write(', '.join(f'{count} {outcome}' for outcome, count in outcomes.items()))
+                continue
+            totals['pruned'] = totals.get('pruned', 0) + OutboxEvent.prune_dispatched()
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                'Outbox drained: ' + ', '.join(f'{count} {outcome}' for outcome, count in totals.items())
+            )
+        )
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:40
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def fill_dedupe_keys(apps, schema_editor):
+    # Same hash as UserNotification.build_dedupe_key.
+    UserNotification = apps.get_model('notifications', 'UserNotification')
+    batch = []
+    for notification in UserNotification.objects.only(
+        'pk', 'notification_type', 'message', 'related_object_id'
+    ).iterator(chunk_size=1000):
+        raw = '\x1f'.join([
+            notification.notification_type or '',
+            notification.message or '',
+            '' if notification.related_object_id is None else str(notification.related_object_id),
+        ])
+        notification.dedupe_key = hashlib.sha256(raw.encode('utf-8')).hexdigest()
+        batch.append(notification)
+        if len(batch) >= 1000:
+            UserNotification.objects.bulk_update(batch, ['dedupe_key'])
+            batch = []
+    if batch:
+        UserNotification.objects.bulk_update(batch, ['dedupe_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_add_notification_enhancements'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usernotification',
+            name='dedupe_key',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Hash of type, message and related object used to suppress duplicates', max_length=64),
+        ),
+        migrations.RunPython(fill_dedupe_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='usernotification',
+            index=models.Index(fields=['user', 'dedupe_key', 'is_read', 'timestamp'], name='usernotif_dedupe_idx'),
+        ),
+    ]
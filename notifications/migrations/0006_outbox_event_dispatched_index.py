@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_outbox_event'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='outboxevent',
+            index=models.Index(fields=['status', 'dispatched_at'], name='notificatio_status_53c37d_idx'),
+        ),
+    ]
@@ -1,4 +1,7 @@
-from django.db import models
+import hashlib
+
+from django.conf import settings
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.utils import timezone
@@ -7,7 +10,47 @@ from datetime import timedelta
 User = get_user_model()
 
 
-class UserNotificationManager(models.Manager):
+class UserNotificationQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        if 'is_read' not in kwargs:
+            return super().update(**kwargs)
+
+        from . import counters
+
+        # Users whose notifications actually flip read state, to drop their badges.
+        flipped = list(
+            self.exclude(is_read=kwargs['is_read'])
+            .values('user_id')
+            .annotate(
+                packages=models.Count(
+                    'pk',
+                    filter=models.Q(notification_type__startswith=counters.PACKAGE_NOTIFICATION_PREFIX),
+                ),
+            )
+            .order_by()
+        )
+        rows = super().update(**kwargs)
+        counters.read_state_changed(flipped)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from . import counters
+
+        objs = list(objs)
+        for notification in objs:
+            if not notification.dedupe_key:
+                notification.dedupe_key = UserNotification.build_dedupe_key(
+                    notification.notification_type,
+                    notification.message,
+                    notification.related_object_id,
+                )
+        created = super().bulk_create(objs, *args, **kwargs)
+        for notification in created:
+            counters.notification_created(notification)
+        return created
+
+
+class UserNotificationManager(models.Manager.from_queryset(UserNotificationQuerySet)):
     def create(self, **kwargs):
         duplicate = UserNotification.find_recent_duplicate(**kwargs)
         if duplicate:
@@ -50,12 +93,33 @@ class UserNotification(models.Model):
     # Fields for dynamic routing
     related_object_id = models.IntegerField(null=True, blank=True, help_text="ID of the related object (rental, appointment, etc.)")
     action_url = models.CharField(max_length=255, null=True, blank=True, help_text="Direct URL to navigate to")
+    dedupe_key = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        editable=False,
+        help_text="Hash of type, message and related object used to suppress duplicates",
+    )
 
     objects = UserNotificationManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'dedupe_key', 'is_read', 'timestamp'], name='usernotif_dedupe_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.notification_type}"
 
+    @staticmethod
+    def build_dedupe_key(notification_type, message, related_object_id):
+        raw = '\x1f'.join([
+            notification_type or '',
+            message or '',
+            '' if related_object_id is None else str(related_object_id),
+        ])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
     @classmethod
     def find_recent_duplicate(cls, **kwargs):
         user = kwargs.get('user')
@@ -68,25 +132,28 @@ class UserNotification(models.Model):
 
         return cls.objects.filter(
             user_id=user_id,
-            notification_type=notification_type,
-            message=message,
-            related_object_id=kwargs.get('related_object_id'),
+            dedupe_key=cls.build_dedupe_key(notification_type, message, kwargs.get('related_object_id')),
             is_read=False,
             timestamp__gte=timezone.now() - cls.DUPLICATE_WINDOW,
         ).order_by('-timestamp').first()
 
+    MERGED_FIELDS = ('action_url', 'title', 'priority', 'category')
+
     @classmethod
-    def merge_duplicate(cls, duplicate, **kwargs):
+    def apply_merged_fields(cls, duplicate, **kwargs):
         updates = []
-        for field_name in ['action_url', 'title', 'priority', 'category']:
+        for field_name in cls.MERGED_FIELDS:
             incoming_value = kwargs.get(field_name)
             if incoming_value and incoming_value != getattr(duplicate, field_name):
                 setattr(duplicate, field_name, incoming_value)
                 updates.append(field_name)
+        return updates
 
-        if updates:
-            duplicate.save(update_fields=updates)
-
+    @classmethod
+    def merge_duplicate(cls, duplicate, **kwargs):
+        updates = cls.apply_merged_fields(duplicate, **kwargs)
+        duplicate.timestamp = timezone.now()
+        duplicate.save(update_fields=['timestamp', *updates])
         return duplicate
 
     def save(self, *args, **kwargs):
@@ -115,13 +182,74 @@ class UserNotification(models.Model):
                 self._state.adding = False
                 return
 
+        self.fill_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'notification_type', 'message', 'related_object_id'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'dedupe_key'}
+        super().save(*args, **kwargs)
+
+    def fill_derived_fields(self):
         if not self.category or self.category == 'system':
             self.category = self.infer_category()
         if not self.priority:
             self.priority = self.infer_priority()
         if not self.title or self._title_has_mojibake():
             self.title = self.build_display_title()
-        super().save(*args, **kwargs)
+        self.dedupe_key = self.build_dedupe_key(self.notification_type, self.message, self.related_object_id)
+
+    @classmethod
+    def bulk_create_notifications(cls, notifications, *, dedupe=True):
+        """
+        Insert unsaved notifications in one query.
+
+        Derived fields are filled the same way ``save()`` fills them, with the
+        related objects needed for titles fetched in bulk.
+        With ``dedupe`` a notification that repeats an unread copy from the
+        last ``DUPLICATE_WINDOW`` is merged into it the way ``merge_duplicate``
+        does, with all merged copies written by one update, and repeats within
+        the batch are folded into their first occurrence. Returns the created
+        rows.
+        """
+        notifications = list(notifications)
+        cls.resolve_related_objects(
+            notification for notification in notifications
+            if not notification.title or notification._title_has_mojibake()
+        )
+        for notification in notifications:
+            notification.fill_derived_fields()
+
+        if dedupe and notifications:
+            now = timezone.now()
+            # Ascending order so the newest unread copy wins, as in find_recent_duplicate.
+            recent = {
+                (duplicate.user_id, duplicate.dedupe_key): duplicate
+                for duplicate in cls.objects.filter(
+                    user_id__in={notification.user_id for notification in notifications},
+                    dedupe_key__in={notification.dedupe_key for notification in notifications},
+                    is_read=False,
+                    timestamp__gte=now - cls.DUPLICATE_WINDOW,
+                ).only('pk', 'user_id', 'dedupe_key', 'timestamp', *cls.MERGED_FIELDS).order_by('timestamp', 'pk')
+            }
+            merged = {}
+            fresh = {}
+            for notification in notifications:
+                key = (notification.user_id, notification.dedupe_key)
+                incoming = {field_name: getattr(notification, field_name) for field_name in cls.MERGED_FIELDS}
+                if key in recent:
+                    duplicate = recent[key]
+                    cls.apply_merged_fields(duplicate, **incoming)
+                    merged[duplicate.pk] = duplicate
+                elif key in fresh:
+                    cls.apply_merged_fields(fresh[key], **incoming)
+                else:
+                    fresh[key] = notification
+            if merged:
+                for duplicate in merged.values():
+                    duplicate.timestamp = now
+                cls.objects.bulk_update(merged.values(), ['timestamp', *cls.MERGED_FIELDS])
+            notifications = list(fresh.values())
+
+        return cls.objects.bulk_create(notifications)
 
     def infer_category(self):
         notification_type = (self.notification_type or '').lower()
@@ -163,35 +291,86 @@ class UserNotification(models.Model):
             return value.strftime('%b %d, %Y')
         return value.strftime('%b %d')
 
+    def _related_target(self):
+        """Key of the model ``related_object_id`` points at, judged by ``notification_type``."""
+        if not self.related_object_id:
+            return None
+        notification_type = (self.notification_type or '').lower()
+        if 'dryer' in notification_type:
+            return 'dryer'
+        if 'package' in notification_type:
+            return 'package'
+        if 'appointment' in notification_type or 'rice' in notification_type:
+            return 'appointment'
+        if 'rental' in notification_type:
+            return 'rental'
+        if 'irrigation' in notification_type:
+            return 'irrigation'
+        return None
+
+    @staticmethod
+    def _related_queryset(target):
+        if target == 'dryer':
+            from machines.models import DryerRental
+            return DryerRental.objects.select_related('user', 'machine')
+        if target == 'package':
+            from machines.models import RentalPackage
+            return RentalPackage.objects.select_related('user', 'approved_by').prefetch_related('items')
+        if target == 'appointment':
+            from machines.models import RiceMillAppointment
+            return RiceMillAppointment.objects.select_related('user', 'machine')
+        if target == 'rental':
+            from machines.models import Rental
+            return Rental.objects.select_related('user', 'machine')
+        from irrigation.models import WaterIrrigationRequest
+        return WaterIrrigationRequest.objects.select_related('farmer', 'sector')
+
     def _related_object(self):
         if hasattr(self, '_related_object_cache'):
             return self._related_object_cache
 
         obj = None
-        if self.related_object_id:
+        target = self._related_target()
+        if target:
             try:
-                notification_type = (self.notification_type or '').lower()
-                if 'dryer' in notification_type:
-                    from machines.models import DryerRental
-                    obj = DryerRental.objects.select_related('user', 'machine').filter(pk=self.related_object_id).first()
-                elif 'package' in notification_type:
-                    from machines.models import RentalPackage
-                    obj = RentalPackage.objects.select_related('user', 'approved_by').prefetch_related('items').filter(pk=self.related_object_id).first()
-                elif 'appointment' in notification_type or 'rice' in notification_type:
-                    from machines.models import RiceMillAppointment
-                    obj = RiceMillAppointment.objects.select_related('user', 'machine').filter(pk=self.related_object_id).first()
-                elif 'rental' in notification_type:
-                    from machines.models import Rental
-                    obj = Rental.objects.select_related('user', 'machine').filter(pk=self.related_object_id).first()
-                elif 'irrigation' in notification_type:
-                    from irrigation.models import WaterIrrigationRequest
-                    obj = WaterIrrigationRequest.objects.select_related('farmer', 'sector').filter(pk=self.related_object_id).first()
+                obj = self._related_queryset(target).filter(pk=self.related_object_id).first()
             except Exception:
                 obj = None
 
         self._related_object_cache = obj
         return obj
 
+    @classmethod
+    def resolve_related_objects(cls, notifications):
+        """
+        Attach the related object of every notification with one query per target model.
+
+        Templates read ``display_title``/``display_detail`` per row; calling
+        this first keeps a list of notifications from costing a query each.
+        Returns the notifications as a list.
+        """
+        notifications = list(notifications)
+        pending = {}
+        for notification in notifications:
+            if hasattr(notification, '_related_object_cache'):
+                continue
+            target = notification._related_target()
+            if target is None:
+                notification._related_object_cache = None
+                continue
+            pending.setdefault(target, []).append(notification)
+
+        for target, group in pending.items():
+            try:
+                objects = cls._related_queryset(target).in_bulk(
+                    {notification.related_object_id for notification in group}
+                )
+            except Exception:
+                objects = {}
+            for notification in group:
+                notification._related_object_cache = objects.get(notification.related_object_id)
+        return notifications
+
     def _actor_name(self):
         obj = self._related_object()
         if obj is None:
@@ -674,3 +853,102 @@ class RiceMillSchedulingAlert(models.Model):
 
     def __str__(self):
         return f"Schedule {self.schedule_id} - {self.alert_type}"
+
+
+class OutboxEvent(models.Model):
+    """
+    Notifications and activity entries waiting to be written.
+
+    ``notifications.outbox.record`` stores one event in the caller's
+    transaction; after commit ``dispatch_outbox_events`` writes the events'
+    activity entries and notifications with one bulk insert each. Events a
+    dispatch could not finish are retried by the ``dispatch_outbox`` command.
+    Dispatched events are pruned after ``OUTBOX_RETENTION_DAYS``.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DISPATCHED = 'dispatched'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_DISPATCHED, 'Dispatched'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    MAX_ATTEMPTS = 5
+    RETRY_DELAY = timedelta(minutes=1)
+    # A claim older than this belongs to a worker that died mid-batch.
+    STALE_CLAIM_AFTER = timedelta(minutes=10)
+
+    event_type = models.CharField(max_length=100, blank=True)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at', 'pk']
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+            models.Index(fields=['status', 'dispatched_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type or 'event'} #{self.pk} ({self.status})"
+
+    @classmethod
+    def claim_batch(cls, limit):
+        """Mark up to ``limit`` due events as processing and return them, skipping rows other workers hold."""
+        now = timezone.now()
+        due = models.Q(status=cls.STATUS_PENDING, available_at__lte=now) | models.Q(
+            status=cls.STATUS_PROCESSING,
+            claimed_at__lt=now - cls.STALE_CLAIM_AFTER,
+        )
+        with transaction.atomic():
+            ids = list(
+                cls.objects.filter(due)
+                .select_for_update(skip_locked=True)
+                .order_by('available_at', 'pk')
+                .values_list('pk', flat=True)[:limit]
+            )
+            if not ids:
+                return []
+            cls.objects.filter(pk__in=ids).update(
+                status=cls.STATUS_PROCESSING,
+                claimed_at=now,
+                attempts=models.F('attempts') + 1,
+            )
+        return list(cls.objects.filter(pk__in=ids).order_by('available_at', 'pk'))
+
+    @classmethod
+    def mark_dispatched(cls, events):
+        cls.objects.filter(pk__in=[event.pk for event in events]).update(
+            status=cls.STATUS_DISPATCHED,
+            last_error='',
+            claimed_at=None,
+            dispatched_at=timezone.now(),
+        )
+
+    @classmethod
+    def prune_dispatched(cls, now=None):
+        """Delete events dispatched more than ``OUTBOX_RETENTION_DAYS`` ago. Returns the number deleted."""
+        now = now or timezone.now()
+        cutoff = now - timedelta(days=getattr(settings, 'OUTBOX_RETENTION_DAYS', 7))
+        deleted, _ = cls.objects.filter(status=cls.STATUS_DISPATCHED, dispatched_at__lt=cutoff).delete()
+        return deleted
+
+    def mark_failed(self, error):
+        """Retry after ``RETRY_DELAY`` until ``MAX_ATTEMPTS`` dispatches have failed."""
+        self.last_error = error
+        self.claimed_at = None
+        if self.attempts >= self.MAX_ATTEMPTS:
+            self.status = self.STATUS_FAILED
+        else:
+            self.status = self.STATUS_PENDING
+            self.available_at = timezone.now() + self.RETRY_DELAY
+        self.save(update_fields=['status', 'last_error', 'claimed_at', 'available_at'])
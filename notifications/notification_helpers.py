@@ -13,16 +13,8 @@ from .models import UserNotification
 User = get_user_model()
 
 
-def create_notification(user, notification_type, message, **kwargs):
-    """
-    Create a notification with automatic categorization and priority
-
-    Args:
-        user: User object
-        notification_type: Type of notification (e.g., 'rental_new_request')
-        message: Notification message
-        **kwargs: Additional fields (title, priority, category, related_object_id, action_url)
-    """
+def _notification_fields(notification_type, message, kwargs):
+    """Fill in category, priority and title when the caller did not pass them."""
     # Auto-detect category from notification_type if not provided
     if 'category' not in kwargs:
         if 'rental' in notification_type:
@@ -56,12 +48,33 @@ def create_notification(user, notification_type, message, **kwargs):
     # Generate title if not provided
     if 'title' not in kwargs:
         kwargs['title'] = generate_notification_title(notification_type, message)
+    return kwargs
 
+
+def create_notification(user, notification_type, message, **kwargs):
+    """
+    Create a notification with automatic categorization and priority
+
+    Args:
+        user: User object
+        notification_type: Type of notification (e.g., 'rental_new_request')
+        message: Notification message
+        **kwargs: Additional fields (title, priority, category, related_object_id, action_url)
+    """
     return UserNotification.objects.create(
         user=user,
         notification_type=notification_type,
         message=message,
-        **kwargs
+        **_notification_fields(notification_type, message, kwargs)
+    )
+
+
+def create_notifications(users, notification_type, message, **kwargs):
+    """Send the same notification to every user in ``users`` with one insert."""
+    fields = _notification_fields(notification_type, message, kwargs)
+    return UserNotification.bulk_create_notifications(
+        UserNotification(user=user, notification_type=notification_type, message=message, **fields)
+        for user in users
     )
 
 
@@ -113,17 +126,16 @@ def notify_rental_request(rental, admin_users=None):
         f"Payment: {rental.get_payment_method_display()}."
     )
 
-    for admin in admin_users:
-        create_notification(
-            user=admin,
-            notification_type='rental_new_request',
-            title=title,
-            message=message,
-            category='rental',
-            priority='important',
-            related_object_id=rental.id,
-            action_url=f'/machines/admin/rental/{rental.id}/approve/'
-        )
+    create_notifications(
+        admin_users,
+        notification_type='rental_new_request',
+        title=title,
+        message=message,
+        category='rental',
+        priority='important',
+        related_object_id=rental.id,
+        action_url=f'/machines/admin/rental/{rental.id}/approve/'
+    )
 
 
 def notify_rental_approved(rental):
@@ -0,0 +1,178 @@
+"""
+Transactional outbox for notifications and activity entries.
+
+Signal handlers describe their side effects with ``activity``,
+``notification`` and ``staff_notification`` and pass them to ``record``.
+``record`` writes a single ``OutboxEvent`` row in the caller's transaction
+and schedules a dispatch for after the commit; a rolled-back transaction
+leaves nothing to send.
+
+``dispatch_outbox_events`` writes a batch of events with one bulk insert
+for activity entries and one for notifications. Staff recipients are
+looked up once per batch. If the batch write fails, its events are written
+one at a time so only the events that fail on their own are retried.
+Events whose dispatch failed, or whose process died before dispatching,
+are retried by the ``dispatch_outbox`` command. Dispatched events are
+pruned at most once per ``PRUNE_INTERVAL_SECONDS`` per process.
+"""
+import logging
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_BATCH_SIZE = 100
+PRUNE_INTERVAL_SECONDS = 3600
+
+_last_prune = None
+
+
+def activity(**kwargs):
+    """Serializable form of ``users.activity.log_activity`` keyword arguments."""
+    from users.activity import build_activity
+
+    entry = build_activity(**kwargs)
+    return {
+        'actor_id': entry.actor_id,
+        'subject_user_id': entry.subject_user_id,
+        'activity_type': entry.activity_type,
+        'visibility': entry.visibility,
+        'title': entry.title,
+        'description': entry.description,
+        'related_model': entry.related_model,
+        'related_object_id': entry.related_object_id,
+        'metadata': entry.metadata,
+        'created_at': entry.created_at.isoformat() if 'created_at' in kwargs and entry.created_at else None,
+    }
+
+
+def notification(user, notification_type, message, related_object_id=None):
+    return {
+        'user_id': getattr(user, 'pk', user),
+        'notification_type': notification_type,
+        'message': message,
+        'related_object_id': related_object_id,
+    }
+
+
+def staff_notification(notification_type, message, related_object_id=None):
+    """A notification for every active staff member who is not an operator."""
+    return {
+        'staff': True,
+        'notification_type': notification_type,
+        'message': message,
+        'related_object_id': related_object_id,
+    }
+
+
+def record(event_type, *, activities=(), notifications=()):
+    """Store the side effects as one outbox event and dispatch it after commit."""
+    from .models import OutboxEvent
+
+    activities = [item for item in activities if item]
+    notifications = [item for item in notifications if item]
+    if not activities and not notifications:
+        return None
+    event = OutboxEvent.objects.create(
+        event_type=event_type,
+        payload={'activities': activities, 'notifications': notifications},
+    )
+    transaction.on_commit(_dispatch_after_commit)
+    return event
+
+
+def _dispatch_after_commit():
+    try:
+        dispatch_outbox_events()
+    except Exception:
+        # The events stay queued for the dispatch_outbox command.
+        logger.exception("Outbox dispatch after commit failed")
+
+
+def _staff_ids():
+    user_model = get_user_model()
+    return list(
+        user_model.objects.filter(is_staff=True, is_active=True)
+        .exclude(role='operator')
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
+
+
+def _deliver(events, staff_ids=None):
+    from notifications.models import UserNotification
+    from users.models import ActivityLog
+
+    activities = []
+    notifications = []
+    for event in events:
+        for values in event.payload.get('activities', []):
+            values = dict(values)
+            created_at = values.pop('created_at', None)
+            values['created_at'] = parse_datetime(created_at) if created_at else event.created_at
+            activities.append(ActivityLog(**values))
+        for values in event.payload.get('notifications', []):
+            values = dict(values)
+            if values.pop('staff', False):
+                if staff_ids is None:
+                    staff_ids = _staff_ids()
+                notifications.extend(UserNotification(user_id=user_id, **values) for user_id in staff_ids)
+            else:
+                notifications.append(UserNotification(**values))
+
+    ActivityLog.objects.bulk_create(activities)
+    UserNotification.bulk_create_notifications(notifications)
+
+
+def _write(events, staff_ids):
+    from .models import OutboxEvent
+
+    with transaction.atomic():
+        _deliver(events, staff_ids)
+        OutboxEvent.mark_dispatched(events)
+
+
+def dispatch_outbox_events(batch_size=DISPATCH_BATCH_SIZE):
+    """Write up to ``batch_size`` due events. Returns counts per outcome."""
+    from .models import OutboxEvent
+
+    outcomes = {'dispatched': 0, 'retried': 0, 'failed': 0}
+    events = OutboxEvent.claim_batch(batch_size)
+    if not events:
+        return outcomes
+    staff_ids = None
+    if any(values.get('staff') for event in events for values in event.payload.get('notifications', [])):
+        staff_ids = _staff_ids()
+    try:
+        _write(events, staff_ids)
+    except Exception:
+        if len(events) > 1:
+            logger.warning("Outbox batch of %s events failed; writing them one at a time", len(events), exc_info=True)
+        for event in events:
+            try:
+                _write([event], staff_ids)
+            except Exception as exc:
+                logger.exception("Outbox event %s failed", event.pk)
+                event.mark_failed(str(exc) or exc.__class__.__name__)
+                outcomes['failed' if event.status == OutboxEvent.STATUS_FAILED else 'retried'] += 1
+            else:
+                outcomes['dispatched'] += 1
+    else:
+        outcomes['dispatched'] = len(events)
+    if outcomes['dispatched']:
+        _prune_periodically()
+    return outcomes
+
+
+def _prune_periodically():
+    global _last_prune
+    from .models import OutboxEvent
+
+    now = time.monotonic()
+    if _last_prune is not None and now - _last_prune < PRUNE_INTERVAL_SECONDS:
+        return
+    _last_prune = now
+    OutboxEvent.prune_dispatched()
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from machines.models import RentalPackage
+
+from . import counters
+from .models import UserNotification
+
+
+@receiver(post_save, sender=UserNotification)
+def update_badge_counters_on_save(sender, instance, created, **kwargs):
+    if created:
+        counters.notification_created(instance)
+        return
+    # Possibly marked read or unread; recount on the next page.
+    counters.forget(
+        [instance.user_id],
+        package=(instance.notification_type or '').startswith(counters.PACKAGE_NOTIFICATION_PREFIX),
+    )
+
+
+@receiver(post_delete, sender=UserNotification)
+def update_badge_counters_on_delete(sender, instance, **kwargs):
+    counters.forget([instance.user_id])
+
+
+@receiver(post_save, sender=RentalPackage)
+@receiver(post_delete, sender=RentalPackage)
+def update_package_badge_counter(sender, instance, **kwargs):
+    counters.forget([instance.user_id], unread=False)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reset_badge_counters_for_new_user(sender, instance, created, **kwargs):
+    if created:
+        # Never inherit counters cached for a reused primary key.
+        counters.forget([instance.pk])
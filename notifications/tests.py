@@ -128,10 +128,10 @@ class NotificationContextProcessorTests(TestCase):
         ):
             context = notifications_context(request)
 
-        self.assertEqual(context['unread_notifications_count'], 0)
-        self.assertEqual(context['recent_notifications'], [])
-        self.assertEqual(context['recent_notification_groups'], [])
-        self.assertEqual(context['package_notification_count'], 0)
+            self.assertEqual(context['unread_notifications_count'], 0)
+            self.assertEqual(context['recent_notifications'], [])
+            self.assertEqual(context['recent_notification_groups'], [])
+            self.assertEqual(context['package_notification_count'], 0)
 
     def test_notifications_context_counts_member_package_updates(self):
         package = RentalPackage.objects.create(
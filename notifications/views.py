@@ -56,8 +56,8 @@ def user_notifications(request):
         unread_list.update(is_read=True)
 
     read_list = UserNotification.objects.filter(user=request.user, is_read=True).order_by('-timestamp')[:50]
-    unread_groups = _group_notification_history(list(unread_list))
-    read_groups = _group_notification_history(list(read_list))
+    unread_groups = _group_notification_history(UserNotification.resolve_related_objects(unread_list))
+    read_groups = _group_notification_history(UserNotification.resolve_related_objects(read_list))
 
     return render(
         request,
@@ -175,7 +175,7 @@ def all_notifications(request):
     search_query = request.GET.get('search', '')
     
     # Start with all notifications
-    notifications = UserNotification.objects.all()
+    notifications = UserNotification.objects.select_related('user')
     
     # Apply category filter
     if category:
@@ -1,6 +1,8 @@
 from django.contrib import admin
 from .models import (
     MachineUsageReport,
+    ReportExportJob,
+    RiceInventoryEntry,
     RiceMillSchedulingReport,
     RiceSale,
     RiceSaleSetting,
@@ -45,5 +47,22 @@ class RiceSaleAdmin(admin.ModelAdmin):
     search_fields = ('reference_number', 'buyer__username', 'buyer__email', 'buyer__first_name', 'buyer__last_name')
 
 
+@admin.register(RiceInventoryEntry)
+class RiceInventoryEntryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'occurred_at', 'entry_type', 'source_label', 'stock_change', 'reserved_change', 'actual_balance', 'reserved_balance')
+    list_filter = ('entry_type', 'source_kind', 'occurred_at')
+    search_fields = ('source_label',)
 
+    def has_change_permission(self, request, obj=None):
+        return False
 
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ReportExportJob)
+class ReportExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'export_key', 'requested_by', 'status', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status', 'export_key', 'created_at')
+    search_fields = ('export_key', 'requested_by__username', 'cache_key')
+    readonly_fields = ('cache_key', 'query_string', 'attempts', 'last_error', 'claimed_at', 'finished_at', 'created_at')
@@ -0,0 +1,292 @@
+"""
+Background rendering of report exports.
+
+``EXPORTS`` lists the PDF and Excel exports that can be queued as a
+``ReportExportJob``. The worker renders a job by calling the export view
+itself with the stored query string, so a queued file matches what the
+direct download returns. Without a worker (``REPORT_EXPORT_WORKER`` off)
+the requesting view renders the job itself through ``render_in_request``.
+
+A job's cache key hashes the export, its normalized filters and a
+fingerprint of the tables the report reads (row count, highest id and
+latest ``updated_at`` per table). While the fingerprint is unchanged a new
+request reuses the stored file. Finished jobs older than
+``REPORT_EXPORT_MAX_AGE_SECONDS`` are pruned with their files, at most once
+per ``PRUNE_INTERVAL_SECONDS`` per process.
+
+The export views are called unwrapped, so ``user_can_export`` repeats their
+access check for the requester before anything is queued or rendered.
+"""
+import hashlib
+import inspect
+import logging
+import tempfile
+import time
+from urllib.parse import urlencode
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.files import File
+from django.db.models import Count, Max
+from django.http import HttpRequest, QueryDict
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+PRUNE_INTERVAL_SECONDS = 300
+
+_last_prune = None
+
+RENTAL_SOURCES = ('machines.Rental', 'bufia.Payment', 'bufia.Refund')
+MACHINE_SOURCES = (
+    'machines.Machine',
+    'machines.Rental',
+    'machines.Maintenance',
+    'machines.MaintenancePartUsed',
+    'machines.RiceMillAppointment',
+    'machines.DryerRental',
+    'reports.RiceSale',
+)
+MEMBERSHIP_SOURCES = (settings.AUTH_USER_MODEL, 'users.MembershipApplication', 'users.Sector')
+
+EXPORTS = {
+    'rental_report_excel': {
+        'label': 'Rental report (Excel)',
+        'view': 'reports.views.export_rental_report_excel',
+        'sources': RENTAL_SOURCES,
+    },
+    'rental_report_pdf': {
+        'label': 'Rental report (PDF)',
+        'view': 'reports.views.export_rental_report_pdf',
+        'sources': RENTAL_SOURCES,
+    },
+    'harvest_report_excel': {
+        'label': 'Harvest report (Excel)',
+        'view': 'reports.views.export_harvest_report_excel',
+        'sources': ('machines.Rental', 'machines.RiceMillAppointment'),
+    },
+    'harvest_report_pdf': {
+        'label': 'Harvest report (PDF)',
+        'view': 'reports.views.export_harvest_report_pdf',
+        'sources': ('machines.Rental', 'machines.RiceMillAppointment'),
+    },
+    'rice_sales_report_excel': {
+        'label': 'Rice sales report (Excel)',
+        'view': 'reports.views.export_rice_sales_report_excel',
+        'sources': ('reports.RiceSale', 'reports.RiceSaleSetting', 'machines.Rental'),
+    },
+    'rice_sales_report_pdf': {
+        'label': 'Rice sales report (PDF)',
+        'view': 'reports.views.export_rice_sales_report_pdf',
+        'sources': ('reports.RiceSale', 'reports.RiceSaleSetting', 'machines.Rental'),
+    },
+    'financial_report_excel': {
+        'label': 'Financial summary (Excel)',
+        'view': 'reports.views.export_financial_report_excel',
+        'sources': RENTAL_SOURCES + MACHINE_SOURCES + ('users.MembershipApplication',),
+    },
+    'financial_report_pdf': {
+        'label': 'Financial summary (PDF)',
+        'view': 'reports.views.export_financial_report_pdf',
+        'sources': RENTAL_SOURCES + MACHINE_SOURCES + ('users.MembershipApplication',),
+    },
+    'machine_usage_report_excel': {
+        'label': 'Machine usage report (Excel)',
+        'view': 'reports.views.export_machine_usage_report_excel',
+        'sources': MACHINE_SOURCES,
+    },
+    'machine_usage_report_pdf': {
+        'label': 'Machine usage report (PDF)',
+        'view': 'reports.views.export_machine_usage_report_pdf',
+        'sources': MACHINE_SOURCES,
+    },
+    'membership_report_excel': {
+        'label': 'Membership report (Excel)',
+        'view': 'reports.views.export_membership_report_excel',
+        'sources': MEMBERSHIP_SOURCES,
+    },
+    'membership_report_pdf': {
+        'label': 'Membership report (PDF)',
+        'view': 'reports.views.export_membership_report_pdf',
+        'sources': MEMBERSHIP_SOURCES,
+    },
+    'payments_excel': {
+        'label': 'Payment transactions (Excel)',
+        'view': 'bufia.views.payment_views.export_payments_excel',
+        'sources': ('bufia.Payment', 'bufia.Refund', settings.AUTH_USER_MODEL),
+        # The view is ``staff_member_required``.
+        'staff_only': True,
+    },
+    'payments_pdf': {
+        'label': 'Payment transactions (PDF)',
+        'view': 'bufia.views.payment_views.export_payments_pdf',
+        'sources': ('bufia.Payment', 'bufia.Refund', settings.AUTH_USER_MODEL),
+        # The view is ``staff_member_required``.
+        'staff_only': True,
+    },
+}
+
+# Query parameters that change how a file is delivered, not what it contains.
+DELIVERY_PARAMS = {'preview', 'page'}
+
+
+def user_can_export(export_key, user):
+    """Whether ``user`` passes the access check of ``export_key``'s view."""
+    spec = EXPORTS.get(export_key)
+    if spec is None or user is None or not user.is_active:
+        return False
+    if spec.get('staff_only'):
+        return user.is_staff
+    return user.is_superuser or user.is_staff
+
+
+def normalized_query(query_string):
+    params = QueryDict(query_string, mutable=True)
+    for name in DELIVERY_PARAMS:
+        params.pop(name, None)
+    return urlencode([
+        (key, value)
+        for key in sorted(params)
+        for value in params.getlist(key)
+        if value != ''
+    ])
+
+
+def data_fingerprint(sources):
+    """One aggregate query per table: row count, highest id and latest ``updated_at``."""
+    parts = []
+    for label in sources:
+        model = apps.get_model(label)
+        aggregates = {'rows': Count('pk'), 'last_id': Max('pk')}
+        if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+            aggregates['last_update'] = Max('updated_at')
+        values = model._default_manager.order_by().aggregate(**aggregates)
+        parts.append(f"{label}:{values['rows']}:{values['last_id']}:{values.get('last_update')}")
+    return '|'.join(parts)
+
+
+def build_cache_key(export_key, query_string):
+    spec = EXPORTS[export_key]
+    raw = '\x1f'.join([export_key, normalized_query(query_string), data_fingerprint(spec['sources'])])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def request_export(export_key, query_string, user):
+    """Queue ``export_key`` for ``user`` or reuse a matching job. Returns ``(job, created)``."""
+    from reports.models import ReportExportJob
+
+    return ReportExportJob.request_export(
+        export_key,
+        normalized_query(query_string),
+        user,
+        cache_key=build_cache_key(export_key, query_string),
+    )
+
+
+def _render(job):
+    """Run the export view for ``job`` and return ``(file, filename, content_type)``."""
+    if not user_can_export(job.export_key, job.requested_by):
+        raise PermissionDenied(f"{job.requested_by} may not run the {job.export_key} export.")
+    spec = EXPORTS[job.export_key]
+    view = inspect.unwrap(import_string(spec['view']))
+    request = HttpRequest()
+    request.method = 'GET'
+    request.GET = QueryDict(job.query_string)
+    request.user = job.requested_by
+    response = view(request)
+
+    artifact = tempfile.SpooledTemporaryFile(max_size=4 * 1024 * 1024)
+    chunks = response.streaming_content if response.streaming else [response.content]
+    for chunk in chunks:
+        artifact.write(chunk)
+    artifact.seek(0)
+
+    extension = 'pdf' if job.export_key.endswith('_pdf') else 'xlsx'
+    filename = f"{job.export_key}_{timezone.localtime().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    return File(artifact, name=filename), filename, response['Content-Type']
+
+
+def _notify_ready(job, exclude=None):
+    """Notify every requester of ``job`` except ``exclude``, who already has the file."""
+    from notifications.models import UserNotification
+
+    requesters = job.requesters.all()
+    if exclude is not None:
+        requesters = requesters.exclude(pk=exclude.pk)
+    label = EXPORTS[job.export_key]['label']
+    action_url = reverse('reports:download_report_export', args=[job.pk])
+    UserNotification.objects.bulk_create([
+        UserNotification(
+            user=user,
+            notification_type='report_export_ready',
+            title='Report Export Ready',
+            message=f"{label} is ready to download.",
+            category='system',
+            related_object_id=job.pk,
+            action_url=action_url,
+        )
+        for user in requesters
+    ])
+
+
+def render_job(job, notify_exclude=None):
+    """Render a claimed ``job`` and notify its requesters. Returns ``'ready'``, ``'retried'`` or ``'failed'``."""
+    from reports.models import ReportExportJob
+
+    try:
+        artifact, filename, content_type = _render(job)
+        with artifact:
+            job.mark_ready(filename, artifact, content_type)
+    except PermissionDenied as exc:
+        # Retrying cannot change what the requester may see.
+        logger.warning("Report export job %s refused: %s", job.pk, exc)
+        job.attempts = ReportExportJob.MAX_ATTEMPTS
+        job.mark_failed(str(exc))
+        return 'failed'
+    except Exception as exc:
+        logger.exception("Report export job %s failed", job.pk)
+        job.mark_failed(str(exc) or exc.__class__.__name__)
+        return 'failed' if job.status == ReportExportJob.STATUS_FAILED else 'retried'
+    _notify_ready(job, exclude=notify_exclude)
+    return 'ready'
+
+
+def render_in_request(job, user):
+    """
+    Render ``job`` now when no ``run_report_exports`` worker is configured.
+
+    ``user`` is handed the file directly, so only the other requesters are
+    notified. A job another process already claimed is left to it.
+    """
+    if getattr(settings, 'REPORT_EXPORT_WORKER', False) or job.is_ready:
+        return job
+    _prune_periodically()
+    if job.claim():
+        render_job(job, notify_exclude=user)
+    return job
+
+
+def process_report_export_jobs(batch_size=5):
+    """Render up to ``batch_size`` queued exports. Returns counts per outcome."""
+    from reports.models import ReportExportJob
+
+    outcomes = {'ready': 0, 'retried': 0, 'failed': 0}
+    for job in ReportExportJob.claim_batch(batch_size):
+        outcomes[render_job(job)] += 1
+    if any(outcomes.values()):
+        _prune_periodically()
+    return outcomes
+
+
+def _prune_periodically():
+    global _last_prune
+    from reports.models import ReportExportJob
+
+    now = time.monotonic()
+    if _last_prune is not None and now - _last_prune < PRUNE_INTERVAL_SECONDS:
+        return
+    _last_prune = now
+    ReportExportJob.prune_expired()
@@ -271,26 +271,61 @@ def build_pdf_bytes(title, filter_details, headers, rows, column_widths=None, th
     return buffer.getvalue()
 
 
-def build_xlsx_bytes(title, filter_details, headers, rows, column_widths=None, sheet_name="Report", theme=None):
-    buffer = BytesIO()
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+XLSX_CHUNK_BYTES = 64 * 1024
+
+
+def build_xlsx_bytes(
+    title, filter_details, headers, rows, column_widths=None, sheet_name="Report", theme=None, total_results=None
+):
+    return b"".join(
+        iter_xlsx_chunks(
+            title,
+            filter_details,
+            headers,
+            rows,
+            column_widths=column_widths,
+            sheet_name=sheet_name,
+            theme=theme,
+            total_results=total_results,
+        )
+    )
+
+
+def iter_xlsx_chunks(
+    title, filter_details, headers, rows, column_widths=None, sheet_name="Report", theme=None, total_results=None
+):
+    """
+    Yield an XLSX workbook as a sequence of byte chunks.
+
+    ``rows`` may be any iterable, such as a generator over
+    ``queryset.iterator()``. It is consumed once and each row is compressed
+    into the sheet as it arrives, so memory does not grow with the row count.
+    The header shows ``total_results``, which defaults to ``len(rows)``.
+    """
+    if total_results is None:
+        if not hasattr(rows, "__len__"):
+            rows = list(rows)
+        total_results = len(rows)
+
     theme_data = _resolve_export_theme(theme)
     logo_path = get_logo_path()
     logo_bytes = logo_path.read_bytes() if logo_path else None
     last_column_letter = _column_letter(max(len(headers), 9))
     printed_at = timezone.localtime(timezone.now()).strftime("%B %d, %Y %I:%M %p")
     filter_summary = _format_filter_summary(filter_details)
-    summary_pairs = _summary_detail_pairs(filter_details, len(rows))
+    summary_pairs = _summary_detail_pairs(filter_details, total_results)
 
-    worksheet_rows = [
+    heading_rows = [
         (1, [("C", 1, title), ("H", 3, f"Printed: {printed_at}")]),
-        (2, [("C", 2, COMPANY_NAME), ("H", 3, f"Total Results: {len(rows)}")]),
+        (2, [("C", 2, COMPANY_NAME), ("H", 3, f"Total Results: {total_results}")]),
         (3, [("C", 2, filter_summary)]),
     ]
 
     summary_start_row = 5
     for offset, (left_pair, right_pair) in enumerate(summary_pairs):
         row_index = summary_start_row + offset
-        worksheet_rows.append(
+        heading_rows.append(
             (
                 row_index,
                 [
@@ -303,23 +338,10 @@ def build_xlsx_bytes(title, filter_details, headers, rows, column_widths=None, s
         )
 
     header_row = summary_start_row + max(len(summary_pairs), 1) + 2
-    worksheet_rows.append(
+    heading_rows.append(
         (header_row, [(_column_letter(index + 1), 4, header) for index, header in enumerate(headers)])
     )
 
-    current_row = header_row + 1
-    if rows:
-        for row in rows:
-            worksheet_rows.append(
-                (
-                    current_row,
-                    [(_column_letter(index + 1), 5, _display_value(value)) for index, value in enumerate(row)],
-                )
-            )
-            current_row += 1
-    else:
-        worksheet_rows.append((current_row, [("A", 5, "No records matched the selected filters.")]))
-
     merges = [
         "C1:F1",
         "C2:F2",
@@ -335,10 +357,9 @@ def build_xlsx_bytes(title, filter_details, headers, rows, column_widths=None, s
         for offset in range(2, len(summary_pairs)):
             row_index = summary_start_row + offset
             merges.extend([f"B{row_index}:D{row_index}", f"F{row_index}:I{row_index}"])
-    if not rows:
-        merges.append(f"A{current_row}:{last_column_letter}{current_row}")
 
-    with ZipFile(buffer, "w", ZIP_DEFLATED) as archive:
+    sink = _ChunkSink()
+    with ZipFile(sink, "w", ZIP_DEFLATED) as archive:
         archive.writestr("[Content_Types].xml", _content_types_xml(include_logo=bool(logo_bytes)))
         archive.writestr("_rels/.rels", _root_rels_xml())
         archive.writestr("docProps/app.xml", _app_xml())
@@ -346,24 +367,56 @@ def build_xlsx_bytes(title, filter_details, headers, rows, column_widths=None, s
         archive.writestr("xl/workbook.xml", _workbook_xml(sheet_name))
         archive.writestr("xl/_rels/workbook.xml.rels", _workbook_rels_xml())
         archive.writestr("xl/styles.xml", _styles_xml(theme_data))
-        archive.writestr(
-            "xl/worksheets/sheet1.xml",
-            _worksheet_xml(
-                worksheet_rows=worksheet_rows,
-                merges=merges,
-                headers=headers,
-                column_widths=column_widths,
-                include_logo=bool(logo_bytes),
-                freeze_row=header_row,
-            ),
-        )
+        yield sink.drain()
+
+        with archive.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(_worksheet_head_xml(headers, column_widths=column_widths, freeze_row=header_row).encode("utf-8"))
+            for row_index, cells in heading_rows:
+                sheet.write(_worksheet_row_xml(row_index, cells, freeze_row=header_row).encode("utf-8"))
+
+            current_row = header_row + 1
+            for row in rows:
+                cells = [(_column_letter(index + 1), 5, _display_value(value)) for index, value in enumerate(row)]
+                sheet.write(_worksheet_row_xml(current_row, cells, freeze_row=header_row).encode("utf-8"))
+                current_row += 1
+                if sink.size >= XLSX_CHUNK_BYTES:
+                    yield sink.drain()
+
+            if current_row == header_row + 1:
+                empty_cells = [("A", 5, "No records matched the selected filters.")]
+                sheet.write(_worksheet_row_xml(current_row, empty_cells, freeze_row=header_row).encode("utf-8"))
+                merges.append(f"A{current_row}:{last_column_letter}{current_row}")
+            sheet.write(_worksheet_tail_xml(merges, include_logo=bool(logo_bytes)).encode("utf-8"))
+
         if logo_bytes:
             archive.writestr("xl/worksheets/_rels/sheet1.xml.rels", _worksheet_rels_xml())
             archive.writestr("xl/drawings/drawing1.xml", _drawing_xml())
             archive.writestr("xl/drawings/_rels/drawing1.xml.rels", _drawing_rels_xml())
             archive.writestr("xl/media/logo.png", logo_bytes)
 
-    return buffer.getvalue()
+    yield sink.drain()
+
+
+class _ChunkSink:
+    """Write-only file object that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+        self.size = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
 
 
 def _display_value(value):
@@ -421,26 +474,7 @@ def _column_letter(index):
     return "".join(reversed(letters))
 
 
-def _worksheet_xml(worksheet_rows, merges, headers, column_widths=None, include_logo=False, freeze_row=7):
-    row_xml = []
-    for row_index, cells in worksheet_rows:
-        if row_index == 1:
-            height_attrs = ' ht="24" customHeight="1"'
-        elif row_index in {2, 3}:
-            height_attrs = ' ht="20" customHeight="1"'
-        elif row_index in {5, 6, freeze_row}:
-            height_attrs = ' ht="22" customHeight="1"'
-        else:
-            height_attrs = ""
-        cell_xml = []
-        for column, style, value in cells:
-            cell_ref = f"{column}{row_index}"
-            escaped_value = escape(_display_value(value))
-            cell_xml.append(
-                f'<c r="{cell_ref}" t="inlineStr" s="{style}"><is><t xml:space="preserve">{escaped_value}</t></is></c>'
-            )
-        row_xml.append(f"<row r=\"{row_index}\"{height_attrs}>{''.join(cell_xml)}</row>")
-
+def _worksheet_head_xml(headers, column_widths=None, freeze_row=7):
     max_columns = max(len(headers), 6)
     cols = []
     for index in range(1, max_columns + 1):
@@ -449,13 +483,6 @@ def _worksheet_xml(worksheet_rows, merges, headers, column_widths=None, include_
             width = column_widths[index - 1]
         cols.append(f'<col min="{index}" max="{index}" width="{width}" customWidth="1"/>')
 
-    merge_xml = ""
-    if merges:
-        merge_items = "".join(f'<mergeCell ref="{merge_ref}"/>' for merge_ref in merges)
-        merge_xml = f'<mergeCells count="{len(merges)}">{merge_items}</mergeCells>'
-
-    drawing_xml = '<drawing r:id="rId1"/>' if include_logo else ""
-
     return (
         '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
         '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
@@ -463,13 +490,40 @@ def _worksheet_xml(worksheet_rows, merges, headers, column_widths=None, include_
         f'<sheetViews><sheetView workbookViewId="0"><pane ySplit="{freeze_row}" topLeftCell="A{freeze_row + 1}" activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>'
         '<sheetFormatPr defaultRowHeight="18"/>'
         f'<cols>{"".join(cols)}</cols>'
-        f'<sheetData>{"".join(row_xml)}</sheetData>'
-        f"{merge_xml}"
-        f"{drawing_xml}"
-        "</worksheet>"
+        "<sheetData>"
     )
 
 
+def _worksheet_row_xml(row_index, cells, freeze_row=7):
+    if row_index == 1:
+        height_attrs = ' ht="24" customHeight="1"'
+    elif row_index in {2, 3}:
+        height_attrs = ' ht="20" customHeight="1"'
+    elif row_index in {5, 6, freeze_row}:
+        height_attrs = ' ht="22" customHeight="1"'
+    else:
+        height_attrs = ""
+    cell_xml = []
+    for column, style, value in cells:
+        cell_ref = f"{column}{row_index}"
+        escaped_value = escape(_display_value(value))
+        cell_xml.append(
+            f'<c r="{cell_ref}" t="inlineStr" s="{style}"><is><t xml:space="preserve">{escaped_value}</t></is></c>'
+        )
+    return f"<row r=\"{row_index}\"{height_attrs}>{''.join(cell_xml)}</row>"
+
+
+def _worksheet_tail_xml(merges, include_logo=False):
+    merge_xml = ""
+    if merges:
+        merge_items = "".join(f'<mergeCell ref="{merge_ref}"/>' for merge_ref in merges)
+        merge_xml = f'<mergeCells count="{len(merges)}">{merge_items}</mergeCells>'
+
+    drawing_xml = '<drawing r:id="rId1"/>' if include_logo else ""
+
+    return f"</sheetData>{merge_xml}{drawing_xml}</worksheet>"
+
+
 def _styles_xml(theme):
     primary_argb = _hex_argb(theme["primary"])
     soft_argb = _hex_argb(theme["soft"])
@@ -0,0 +1,172 @@
+"""
+Rice inventory ledger.
+
+Stock comes in from BUFIA rice-share milling appointments and goes out
+through rice orders. ``record_appointment`` and ``record_order`` compare
+what the ledger already holds for one source with what that source should
+contribute now, and append the difference as new ``RiceInventoryEntry``
+rows. Calling them again without a change appends nothing, so the signal
+handlers in ``reports.signals`` can call them on every save.
+"""
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+MILLING_STATUSES = ('paid', 'confirmed', 'completed')
+
+ZERO = Decimal('0.00')
+CHANGE_FIELDS = ('stock_change', 'reserved_change', 'milled_kg_change', 'milling_cost_change')
+
+
+def _quantize(value):
+    return Decimal(str(value or '0')).quantize(Decimal('0.01'))
+
+
+def milled_sacks(final_weight):
+    from reports.models import RiceInventoryBalance
+
+    return (_quantize(final_weight) / RiceInventoryBalance.KG_PER_SACK).quantize(Decimal('0.01'))
+
+
+def counts_as_milled_stock(appointment):
+    from machines.models import RiceMillAppointment
+
+    return (
+        appointment.booking_source == RiceMillAppointment.BOOKING_SOURCE_BUFIA_RICE_SHARE
+        and appointment.final_weight is not None
+        and appointment.total_amount is not None
+        and appointment.status in MILLING_STATUSES
+    )
+
+
+def _recorded_totals(source_kind, source_id):
+    from reports.models import RiceInventoryEntry
+
+    totals = RiceInventoryEntry.objects.filter(
+        source_kind=source_kind,
+        source_id=source_id,
+    ).aggregate(entries=Count('pk'), **{field: Sum(field) for field in CHANGE_FIELDS})
+    return {field: totals[field] or ZERO for field in CHANGE_FIELDS}, totals['entries']
+
+
+def _append(balance, entry_type, source_kind, source_id, label, occurred_at, **changes):
+    from reports.models import RiceInventoryEntry
+
+    changes = {field: changes.get(field, ZERO) for field in CHANGE_FIELDS}
+    if source_kind == RiceInventoryEntry.SOURCE_MILLING:
+        balance.stock_in_sacks += changes['stock_change']
+    else:
+        balance.sold_sacks -= changes['stock_change']
+    balance.reserved_sacks += changes['reserved_change']
+    balance.milled_kg += changes['milled_kg_change']
+    balance.milling_cost += changes['milling_cost_change']
+    return RiceInventoryEntry.objects.create(
+        entry_type=entry_type,
+        source_kind=source_kind,
+        source_id=source_id,
+        source_label=label[:255],
+        occurred_at=occurred_at or timezone.now(),
+        actual_balance=balance.actual_sacks,
+        reserved_balance=balance.reserved_sacks,
+        **changes,
+    )
+
+
+def _difference(target, recorded):
+    return {field: target.get(field, ZERO) - recorded[field] for field in CHANGE_FIELDS}
+
+
+def record_appointment(appointment, *, deleted=False):
+    """Bring the ledger in line with one milling appointment. Returns the new entries."""
+    from reports.models import RiceInventoryBalance, RiceInventoryEntry
+
+    target = {}
+    if not deleted and counts_as_milled_stock(appointment):
+        target = {
+            'stock_change': milled_sacks(appointment.final_weight),
+            'milled_kg_change': _quantize(appointment.final_weight),
+            'milling_cost_change': _quantize(appointment.total_amount),
+        }
+
+    with transaction.atomic():
+        balance = RiceInventoryBalance.get_solo(lock=True)
+        recorded, _entries = _recorded_totals(RiceInventoryEntry.SOURCE_MILLING, appointment.pk)
+        changes = _difference(target, recorded)
+        if not any(changes.values()):
+            return []
+
+        reference = appointment.reference_number or appointment.get_transaction_id() or f'Appointment #{appointment.pk}'
+        if changes['stock_change'] > 0 and not deleted:
+            entry_type = RiceInventoryEntry.ENTRY_STOCK_IN
+            label = f'{reference} - Milling completed'
+            occurred_at = timezone.make_aware(datetime.combine(appointment.appointment_date, datetime.min.time()))
+        else:
+            entry_type = RiceInventoryEntry.ENTRY_ADJUSTMENT
+            label = f'{reference} - Milling record {"removed" if deleted else "updated"}'
+            occurred_at = None
+        entry = _append(
+            balance, entry_type, RiceInventoryEntry.SOURCE_MILLING, appointment.pk, label, occurred_at, **changes
+        )
+        balance.save()
+    return [entry]
+
+
+def record_order(order, *, deleted=False):
+    """Bring the ledger in line with one rice order. Returns the new entries."""
+    from reports.models import RiceInventoryBalance, RiceInventoryEntry, RiceSale
+
+    sacks = _quantize(order.sacks)
+    target = {}
+    if not deleted:
+        if order.order_status == RiceSale.ORDER_STATUS_CLAIMED:
+            target = {'stock_change': -sacks}
+        elif order.is_active_reservation:
+            target = {'reserved_change': sacks}
+
+    buyer_name = '' if deleted else order.buyer.get_full_name() or order.buyer.username
+    reference = order.reference_number or f'Order #{order.pk}'
+    new_entries = []
+    with transaction.atomic():
+        balance = RiceInventoryBalance.get_solo(lock=True)
+        recorded, entry_count = _recorded_totals(RiceInventoryEntry.SOURCE_ORDER, order.pk)
+        if not entry_count and not deleted and sacks:
+            # Every order is first recorded as a reservation, then claimed or released.
+            new_entries.append(_append(
+                balance,
+                RiceInventoryEntry.ENTRY_RESERVED,
+                RiceInventoryEntry.SOURCE_ORDER,
+                order.pk,
+                f'{reference} - {buyer_name}',
+                order.created_at,
+                reserved_change=sacks,
+            ))
+            recorded['reserved_change'] += sacks
+
+        changes = _difference(target, recorded)
+        if any(changes.values()):
+            if deleted:
+                entry_type, label, occurred_at = RiceInventoryEntry.ENTRY_ADJUSTMENT, f'{reference} - Order removed', None
+            elif changes['stock_change'] < 0:
+                entry_type, label, occurred_at = (
+                    RiceInventoryEntry.ENTRY_STOCK_OUT, f'{reference} - Claimed by {buyer_name}', order.claimed_at
+                )
+            elif changes['stock_change'] > 0:
+                entry_type, label, occurred_at = RiceInventoryEntry.ENTRY_ADJUSTMENT, f'{reference} - Claim reversed', None
+            elif changes['reserved_change'] < 0:
+                entry_type, label, occurred_at = (
+                    RiceInventoryEntry.ENTRY_RESERVATION_RELEASED,
+                    f'{reference} - Reservation {"cancelled" if order.cancelled_at else "reduced"}',
+                    order.cancelled_at,
+                )
+            else:
+                entry_type, label, occurred_at = RiceInventoryEntry.ENTRY_RESERVED, f'{reference} - {buyer_name}', None
+            new_entries.append(_append(
+                balance, entry_type, RiceInventoryEntry.SOURCE_ORDER, order.pk, label, occurred_at, **changes
+            ))
+
+        if new_entries:
+            balance.save()
+    return new_entries
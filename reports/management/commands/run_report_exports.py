@@ -0,0 +1,61 @@
+"""
+Management command to render queued report exports.
+
+Export buttons only queue a ReportExportJob; run this as a worker next to
+the web process (it must share REPORT_EXPORT_ROOT so downloads can read the
+files). Each pass that finds nothing queued also prunes jobs older than
+REPORT_EXPORT_MAX_AGE_SECONDS along with their files:
+
+    python manage.py run_report_exports            # render what is queued, then exit
+    python manage.py run_report_exports --loop     # keep polling
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from reports.export_jobs import process_report_export_jobs
+from reports.models import ReportExportJob
+
+
+class Command(BaseCommand):
+    help = 'Render queued report exports and store the files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5,
+            help='Number of jobs to claim per batch (default: 5)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new jobs instead of exiting when the queue is empty'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=3.0,
+            help='Seconds to wait between polls when the queue is empty (default: 3)'
+        )
+
+    def handle(self, *args, **options):
+        totals = {}
+        while True:
+            outcomes = process_report_export_jobs(batch_size=options['batch_size'])
+            for outcome, count in outcomes.items():
+                totals[outcome] = totals.get(outcome, 0) + count
+            if any(outcomes.values()):
+                self.stdout.write(', '.join(f'{count} {outcome}' for outcome, count in outcomes.items()))
+                continue
+            totals['pruned'] = totals.get('pruned', 0) + ReportExportJob.prune_expired()
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                'Report exports rendered: ' + ', '.join(f'{count} {outcome}' for outcome, count in totals.items())
+            )
+        )
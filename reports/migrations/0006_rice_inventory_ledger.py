@@ -0,0 +1,148 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:00
+
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.utils import timezone
+
+KG_PER_SACK = Decimal('50.00')
+CENT = Decimal('0.01')
+
+
+def _buyer_name(user):
+    return f'{user.first_name} {user.last_name}'.strip() or user.username
+
+
+def replay_rice_inventory(apps, schema_editor):
+    # Same events and ordering the stock movement page used to rebuild on every request.
+    RiceMillAppointment = apps.get_model('machines', 'RiceMillAppointment')
+    RiceSale = apps.get_model('reports', 'RiceSale')
+    RiceInventoryEntry = apps.get_model('reports', 'RiceInventoryEntry')
+    RiceInventoryBalance = apps.get_model('reports', 'RiceInventoryBalance')
+
+    events = []
+    appointments = RiceMillAppointment.objects.filter(
+        booking_source='bufia_rice_share',
+        final_weight__isnull=False,
+        total_amount__isnull=False,
+        status__in=['paid', 'confirmed', 'completed'],
+    )
+    for appointment in appointments:
+        occurred_at = timezone.make_aware(datetime.combine(appointment.appointment_date, datetime.min.time()))
+        kg = Decimal(str(appointment.final_weight)).quantize(CENT)
+        events.append(((occurred_at, 0, appointment.pk), {
+            'entry_type': 'stock_in',
+            'source_kind': 'milling',
+            'source_id': appointment.pk,
+            'source_label': f'{appointment.reference_number or f"Appointment #{appointment.pk}"} - Milling completed',
+            'occurred_at': occurred_at,
+            'stock_change': (kg / KG_PER_SACK).quantize(CENT),
+            'milled_kg_change': kg,
+            'milling_cost_change': Decimal(str(appointment.total_amount)).quantize(CENT),
+        }))
+
+    for order in RiceSale.objects.select_related('buyer'):
+        sacks = Decimal(str(order.sacks)).quantize(CENT)
+        reference = order.reference_number or f'Order #{order.pk}'
+        events.append(((order.created_at, 1, order.pk), {
+            'entry_type': 'reserved',
+            'source_kind': 'order',
+            'source_id': order.pk,
+            'source_label': f'{reference} - {_buyer_name(order.buyer)}',
+            'occurred_at': order.created_at,
+            'reserved_change': sacks,
+        }))
+        if order.order_status == 'claimed':
+            occurred_at = order.claimed_at or order.created_at
+            events.append(((occurred_at, 3, order.pk), {
+                'entry_type': 'stock_out',
+                'source_kind': 'order',
+                'source_id': order.pk,
+                'source_label': f'{reference} - Claimed by {_buyer_name(order.buyer)}',
+                'occurred_at': occurred_at,
+                'stock_change': -sacks,
+                'reserved_change': -sacks,
+            }))
+        elif order.order_status == 'cancelled':
+            occurred_at = order.cancelled_at or order.created_at
+            events.append(((occurred_at, 2, order.pk), {
+                'entry_type': 'reservation_released',
+                'source_kind': 'order',
+                'source_id': order.pk,
+                'source_label': f'{reference} - Reservation cancelled',
+                'occurred_at': occurred_at,
+                'reserved_change': -sacks,
+            }))
+
+    events.sort(key=lambda event: event[0])
+    balance = RiceInventoryBalance(pk=1)
+    entries = []
+    for _sort_key, values in events:
+        stock_change = values.get('stock_change', Decimal('0.00'))
+        if values['source_kind'] == 'milling':
+            balance.stock_in_sacks += stock_change
+        else:
+            balance.sold_sacks -= stock_change
+        balance.reserved_sacks += values.get('reserved_change', Decimal('0.00'))
+        balance.milled_kg += values.get('milled_kg_change', Decimal('0.00'))
+        balance.milling_cost += values.get('milling_cost_change', Decimal('0.00'))
+        entries.append(RiceInventoryEntry(
+            actual_balance=balance.stock_in_sacks - balance.sold_sacks,
+            reserved_balance=balance.reserved_sacks,
+            **values,
+        ))
+    RiceInventoryEntry.objects.bulk_create(entries, batch_size=1000)
+    balance.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machines', '0056_dryercapacityday'),
+        ('reports', '0005_report_export_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiceInventoryBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('milled_kg', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('milling_cost', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('stock_in_sacks', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('sold_sacks', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('reserved_sacks', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Rice Inventory Balance',
+                'verbose_name_plural': 'Rice Inventory Balance',
+            },
+        ),
+        migrations.CreateModel(
+            name='RiceInventoryEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_type', models.CharField(choices=[('stock_in', 'Stock In'), ('reserved', 'Reserved'), ('stock_out', 'Stock Out'), ('reservation_released', 'Reservation Released'), ('adjustment', 'Adjustment')], max_length=30)),
+                ('source_kind', models.CharField(choices=[('milling', 'Milling Appointment'), ('order', 'Rice Order')], max_length=20)),
+                ('source_id', models.PositiveBigIntegerField()),
+                ('source_label', models.CharField(blank=True, max_length=255)),
+                ('occurred_at', models.DateTimeField(db_index=True)),
+                ('stock_change', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('reserved_change', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('milled_kg_change', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('milling_cost_change', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('actual_balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('reserved_balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Rice Inventory Entry',
+                'verbose_name_plural': 'Rice Inventory Entries',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['source_kind', 'source_id'], name='reports_ric_source__4bbb37_idx')],
+            },
+        ),
+        migrations.RunPython(replay_rice_inventory, migrations.RunPython.noop),
+    ]
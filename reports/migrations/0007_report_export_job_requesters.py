@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_requesters(apps, schema_editor):
+    ReportExportJob = apps.get_model('reports', 'ReportExportJob')
+    Through = ReportExportJob.requesters.through
+    Through.objects.bulk_create(
+        [
+            Through(reportexportjob_id=job_id, customuser_id=user_id)
+            for job_id, user_id in ReportExportJob.objects.filter(requested_by__isnull=False).values_list(
+                'pk', 'requested_by_id'
+            )
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reports', '0006_rice_inventory_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportexportjob',
+            name='requesters',
+            field=models.ManyToManyField(blank=True, related_name='requested_report_exports', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_requesters, migrations.RunPython.noop),
+    ]
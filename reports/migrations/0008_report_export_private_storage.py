@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:28
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+import reports.models
+
+
+def drop_public_exports(apps, schema_editor):
+    """Exports rendered so far sit under MEDIA_ROOT; delete them and their jobs so they are re-rendered privately."""
+    ReportExportJob = apps.get_model('reports', 'ReportExportJob')
+    for name in ReportExportJob.objects.exclude(artifact='').values_list('artifact', flat=True):
+        default_storage.delete(name)
+    ReportExportJob.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0007_report_export_job_requesters'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_public_exports, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='reportexportjob',
+            name='artifact',
+            field=models.FileField(blank=True, storage=reports.models.ReportExportStorage(), upload_to='%Y/%m/'),
+        ),
+    ]
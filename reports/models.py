@@ -1,9 +1,12 @@
 from datetime import timedelta
 from decimal import Decimal
 
-from django.db import models
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from django.utils.functional import cached_property
 
 User = get_user_model()
 
@@ -190,3 +193,300 @@ class RiceSale(models.Model):
             and self.payment_method == self.PAYMENT_METHOD_GCASH
             and self.payment_status == self.PAYMENT_STATUS_PAID
         )
+
+
+class RiceInventoryEntry(models.Model):
+    """
+    One append-only movement of BUFIA's milled rice stock.
+
+    Entries are written by ``reports.inventory`` when a rice-share milling
+    appointment completes and when an order is reserved, claimed or
+    cancelled. Each entry stores the actual and reserved balances after it,
+    so the stock movement page reads rows in id order without replaying
+    history.
+    """
+    ENTRY_STOCK_IN = 'stock_in'
+    ENTRY_RESERVED = 'reserved'
+    ENTRY_STOCK_OUT = 'stock_out'
+    ENTRY_RESERVATION_RELEASED = 'reservation_released'
+    ENTRY_ADJUSTMENT = 'adjustment'
+    ENTRY_TYPE_CHOICES = [
+        (ENTRY_STOCK_IN, 'Stock In'),
+        (ENTRY_RESERVED, 'Reserved'),
+        (ENTRY_STOCK_OUT, 'Stock Out'),
+        (ENTRY_RESERVATION_RELEASED, 'Reservation Released'),
+        (ENTRY_ADJUSTMENT, 'Adjustment'),
+    ]
+    SOURCE_MILLING = 'milling'
+    SOURCE_ORDER = 'order'
+    SOURCE_KIND_CHOICES = [
+        (SOURCE_MILLING, 'Milling Appointment'),
+        (SOURCE_ORDER, 'Rice Order'),
+    ]
+
+    entry_type = models.CharField(max_length=30, choices=ENTRY_TYPE_CHOICES)
+    # A plain id rather than a foreign key: entries outlive deleted sources.
+    source_kind = models.CharField(max_length=20, choices=SOURCE_KIND_CHOICES)
+    source_id = models.PositiveBigIntegerField()
+    source_label = models.CharField(max_length=255, blank=True)
+    occurred_at = models.DateTimeField(db_index=True)
+    stock_change = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    reserved_change = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    milled_kg_change = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    milling_cost_change = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    actual_balance = models.DecimalField(max_digits=12, decimal_places=2)
+    reserved_balance = models.DecimalField(max_digits=12, decimal_places=2)
+    recorded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Rice Inventory Entry'
+        verbose_name_plural = 'Rice Inventory Entries'
+        indexes = [
+            models.Index(fields=['source_kind', 'source_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_entry_type_display()} {self.source_label or self.source_id}"
+
+
+class RiceInventoryBalance(models.Model):
+    """
+    Current totals of the rice inventory ledger, kept in a single row.
+
+    ``reports.inventory`` locks this row before appending entries, and the
+    rice store locks it before checking availability, so concurrent
+    reservations cannot both claim the last sacks.
+    """
+    milled_kg = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    milling_cost = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    stock_in_sacks = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    sold_sacks = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    reserved_sacks = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    KG_PER_SACK = Decimal('50.00')
+
+    class Meta:
+        verbose_name = 'Rice Inventory Balance'
+        verbose_name_plural = 'Rice Inventory Balance'
+
+    def __str__(self):
+        return f"{self.available_sacks} sacks available"
+
+    @classmethod
+    def get_solo(cls, *, lock=False):
+        obj, _created = cls.objects.get_or_create(pk=1)
+        if lock:
+            obj = cls.objects.select_for_update().get(pk=1)
+        return obj
+
+    @property
+    def actual_sacks(self):
+        return self.stock_in_sacks - self.sold_sacks
+
+    @property
+    def milled_total_sacks(self):
+        return (self.milled_kg / self.KG_PER_SACK).quantize(Decimal('0.01'))
+
+    @property
+    def available_sacks(self):
+        return max(self.milled_total_sacks - self.reserved_sacks - self.sold_sacks, Decimal('0.00'))
+
+
+class ReportExportStorage(FileSystemStorage):
+    """
+    File storage under ``REPORT_EXPORT_ROOT`` rather than MEDIA_ROOT.
+
+    Nothing serves this directory; files only leave through the
+    permission-checked ``download_report_export`` view.
+    """
+
+    @cached_property
+    def base_location(self):
+        return self._value_or_setting(self._location, settings.REPORT_EXPORT_ROOT)
+
+    def _clear_cached_properties(self, setting, **kwargs):
+        super()._clear_cached_properties(setting, **kwargs)
+        if setting == 'REPORT_EXPORT_ROOT':
+            self.__dict__.pop('base_location', None)
+            self.__dict__.pop('location', None)
+
+
+class ReportExportJob(models.Model):
+    """
+    A report export rendered outside the request.
+
+    Export buttons queue a job with the report's query string; the
+    ``run_report_exports`` command renders it and stores the file, or the
+    request renders it itself when ``REPORT_EXPORT_WORKER`` is off.
+    ``cache_key`` hashes the export, its filters and a fingerprint of the
+    data behind it, so an identical export is served from the stored file
+    until that data changes or the file is older than
+    ``REPORT_EXPORT_MAX_AGE_SECONDS``; after that ``prune_expired`` deletes
+    the job and its file.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_READY = 'ready'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_READY, 'Ready'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    MAX_ATTEMPTS = 3
+    RETRY_DELAY = timedelta(minutes=1)
+    # A claim older than this belongs to a worker that died mid-render.
+    STALE_CLAIM_AFTER = timedelta(minutes=15)
+
+    export_key = models.CharField(max_length=50)
+    query_string = models.TextField(blank=True)
+    cache_key = models.CharField(max_length=64, db_index=True)
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='report_export_jobs',
+    )
+    # Everyone who asked for this export while it was queued; all of them
+    # are notified when it is ready.
+    requesters = models.ManyToManyField(
+        User,
+        blank=True,
+        related_name='requested_report_exports',
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    artifact = models.FileField(upload_to='%Y/%m/', storage=ReportExportStorage(), blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.export_key} #{self.pk} ({self.status})"
+
+    @property
+    def is_ready(self):
+        return self.status == self.STATUS_READY and bool(self.artifact)
+
+    @property
+    def filename(self):
+        return self.artifact.name.rsplit('/', 1)[-1] if self.artifact else ''
+
+    @classmethod
+    def fresh_after(cls):
+        return timezone.now() - timedelta(seconds=getattr(settings, 'REPORT_EXPORT_MAX_AGE_SECONDS', 900))
+
+    @classmethod
+    def request_export(cls, export_key, query_string, user, *, cache_key):
+        """
+        Return ``(job, created)`` for an export of ``cache_key``.
+
+        A fresh stored file or a job already queued for the same key is
+        reused instead of rendering the export again; ``user`` joins the
+        requesters of a queued job so they are notified too.
+        """
+        existing = cls.objects.filter(cache_key=cache_key).filter(
+            models.Q(status=cls.STATUS_READY, finished_at__gte=cls.fresh_after())
+            | models.Q(status__in=[cls.STATUS_PENDING, cls.STATUS_PROCESSING])
+        ).first()
+        if existing and (existing.status != cls.STATUS_READY or existing.artifact_exists()):
+            if existing.status != cls.STATUS_READY:
+                existing.requesters.add(user)
+            return existing, False
+        job = cls.objects.create(
+            export_key=export_key,
+            query_string=query_string,
+            cache_key=cache_key,
+            requested_by=user,
+        )
+        job.requesters.add(user)
+        return job, True
+
+    @classmethod
+    def claim_batch(cls, limit):
+        """Mark up to ``limit`` due jobs as processing and return them, skipping rows other workers hold."""
+        now = timezone.now()
+        due = models.Q(status=cls.STATUS_PENDING, available_at__lte=now) | models.Q(
+            status=cls.STATUS_PROCESSING,
+            claimed_at__lt=now - cls.STALE_CLAIM_AFTER,
+        )
+        with transaction.atomic():
+            ids = list(
+                cls.objects.filter(due)
+                .select_for_update(skip_locked=True)
+                .order_by('available_at', 'pk')
+                .values_list('pk', flat=True)[:limit]
+            )
+            if not ids:
+                return []
+            cls.objects.filter(pk__in=ids).update(
+                status=cls.STATUS_PROCESSING,
+                claimed_at=now,
+                attempts=models.F('attempts') + 1,
+            )
+        return list(cls.objects.select_related('requested_by').filter(pk__in=ids).order_by('available_at', 'pk'))
+
+    def claim(self):
+        """Claim this job for rendering in the current process; False if a worker already holds it."""
+        now = timezone.now()
+        claimed = type(self).objects.filter(pk=self.pk, status=self.STATUS_PENDING).update(
+            status=self.STATUS_PROCESSING,
+            claimed_at=now,
+            attempts=models.F('attempts') + 1,
+        )
+        if claimed:
+            self.refresh_from_db(fields=['status', 'claimed_at', 'attempts'])
+        return bool(claimed)
+
+    @classmethod
+    def prune_expired(cls):
+        """Delete ready or failed jobs older than ``REPORT_EXPORT_MAX_AGE_SECONDS`` and their files. Returns the number deleted."""
+        expired = list(
+            cls.objects.filter(
+                status__in=[cls.STATUS_READY, cls.STATUS_FAILED],
+                finished_at__lt=cls.fresh_after(),
+            ).only('pk', 'artifact')
+        )
+        for job in expired:
+            if job.artifact:
+                job.artifact.delete(save=False)
+        cls.objects.filter(pk__in=[job.pk for job in expired]).delete()
+        return len(expired)
+
+    def artifact_exists(self):
+        return bool(self.artifact) and self.artifact.storage.exists(self.artifact.name)
+
+    def mark_ready(self, filename, content, content_type):
+        self.artifact.save(filename, content, save=False)
+        self.content_type = content_type
+        self.status = self.STATUS_READY
+        self.last_error = ''
+        self.claimed_at = None
+        self.finished_at = timezone.now()
+        self.save(update_fields=['artifact', 'content_type', 'status', 'last_error', 'claimed_at', 'finished_at'])
+
+    def mark_failed(self, error):
+        """Retry after ``RETRY_DELAY`` until ``MAX_ATTEMPTS`` renders have failed."""
+        self.last_error = error
+        self.claimed_at = None
+        if self.attempts >= self.MAX_ATTEMPTS:
+            self.status = self.STATUS_FAILED
+            self.finished_at = timezone.now()
+        else:
+            self.status = self.STATUS_PENDING
+            self.available_at = timezone.now() + self.RETRY_DELAY
+        self.save(update_fields=['status', 'last_error', 'claimed_at', 'finished_at', 'available_at'])
@@ -0,0 +1,35 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from machines.models import RiceMillAppointment
+
+from . import inventory
+from .models import RiceSale
+
+
+@receiver(post_save, sender=RiceSale)
+def record_rice_order_movement(sender, instance, raw=False, **kwargs):
+    # RiceSale.save() assigns the reference in a second save; record once it is set.
+    if raw or not instance.reference_number:
+        return
+    inventory.record_order(instance)
+
+
+@receiver(post_delete, sender=RiceSale)
+def release_deleted_rice_order(sender, instance, **kwargs):
+    inventory.record_order(instance, deleted=True)
+
+
+@receiver(post_save, sender=RiceMillAppointment)
+def record_milled_rice_stock(sender, instance, raw=False, **kwargs):
+    # Only rice-share appointments feed the inventory.
+    if raw or instance.booking_source != RiceMillAppointment.BOOKING_SOURCE_BUFIA_RICE_SHARE:
+        return
+    inventory.record_appointment(instance)
+
+
+@receiver(post_delete, sender=RiceMillAppointment)
+def remove_deleted_milling_stock(sender, instance, **kwargs):
+    if instance.booking_source != RiceMillAppointment.BOOKING_SOURCE_BUFIA_RICE_SHARE:
+        return
+    inventory.record_appointment(instance, deleted=True)
@@ -1,19 +1,34 @@
 from datetime import timedelta
 from decimal import Decimal
 from io import BytesIO
+import os
+import shutil
+import tempfile
 from unittest.mock import patch
 from zipfile import ZipFile
 
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import NoReverseMatch, reverse
 from django.utils import timezone
 
 from bufia.models import Payment, Refund
 from machines.models import Machine, Maintenance, MaintenancePartUsed, Rental, RiceMillAppointment, RentalPackage, RentalPackageItem
-from reports.models import RiceSale, RiceSaleSetting
+from notifications.models import UserNotification
+from reports.export_jobs import process_report_export_jobs
+from reports.export_utils import build_xlsx_bytes, iter_xlsx_chunks
+from reports.models import ReportExportJob, RiceInventoryBalance, RiceInventoryEntry, RiceSale, RiceSaleSetting
+from reports.views import (
+    STOCK_MOVEMENT_PAGE_SIZE,
+    _machine_profitability_snapshot,
+    _machine_usage_report_context,
+    _rice_inventory_snapshot,
+)
 from users.models import MembershipApplication
 
 
@@ -302,7 +317,7 @@ class ReportsAccessTests(TestCase):
             'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
         )
 
-        workbook = ZipFile(BytesIO(response.content))
+        workbook = ZipFile(BytesIO(response.getvalue()))
         self.assertIn('xl/media/logo.png', workbook.namelist())
         sheet_xml = workbook.read('xl/worksheets/sheet1.xml').decode('utf-8')
 
@@ -314,8 +329,8 @@ class ReportsAccessTests(TestCase):
         rental_response = self.client.get(reverse('reports:export_rental_report_excel'), {'date_range': '1_week'})
         membership_response = self.client.get(reverse('reports:export_membership_report_excel'))
 
-        rental_workbook = ZipFile(BytesIO(rental_response.content))
-        membership_workbook = ZipFile(BytesIO(membership_response.content))
+        rental_workbook = ZipFile(BytesIO(rental_response.getvalue()))
+        membership_workbook = ZipFile(BytesIO(membership_response.getvalue()))
 
         rental_styles = rental_workbook.read('xl/styles.xml').decode('utf-8')
         membership_styles = membership_workbook.read('xl/styles.xml').decode('utf-8')
@@ -753,6 +768,69 @@ class ReportsAccessTests(TestCase):
         self.assertIn('Membership Fee', payment_types)
         self.assertIn('Rice Sale', payment_types)
 
+    def test_financial_filters_and_excel_export_match_the_unfiltered_list(self):
+        legacy_member = User.objects.create_user(
+            username='export-legacy-member',
+            email='export-legacy-member@example.com',
+            password='testpass123',
+        )
+        MembershipApplication.objects.create(
+            user=legacy_member,
+            payment_method='face_to_face',
+            payment_status='paid',
+            payment_date=timezone.now(),
+        )
+        RiceSale.objects.create(
+            buyer=self.member,
+            sacks=Decimal('1.00'),
+            price_per_sack=Decimal('1200.00'),
+            payment_method=RiceSale.PAYMENT_METHOD_GCASH,
+            payment_status=RiceSale.PAYMENT_STATUS_PAID,
+            order_status=RiceSale.ORDER_STATUS_CLAIMED,
+            paid_at=timezone.now(),
+        )
+        Payment.objects.create(
+            user=self.member,
+            payment_type='rental',
+            amount=Decimal('800.00'),
+            status='completed',
+            payment_provider='paymongo',
+            stripe_payment_intent_id='pi_financial_export_001',
+            content_type=ContentType.objects.get_for_model(Rental),
+            object_id=self.package_rental.id,
+        )
+        everything = self.client.get(reverse('reports:financial_summary')).context['payments']
+        filters = {
+            'payment_method': ['gcash', 'over_counter', 'office_manual'],
+            'transaction_type': ['direct_rental', 'package_rental', 'membership', 'rice_sale'],
+            'availing_type': ['package', 'direct'],
+        }
+        key_fields = {
+            'payment_method': 'payment_method_key',
+            'transaction_type': 'transaction_type_key',
+            'availing_type': 'availing_type',
+        }
+
+        for name, values in filters.items():
+            for value in values:
+                with self.subTest(**{name: value}):
+                    expected = [
+                        item.internal_transaction_id
+                        for item in everything
+                        if getattr(item, key_fields[name]) == value
+                    ]
+                    page = self.client.get(reverse('reports:financial_summary'), {name: value})
+                    self.assertEqual(
+                        [item.internal_transaction_id for item in page.context['payments']],
+                        expected,
+                    )
+
+                    export = self.client.get(reverse('reports:export_financial_report_excel'), {name: value})
+                    sheet_xml = ZipFile(BytesIO(export.getvalue())).read('xl/worksheets/sheet1.xml').decode('utf-8')
+                    self.assertIn(f'Total Results: {len(expected)}', sheet_xml)
+                    for transaction_id in expected:
+                        self.assertIn(transaction_id, sheet_xml)
+
     def test_financial_summary_custom_range_uses_payment_transaction_dates_for_rental_income(self):
         today = timezone.localdate()
         start_date = (today - timedelta(days=7)).isoformat()
@@ -943,6 +1021,38 @@ class ReportsAccessTests(TestCase):
         self.assertContains(response, 'Maint. PHP 560.00')
         self.assertContains(response, 'PHP 640.00')
 
+    def test_machine_usage_report_aggregates_match_per_machine_snapshots(self):
+        self.recent_rental.diesel_consumed = Decimal('18.50')
+        self.recent_rental.diesel_cost = Decimal('300.00')
+        self.recent_rental.save(update_fields=['diesel_consumed', 'diesel_cost'])
+        request = RequestFactory().get(reverse('reports:machine_usage_report'))
+        request.user = self.admin
+
+        with CaptureQueriesContext(connection) as few:
+            context = _machine_usage_report_context(request)
+        filters = {'start_value': None, 'end_value': None}
+        for row in context['usage_data']:
+            snapshot = _machine_profitability_snapshot(row['machine'], filters)
+            rentals = Rental.objects.filter(machine=row['machine'])
+            self.assertEqual(row['rental_count'], rentals.count())
+            self.assertEqual(row['total_days'], sum(rental.get_duration_days() for rental in rentals))
+            self.assertEqual(row['revenue'], snapshot['revenue']['total_revenue'])
+            self.assertEqual(row['maintenance_cost'], snapshot['maintenance']['maintenance_total'])
+            self.assertEqual(row['maintenance_count'], snapshot['maintenance']['maintenance_count'])
+            self.assertEqual(row['diesel_cost'], snapshot['diesel']['total_diesel_cost'])
+            self.assertEqual(row['diesel_jobs_count'], snapshot['diesel']['diesel_jobs_count'])
+            self.assertEqual(row['net_profit'], snapshot['net_profit'])
+
+        for index in range(3):
+            Machine.objects.create(
+                name=f'Extra Tractor {index}',
+                machine_type='tractor_4wd',
+                current_price='1200',
+            )
+        with CaptureQueriesContext(connection) as many:
+            _machine_usage_report_context(request)
+        self.assertEqual(len(few), len(many))
+
     def test_machine_usage_detail_shows_diesel_cost_in_clean_profit_breakdown(self):
         self.recent_rental.diesel_consumed = Decimal('18.50')
         self.recent_rental.diesel_cost = Decimal('300.00')
@@ -1186,7 +1296,7 @@ class ReportsAccessTests(TestCase):
             excel_response['Content-Type'],
             'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
         )
-        workbook = ZipFile(BytesIO(excel_response.content))
+        workbook = ZipFile(BytesIO(excel_response.getvalue()))
         sheet_xml = workbook.read('xl/worksheets/sheet1.xml').decode('utf-8')
         self.assertIn('Printable Inactive', sheet_xml)
         self.assertIn('Inactive', sheet_xml)
@@ -1429,7 +1539,7 @@ class ReportsAccessTests(TestCase):
             'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
         )
 
-        workbook = ZipFile(BytesIO(response.content))
+        workbook = ZipFile(BytesIO(response.getvalue()))
         sheet_xml = workbook.read('xl/worksheets/sheet1.xml').decode('utf-8')
 
         self.assertIn('Payment Transactions Filtered Report', sheet_xml)
@@ -1531,6 +1641,206 @@ class ReportsAccessTests(TestCase):
                 self.assertEqual(response.status_code, 200)
 
 
+class StreamingXlsxTests(SimpleTestCase):
+    def test_rows_are_consumed_only_as_the_workbook_streams(self):
+        consumed = []
+
+        def rows():
+            for index in range(5000):
+                consumed.append(index)
+                yield [f'TXN-{index:05d}', f'Member {index}', index * 7919 % 100003]
+
+        chunks = iter_xlsx_chunks('Lazy Report', [('Scope', 'All')], ['ID', 'Member', 'Amount'], rows(), total_results=5000)
+        first_chunk = next(chunks)
+        self.assertEqual(consumed, [])
+
+        workbook_bytes = first_chunk + b''.join(chunks)
+        self.assertEqual(len(consumed), 5000)
+        sheet_xml = ZipFile(BytesIO(workbook_bytes)).read('xl/worksheets/sheet1.xml').decode('utf-8')
+        self.assertIn('Total Results: 5000', sheet_xml)
+        self.assertIn('TXN-04999', sheet_xml)
+        self.assertTrue(sheet_xml.endswith('</worksheet>'))
+
+    def test_streamed_workbook_matches_the_bytes_builder(self):
+        rows = [['A-1', 'First'], ['A-2', 'Second']]
+        streamed = b''.join(iter_xlsx_chunks('Same Report', [], ['ID', 'Name'], iter(rows), total_results=2))
+        built = build_xlsx_bytes('Same Report', [], ['ID', 'Name'], rows)
+
+        streamed_sheet = ZipFile(BytesIO(streamed)).read('xl/worksheets/sheet1.xml')
+        built_sheet = ZipFile(BytesIO(built)).read('xl/worksheets/sheet1.xml')
+        self.assertEqual(streamed_sheet, built_sheet)
+
+    def test_empty_export_keeps_the_no_records_row(self):
+        sheet_xml = ZipFile(BytesIO(build_xlsx_bytes('Empty', [], ['ID'], iter([])))).read(
+            'xl/worksheets/sheet1.xml'
+        ).decode('utf-8')
+
+        self.assertIn('Total Results: 0', sheet_xml)
+        self.assertIn('No records matched the selected filters.', sheet_xml)
+
+
+class ReportExportJobTests(TestCase):
+    def setUp(self):
+        self.export_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.export_root, ignore_errors=True)
+        export_override = override_settings(REPORT_EXPORT_ROOT=self.export_root, REPORT_EXPORT_WORKER=True)
+        export_override.enable()
+        self.addCleanup(export_override.disable)
+
+        self.admin = User.objects.create_superuser(
+            username='export-admin',
+            email='export-admin@example.com',
+            password='testpass123',
+        )
+        User.objects.create_user(
+            username='export-member',
+            email='export-member@example.com',
+            password='testpass123',
+            role=User.REGULAR_USER,
+        )
+        self.client.force_login(self.admin)
+        self.request_url = reverse('reports:request_report_export', args=['membership_report_pdf'])
+
+    def test_queued_export_is_rendered_by_the_worker_and_announced(self):
+        response = self.client.get(self.request_url, {'filter': 'all'})
+        job = ReportExportJob.objects.get()
+        self.assertRedirects(response, reverse('reports:report_export_job_status', args=[job.pk]))
+        self.assertEqual(job.status, ReportExportJob.STATUS_PENDING)
+
+        self.assertEqual(process_report_export_jobs(), {'ready': 1, 'retried': 0, 'failed': 0})
+
+        status = self.client.get(reverse('reports:report_export_job_status', args=[job.pk]), {'format': 'json'}).json()
+        self.assertEqual(status['status'], ReportExportJob.STATUS_READY)
+        download = self.client.get(status['download_url'])
+        self.assertEqual(download.status_code, 200)
+        self.assertTrue(download.getvalue().startswith(b'%PDF'))
+        notification = UserNotification.objects.get(user=self.admin, notification_type='report_export_ready')
+        self.assertEqual(notification.action_url, status['download_url'])
+
+    def test_every_admin_waiting_on_a_queued_export_is_announced(self):
+        other_admin = User.objects.create_superuser(
+            username='export-admin-2',
+            email='export-admin-2@example.com',
+            password='testpass123',
+        )
+        self.client.get(self.request_url, {'filter': 'all'})
+        self.client.force_login(other_admin)
+        self.client.get(self.request_url, {'filter': 'all'})
+        job = ReportExportJob.objects.get()
+        self.assertEqual(set(job.requesters.all()), {self.admin, other_admin})
+
+        process_report_export_jobs()
+
+        self.assertEqual(
+            set(UserNotification.objects.filter(notification_type='report_export_ready').values_list('user', flat=True)),
+            {self.admin.pk, other_admin.pk},
+        )
+
+    @override_settings(REPORT_EXPORT_WORKER=False)
+    def test_export_is_rendered_in_the_request_without_a_worker(self):
+        response = self.client.get(self.request_url, {'filter': 'all'})
+
+        job = ReportExportJob.objects.get()
+        self.assertEqual(job.status, ReportExportJob.STATUS_READY)
+        self.assertRedirects(
+            response,
+            reverse('reports:download_report_export', args=[job.pk]),
+            fetch_redirect_response=False,
+        )
+        self.assertTrue(self.client.get(response.url).getvalue().startswith(b'%PDF'))
+        self.assertFalse(UserNotification.objects.filter(notification_type='report_export_ready').exists())
+
+    def test_identical_export_reuses_the_file_until_the_data_changes(self):
+        self.client.get(self.request_url, {'filter': 'all'})
+        process_report_export_jobs()
+        job = ReportExportJob.objects.get()
+
+        response = self.client.get(self.request_url, {'preview': '1', 'filter': 'all'})
+        self.assertRedirects(
+            response,
+            reverse('reports:download_report_export', args=[job.pk]),
+            fetch_redirect_response=False,
+        )
+        self.assertEqual(ReportExportJob.objects.count(), 1)
+
+        User.objects.create_user(username='late-member', password='testpass123', role=User.REGULAR_USER)
+        self.client.get(self.request_url, {'filter': 'all'})
+        self.assertEqual(ReportExportJob.objects.count(), 2)
+
+    def test_failed_render_is_retried_then_given_up(self):
+        self.client.get(self.request_url)
+        job = ReportExportJob.objects.get()
+
+        with patch('reports.export_jobs._render', side_effect=RuntimeError('renderer crashed')), \
+                self.assertLogs('reports.export_jobs', level='ERROR'):
+            self.assertEqual(process_report_export_jobs()['retried'], 1)
+            job.refresh_from_db()
+            self.assertEqual(job.status, ReportExportJob.STATUS_PENDING)
+            self.assertEqual(job.last_error, 'renderer crashed')
+
+            ReportExportJob.objects.filter(pk=job.pk).update(
+                attempts=ReportExportJob.MAX_ATTEMPTS - 1,
+                available_at=timezone.now(),
+            )
+            self.assertEqual(process_report_export_jobs()['failed'], 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ReportExportJob.STATUS_FAILED)
+        self.assertRedirects(
+            self.client.get(reverse('reports:download_report_export', args=[job.pk])),
+            reverse('reports:report_export_job_status', args=[job.pk]),
+        )
+
+
+    def test_artifacts_are_stored_outside_media_root(self):
+        self.client.get(self.request_url, {'filter': 'all'})
+        process_report_export_jobs()
+        job = ReportExportJob.objects.get()
+
+        self.assertTrue(job.artifact.path.startswith(self.export_root))
+        self.assertFalse(job.artifact.path.startswith(str(settings.MEDIA_ROOT)))
+
+    def test_expired_jobs_are_pruned_with_their_files(self):
+        self.client.get(self.request_url, {'filter': 'all'})
+        process_report_export_jobs()
+        job = ReportExportJob.objects.get()
+        path = job.artifact.path
+        self.assertTrue(os.path.exists(path))
+
+        ReportExportJob.objects.filter(pk=job.pk).update(finished_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(ReportExportJob.prune_expired(), 1)
+
+        self.assertFalse(ReportExportJob.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_staff_only_export_refuses_non_staff_superusers(self):
+        superuser = User.objects.create_superuser(
+            username='export-owner',
+            email='export-owner@example.com',
+            password='testpass123',
+        )
+        User.objects.filter(pk=superuser.pk).update(is_staff=False)
+        self.client.force_login(User.objects.get(pk=superuser.pk))
+
+        with self.assertLogs('django.request', level='WARNING'):
+            response = self.client.get(reverse('reports:request_report_export', args=['payments_pdf']))
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(ReportExportJob.objects.exists())
+
+    def test_worker_refuses_a_job_whose_requester_lost_access(self):
+        self.client.get(reverse('reports:request_report_export', args=['payments_pdf']))
+        job = ReportExportJob.objects.get()
+        User.objects.filter(pk=self.admin.pk).update(is_staff=False)
+
+        with self.assertLogs('reports.export_jobs', level='WARNING'):
+            self.assertEqual(process_report_export_jobs()['failed'], 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ReportExportJob.STATUS_FAILED)
+        self.assertFalse(job.artifact)
+
+
 class RiceStoreFlowTests(TestCase):
     def setUp(self):
         self.admin = User.objects.create_superuser(
@@ -1683,6 +1993,43 @@ class RiceStoreFlowTests(TestCase):
         self.assertContains(response, 'Print')
         self.assertIn('stock_movements', response.context)
 
+    def test_rice_sales_stock_movement_page_filters_by_date_and_paginates(self):
+        now = timezone.now()
+        RiceInventoryEntry.objects.bulk_create([
+            RiceInventoryEntry(
+                entry_type=RiceInventoryEntry.ENTRY_STOCK_IN,
+                source_kind=RiceInventoryEntry.SOURCE_MILLING,
+                source_id=index,
+                source_label=f'Milling #{index}',
+                occurred_at=now - timedelta(days=30) if index == 0 else now,
+                stock_change=Decimal('1.00'),
+                actual_balance=Decimal(index + 1),
+                reserved_balance=Decimal('0.00'),
+            )
+            for index in range(STOCK_MOVEMENT_PAGE_SIZE + 2)
+        ])
+        self.client.force_login(self.admin)
+        today = timezone.localdate().isoformat()
+
+        response = self.client.get(
+            reverse('reports:rice_sales_stock_movement'),
+            {'start_date': today, 'end_date': today},
+        )
+        second_page = self.client.get(
+            reverse('reports:rice_sales_stock_movement'),
+            {'start_date': today, 'end_date': today, 'page': 2},
+        )
+        printout = self.client.get(
+            reverse('reports:rice_sales_stock_movement'),
+            {'start_date': today, 'end_date': today, 'print': '1'},
+        )
+
+        self.assertEqual(len(response.context['stock_movements']), STOCK_MOVEMENT_PAGE_SIZE)
+        self.assertEqual(response.context['stock_movement_page'].paginator.count, STOCK_MOVEMENT_PAGE_SIZE + 1)
+        self.assertEqual(len(second_page.context['stock_movements']), 1)
+        self.assertNotIn('Milling #0', [row['source'] for row in printout.context['stock_movements']])
+        self.assertEqual(len(printout.context['stock_movements']), STOCK_MOVEMENT_PAGE_SIZE + 1)
+
     def test_rice_sales_order_records_page_shows_filters_and_table(self):
         self.client.force_login(self.admin)
         response = self.client.get(reverse('reports:rice_sales_order_records'))
@@ -1962,7 +2309,7 @@ class RiceStoreFlowTests(TestCase):
         response = self.client.get(reverse('reports:rice_sales_report'))
 
         self.assertEqual(response.status_code, 200)
-        self.assertContains(response, order.created_at.strftime('%b %d, %Y'))
+        self.assertContains(response, timezone.localtime(order.created_at).strftime('%b %d, %Y'))
         self.assertNotContains(response, 'Not set')
         stock_movements = response.context['stock_movements']
         self.assertTrue(stock_movements)
@@ -2109,3 +2456,106 @@ class RiceStoreFlowTests(TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'Only approved members can buy BUFIA rice.')
+
+
+class RiceInventoryLedgerTests(TestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(
+            username='ledger-member',
+            email='ledger-member@example.com',
+            password='testpass123',
+            first_name='Ledger',
+            last_name='Buyer',
+        )
+        self.rice_mill_machine = Machine.objects.create(
+            name='Ledger Rice Mill',
+            machine_type='rice_mill',
+            description='Rice mill for ledger tests',
+            current_price='5',
+        )
+        self.appointment = RiceMillAppointment.objects.create(
+            machine=self.rice_mill_machine,
+            user=self.member,
+            appointment_date=timezone.localdate() - timedelta(days=1),
+            sacks=10,
+            rice_quantity=Decimal('500.00'),
+            final_weight=Decimal('500.00'),
+            price_per_kg=Decimal('5.00'),
+            total_amount=Decimal('2500.00'),
+            payment_method='face_to_face',
+            booking_source=RiceMillAppointment.BOOKING_SOURCE_BUFIA_RICE_SHARE,
+            status='confirmed',
+        )
+
+    def _order(self, sacks, **overrides):
+        values = {
+            'buyer': self.member,
+            'sacks': Decimal(sacks),
+            'price_per_sack': Decimal('1200.00'),
+        }
+        values.update(overrides)
+        return RiceSale.objects.create(**values)
+
+    def _balances(self):
+        return [
+            (entry.entry_type, entry.actual_balance, entry.reserved_balance)
+            for entry in RiceInventoryEntry.objects.order_by('pk')
+        ]
+
+    def test_order_lifecycle_appends_entries_with_running_balances(self):
+        claimed = self._order('3.00')
+        cancelled = self._order('2.00')
+
+        claimed.order_status = RiceSale.ORDER_STATUS_CLAIMED
+        claimed.claimed_at = timezone.now()
+        claimed.save()
+        claimed.save()
+        cancelled.order_status = RiceSale.ORDER_STATUS_CANCELLED
+        cancelled.cancelled_at = timezone.now()
+        cancelled.save()
+
+        self.assertEqual(self._balances(), [
+            ('stock_in', Decimal('10.00'), Decimal('0.00')),
+            ('reserved', Decimal('10.00'), Decimal('3.00')),
+            ('reserved', Decimal('10.00'), Decimal('5.00')),
+            ('stock_out', Decimal('7.00'), Decimal('2.00')),
+            ('reservation_released', Decimal('7.00'), Decimal('0.00')),
+        ])
+        balance = RiceInventoryBalance.get_solo()
+        self.assertEqual(balance.sold_sacks, Decimal('3.00'))
+        self.assertEqual(balance.available_sacks, Decimal('7.00'))
+
+    def test_snapshot_reads_the_balance_row_and_one_order_aggregate(self):
+        self._order('4.00')
+        self._order(
+            '1.00',
+            payment_status=RiceSale.PAYMENT_STATUS_PAID,
+            order_status=RiceSale.ORDER_STATUS_CLAIMED,
+            claimed_at=timezone.now(),
+        )
+
+        with self.assertNumQueries(2):
+            snapshot = _rice_inventory_snapshot()
+
+        self.assertEqual(snapshot['milled_total_sacks'], Decimal('10.00'))
+        self.assertEqual(snapshot['reserved_sacks'], Decimal('4.00'))
+        self.assertEqual(snapshot['sold_sacks'], Decimal('1.00'))
+        self.assertEqual(snapshot['available_sacks'], Decimal('5.00'))
+        self.assertEqual(snapshot['milling_cost_per_sack'], Decimal('250.00'))
+        self.assertEqual(snapshot['claimed_sales_revenue'], Decimal('1200.00'))
+
+    def test_milling_corrections_and_deletions_append_adjustments(self):
+        self.appointment.final_weight = Decimal('400.00')
+        self.appointment.save()
+        order = self._order('2.00')
+        order.delete()
+
+        self.assertEqual(self._balances(), [
+            ('stock_in', Decimal('10.00'), Decimal('0.00')),
+            ('adjustment', Decimal('8.00'), Decimal('0.00')),
+            ('reserved', Decimal('8.00'), Decimal('2.00')),
+            ('adjustment', Decimal('8.00'), Decimal('0.00')),
+        ])
+        balance = RiceInventoryBalance.get_solo()
+        self.assertEqual(balance.milled_kg, Decimal('400.00'))
+        self.assertEqual(balance.available_sacks, Decimal('8.00'))
@@ -40,4 +40,7 @@ urlpatterns = [
     path('machine-usage/export/pdf/', views.export_machine_usage_report_pdf, name='export_machine_usage_report_pdf'),
     path('membership/export/excel/', views.export_membership_report_excel, name='export_membership_report_excel'),
     path('membership/export/pdf/', views.export_membership_report_pdf, name='export_membership_report_pdf'),
+    path('exports/<slug:export_key>/request/', views.request_report_export, name='request_report_export'),
+    path('exports/jobs/<int:pk>/', views.report_export_job_status, name='report_export_job_status'),
+    path('exports/jobs/<int:pk>/download/', views.download_report_export, name='download_report_export'),
 ]
@@ -1,5 +1,6 @@
 import csv
 from collections import Counter
+import heapq
 from datetime import datetime, timedelta
 from decimal import Decimal
 import re
@@ -9,18 +10,22 @@ from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
 from django.db import transaction
-from django.db.models import Avg, F, Q, Sum
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Q, Sum
 from django.db.models.functions import Coalesce
-from django.http import HttpResponse
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 from django.utils import timezone
 
 from bufia.models import Payment, Refund
 from reports.forms import RiceOrderPaymentForm, RicePurchaseForm, RiceSaleSettingForm
-from reports.export_utils import build_pdf_bytes, build_xlsx_bytes
-from machines.models import DryerRental, Machine, Maintenance, RiceMillAppointment, Rental
-from reports.models import RiceSale, RiceSaleSetting
+from reports.export_jobs import EXPORTS, render_in_request, request_export, user_can_export
+from reports.export_utils import XLSX_CONTENT_TYPE, build_pdf_bytes, iter_xlsx_chunks
+from machines.models import DryerRental, Machine, Maintenance, MaintenancePartUsed, RiceMillAppointment, Rental
+from reports.models import ReportExportJob, RiceInventoryBalance, RiceInventoryEntry, RiceSale, RiceSaleSetting
 from users.forms import MembershipProofUploadForm
 from users.models import MembershipApplication
 from users.views import (
@@ -77,7 +82,14 @@ FINANCIAL_STATUS_CHOICES = [
 
 SERVICE_REVENUE_STATUSES = ['paid', 'confirmed', 'completed']
 MAINTENANCE_COST_STATUSES = ['completed']
-MILLED_RICE_KG_PER_SACK = Decimal('50.00')
+PAID_RENTAL_REVENUE_Q = (
+    Q(payment_amount__isnull=False)
+    & ~Q(payment_type='in_kind')
+    & (Q(payment_verified=True) | Q(payment_status='paid'))
+)
+DIESEL_RECORD_Q = Q(diesel_consumed__isnull=False) | Q(diesel_cost__isnull=False)
+EXPORT_ITERATOR_CHUNK_SIZE = 500
+STOCK_MOVEMENT_PAGE_SIZE = 50
 
 
 def _date_value(value):
@@ -311,7 +323,10 @@ def _machine_maintenance_queryset(machine, date_filters):
     ).exclude(
         status='cancelled',
     ).prefetch_related('parts_used').order_by('-start_date')
+    return _apply_maintenance_range(maintenance, date_filters)
+
 
+def _apply_maintenance_range(maintenance, date_filters):
     if date_filters['start_value']:
         maintenance = maintenance.filter(
             Q(actual_completion_date__date__gte=date_filters['start_value']) |
@@ -431,9 +446,158 @@ def _machine_maintenance_timeline(machine):
 
 
 def _machine_profitability_snapshot(machine, date_filters):
-    revenue = _machine_revenue_breakdown(machine, date_filters)
-    maintenance = _machine_maintenance_breakdown(machine, date_filters)
-    diesel = _machine_diesel_breakdown(machine, date_filters)
+    return _machine_profitability_from_breakdowns(
+        machine,
+        date_filters,
+        revenue=_machine_revenue_breakdown(machine, date_filters),
+        maintenance=_machine_maintenance_breakdown(machine, date_filters),
+        diesel=_machine_diesel_breakdown(machine, date_filters),
+    )
+
+
+def _rental_date_range(queryset, date_filters):
+    if date_filters['start_value']:
+        queryset = queryset.filter(start_date__gte=date_filters['start_value'])
+    if date_filters['end_value']:
+        queryset = queryset.filter(end_date__lte=date_filters['end_value'])
+    return queryset
+
+
+def _grouped_by_machine(queryset, **aggregates):
+    rows = queryset.order_by().values('machine_id').annotate(**aggregates)
+    return {row.pop('machine_id'): row for row in rows}
+
+
+def _machine_usage_aggregates(machines, date_filters):
+    """
+    Return per-machine usage, revenue, maintenance and diesel figures.
+
+    Each source table is read once with ``GROUP BY machine_id`` so the cost
+    does not grow with the number of machines. The result maps machine ids
+    to the same ``revenue``/``maintenance``/``diesel`` shapes that the
+    single-machine breakdowns return (minus the record querysets).
+    """
+    zero = Decimal('0.00')
+    machines = list(machines)
+    machine_ids = [machine.pk for machine in machines]
+
+    rentals = _grouped_by_machine(
+        _rental_date_range(Rental.objects.filter(machine_id__in=machine_ids), date_filters),
+        rental_count=Count('id'),
+        rental_duration=Sum(
+            ExpressionWrapper(F('end_date') - F('start_date'), output_field=DurationField())
+        ),
+        rental_revenue=Sum('payment_amount', filter=PAID_RENTAL_REVENUE_Q),
+        paid_rental_count=Count('id', filter=PAID_RENTAL_REVENUE_Q),
+        total_diesel_liters=Sum('diesel_consumed', filter=DIESEL_RECORD_Q),
+        total_diesel_cost=Sum('diesel_cost', filter=DIESEL_RECORD_Q),
+        diesel_jobs_count=Count('id', filter=DIESEL_RECORD_Q),
+    )
+
+    rice_query = RiceMillAppointment.objects.filter(
+        machine_id__in=machine_ids,
+        total_amount__isnull=False,
+        status__in=SERVICE_REVENUE_STATUSES,
+    )
+    if date_filters['start_value']:
+        rice_query = rice_query.filter(appointment_date__gte=date_filters['start_value'])
+    if date_filters['end_value']:
+        rice_query = rice_query.filter(appointment_date__lte=date_filters['end_value'])
+    rice = _grouped_by_machine(rice_query, revenue=Sum('total_amount'), count=Count('id'))
+
+    dryer_query = DryerRental.objects.filter(
+        machine_id__in=machine_ids,
+        total_amount__isnull=False,
+        status__in=SERVICE_REVENUE_STATUSES,
+    )
+    if date_filters['start_value']:
+        dryer_query = dryer_query.filter(rental_date__gte=date_filters['start_value'])
+    if date_filters['end_value']:
+        dryer_query = dryer_query.filter(rental_date__lte=date_filters['end_value'])
+    dryer = _grouped_by_machine(dryer_query, revenue=Sum('total_amount'), count=Count('id'))
+
+    maintenance_query = _apply_maintenance_range(
+        Maintenance.objects.filter(machine_id__in=machine_ids).exclude(status='cancelled'),
+        date_filters,
+    )
+    cost_filter = Q(status__in=MAINTENANCE_COST_STATUSES)
+    maintenance = _grouped_by_machine(
+        maintenance_query,
+        maintenance_count=Count('id'),
+        completed_maintenance_count=Count('id', filter=cost_filter),
+        labor_cost=Sum('labor_cost', filter=cost_filter),
+        other_cost=Sum('other_cost', filter=cost_filter),
+    )
+    parts = {
+        row['maintenance_record__machine_id']: row['parts_cost']
+        for row in MaintenancePartUsed.objects.filter(
+            maintenance_record__in=maintenance_query.filter(cost_filter),
+        ).order_by().values('maintenance_record__machine_id').annotate(parts_cost=Sum('subtotal'))
+    }
+
+    # Harvesters earn from rice sales, which are not tied to a machine.
+    harvester_revenue = zero
+    rice_sale_count = 0
+    if any(machine.machine_type == 'harvester' for machine in machines):
+        rice_sale_query = RiceSale.objects.filter(payment_status=RiceSale.PAYMENT_STATUS_PAID)
+        if date_filters['start_value']:
+            rice_sale_query = rice_sale_query.filter(paid_at__date__gte=date_filters['start_value'])
+        if date_filters['end_value']:
+            rice_sale_query = rice_sale_query.filter(paid_at__date__lte=date_filters['end_value'])
+        rice_sales = rice_sale_query.aggregate(total=Sum(F('sacks') * F('price_per_sack')), count=Count('id'))
+        harvester_revenue = rice_sales['total'] or zero
+        rice_sale_count = rice_sales['count']
+
+    figures = {}
+    for machine in machines:
+        rental_row = rentals.get(machine.pk, {})
+        rice_row = rice.get(machine.pk, {})
+        dryer_row = dryer.get(machine.pk, {})
+        maintenance_row = maintenance.get(machine.pk, {})
+        is_harvester = machine.machine_type == 'harvester'
+
+        rental_count = rental_row.get('rental_count', 0)
+        duration = rental_row.get('rental_duration')
+        revenue = {
+            'rental_revenue': rental_row.get('rental_revenue') or zero,
+            'rice_revenue': rice_row.get('revenue') or zero,
+            'dryer_revenue': dryer_row.get('revenue') or zero,
+            'harvester_revenue': harvester_revenue if is_harvester else zero,
+            'rental_count': rental_row.get('paid_rental_count', 0),
+            'rice_count': rice_row.get('count', 0),
+            'dryer_count': dryer_row.get('count', 0),
+            'rice_sale_count': rice_sale_count if is_harvester else 0,
+        }
+        revenue['total_revenue'] = (
+            revenue['rental_revenue'] + revenue['rice_revenue']
+            + revenue['dryer_revenue'] + revenue['harvester_revenue']
+        )
+        maintenance_figures = {
+            'maintenance_count': maintenance_row.get('maintenance_count', 0),
+            'completed_maintenance_count': maintenance_row.get('completed_maintenance_count', 0),
+            'parts_cost': parts.get(machine.pk) or zero,
+            'labor_cost': maintenance_row.get('labor_cost') or zero,
+            'other_cost': maintenance_row.get('other_cost') or zero,
+        }
+        maintenance_figures['maintenance_total'] = (
+            maintenance_figures['parts_cost'] + maintenance_figures['labor_cost'] + maintenance_figures['other_cost']
+        )
+        figures[machine.pk] = {
+            'rental_count': rental_count,
+            # Rental durations are inclusive of both end dates.
+            'total_days': (duration.days if duration else 0) + rental_count,
+            'revenue': revenue,
+            'maintenance': maintenance_figures,
+            'diesel': {
+                'diesel_jobs_count': rental_row.get('diesel_jobs_count', 0),
+                'total_diesel_liters': rental_row.get('total_diesel_liters') or zero,
+                'total_diesel_cost': rental_row.get('total_diesel_cost') or zero,
+            },
+        }
+    return figures
+
+
+def _machine_profitability_from_breakdowns(machine, date_filters, *, revenue, maintenance, diesel):
     acquisition_amount = machine.acquisition_amount or Decimal('0.00')
     operating_expenses = maintenance['maintenance_total'] + diesel['total_diesel_cost']
     net_profit = revenue['total_revenue'] - operating_expenses
@@ -564,9 +728,23 @@ def _filename(prefix, extension):
     return f'{prefix}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
 
 
-def _xlsx_response(prefix, title, filter_details, headers, rows, column_widths=None, sheet_name='Report'):
-    response = HttpResponse(
-        build_xlsx_bytes(
+def _iter_in_chunks(queryset, chunk_size=EXPORT_ITERATOR_CHUNK_SIZE):
+    """Yield lists of up to ``chunk_size`` rows read through ``queryset.iterator()``."""
+    chunk = []
+    for row in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _xlsx_response(
+    prefix, title, filter_details, headers, rows, column_widths=None, sheet_name='Report', total_results=None
+):
+    response = StreamingHttpResponse(
+        iter_xlsx_chunks(
             title=title,
             filter_details=filter_details,
             headers=headers,
@@ -574,8 +752,9 @@ def _xlsx_response(prefix, title, filter_details, headers, rows, column_widths=N
             column_widths=column_widths,
             sheet_name=sheet_name,
             theme=prefix,
+            total_results=total_results,
         ),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        content_type=XLSX_CONTENT_TYPE,
     )
     response['Content-Disposition'] = f'attachment; filename="{_filename(prefix, "xlsx")}"'
     return response
@@ -602,7 +781,8 @@ def _pdf_response(prefix, title, filter_details, headers, rows, column_widths=No
     return response
 
 
-def _rental_report_context(request):
+def _rental_report_queryset(request):
+    """Return ``(rentals, filters, machines, members)`` for the rental report's query string."""
     date_filters = _resolve_date_filters(request)
     machine_id = (request.GET.get('machine') or '').strip()
     member_id = (request.GET.get('member') or '').strip()
@@ -642,9 +822,26 @@ def _rental_report_context(request):
         'direct': 'Direct Rental',
     }.get(availing_type, 'All Availing Types')
 
-    ordered_rentals, total_refunded = _attach_rental_report_payment_metadata(
-        rentals.order_by('-created_at')
-    )
+    filters = {
+        'date_range': date_filters['date_range'],
+        'date_range_label': date_filters['date_range_label'],
+        'start_date': date_filters['start_date'],
+        'end_date': date_filters['end_date'],
+        'machine': machine_id,
+        'machine_label': machine_label,
+        'member': member_id,
+        'member_label': member_label,
+        'status': status,
+        'status_label': status_label,
+        'availing_type': availing_type,
+        'availing_type_label': availing_type_label,
+    }
+    return rentals.order_by('-created_at'), filters, machines, members
+
+
+def _rental_report_context(request):
+    rentals, filters, machines, members = _rental_report_queryset(request)
+    ordered_rentals, total_refunded = _attach_rental_report_payment_metadata(rentals)
     stats = {
         'total': len(ordered_rentals),
         'package': sum(1 for rental in ordered_rentals if getattr(rental, 'package_request_id', None)),
@@ -671,23 +868,17 @@ def _rental_report_context(request):
         'members': members,
         'status_choices': Rental.STATUS_CHOICES,
         'date_range_options': DATE_RANGE_CHOICES,
-        'filters': {
-            'date_range': date_filters['date_range'],
-            'date_range_label': date_filters['date_range_label'],
-            'start_date': date_filters['start_date'],
-            'end_date': date_filters['end_date'],
-            'machine': machine_id,
-            'machine_label': machine_label,
-            'member': member_id,
-            'member_label': member_label,
-            'status': status,
-            'status_label': status_label,
-            'availing_type': availing_type,
-            'availing_type_label': availing_type_label,
-        }
+        'filters': filters,
     }
 
 
+def _iter_rental_report_rentals(rentals):
+    """Yield ``rentals`` with their report payment metadata, attached one chunk at a time."""
+    for chunk in _iter_in_chunks(rentals):
+        chunk, _ = _attach_rental_report_payment_metadata(chunk)
+        yield from chunk
+
+
 def _payment_method_filter_key(label):
     normalized = (label or '').strip().lower()
     if 'gcash' in normalized:
@@ -753,7 +944,8 @@ def _attach_rental_report_payment_metadata(rentals):
     return rentals, total_refunded
 
 
-def _harvest_report_context(request):
+def _harvest_report_queryset(request):
+    """Return ``(rentals, filters, members)`` for the harvest report's query string."""
     date_filters = _resolve_date_filters(request)
     rentals = _completed_harvest_rentals()
     member_id = (request.GET.get('member') or '').strip()
@@ -779,7 +971,34 @@ def _harvest_report_context(request):
             organization_share_received__gte=F('organization_share_required'),
         )
 
-    harvest_data = [_harvest_row(rental) for rental in rentals.order_by('-operator_reported_at', '-created_at')]
+    members = User.objects.filter(
+        id__in=_completed_harvest_rentals().values_list('user_id', flat=True)
+    ).order_by('first_name', 'last_name', 'username')
+    selected_member = members.filter(id=member_id).first() if member_id else None
+    member_label = _user_display_label(selected_member) if selected_member else 'All Members'
+    delivery_labels = {
+        '': 'All Delivery Status',
+        'delivered': 'Delivered',
+        'outstanding': 'Outstanding',
+        'settled': 'Settled',
+    }
+
+    filters = {
+        'date_range': date_filters['date_range'],
+        'date_range_label': date_filters['date_range_label'],
+        'start_date': date_filters['start_date'],
+        'end_date': date_filters['end_date'],
+        'member': member_id,
+        'member_label': member_label,
+        'delivery_status': delivery_status,
+        'delivery_status_label': delivery_labels.get(delivery_status, 'All Delivery Status'),
+    }
+    return rentals.order_by('-operator_reported_at', '-created_at'), filters, members
+
+
+def _harvest_report_context(request):
+    rentals, filters, members = _harvest_report_queryset(request)
+    harvest_data = [_harvest_row(rental) for rental in rentals]
     total_harvested = sum((row['rental'].total_harvest_sacks or Decimal('0.00')) for row in harvest_data)
     total_bufia = sum((row['bufia_share'] or Decimal('0.00')) for row in harvest_data)
     total_member = sum((row['member_share'] or Decimal('0.00')) for row in harvest_data)
@@ -793,17 +1012,6 @@ def _harvest_report_context(request):
         if total_bufia > 0 else Decimal('0.00')
     )
     bufia_milling = _bufia_harvest_milling_snapshot()
-    members = User.objects.filter(
-        id__in=_completed_harvest_rentals().values_list('user_id', flat=True)
-    ).order_by('first_name', 'last_name', 'username')
-    selected_member = members.filter(id=member_id).first() if member_id else None
-    member_label = _user_display_label(selected_member) if selected_member else 'All Members'
-    delivery_labels = {
-        '': 'All Delivery Status',
-        'delivered': 'Delivered',
-        'outstanding': 'Outstanding',
-        'settled': 'Settled',
-    }
 
     return {
         'harvest_data': harvest_data,
@@ -824,32 +1032,27 @@ def _harvest_report_context(request):
             ('outstanding', 'Outstanding'),
             ('settled', 'Settled'),
         ],
-        'filters': {
-            'date_range': date_filters['date_range'],
-            'date_range_label': date_filters['date_range_label'],
-            'start_date': date_filters['start_date'],
-            'end_date': date_filters['end_date'],
-            'member': member_id,
-            'member_label': member_label,
-            'delivery_status': delivery_status,
-            'delivery_status_label': delivery_labels.get(delivery_status, 'All Delivery Status'),
-        }
+        'filters': filters,
     }
 
 
-def _rice_sales_report_context(request):
-    _expire_overdue_rice_orders()
+def _effective_pickup_date(order):
+    return (
+        order.pickup_date
+        or (timezone.localtime(order.claimed_at).date() if order.claimed_at else None)
+        or timezone.localtime(order.created_at).date()
+    )
+
+
+def _rice_sales_report_queryset(request):
+    """Return ``(orders, filters, members)`` for the rice sales report's query string, newest first."""
     date_filters = _resolve_date_filters(request)
-    rice_sale_settings = _rice_sale_setting()
-    rice_inventory = _rice_inventory_snapshot()
-    bufia_milling = _bufia_harvest_milling_snapshot()
     member_id = (request.GET.get('member') or '').strip()
     order_status = (request.GET.get('order_status') or '').strip()
     payment_status = (request.GET.get('payment_status') or '').strip()
     payment_method = (request.GET.get('payment_method') or '').strip()
 
-    base_orders = RiceSale.objects.select_related('buyer', 'processed_by')
-    filtered_order_query = base_orders
+    filtered_order_query = RiceSale.objects.select_related('buyer', 'processed_by')
     if date_filters['start_value']:
         filtered_order_query = filtered_order_query.filter(created_at__date__gte=date_filters['start_value'])
     if date_filters['end_value']:
@@ -863,37 +1066,53 @@ def _rice_sales_report_context(request):
     if payment_method:
         filtered_order_query = filtered_order_query.filter(payment_method=payment_method)
 
+    members = User.objects.filter(
+        id__in=RiceSale.objects.values_list('buyer_id', flat=True).distinct()
+    ).order_by('last_name', 'first_name', 'username')
+    selected_member = members.filter(id=member_id).first() if member_id else None
+    member_label = _user_display_label(selected_member) if selected_member else 'All Members'
+    order_status_label = dict(RiceSale.ORDER_STATUS_CHOICES).get(order_status, 'All Order Statuses') if order_status else 'All Order Statuses'
+    payment_status_label = dict(RiceSale.PAYMENT_STATUS_CHOICES).get(payment_status, 'All Payment Statuses') if payment_status else 'All Payment Statuses'
+    payment_method_label = dict(RiceSale.PAYMENT_METHOD_CHOICES).get(payment_method, 'All Payment Methods') if payment_method else 'All Payment Methods'
+
+    filters = {
+        'date_range': date_filters['date_range'],
+        'date_range_label': date_filters['date_range_label'],
+        'start_date': date_filters['start_date'],
+        'end_date': date_filters['end_date'],
+        'member': member_id,
+        'member_label': member_label,
+        'order_status': order_status,
+        'order_status_label': order_status_label,
+        'payment_status': payment_status,
+        'payment_status_label': payment_status_label,
+        'payment_method': payment_method,
+        'payment_method_label': payment_method_label,
+    }
+    return filtered_order_query.order_by('-created_at', '-id'), filters, members
+
+
+def _rice_sales_report_context(request):
+    _expire_overdue_rice_orders()
+    rice_sale_settings = _rice_sale_setting()
+    rice_inventory = _rice_inventory_snapshot()
+    bufia_milling = _bufia_harvest_milling_snapshot()
+    filtered_order_query, filters, members = _rice_sales_report_queryset(request)
+    stock_movement_page = _rice_stock_movement_page(request, _resolve_date_filters(request))
+
     orders = _attach_rice_sale_payment_records(
-        base_orders.order_by('pickup_date', '-created_at', '-id')
-    )
-    filtered_orders = _attach_rice_sale_payment_records(
-        filtered_order_query.order_by('-created_at', '-id')
+        RiceSale.objects.select_related('buyer', 'processed_by').order_by('pickup_date', '-created_at', '-id')
     )
+    filtered_orders = _attach_rice_sale_payment_records(filtered_order_query)
     for order in orders:
-        order.effective_pickup_date = (
-            order.pickup_date
-            or (timezone.localtime(order.claimed_at).date() if order.claimed_at else None)
-            or timezone.localtime(order.created_at).date()
-        )
+        order.effective_pickup_date = _effective_pickup_date(order)
     for order in filtered_orders:
-        order.effective_pickup_date = (
-            order.pickup_date
-            or (timezone.localtime(order.claimed_at).date() if order.claimed_at else None)
-            or timezone.localtime(order.created_at).date()
-        )
+        order.effective_pickup_date = _effective_pickup_date(order)
 
     waiting_pickup_orders = [
         order for order in orders
         if order.order_status not in [RiceSale.ORDER_STATUS_CLAIMED, RiceSale.ORDER_STATUS_CANCELLED]
     ]
-    members = User.objects.filter(
-        id__in=RiceSale.objects.values_list('buyer_id', flat=True).distinct()
-    ).order_by('last_name', 'first_name', 'username')
-    selected_member = members.filter(id=member_id).first() if member_id else None
-    member_label = _user_display_label(selected_member) if selected_member else 'All Members'
-    order_status_label = dict(RiceSale.ORDER_STATUS_CHOICES).get(order_status, 'All Order Statuses') if order_status else 'All Order Statuses'
-    payment_status_label = dict(RiceSale.PAYMENT_STATUS_CHOICES).get(payment_status, 'All Payment Statuses') if payment_status else 'All Payment Statuses'
-    payment_method_label = dict(RiceSale.PAYMENT_METHOD_CHOICES).get(payment_method, 'All Payment Methods') if payment_method else 'All Payment Methods'
 
     remaining_stock_value = (
         rice_inventory['available_sacks'] * Decimal(str(rice_sale_settings.current_price_per_sack or '0.00'))
@@ -904,23 +1123,11 @@ def _rice_sales_report_context(request):
         'bufia_milling': bufia_milling,
         'sales_transactions': filtered_orders,
         'pickup_orders': waiting_pickup_orders,
-        'stock_movements': _rice_stock_movement_rows(),
+        'stock_movements': _rice_stock_movement_rows(stock_movement_page),
+        'stock_movement_page': stock_movement_page,
         'remaining_stock_value': remaining_stock_value,
         'members': members,
-        'filters': {
-            'date_range': date_filters['date_range'],
-            'date_range_label': date_filters['date_range_label'],
-            'start_date': date_filters['start_date'],
-            'end_date': date_filters['end_date'],
-            'member': member_id,
-            'member_label': member_label,
-            'order_status': order_status,
-            'order_status_label': order_status_label,
-            'payment_status': payment_status,
-            'payment_status_label': payment_status_label,
-            'payment_method': payment_method,
-            'payment_method_label': payment_method_label,
-        },
+        'filters': filters,
         'order_status_options': RiceSale.ORDER_STATUS_CHOICES,
         'payment_status_options': RiceSale.PAYMENT_STATUS_CHOICES,
         'payment_method_options': RiceSale.PAYMENT_METHOD_CHOICES,
@@ -957,17 +1164,32 @@ def _rice_sales_pricing_context():
     }
 
 
-def _rice_sales_stock_movement_context():
+def _rice_sales_stock_movement_context(request, *, paginate=True):
     rice_sale_settings = _rice_sale_setting()
     rice_inventory = _rice_inventory_snapshot()
     remaining_stock_value = (
         rice_inventory['available_sacks'] * Decimal(str(rice_sale_settings.current_price_per_sack or '0.00'))
     ).quantize(Decimal('0.01'))
+    date_filters = _resolve_date_filters(request)
+    if paginate:
+        stock_movement_page = _rice_stock_movement_page(request, date_filters)
+        entries = stock_movement_page
+    else:
+        stock_movement_page = None
+        entries = _rice_stock_movement_queryset(date_filters).iterator(chunk_size=EXPORT_ITERATOR_CHUNK_SIZE)
 
     return {
         'rice_inventory': rice_inventory,
-        'stock_movements': _rice_stock_movement_rows(),
+        'stock_movements': _rice_stock_movement_rows(entries),
+        'stock_movement_page': stock_movement_page,
         'remaining_stock_value': remaining_stock_value,
+        'filters': {
+            'date_range': date_filters['date_range'],
+            'date_range_label': date_filters['date_range_label'],
+            'start_date': date_filters['start_date'],
+            'end_date': date_filters['end_date'],
+        },
+        'date_range_options': DATE_RANGE_CHOICES,
     }
 
 
@@ -975,13 +1197,74 @@ def _rice_sales_order_records_context(request):
     return _rice_sales_report_context(request)
 
 
-def _financial_summary_context(request):
+def _financial_report_filters(request):
+    """Return ``(date_filters, filters)`` for the financial summary's query string."""
     date_filters = _resolve_date_filters(request)
     member_id = (request.GET.get('member') or '').strip()
     transaction_type = (request.GET.get('transaction_type') or '').strip()
     status = (request.GET.get('status') or '').strip()
     payment_method = (request.GET.get('payment_method') or '').strip()
     availing_type = (request.GET.get('availing_type') or '').strip()
+    return date_filters, {
+        'date_range': date_filters['date_range'],
+        'date_range_label': date_filters['date_range_label'],
+        'start_date': date_filters['start_date'],
+        'end_date': date_filters['end_date'],
+        'member': member_id,
+        'member_label': (
+            _user_display_label(User.objects.filter(pk=member_id).first()) if member_id else 'All Members'
+        ),
+        'transaction_type': transaction_type,
+        'transaction_type_label': dict(FINANCIAL_TRANSACTION_TYPE_CHOICES).get(
+            transaction_type, 'All Transaction Types'
+        ),
+        'status': status,
+        'status_label': dict(FINANCIAL_STATUS_CHOICES).get(status, 'All Statuses'),
+        'payment_method': payment_method,
+        'payment_method_label': dict(FINANCIAL_PAYMENT_METHOD_CHOICES).get(
+            payment_method, 'All Payment Methods'
+        ),
+        'availing_type': availing_type,
+        'availing_type_label': {
+            'package': 'Package Availing',
+            'direct': 'Direct Rental',
+        }.get(availing_type, 'All Availing Types'),
+    }
+
+
+def _payment_channel_query(payment_method):
+    """Database form of ``_payment_method_filter_key(payment.payment_channel_display) == payment_method``."""
+    stripe_reference = (
+        Q(stripe_session_id__gt='') | Q(stripe_payment_intent_id__gt='') | Q(stripe_charge_id__gt='')
+    )
+    gcash = Q(amount_received__isnull=True) & stripe_reference
+    office_manual = Q(amount_received__isnull=True) & ~stripe_reference & Q(payment_provider='manual')
+    if payment_method == 'gcash':
+        return gcash
+    if payment_method == 'office_manual':
+        return office_manual
+    if payment_method == 'over_counter':
+        return ~(gcash | office_manual)
+    return Q(pk__in=[])
+
+
+def _financial_transaction_sources(date_filters, filters):
+    """
+    Querysets behind the financial summary's transaction list.
+
+    Returns ``[(queryset, to_rows), ...]``: every filter is applied in the
+    database, each queryset is ordered newest first by the date its rows
+    are listed under, and ``to_rows`` turns a chunk of it into
+    ``_transaction_row`` items.
+    """
+    member_id = filters['member']
+    transaction_type = filters['transaction_type']
+    status = filters['status']
+    payment_method = filters['payment_method']
+    availing_type = filters['availing_type']
+    rental_content_type = ContentType.objects.get_for_model(Rental)
+    membership_content_type = ContentType.objects.get_for_model(MembershipApplication)
+    rice_sale_content_type = ContentType.objects.get_for_model(RiceSale)
 
     payment_queryset = Payment.objects.select_related('user', 'processed_by', 'content_type').prefetch_related('refunds')
     payment_queryset = _apply_payment_transaction_range(payment_queryset, date_filters)
@@ -989,59 +1272,71 @@ def _financial_summary_context(request):
         payment_queryset = payment_queryset.filter(user_id=member_id)
     if status:
         payment_queryset = payment_queryset.filter(status=status)
-
-    payment_rows = list(payment_queryset.order_by('-transaction_at', '-created_at'))
-    rental_content_type = ContentType.objects.get_for_model(Rental)
-    membership_content_type = ContentType.objects.get_for_model(MembershipApplication)
-    rice_sale_content_type = ContentType.objects.get_for_model(RiceSale)
-
-    rental_map = {
-        rental.id: rental
-        for rental in Rental.objects.select_related('machine', 'user').annotate(
-            package_request_id=F('package_item__rental_package_id'),
-            package_request_name=F('package_item__rental_package__package_name'),
-            package_service_name=F('package_item__service_name'),
-        ).filter(
-            id__in=[
-                payment.object_id
-                for payment in payment_rows
-                if payment.content_type_id == rental_content_type.id
-            ]
-        )
-    }
-
-    transactions = []
-    for payment_record in payment_rows:
-        payment_type_display = payment_record.get_payment_type_display()
-        transaction_type_key = payment_record.payment_type
-        source_label = ''
-        source_detail = ''
-        availing_type_value = ''
-        availing_type_display = ''
-
-        if payment_record.content_type_id == rental_content_type.id:
-            rental = rental_map.get(payment_record.object_id)
-            if rental and getattr(rental, 'package_request_id', None):
-                payment_type_display = 'Package Rental'
-                transaction_type_key = 'package_rental'
-                source_label = rental.package_request_name or 'Package Availing'
-                source_detail = rental.package_service_name or rental.machine.name
-                availing_type_value = 'package'
-                availing_type_display = 'Package Availing'
-            else:
-                payment_type_display = 'Direct Rental'
-                transaction_type_key = 'direct_rental'
-                source_label = rental.machine.name if rental else 'Direct Rental'
-                source_detail = rental.machine.get_machine_type_display() if rental else ''
-                availing_type_value = 'direct'
-                availing_type_display = 'Direct Rental'
-        elif payment_record.content_type_id == rice_sale_content_type.id:
-            source_label = 'Rice Store Order'
-        elif payment_record.content_type_id == membership_content_type.id:
-            source_label = 'Membership Application'
-
-        transactions.append(
-            _transaction_row(
+    if payment_method:
+        payment_queryset = payment_queryset.filter(_payment_channel_query(payment_method))
+    # Rental payments are listed as package or direct rentals instead of
+    # their payment type, and only they carry an availing type.
+    package_rental_ids = Rental.objects.filter(package_item__isnull=False).values('pk')
+    package_rental = Q(content_type=rental_content_type, object_id__in=package_rental_ids)
+    direct_rental = Q(content_type=rental_content_type) & ~Q(object_id__in=package_rental_ids)
+    if transaction_type == 'package_rental':
+        payment_queryset = payment_queryset.filter(package_rental)
+    elif transaction_type == 'direct_rental':
+        payment_queryset = payment_queryset.filter(direct_rental)
+    elif transaction_type:
+        payment_queryset = payment_queryset.exclude(content_type=rental_content_type).filter(payment_type=transaction_type)
+    if availing_type == 'package':
+        payment_queryset = payment_queryset.filter(package_rental)
+    elif availing_type == 'direct':
+        payment_queryset = payment_queryset.filter(direct_rental)
+    elif availing_type:
+        payment_queryset = payment_queryset.none()
+
+    def payment_rows(payments):
+        rental_map = {
+            rental.id: rental
+            for rental in Rental.objects.select_related('machine', 'user').annotate(
+                package_request_id=F('package_item__rental_package_id'),
+                package_request_name=F('package_item__rental_package__package_name'),
+                package_service_name=F('package_item__service_name'),
+            ).filter(
+                id__in=[
+                    payment.object_id
+                    for payment in payments
+                    if payment.content_type_id == rental_content_type.id
+                ]
+            )
+        }
+        for payment_record in payments:
+            payment_type_display = payment_record.get_payment_type_display()
+            transaction_type_key = payment_record.payment_type
+            source_label = ''
+            source_detail = ''
+            availing_type_value = ''
+            availing_type_display = ''
+
+            if payment_record.content_type_id == rental_content_type.id:
+                rental = rental_map.get(payment_record.object_id)
+                if rental and getattr(rental, 'package_request_id', None):
+                    payment_type_display = 'Package Rental'
+                    transaction_type_key = 'package_rental'
+                    source_label = rental.package_request_name or 'Package Availing'
+                    source_detail = rental.package_service_name or rental.machine.name
+                    availing_type_value = 'package'
+                    availing_type_display = 'Package Availing'
+                else:
+                    payment_type_display = 'Direct Rental'
+                    transaction_type_key = 'direct_rental'
+                    source_label = rental.machine.name if rental else 'Direct Rental'
+                    source_detail = rental.machine.get_machine_type_display() if rental else ''
+                    availing_type_value = 'direct'
+                    availing_type_display = 'Direct Rental'
+            elif payment_record.content_type_id == rice_sale_content_type.id:
+                source_label = 'Rice Store Order'
+            elif payment_record.content_type_id == membership_content_type.id:
+                source_label = 'Membership Application'
+
+            yield _transaction_row(
                 user=payment_record.user,
                 created_at=getattr(payment_record, 'transaction_at', None) or payment_record.paid_at or payment_record.created_at,
                 internal_transaction_id=payment_record.internal_transaction_id or 'Pending',
@@ -1062,26 +1357,36 @@ def _financial_summary_context(request):
                 availing_type_display=availing_type_display,
                 counts_toward_revenue=payment_record.status in {'completed', 'refunded'},
             )
-        )
 
-    membership_payment_ids = set(
-        Payment.objects.filter(
+    legacy_membership_query = MembershipApplication.objects.select_related('user').filter(
+        payment_status='paid',
+    ).exclude(
+        pk__in=Payment.objects.filter(
             payment_type='membership',
             content_type=membership_content_type,
-        ).values_list('object_id', flat=True)
+        ).values('object_id')
     )
-    legacy_membership_query = MembershipApplication.objects.select_related('user').filter(
-        payment_status='paid',
-    ).exclude(pk__in=membership_payment_ids)
     if date_filters['start_value']:
         legacy_membership_query = legacy_membership_query.filter(payment_date__date__gte=date_filters['start_value'])
     if date_filters['end_value']:
         legacy_membership_query = legacy_membership_query.filter(payment_date__date__lte=date_filters['end_value'])
     if member_id:
         legacy_membership_query = legacy_membership_query.filter(user_id=member_id)
-    if transaction_type in {'', 'membership'} and status in {'', 'completed'} and payment_method in {'', 'over_counter', 'office_manual'}:
-        transactions.extend(
-            _transaction_row(
+    if payment_method == 'over_counter':
+        legacy_membership_query = legacy_membership_query.filter(payment_method='face_to_face')
+    elif payment_method == 'office_manual':
+        legacy_membership_query = legacy_membership_query.exclude(payment_method='face_to_face')
+    if (
+        transaction_type not in {'', 'membership'}
+        or status not in {'', 'completed'}
+        or payment_method not in {'', 'over_counter', 'office_manual'}
+        or availing_type
+    ):
+        legacy_membership_query = legacy_membership_query.none()
+
+    def membership_rows(applications):
+        for application in applications:
+            yield _transaction_row(
                 user=application.user,
                 created_at=_transaction_datetime(application.payment_date, application.submission_date),
                 internal_transaction_id=f'BUFIA-MEM-{application.pk:05d}',
@@ -1095,18 +1400,15 @@ def _financial_summary_context(request):
                 source_label='Legacy Membership Payment',
                 counts_toward_revenue=True,
             )
-            for application in legacy_membership_query
-        )
 
-    rice_sale_payment_ids = set(
-        Payment.objects.filter(
+    rice_sales_query = RiceSale.objects.select_related('buyer', 'processed_by').filter(
+        payment_status=RiceSale.PAYMENT_STATUS_PAID,
+    ).exclude(
+        pk__in=Payment.objects.filter(
             payment_type='rice_sale',
             content_type=rice_sale_content_type,
-        ).values_list('object_id', flat=True)
+        ).values('object_id')
     )
-    rice_sales_query = RiceSale.objects.select_related('buyer', 'processed_by').filter(
-        payment_status=RiceSale.PAYMENT_STATUS_PAID,
-    ).exclude(pk__in=rice_sale_payment_ids)
     if date_filters['start_value']:
         rice_sales_query = rice_sales_query.filter(paid_at__date__gte=date_filters['start_value'])
     if date_filters['end_value']:
@@ -1120,9 +1422,12 @@ def _financial_summary_context(request):
             rice_sales_query = rice_sales_query.filter(payment_method=RiceSale.PAYMENT_METHOD_OTC)
         else:
             rice_sales_query = rice_sales_query.none()
-    if transaction_type in {'', 'rice_sale'} and status in {'', 'completed'}:
-        transactions.extend(
-            _transaction_row(
+    if transaction_type not in {'', 'rice_sale'} or status not in {'', 'completed'} or availing_type:
+        rice_sales_query = rice_sales_query.none()
+
+    def rice_sale_rows(orders):
+        for order in orders:
+            yield _transaction_row(
                 user=order.buyer,
                 created_at=_transaction_datetime(order.paid_at, order.created_at.date()),
                 internal_transaction_id=order.reference_number or f'BUFIA-RICE-{order.pk:05d}',
@@ -1137,15 +1442,43 @@ def _financial_summary_context(request):
                 source_label='Rice Store Order',
                 counts_toward_revenue=True,
             )
-            for order in rice_sales_query
-        )
 
-    if payment_method:
-        transactions = [item for item in transactions if item.payment_method_key == payment_method]
-    if transaction_type:
-        transactions = [item for item in transactions if item.transaction_type_key == transaction_type]
-    if availing_type:
-        transactions = [item for item in transactions if item.availing_type == availing_type]
+    # Rows missing their primary date are listed under a fallback day, so
+    # they are read separately to keep every queryset in listing order.
+    return [
+        (payment_queryset.order_by('-transaction_at', '-created_at', '-pk'), payment_rows),
+        (legacy_membership_query.filter(payment_date__isnull=False).order_by('-payment_date', '-pk'), membership_rows),
+        (legacy_membership_query.filter(payment_date__isnull=True).order_by('-submission_date', '-pk'), membership_rows),
+        (rice_sales_query.filter(paid_at__isnull=False).order_by('-paid_at', '-pk'), rice_sale_rows),
+        (rice_sales_query.filter(paid_at__isnull=True).order_by('-created_at', '-pk'), rice_sale_rows),
+    ]
+
+
+def _iter_financial_transactions(sources):
+    """Merge ``_financial_transaction_sources`` newest first, reading each queryset in chunks."""
+    def read(queryset, to_rows):
+        for chunk in _iter_in_chunks(queryset):
+            yield from to_rows(chunk)
+
+    return heapq.merge(
+        *(read(queryset, to_rows) for queryset, to_rows in sources),
+        key=lambda item: (item.created_at, item.internal_transaction_id or ''),
+        reverse=True,
+    )
+
+
+def _financial_summary_context(request):
+    date_filters, filters = _financial_report_filters(request)
+    member_id = filters['member']
+    transaction_type = filters['transaction_type']
+    status = filters['status']
+    payment_method = filters['payment_method']
+    availing_type = filters['availing_type']
+    rental_content_type = ContentType.objects.get_for_model(Rental)
+    membership_content_type = ContentType.objects.get_for_model(MembershipApplication)
+    rice_sale_content_type = ContentType.objects.get_for_model(RiceSale)
+
+    transactions = list(_iter_financial_transactions(_financial_transaction_sources(date_filters, filters)))
 
     outstanding_query = Rental.objects.exclude(payment_type='in_kind').filter(
         payment_amount__isnull=False,
@@ -1170,9 +1503,17 @@ def _financial_summary_context(request):
         Sum('payment_amount')
     )['payment_amount__sum'] or 0
 
+    all_machines = list(Machine.objects.all())
+    machine_figures = _machine_usage_aggregates(all_machines, date_filters)
     profitability_snapshots = [
-        _machine_profitability_snapshot(machine, date_filters)
-        for machine in Machine.objects.all()
+        _machine_profitability_from_breakdowns(
+            machine,
+            date_filters,
+            revenue=machine_figures[machine.pk]['revenue'],
+            maintenance=machine_figures[machine.pk]['maintenance'],
+            diesel=machine_figures[machine.pk]['diesel'],
+        )
+        for machine in all_machines
     ]
     machine_revenue = sum((item['revenue']['total_revenue'] for item in profitability_snapshots), Decimal('0.00'))
     machine_acquisition_cost = sum((item['acquisition_amount'] for item in profitability_snapshots), Decimal('0.00'))
@@ -1299,11 +1640,6 @@ def _financial_summary_context(request):
         service_payment_queryset = service_payment_queryset.none()
     service_income = service_payment_queryset.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
 
-    transactions.sort(
-        key=lambda item: (item.created_at, item.internal_transaction_id or ''),
-        reverse=True,
-    )
-
     filtered_payment_ids = [item.payment_id for item in transactions if item.payment_id]
     refunds = Refund.objects.select_related('payment').filter(status='refunded')
     if filtered_payment_ids:
@@ -1352,31 +1688,7 @@ def _financial_summary_context(request):
         'transaction_type_options': FINANCIAL_TRANSACTION_TYPE_CHOICES,
         'payment_method_options': FINANCIAL_PAYMENT_METHOD_CHOICES,
         'status_options': FINANCIAL_STATUS_CHOICES,
-        'filters': {
-            'date_range': date_filters['date_range'],
-            'date_range_label': date_filters['date_range_label'],
-            'start_date': date_filters['start_date'],
-            'end_date': date_filters['end_date'],
-            'member': member_id,
-            'member_label': (
-                _user_display_label(User.objects.filter(pk=member_id).first()) if member_id else 'All Members'
-            ),
-            'transaction_type': transaction_type,
-            'transaction_type_label': dict(FINANCIAL_TRANSACTION_TYPE_CHOICES).get(
-                transaction_type, 'All Transaction Types'
-            ),
-            'status': status,
-            'status_label': dict(FINANCIAL_STATUS_CHOICES).get(status, 'All Statuses'),
-            'payment_method': payment_method,
-            'payment_method_label': dict(FINANCIAL_PAYMENT_METHOD_CHOICES).get(
-                payment_method, 'All Payment Methods'
-            ),
-            'availing_type': availing_type,
-            'availing_type_label': {
-                'package': 'Package Availing',
-                'direct': 'Direct Rental',
-            }.get(availing_type, 'All Availing Types'),
-        }
+        'filters': filters,
     }
 
 
@@ -1388,17 +1700,21 @@ def _machine_usage_report_context(request):
     if machine_id:
         machines = machines.filter(id=machine_id)
 
+    machines = list(machines)
+    machine_figures = _machine_usage_aggregates(machines, date_filters)
+
     usage_data = []
     for machine in machines:
-        rentals = Rental.objects.filter(machine=machine)
-        if date_filters['start_value']:
-            rentals = rentals.filter(start_date__gte=date_filters['start_value'])
-        if date_filters['end_value']:
-            rentals = rentals.filter(end_date__lte=date_filters['end_value'])
-
-        total_rentals = rentals.count()
-        total_days = sum(r.get_duration_days() for r in rentals)
-        profitability = _machine_profitability_snapshot(machine, date_filters)
+        figures = machine_figures[machine.pk]
+        total_rentals = figures['rental_count']
+        total_days = figures['total_days']
+        profitability = _machine_profitability_from_breakdowns(
+            machine,
+            date_filters,
+            revenue=figures['revenue'],
+            maintenance=figures['maintenance'],
+            diesel=figures['diesel'],
+        )
         revenue = profitability['revenue']['total_revenue']
         acquisition_amount = profitability['acquisition_amount']
         maintenance = profitability['maintenance']
@@ -1703,38 +2019,33 @@ def _cancel_rice_order(order, *, cancelled_at=None, processed_by=None):
     return order
 
 
-def _rice_inventory_snapshot():
-    bufia_milling = _bufia_harvest_milling_snapshot()
-    milled_total_kg = bufia_milling['total_milled_weight']
-    milled_total_sacks = (
-        Decimal(str(milled_total_kg)) / MILLED_RICE_KG_PER_SACK
-    ).quantize(Decimal('0.01'))
-    active_orders = RiceSale.objects.exclude(order_status=RiceSale.ORDER_STATUS_CANCELLED)
-    reserved_orders = active_orders.filter(
-        order_status__in=[RiceSale.ORDER_STATUS_RESERVED, RiceSale.ORDER_STATUS_READY]
-    )
-    claimed_orders = active_orders.filter(order_status=RiceSale.ORDER_STATUS_CLAIMED)
-    paid_orders = active_orders.filter(payment_status=RiceSale.PAYMENT_STATUS_PAID)
-    paid_claimed_orders = claimed_orders.filter(payment_status=RiceSale.PAYMENT_STATUS_PAID)
-    pending_otc_orders = active_orders.filter(
-        payment_method=RiceSale.PAYMENT_METHOD_OTC,
-        payment_status=RiceSale.PAYMENT_STATUS_PENDING,
+def _rice_inventory_snapshot(balance=None):
+    """Ledger totals plus one grouped query for the revenue figures."""
+    balance = balance or RiceInventoryBalance.get_solo()
+    milled_total_sacks = balance.milled_total_sacks
+    claimed_sacks = balance.sold_sacks
+    paid = Q(payment_status=RiceSale.PAYMENT_STATUS_PAID)
+    claimed = Q(order_status=RiceSale.ORDER_STATUS_CLAIMED)
+    pending_otc = Q(payment_method=RiceSale.PAYMENT_METHOD_OTC, payment_status=RiceSale.PAYMENT_STATUS_PENDING)
+    order_totals = RiceSale.objects.exclude(
+        order_status=RiceSale.ORDER_STATUS_CANCELLED,
+    ).order_by().aggregate(
+        claimed_orders_count=Count('pk', filter=claimed),
+        paid_sacks=Sum('sacks', filter=paid),
+        paid_sales_revenue=Sum('total_amount', filter=paid),
+        paid_orders_count=Count('pk', filter=paid),
+        claimed_sales_revenue=Sum('total_amount', filter=paid & claimed),
+        pending_otc_orders=Count('pk', filter=pending_otc),
+        pending_otc_amount=Sum('total_amount', filter=pending_otc),
     )
+    paid_sacks = order_totals['paid_sacks'] or Decimal('0.00')
+    paid_sales_revenue = order_totals['paid_sales_revenue'] or Decimal('0.00')
+    claimed_sales_revenue = order_totals['claimed_sales_revenue'] or Decimal('0.00')
+    pending_otc_amount = order_totals['pending_otc_amount'] or Decimal('0.00')
 
-    reserved_sacks = reserved_orders.aggregate(total=Sum('sacks'))['total'] or Decimal('0.00')
-    claimed_sacks = claimed_orders.aggregate(total=Sum('sacks'))['total'] or Decimal('0.00')
-    paid_sacks = paid_orders.aggregate(total=Sum('sacks'))['total'] or Decimal('0.00')
-    paid_sales_revenue = paid_orders.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
-    claimed_sales_revenue = paid_claimed_orders.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
-    pending_otc_amount = pending_otc_orders.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
-
-    available_sacks = max(
-        Decimal(str(milled_total_sacks)) - Decimal(str(reserved_sacks)) - Decimal(str(claimed_sacks)),
-        Decimal('0.00'),
-    )
     if milled_total_sacks > 0:
         milling_cost_per_sack = (
-            Decimal(str(bufia_milling['total_milling_cost'])) / Decimal(str(milled_total_sacks))
+            Decimal(str(balance.milling_cost)) / Decimal(str(milled_total_sacks))
         ).quantize(Decimal('0.01'))
     else:
         milling_cost_per_sack = Decimal('0.00')
@@ -1748,17 +2059,17 @@ def _rice_inventory_snapshot():
     )
 
     return {
-        'milled_total_kg': Decimal(str(milled_total_kg)).quantize(Decimal('0.01')),
-        'milled_total_sacks': Decimal(str(milled_total_sacks)).quantize(Decimal('0.01')),
-        'reserved_sacks': Decimal(str(reserved_sacks)).quantize(Decimal('0.01')),
+        'milled_total_kg': Decimal(str(balance.milled_kg)).quantize(Decimal('0.01')),
+        'milled_total_sacks': milled_total_sacks,
+        'reserved_sacks': Decimal(str(balance.reserved_sacks)).quantize(Decimal('0.01')),
         'sold_sacks': Decimal(str(claimed_sacks)).quantize(Decimal('0.01')),
-        'claimed_orders_count': claimed_orders.count(),
+        'claimed_orders_count': order_totals['claimed_orders_count'],
         'paid_sacks': Decimal(str(paid_sacks)).quantize(Decimal('0.01')),
         'sales_revenue': Decimal(str(paid_sales_revenue)).quantize(Decimal('0.01')),
-        'paid_orders_count': paid_orders.count(),
+        'paid_orders_count': order_totals['paid_orders_count'],
         'claimed_sales_revenue': Decimal(str(claimed_sales_revenue)).quantize(Decimal('0.01')),
-        'available_sacks': available_sacks.quantize(Decimal('0.01')),
-        'pending_otc_orders': pending_otc_orders.count(),
+        'available_sacks': balance.available_sacks.quantize(Decimal('0.01')),
+        'pending_otc_orders': order_totals['pending_otc_orders'],
         'pending_otc_amount': Decimal(str(pending_otc_amount)).quantize(Decimal('0.01')),
         'milling_cost_per_sack': milling_cost_per_sack,
         'cost_of_sold_rice': cost_of_sold_rice,
@@ -1767,73 +2078,31 @@ def _rice_inventory_snapshot():
     }
 
 
-def _rice_stock_movement_rows():
-    rows = []
-    for appointment in _bufia_harvest_milling_queryset().order_by('updated_at', 'created_at', 'pk'):
-        stock_in = (
-            Decimal(str(appointment.final_weight or '0.00')) / MILLED_RICE_KG_PER_SACK
-        ).quantize(Decimal('0.01'))
-        appointment_event_at = timezone.make_aware(
-            datetime.combine(appointment.appointment_date, datetime.min.time())
-        )
-        rows.append({
-            'date': appointment_event_at,
-            'type': 'stock_in',
-            'type_label': 'Stock In',
-            'source': f'{appointment.reference_number or appointment.get_transaction_id()} - Milling completed',
-            'stock_in': stock_in,
-            'stock_out': None,
-            'sort_key': (appointment_event_at, 0, appointment.pk),
-        })
+def _rice_stock_movement_queryset(date_filters):
+    """Ledger entries that occurred within ``date_filters``, newest first."""
+    return _apply_datetime_range(RiceInventoryEntry.objects.order_by('-pk'), 'occurred_at', date_filters)
 
-    orders = RiceSale.objects.select_related('buyer').order_by('created_at', 'pk')
-    for order in orders:
+
+def _rice_stock_movement_page(request, date_filters):
+    paginator = Paginator(_rice_stock_movement_queryset(date_filters), STOCK_MOVEMENT_PAGE_SIZE)
+    return paginator.get_page(request.GET.get('page'))
+
+
+def _rice_stock_movement_rows(entries):
+    rows = []
+    for entry in entries:
         rows.append({
-            'date': order.created_at,
-            'type': 'reserved',
-            'type_label': 'Reserved',
-            'source': f'{order.reference_number} - {order.buyer.get_full_name() or order.buyer.username}',
-            'stock_in': None,
-            'stock_out': None,
-            'sort_key': (order.created_at, 1, order.pk),
-            'reserved_change': Decimal(str(order.sacks)).quantize(Decimal('0.01')),
+            'date': entry.occurred_at,
+            'type': entry.entry_type,
+            'type_label': entry.get_entry_type_display(),
+            'source': entry.source_label,
+            'stock_in': entry.stock_change if entry.stock_change > 0 else None,
+            'stock_out': -entry.stock_change if entry.stock_change < 0 else None,
+            'reserved_change': entry.reserved_change,
+            'actual_balance': entry.actual_balance,
+            'reserved_balance': max(entry.reserved_balance, Decimal('0.00')),
+            'available_balance': max(entry.actual_balance - entry.reserved_balance, Decimal('0.00')),
         })
-        if order.order_status == RiceSale.ORDER_STATUS_CLAIMED and order.claimed_at:
-            rows.append({
-                'date': order.claimed_at,
-                'type': 'stock_out',
-                'type_label': 'Stock Out',
-                'source': f'{order.reference_number} - Claimed by {order.buyer.get_full_name() or order.buyer.username}',
-                'stock_in': None,
-                'stock_out': Decimal(str(order.sacks)).quantize(Decimal('0.01')),
-                'sort_key': (order.claimed_at, 3, order.pk),
-                'reserved_change': Decimal(str(order.sacks)).quantize(Decimal('0.01')) * Decimal('-1'),
-            })
-        elif order.order_status == RiceSale.ORDER_STATUS_CANCELLED and order.cancelled_at:
-            rows.append({
-                'date': order.cancelled_at,
-                'type': 'reservation_released',
-                'type_label': 'Reservation Released',
-                'source': f'{order.reference_number} - Reservation cancelled',
-                'stock_in': None,
-                'stock_out': None,
-                'sort_key': (order.cancelled_at, 2, order.pk),
-                'reserved_change': Decimal(str(order.sacks)).quantize(Decimal('0.01')) * Decimal('-1'),
-            })
-
-    rows.sort(key=lambda item: item['sort_key'])
-
-    actual_balance = Decimal('0.00')
-    reserved_balance = Decimal('0.00')
-    for row in rows:
-        if row['stock_in']:
-            actual_balance += row['stock_in']
-        if row['stock_out']:
-            actual_balance -= row['stock_out']
-        reserved_balance += row.get('reserved_change', Decimal('0.00'))
-        row['actual_balance'] = actual_balance.quantize(Decimal('0.01'))
-        row['reserved_balance'] = max(reserved_balance, Decimal('0.00')).quantize(Decimal('0.01'))
-        row['available_balance'] = max(actual_balance - reserved_balance, Decimal('0.00')).quantize(Decimal('0.01'))
     return rows
 
 
@@ -2028,13 +2297,15 @@ def rice_sales_pricing(request):
 @user_passes_test(is_admin)
 def rice_sales_stock_movement(request):
     _expire_overdue_rice_orders(processed_by=request.user)
-    context = _rice_sales_stock_movement_context()
+    # The printout lists every movement in the date range rather than one page
+    is_print = request.GET.get('print') == '1'
+    context = _rice_sales_stock_movement_context(request, paginate=not is_print)
     
     # Add current date for print template
     context['current_date'] = timezone.now()
     
     # Check if this is a print request
-    if request.GET.get('print') == '1':
+    if is_print:
         return render(request, 'reports/rice_sales_stock_movement_print.html', context)
     
     return render(request, 'reports/rice_sales_stock_movement.html', context)
@@ -2096,7 +2367,8 @@ def rice_store(request):
             rice_type = purchase_form.cleaned_data.get('rice_type', '')
             payment_method = purchase_form.cleaned_data.get('payment_method') or RiceSale.PAYMENT_METHOD_OTC
             with transaction.atomic():
-                inventory = _rice_inventory_snapshot()
+                # Holding the balance row serializes reservations against the same stock.
+                inventory = _rice_inventory_snapshot(RiceInventoryBalance.get_solo(lock=True))
                 if sacks > inventory['available_sacks']:
                     purchase_form.add_error('sacks', f'Only {inventory["available_sacks"]:.2f} sacks are available right now.')
                 else:
@@ -2337,7 +2609,7 @@ def membership_proof_detail(request, pk):
 @user_passes_test(is_admin)
 def export_rental_report(request):
     """Export rental report to CSV."""
-    rentals = _rental_report_context(request)['rentals']
+    rentals = _rental_report_queryset(request)[0]
 
     response = HttpResponse(content_type='text/csv')
     response['Content-Disposition'] = f'attachment; filename="rental_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
@@ -2349,7 +2621,7 @@ def export_rental_report(request):
         'Payment Type', 'Payment Status', 'Refund Status', 'Rental Status',
     ])
 
-    for rental in rentals.order_by('-created_at'):
+    for rental in _iter_rental_report_rentals(rentals):
         writer.writerow([
             rental.transaction_id or f'RENTAL-{rental.id:05d}',
             rental.customer_display_name,
@@ -2373,13 +2645,12 @@ def export_rental_report(request):
 @login_required
 @user_passes_test(is_admin)
 def export_rental_report_excel(request):
-    context = _rental_report_context(request)
-    filters = context['filters']
+    rentals, filters, _, _ = _rental_report_queryset(request)
     headers = [
         'Transaction ID', 'Member', 'Machine', 'Start Date', 'End Date',
         'Duration (Days)', 'Availing Type', 'Package Request', 'Area (Ha)', 'Amount', 'Payment Type', 'Payment Status', 'Refund Status', 'Rental Status',
     ]
-    rows = [
+    rows = (
         [
             rental.transaction_id or f'RENTAL-{rental.id:05d}',
             rental.customer_display_name,
@@ -2396,8 +2667,8 @@ def export_rental_report_excel(request):
             rental.report_refund_status_label or 'Not Refunded',
             rental.status,
         ]
-        for rental in context['rentals']
-    ]
+        for rental in _iter_rental_report_rentals(rentals)
+    )
     filter_details = [
         ('Date Range', filters['date_range_label']),
         ('Machine', filters['machine_label']),
@@ -2413,6 +2684,7 @@ def export_rental_report_excel(request):
         rows=rows,
         column_widths=[18, 24, 18, 13, 13, 12, 16, 22, 11, 14, 18, 16, 16, 14],
         sheet_name='Rental Report',
+        total_results=rentals.count(),
     )
 
 
@@ -2498,12 +2770,12 @@ def export_harvest_report(request):
 @login_required
 @user_passes_test(is_admin)
 def export_harvest_report_excel(request):
-    context = _harvest_report_context(request)
+    rentals, filters, _ = _harvest_report_queryset(request)
     headers = [
         'Transaction ID', 'Member', 'Machine', 'Harvest Date',
         'Total Harvest', 'BUFIA Share', 'Member Share', 'Delivered', 'Outstanding',
     ]
-    rows = [
+    rows = (
         [
             item['transaction_id'],
             item['rental'].customer_display_name,
@@ -2515,16 +2787,17 @@ def export_harvest_report_excel(request):
             f"{item['collected'] or 0:.2f}",
             f"{item['outstanding'] or 0:.2f}",
         ]
-        for item in context['harvest_data']
-    ]
+        for item in map(_harvest_row, rentals.iterator(chunk_size=EXPORT_ITERATOR_CHUNK_SIZE))
+    )
     return _xlsx_response(
         prefix='harvest_report',
         title='Harvest Share Filtered Report',
-        filter_details=[('Date Range', context['filters']['date_range_label'])],
+        filter_details=[('Date Range', filters['date_range_label'])],
         headers=headers,
         rows=rows,
         column_widths=[18, 22, 18, 14, 14, 14, 14, 14, 14],
         sheet_name='Harvest Report',
+        total_results=rentals.count(),
     )
 
 
@@ -2564,18 +2837,18 @@ def export_harvest_report_pdf(request):
 @login_required
 @user_passes_test(is_admin)
 def export_rice_sales_report_excel(request):
-    context = _rice_sales_report_context(request)
-    filters = context['filters']
+    _expire_overdue_rice_orders()
+    orders, filters, _ = _rice_sales_report_queryset(request)
     headers = [
         'Reference', 'Buyer', 'Created', 'Pickup Date', 'Sacks',
         'Payment Method', 'Payment Status', 'Order Status', 'Total Amount', 'Paid At',
     ]
-    rows = [
+    rows = (
         [
             order.reference_number,
             _user_display_label(order.buyer),
             timezone.localtime(order.created_at).strftime('%Y-%m-%d %H:%M') if order.created_at else '',
-            order.effective_pickup_date.strftime('%Y-%m-%d') if order.effective_pickup_date else '',
+            _effective_pickup_date(order).strftime('%Y-%m-%d'),
             f"{order.sacks or 0:.2f}",
             order.get_payment_method_display(),
             order.get_payment_status_display(),
@@ -2583,8 +2856,8 @@ def export_rice_sales_report_excel(request):
             f"{order.total_amount or 0:.2f}",
             timezone.localtime(order.paid_at).strftime('%Y-%m-%d %H:%M') if order.paid_at else '',
         ]
-        for order in context['sales_transactions']
-    ]
+        for order in orders.iterator(chunk_size=EXPORT_ITERATOR_CHUNK_SIZE)
+    )
     filter_details = [
         ('Date Range', filters['date_range_label']),
         ('Member', filters['member_label']),
@@ -2600,6 +2873,7 @@ def export_rice_sales_report_excel(request):
         rows=rows,
         column_widths=[18, 22, 18, 14, 10, 16, 16, 16, 14, 18],
         sheet_name='Rice Sales',
+        total_results=orders.count(),
     )
 
 
@@ -2681,9 +2955,10 @@ def export_financial_report(request):
 @login_required
 @user_passes_test(is_admin)
 def export_financial_report_excel(request):
-    context = _financial_summary_context(request)
+    date_filters, filters = _financial_report_filters(request)
+    sources = _financial_transaction_sources(date_filters, filters)
     headers = ['Date', 'Transaction ID', 'Member', 'Payment Type', 'Source', 'Amount Due', 'Refunded', 'Net Amount', 'Payment Method', 'Processed By', 'Status']
-    rows = [
+    rows = (
         [
             payment.created_at.strftime('%Y-%m-%d'),
             payment.internal_transaction_id or 'N/A',
@@ -2697,23 +2972,24 @@ def export_financial_report_excel(request):
             _user_display_label(payment.processed_by) if payment.processed_by_id else 'N/A',
             payment.status_display,
         ]
-        for payment in context['payments']
-    ]
+        for payment in _iter_financial_transactions(sources)
+    )
     return _xlsx_response(
         prefix='financial_report',
         title='Financial Summary Filtered Report',
         filter_details=[
-            ('Date Range', context['filters']['date_range_label']),
-            ('Member', context['filters']['member_label']),
-            ('Transaction Type', context['filters']['transaction_type_label']),
-            ('Status', context['filters']['status_label']),
-            ('Payment Method', context['filters']['payment_method_label']),
-            ('Availing Type', context['filters']['availing_type_label']),
+            ('Date Range', filters['date_range_label']),
+            ('Member', filters['member_label']),
+            ('Transaction Type', filters['transaction_type_label']),
+            ('Status', filters['status_label']),
+            ('Payment Method', filters['payment_method_label']),
+            ('Availing Type', filters['availing_type_label']),
         ],
         headers=headers,
         rows=rows,
         column_widths=[14, 20, 20, 16, 18, 12, 12, 12, 16, 18, 12],
         sheet_name='Financial Report',
+        total_results=sum(queryset.count() for queryset, _ in sources),
     )
 
 
@@ -2761,7 +3037,7 @@ def export_financial_report_pdf(request):
 def export_machine_usage_report_excel(request):
     context = _machine_usage_report_context(request)
     headers = ['Machine', 'Type', 'Brand', 'Model', 'Year', 'Acquired', 'Acquisition Cost', 'Diesel Liters', 'Diesel Cost', 'Maintenance Cost', 'Operating Cost', 'Recovery Remaining', 'Rental Count', 'Rental Days', 'Revenue', 'Clean Profit', 'ROI %', 'Maintenance Records', 'Utilization %']
-    rows = [
+    rows = (
         [
             item['machine'].name,
             item['machine'].get_machine_type_display() if hasattr(item['machine'], 'get_machine_type_display') else item['machine'].machine_type,
@@ -2784,7 +3060,7 @@ def export_machine_usage_report_excel(request):
             f'{item["utilization_rate"]:.2f}%',
         ]
         for item in context['usage_data']
-    ]
+    )
     filter_details = [
         ('Date Range', context['filters']['date_range_label']),
         ('Machine', context['filters']['machine_label']),
@@ -2797,6 +3073,7 @@ def export_machine_usage_report_excel(request):
         rows=rows,
         column_widths=[22, 16, 14, 16, 9, 12, 14, 12, 14, 14, 14, 14, 10, 10, 12, 12, 9, 14, 10],
         sheet_name='Machine Usage',
+        total_results=len(context['usage_data']),
     )
 
 
@@ -2849,7 +3126,7 @@ def export_machine_usage_report_pdf(request):
 def export_membership_report_excel(request):
     context = _membership_report_context(request)
     headers = ['Member', 'Username', 'Email', 'Phone', 'Sector', 'Submitted', 'Approved', 'Status', 'Role']
-    rows = [
+    rows = (
         [
             _user_display_label(member),
             member.username,
@@ -2865,8 +3142,8 @@ def export_membership_report_excel(request):
             _membership_status_label(member),
             'Admin' if member.is_superuser else member.get_role_display(),
         ]
-        for member in context['members']
-    ]
+        for member in context['members'].iterator(chunk_size=EXPORT_ITERATOR_CHUNK_SIZE)
+    )
     filter_details = [
         ('Date Range', context['filters']['date_range_label']),
         ('Member Status', context['filters']['filter_type_label']),
@@ -2879,6 +3156,7 @@ def export_membership_report_excel(request):
         rows=rows,
         column_widths=[22, 16, 26, 16, 18, 14, 14, 14, 14],
         sheet_name='Membership',
+        total_results=context['members'].count(),
     )
 
 
@@ -2920,6 +3198,59 @@ def export_membership_report_pdf(request):
     )
 
 
+@login_required
+@user_passes_test(is_admin)
+def request_report_export(request, export_key):
+    if export_key not in EXPORTS:
+        raise Http404('Unknown export.')
+    if not user_can_export(export_key, request.user):
+        raise PermissionDenied
+    job, _ = request_export(export_key, request.GET.urlencode(), request.user)
+    job = render_in_request(job, request.user)
+    if job.is_ready:
+        return redirect('reports:download_report_export', pk=job.pk)
+    messages.info(
+        request,
+        f"{EXPORTS[export_key]['label']} is being prepared. You will be notified when it is ready to download.",
+    )
+    return redirect('reports:report_export_job_status', pk=job.pk)
+
+
+@login_required
+@user_passes_test(is_admin)
+def report_export_job_status(request, pk):
+    job = get_object_or_404(ReportExportJob, pk=pk)
+    if not user_can_export(job.export_key, request.user):
+        raise PermissionDenied
+    payload = {
+        'id': job.pk,
+        'status': job.status,
+        'label': EXPORTS.get(job.export_key, {}).get('label', job.export_key),
+        'download_url': reverse('reports:download_report_export', args=[job.pk]) if job.is_ready else None,
+        'error': job.last_error if job.status == ReportExportJob.STATUS_FAILED else '',
+    }
+    if request.GET.get('format') == 'json':
+        return JsonResponse(payload)
+    return render(request, 'reports/export_job_status.html', {'job': job, 'export': payload})
+
+
+@login_required
+@user_passes_test(is_admin)
+def download_report_export(request, pk):
+    job = get_object_or_404(ReportExportJob, pk=pk)
+    if not user_can_export(job.export_key, request.user):
+        raise PermissionDenied
+    if not job.is_ready or not job.artifact_exists():
+        messages.warning(request, 'This export is not available for download yet.')
+        return redirect('reports:report_export_job_status', pk=job.pk)
+    return FileResponse(
+        job.artifact.open('rb'),
+        as_attachment=True,
+        filename=job.filename,
+        content_type=job.content_type or None,
+    )
+
+
 @login_required
 @user_passes_test(is_admin)
 def sector_member_list_report(request, pk):
@@ -6,7 +6,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.test import Client, TestCase
 from django.urls import reverse
 
-from bufia.models import Payment
+from bufia.models import Payment, Refund
 from machines.models import Machine, Rental, RentalPackage, RentalPackageItem
 
 
@@ -271,6 +271,44 @@ class AdminRentalDashboardStageTests(TestCase):
         self.assertContains(review_response, 'Refund Management')
         self.assertContains(review_response, 'Process Refund')
 
+    def test_dashboard_counters_match_per_tab_querysets(self):
+        rental_content_type = ContentType.objects.get_for_model(Rental)
+        for offset, status in enumerate(['pending', 'pending', 'approved', 'completed', 'cancelled', 'cancelled']):
+            day = date.today() + timedelta(days=10 + offset)
+            Rental.objects.create(
+                user=self.member_a,
+                machine=self.machine,
+                start_date=day,
+                end_date=day,
+                status=status,
+                workflow_state={'pending': 'requested'}.get(status, status),
+                payment_type='cash',
+                payment_amount=Decimal('5400.00'),
+            )
+        refundable, fully_refunded = Rental.objects.filter(status='cancelled').order_by('id')
+        for rental in (refundable, fully_refunded):
+            payment = Payment.objects.create(
+                user=self.member_a,
+                payment_type='rental',
+                amount=Decimal('5400.00'),
+                currency='PHP',
+                status='completed',
+                content_type=rental_content_type,
+                object_id=rental.id,
+            )
+        Refund.objects.create(payment=payment, amount=Decimal('5400.00'), method='cash')
+
+        response = self.client.get(reverse('machines:admin_rental_dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.context['tab_counts'],
+            {'pending': 2, 'approved': 1, 'in_progress': 0, 'completed': 3},
+        )
+        self.assertEqual(response.context['refund_queue_count'], 1)
+        self.assertEqual(response.context['overdue_rentals_count'], 0)
+        self.assertEqual(response.context['in_kind_verification_count'], 0)
+
     def test_overdue_report_lists_affected_approved_rentals_and_allows_reschedule(self):
         overdue_rental = Rental.objects.create(
             user=self.member_a,
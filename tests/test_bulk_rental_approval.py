@@ -0,0 +1,144 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from bufia.models import Payment
+from machines.models import Machine, Rental
+from notifications.models import OutboxEvent, UserNotification
+from users.models import ActivityLog
+
+
+User = get_user_model()
+
+
+class BulkRentalApprovalTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='bulk-admin',
+            email='bulk-admin@example.com',
+            password='secret',
+            is_staff=True,
+        )
+        self.members = [
+            User.objects.create_user(
+                username=f'bulk-member-{index}',
+                email=f'bulk-member-{index}@example.com',
+                password='secret',
+            )
+            for index in range(5)
+        ]
+        self.machine = Machine.objects.create(
+            name='Bulk Tractor',
+            machine_type='tractor',
+            status='available',
+            rental_fee_per_day=100,
+            current_price='100/day',
+        )
+        self.today = timezone.localdate()
+
+    def _create_rental(self, member, offset, **overrides):
+        day = self.today + timedelta(days=offset)
+        values = {
+            'machine': self.machine,
+            'user': member,
+            'start_date': day,
+            'end_date': day,
+            'status': 'pending',
+            'workflow_state': 'requested',
+            'payment_type': 'cash',
+        }
+        values.update(overrides)
+        return Rental.objects.create(**values)
+
+    def _bulk_approve(self, rentals):
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse('machines:bulk_approve_rentals'),
+                {'rental_ids': [str(rental.pk) for rental in rentals]},
+            )
+
+    def test_earlier_request_wins_mutual_conflicts_and_blocked_rows_are_skipped(self):
+        first = self._create_rental(self.members[0], 5)
+        later_overlap = self._create_rental(self.members[1], 5)
+        separate = self._create_rental(self.members[2], 9)
+        blocked = self._create_rental(self.members[3], 14)
+        approved = self._create_rental(self.members[4], 12, status='approved', workflow_state='approved')
+        Rental.objects.filter(pk=blocked.pk).update(start_date=approved.start_date, end_date=approved.end_date)
+
+        with patch.object(Rental, 'save', side_effect=AssertionError('bulk approval must not save per row')):
+            response = self._bulk_approve([separate, later_overlap, blocked, first, approved])
+
+        self.assertRedirects(response, reverse('machines:admin_rental_dashboard'), fetch_redirect_response=False)
+        statuses = dict(Rental.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[first.pk], 'approved')
+        self.assertEqual(statuses[separate.pk], 'approved')
+        self.assertEqual(statuses[later_overlap.pk], 'cancelled')
+        self.assertEqual(statuses[blocked.pk], 'pending')
+
+        later_overlap.refresh_from_db()
+        self.assertEqual(later_overlap.cancellation_type, 'auto_conflict')
+        self.assertIn(f'approved rental #{first.pk}', later_overlap.system_note)
+        self.assertEqual(later_overlap.state_changed_by, self.admin)
+
+        content_type = ContentType.objects.get_for_model(Rental)
+        self.assertCountEqual(
+            Payment.objects.filter(content_type=content_type, status='pending').values_list('object_id', flat=True),
+            [first.pk, separate.pk],
+        )
+
+    def test_side_effects_are_emitted_once_after_commit(self):
+        first = self._create_rental(self.members[0], 3)
+        loser = self._create_rental(self.members[1], 3)
+
+        self._bulk_approve([first, loser])
+
+        self.assertCountEqual(
+            UserNotification.objects.filter(user=self.members[0], notification_type__startswith='rental_').exclude(
+                notification_type='rental_submitted',
+            ).values_list('notification_type', flat=True),
+            ['rental_approved', 'rental_approved'],
+        )
+        self.assertCountEqual(
+            UserNotification.objects.filter(user=self.members[1], notification_type__startswith='rental_').exclude(
+                notification_type='rental_submitted',
+            ).values_list('notification_type', flat=True),
+            ['rental_conflict', 'rental_cancelled'],
+        )
+        self.assertTrue(
+            UserNotification.objects.filter(notification_type='rental_approved').exclude(title='').exists()
+        )
+        self.assertCountEqual(
+            ActivityLog.objects.filter(
+                related_model='machines.Rental',
+                related_object_id__in=[str(first.pk), str(loser.pk)],
+            ).exclude(activity_type='submit').values_list('activity_type', flat=True),
+            ['approve', 'other'],
+        )
+
+    def test_notifications_wait_for_commit(self):
+        rental = self._create_rental(self.members[0], 4)
+        self.client.force_login(self.admin)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(reverse('machines:bulk_approve_rentals'), {'rental_ids': [str(rental.pk)]})
+
+        self.assertEqual(len(callbacks), 2)
+        self.assertFalse(UserNotification.objects.filter(notification_type='rental_approved').exists())
+        event = OutboxEvent.objects.get(event_type='rental_bulk_status')
+        self.assertEqual(event.status, OutboxEvent.STATUS_PENDING)
+        self.assertEqual(
+            {item['notification_type'] for item in event.payload['notifications']},
+            {'rental_approved'},
+        )
+
+        for callback in callbacks:
+            callback()
+        self.assertTrue(UserNotification.objects.filter(notification_type='rental_approved').exists())
+        event.refresh_from_db()
+        self.assertEqual(event.status, OutboxEvent.STATUS_DISPATCHED)
@@ -0,0 +1,130 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from machines.models import DryerCapacityDay, DryerRental, Machine
+
+
+User = get_user_model()
+
+
+class DryerCapacityLedgerTests(TestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(
+            username='ledger-member',
+            email='ledger-member@example.com',
+            password='secret',
+        )
+        self.dryer = Machine.objects.create(
+            name='Ledger Flatbed',
+            machine_type='flatbed_dryer',
+            dryer_pricing_type='until_dried',
+            status='available',
+            rental_fee_per_day=0,
+            current_price='Until Dried',
+            flatbed_max_sack_capacity=Decimal('100.00'),
+        )
+        self.today = timezone.localdate()
+
+    def _create_booking(self, offset, days=1, quantity='30 sacks', status='approved'):
+        rental_date = self.today + timedelta(days=offset)
+        return DryerRental.objects.create(
+            machine=self.dryer,
+            user=self.member,
+            rental_type='until_dried',
+            rental_date=rental_date,
+            estimated_end_date=rental_date + timedelta(days=days - 1),
+            goods_description='Palay',
+            quantity=quantity,
+            status=status,
+        )
+
+    def _ledger(self):
+        return {
+            row.day: (row.used_sacks, row.rental_count)
+            for row in DryerCapacityDay.objects.filter(machine=self.dryer)
+            if row.rental_count
+        }
+
+    def test_ledger_follows_create_update_cancel_and_delete(self):
+        first = self._create_booking(2, days=3)
+        second = self._create_booking(3, quantity='20 sacks')
+        self._create_booking(3, quantity='50 sacks', status='pending')
+        day = self.today + timedelta(days=2)
+
+        self.assertEqual(self._ledger(), {
+            day: (Decimal('30.00'), 1),
+            day + timedelta(days=1): (Decimal('50.00'), 2),
+            day + timedelta(days=2): (Decimal('30.00'), 1),
+        })
+
+        first.estimated_end_date = day
+        first.save()
+        second.status = 'cancelled'
+        second.save(update_fields=['status'])
+        self.assertEqual(self._ledger(), {day: (Decimal('30.00'), 1)})
+
+        first.delete()
+        self.assertEqual(self._ledger(), {})
+
+    def test_saving_a_stale_instance_keeps_the_ledger_in_step(self):
+        booking = self._create_booking(2)
+        stale = DryerRental.objects.get(pk=booking.pk)
+        day = self.today + timedelta(days=2)
+
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertEqual(self._ledger(), {})
+
+        # The stale copy still says approved; saving it books the sacks again.
+        stale.save()
+        self.assertEqual(self._ledger(), {day: (Decimal('30.00'), 1)})
+
+        booking.delete()
+        self.assertEqual(self._ledger(), {})
+
+    def test_range_reads_match_per_day_recomputation(self):
+        self._create_booking(1, days=4, quantity='40 sacks')
+        excluded = self._create_booking(2, days=2, quantity='35 sacks')
+        self._create_booking(4, quantity='70 sacks')
+        window_end = self.today + timedelta(days=6)
+
+        with self.assertNumQueries(2):
+            available = DryerRental.available_dryer_capacity_by_day(
+                self.dryer,
+                self.today,
+                window_end,
+                exclude_pk=excluded.pk,
+            )
+
+        for target_date, sacks in available.items():
+            expected_used = sum(
+                rental.quantity_in_sacks
+                for rental in DryerRental.capacity_rentals_for_date(self.dryer, target_date, exclude_pk=excluded.pk)
+            )
+            self.assertEqual(sacks, max(Decimal('100.00') - expected_used, Decimal('0.00')))
+        self.assertEqual(
+            DryerRental.first_capacity_shortfall(self.dryer, Decimal('40.00'), self.today, window_end),
+            (self.today + timedelta(days=2), Decimal('25.00')),
+        )
+        self.assertEqual(
+            DryerRental.first_dryer_date_with_capacity(self.dryer, Decimal('65.00'), self.today + timedelta(days=1)),
+            self.today + timedelta(days=5),
+        )
+
+    def test_rebuild_repairs_rows_written_outside_signals(self):
+        booking = self._create_booking(1, days=2)
+        DryerRental.objects.filter(pk=booking.pk).update(quantity='45 sacks')
+        DryerCapacityDay.objects.create(machine=self.dryer, day=self.today, used_sacks=Decimal('9.00'), rental_count=1)
+
+        call_command('rebuild_dryer_capacity', machine_ids=[self.dryer.pk], stdout=StringIO())
+
+        self.assertEqual(self._ledger(), {
+            self.today + timedelta(days=1): (Decimal('45.00'), 1),
+            self.today + timedelta(days=2): (Decimal('45.00'), 1),
+        })
@@ -0,0 +1,218 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from machines.models import Machine, MachineCalendarSnapshot, Maintenance, Rental
+from machines.utils import AvailabilityChecker
+from machines.views_optimized import get_blocked_dates
+
+
+User = get_user_model()
+
+
+class MachineCalendarSnapshotTests(TestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(
+            username='calendar-member',
+            email='calendar-member@example.com',
+            password='secret',
+        )
+        self.other_member = User.objects.create_user(
+            username='calendar-other',
+            email='calendar-other@example.com',
+            password='secret',
+        )
+        self.machine = Machine.objects.create(
+            name='Snapshot Tractor',
+            machine_type='tractor',
+            status='available',
+            rental_fee_per_day=100,
+            current_price='100/day',
+        )
+        self.today = timezone.localdate()
+
+    def _create_rental(self, offset, **overrides):
+        day = self.today + timedelta(days=offset)
+        values = {
+            'machine': self.machine,
+            'user': self.member,
+            'start_date': day,
+            'end_date': day,
+            'status': 'approved',
+            'workflow_state': 'approved',
+            'payment_type': 'cash',
+        }
+        values.update(overrides)
+        return Rental.objects.create(**values)
+
+    def _calendar_url(self):
+        return reverse('machines:machine_calendar_events', args=[self.machine.pk])
+
+    def test_snapshot_is_reused_until_invalidated(self):
+        self._create_rental(3)
+        MachineCalendarSnapshot.for_machine(self.machine)
+
+        with self.assertNumQueries(1):
+            snapshot = MachineCalendarSnapshot.for_machine(self.machine)
+        self.assertEqual([period['kind'] for period in snapshot.periods], ['rental'])
+
+        self._create_rental(5, status='pending', workflow_state='requested')
+        snapshot = MachineCalendarSnapshot.for_machine(self.machine)
+        self.assertEqual(len(snapshot.periods), 2)
+        self.assertEqual(snapshot.built_version, snapshot.version)
+
+    def test_settling_in_kind_rental_invalidates_snapshot(self):
+        rental = self._create_rental(3)
+        # Rentals take their payment type from the machine on creation.
+        Rental.objects.filter(pk=rental.pk).update(payment_type='in_kind')
+        rental.refresh_from_db()
+        snapshot = MachineCalendarSnapshot.for_machine(self.machine)
+        self.assertTrue(snapshot.periods[0]['blocking'])
+
+        rental.settlement_status = 'paid'
+        rental.save(update_fields=['settlement_status'])
+
+        refreshed = MachineCalendarSnapshot.for_machine(self.machine)
+        self.assertGreater(refreshed.version, snapshot.version)
+        self.assertFalse(any(period['blocking'] for period in refreshed.periods))
+
+    def test_snapshot_keeps_only_the_recent_window(self):
+        lookback = MachineCalendarSnapshot.LOOKBACK_DAYS
+        old = self._create_rental(-lookback - 10, status='rejected', workflow_state='requested')
+        overdue = self._create_rental(-lookback - 5)
+        finished = self._create_rental(2, workflow_state='completed')
+        upcoming = self._create_rental(4)
+
+        snapshot = MachineCalendarSnapshot.for_machine(self.machine)
+        self.assertEqual([period['id'] for period in snapshot.periods], [overdue.id, upcoming.id])
+        self.assertEqual(snapshot.periods[0]['effective_end'], self.today.isoformat())
+        self.assertNotIn(finished.id, [period['id'] for period in snapshot.periods])
+
+        history_start = self.today - timedelta(days=lookback + 20)
+        history = snapshot.overlapping(history_start, history_start + timedelta(days=15), statuses={'rejected'})
+        self.assertEqual([period['id'] for period in history], [old.id])
+
+    def test_maintenance_changes_invalidate_snapshot(self):
+        snapshot = MachineCalendarSnapshot.for_machine(self.machine)
+        start = timezone.now() + timedelta(days=4)
+        maintenance = Maintenance.objects.create(
+            machine=self.machine,
+            description='Blade swap',
+            start_date=start,
+            end_date=start + timedelta(days=1),
+        )
+
+        refreshed = MachineCalendarSnapshot.for_machine(self.machine)
+        self.assertGreater(refreshed.version, snapshot.version)
+        self.assertEqual([period['id'] for period in refreshed.periods], [maintenance.id])
+
+        maintenance.delete()
+        self.assertEqual(MachineCalendarSnapshot.for_machine(self.machine).periods, [])
+
+    def test_calendar_feed_answers_304_until_schedule_changes(self):
+        self._create_rental(2)
+        self.client.force_login(self.member)
+
+        first = self.client.get(self._calendar_url())
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+        self.assertIn('no-cache', first['Cache-Control'])
+
+        cached = self.client.get(self._calendar_url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+
+        self._create_rental(6, status='pending', workflow_state='requested')
+        changed = self.client.get(self._calendar_url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+        self.assertEqual(len(changed.json()), 2)
+
+    def test_private_events_are_scoped_per_viewer(self):
+        self._create_rental(4, status='rejected', workflow_state='requested')
+
+        self.client.force_login(self.member)
+        owner_response = self.client.get(self._calendar_url())
+        self.client.force_login(self.other_member)
+        other_response = self.client.get(self._calendar_url(), HTTP_IF_NONE_MATCH=owner_response['ETag'])
+
+        self.assertEqual([event['title'] for event in owner_response.json()], ['Rejected Request'])
+        self.assertEqual(other_response.status_code, 200)
+        self.assertEqual(other_response.json(), [])
+
+    def test_all_machines_feed_supports_etag(self):
+        self._create_rental(1)
+        self.client.force_login(self.member)
+        url = reverse('machines:all_machines_calendar_events')
+
+        first = self.client.get(url)
+        self.assertEqual([event['extendedProps']['machineName'] for event in first.json()], [self.machine.name])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        Machine.objects.filter(pk=self.machine.pk).update(name='Renamed Tractor')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+    def test_history_is_rebuilt_once_per_feed_request(self):
+        lookback = MachineCalendarSnapshot.LOOKBACK_DAYS
+        old = self._create_rental(-lookback - 10)
+        history_start = self.today - timedelta(days=lookback + 20)
+        self.client.force_login(self.member)
+        params = {
+            'start': history_start.isoformat(),
+            'end': (history_start + timedelta(days=30)).isoformat(),
+        }
+
+        def history_queries(url):
+            self.client.get(url, params)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, params)
+            self.assertIn(f'rental-{old.id}', [event['id'] for event in response.json()])
+            return sum('"machines_rental"' in query['sql'] for query in queries.captured_queries)
+
+        all_url = reverse('machines:all_machines_calendar_events')
+        self.assertEqual(history_queries(self._calendar_url()), 1)
+        single_machine = history_queries(all_url)
+        for index in range(3):
+            Machine.objects.create(
+                name=f'Snapshot Harvester {index}',
+                machine_type='harvester',
+                status='available',
+                rental_fee_per_day=100,
+                current_price='100/day',
+            )
+        self.assertEqual(history_queries(all_url), single_machine)
+
+    def test_check_date_availability_reads_snapshot(self):
+        pending = self._create_rental(8, status='pending', workflow_state='requested')
+        approved = self._create_rental(9)
+        self.client.force_login(self.other_member)
+        url = reverse('machines:check_date_availability')
+
+        def check(offset, **extra):
+            day = (self.today + timedelta(days=offset)).isoformat()
+            payload = {'machine_id': self.machine.pk, 'start_date': day, 'end_date': day}
+            payload.update(extra)
+            return self.client.post(url, data=json.dumps(payload), content_type='application/json').json()
+
+        self.assertFalse(check(9)['available'])
+        self.assertTrue(check(9, exclude_rental_id=approved.id)['available'])
+        pending_payload = check(8)
+        self.assertTrue(pending_payload['available'])
+        self.assertEqual(pending_payload['pending_conflict_count'], 1)
+        self.assertEqual(check(8, exclude_rental_id=pending.id)['pending_conflict_count'], 0)
+
+    def test_blocked_date_helpers_share_snapshot(self):
+        self._create_rental(2)
+        self._create_rental(12, status='pending', workflow_state='requested')
+        window_end = self.today + timedelta(days=10)
+
+        blocked = get_blocked_dates(self.machine, self.today, window_end)
+        periods = AvailabilityChecker.get_available_dates(self.machine, self.today, window_end)
+
+        self.assertEqual([entry['status'] for entry in blocked], ['approved'])
+        self.assertEqual([entry['start'] for entry in periods], [self.today + timedelta(days=2)])
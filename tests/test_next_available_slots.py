@@ -0,0 +1,134 @@
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from machines.models import Machine, Rental
+from machines.utils import AvailabilityChecker
+from machines.views import _rental_alternative_slots
+
+
+User = get_user_model()
+
+
+class NextAvailableSlotTests(TestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(
+            username='slot-member',
+            email='slot-member@example.com',
+            password='secret',
+        )
+        self.busy_tractor = Machine.objects.create(
+            name='Alpha Tractor',
+            machine_type='tractor_4wd',
+            status='available',
+            rental_fee_per_day=100,
+            current_price='100/day',
+        )
+        self.free_tractor = Machine.objects.create(
+            name='Bravo Tractor',
+            machine_type='hand_tractor',
+            status='available',
+            rental_fee_per_day=100,
+            current_price='100/day',
+        )
+        Machine.objects.create(
+            name='Harvester',
+            machine_type='harvester',
+            status='available',
+            rental_fee_per_day=100,
+            current_price='100/day',
+        )
+        self.today = timezone.localdate()
+
+    def _book(self, machine, start_offset, end_offset, **overrides):
+        values = {
+            'machine': machine,
+            'user': self.member,
+            'start_date': self.today + timedelta(days=start_offset),
+            'end_date': self.today + timedelta(days=end_offset),
+            'status': 'approved',
+            'workflow_state': 'approved',
+            'payment_type': 'cash',
+        }
+        values.update(overrides)
+        return Rental.objects.create(**values)
+
+    def test_slots_cover_every_machine_in_category(self):
+        self._book(self.busy_tractor, 0, 2)
+        self._book(self.busy_tractor, 4, 5)
+        self._book(self.free_tractor, 0, 0, status='pending', workflow_state='requested')
+
+        result = AvailabilityChecker.find_next_available_slots('tractor_4wd', 2, start_date=self.today)
+
+        self.assertEqual(result['category'], 'tractor')
+        slots = {slot['machine'].pk: slot['start_date'] for slot in result['slots']}
+        self.assertEqual(slots, {
+            self.busy_tractor.pk: self.today + timedelta(days=6),
+            self.free_tractor.pk: self.today + timedelta(days=1),
+        })
+        self.assertEqual(result['best']['machine'], self.free_tractor)
+
+        ignoring_pending = AvailabilityChecker.find_next_available_slots(
+            'tractor', 2, start_date=self.today, include_pending=False,
+        )
+        self.assertEqual(ignoring_pending['best']['start_date'], self.today)
+
+    def test_next_available_date_uses_overdue_end(self):
+        self._book(self.busy_tractor, 1, 1)
+        Rental.objects.filter(machine=self.busy_tractor).update(
+            start_date=self.today - timedelta(days=3),
+            end_date=self.today - timedelta(days=1),
+        )
+
+        self.assertEqual(
+            AvailabilityChecker.get_next_available_date(self.busy_tractor, self.today),
+            self.today + timedelta(days=1),
+        )
+
+    def test_endpoint_resolves_category_from_machine(self):
+        self._book(self.busy_tractor, 0, 1)
+        self._book(self.free_tractor, 0, 3)
+        self.client.force_login(self.member)
+
+        response = self.client.get(
+            reverse('machines:next_available_slots'),
+            {'machine_id': self.busy_tractor.pk, 'days': 3},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(payload['category'], 'tractor')
+        self.assertEqual(payload['best'], {
+            'machine_id': self.busy_tractor.pk,
+            'machine_name': self.busy_tractor.name,
+            'start_date': (self.today + timedelta(days=2)).isoformat(),
+            'end_date': (self.today + timedelta(days=4)).isoformat(),
+        })
+        self.assertEqual(len(payload['machines']), 2)
+
+    def test_endpoint_validates_input(self):
+        self.client.force_login(self.member)
+        url = reverse('machines:next_available_slots')
+
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {'category': 'tractor', 'days': 0}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'machine_id': 999999}).status_code, 404)
+
+    def test_rental_form_conflict_suggests_same_category_machines(self):
+        self._book(self.busy_tractor, 3, 4)
+        form = SimpleNamespace(cleaned_data={
+            'machine': self.busy_tractor,
+            'start_date': self.today + timedelta(days=3),
+            'end_date': self.today + timedelta(days=4),
+        })
+
+        suggestions = _rental_alternative_slots(form)
+
+        self.assertEqual(suggestions['duration_days'], 2)
+        self.assertEqual(suggestions['best']['machine'], self.free_tractor)
+        self.assertEqual(suggestions['best']['start_date'], self.today + timedelta(days=3))
+        self.assertIsNone(_rental_alternative_slots(SimpleNamespace(cleaned_data={})))
@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from machines.models import RentalPackage
+from notifications.context_processors import notifications_context
+from notifications.counters import UNREAD_KEY, badge_counts
+from notifications.models import UserNotification
+from notifications.notification_helpers import mark_all_as_read
+
+
+User = get_user_model()
+
+
+class NotificationBadgeCounterTests(TestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(
+            username='badge-member',
+            email='badge-member@example.com',
+            password='secret',
+        )
+        self.factory = RequestFactory()
+
+    def _notify(self, index, **overrides):
+        values = {
+            'user': self.member,
+            'notification_type': 'rental_update',
+            'message': f'Rental update {index}.',
+        }
+        values.update(overrides)
+        return UserNotification.objects.create(**values)
+
+    def _context(self):
+        request = self.factory.get('/dashboard/')
+        request.user = self.member
+        return notifications_context(request)
+
+    def test_pages_read_cached_counts_and_skip_the_unused_recent_list(self):
+        self._notify(1)
+        self._context()
+
+        with self.assertNumQueries(0):
+            context = self._context()
+
+        self.assertEqual(context['unread_notifications_count'], self._unread_in_db())
+
+    def test_creates_and_mark_all_read_drop_the_counter_for_one_recount(self):
+        starting = badge_counts(self.member)['unread']
+        self._notify(1)
+        self._notify(2)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(badge_counts(self.member)['unread'], starting + 2)
+        with self.assertNumQueries(0):
+            badge_counts(self.member)
+
+        mark_all_as_read(self.member)
+        with self.assertNumQueries(1):
+            self.assertEqual(badge_counts(self.member)['unread'], 0)
+
+    def test_counters_are_never_adjusted_in_place(self):
+        badge_counts(self.member)
+        # Another process's copy of the counter; only dropping it is safe.
+        cache.set(UNREAD_KEY.format(self.member.pk), 7)
+
+        self._notify(1)
+
+        self.assertIsNone(cache.get(UNREAD_KEY.format(self.member.pk)))
+        self.assertEqual(badge_counts(self.member)['unread'], self._unread_in_db())
+
+    def test_reading_one_notification_is_reflected(self):
+        notification = self._notify(1)
+        badge_counts(self.member)
+
+        notification.is_read = True
+        notification.save(update_fields=['is_read'])
+
+        self.assertEqual(badge_counts(self.member)['unread'], self._unread_in_db())
+
+    def test_package_badge_follows_package_changes(self):
+        self.assertEqual(badge_counts(self.member)['package'], 0)
+
+        package = RentalPackage.objects.create(
+            user=self.member,
+            package_name='Badge Package',
+            farmer_name='Badge Member',
+            location='Badge Farm',
+            preferred_start_date=timezone.localdate() + timedelta(days=3),
+            status='pending',
+        )
+        self.assertEqual(badge_counts(self.member)['package'], 1)
+
+        RentalPackage.objects.filter(pk=package.pk).update(member_last_viewed_at=timezone.now() + timedelta(minutes=1))
+        self._notify(2, notification_type='rental_package_approved', related_object_id=package.pk)
+        self.assertEqual(badge_counts(self.member)['package'], 1)
+
+        mark_all_as_read(self.member)
+        self.assertEqual(badge_counts(self.member)['package'], 0)
+
+    def _unread_in_db(self):
+        return UserNotification.objects.filter(user=self.member, is_read=False).count()
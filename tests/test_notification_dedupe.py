@@ -0,0 +1,143 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from bufia.services.payments import notify_staff
+from notifications.models import UserNotification
+
+
+User = get_user_model()
+
+
+class NotificationDedupeTests(TestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(
+            username='dedupe-member',
+            email='dedupe-member@example.com',
+            password='secret',
+        )
+        self.staff = [
+            User.objects.create_user(
+                username=f'dedupe-staff-{index}',
+                email=f'dedupe-staff-{index}@example.com',
+                password='secret',
+                is_staff=True,
+            )
+            for index in range(4)
+        ]
+
+    def _notification(self, user, message='Payment received.', **overrides):
+        values = {
+            'user': user,
+            'notification_type': 'rental_payment_received',
+            'message': message,
+            'title': 'Payment Received',
+            'related_object_id': 42,
+        }
+        values.update(overrides)
+        return UserNotification(**values)
+
+    def test_saved_notifications_carry_a_content_hash(self):
+        notification = UserNotification.objects.create(
+            user=self.member,
+            notification_type='rental_update',
+            message='Rental moved.',
+            related_object_id=5,
+        )
+
+        self.assertEqual(
+            notification.dedupe_key,
+            UserNotification.build_dedupe_key('rental_update', 'Rental moved.', 5),
+        )
+        self.assertNotEqual(
+            notification.dedupe_key,
+            UserNotification.build_dedupe_key('rental_update', 'Rental moved.', None),
+        )
+
+    def test_duplicate_lookup_matches_on_the_key_not_the_message_text(self):
+        first = UserNotification.objects.create(
+            user=self.member,
+            notification_type='rental_update',
+            message='Rental moved.',
+        )
+
+        with self.assertNumQueries(1) as queries:
+            duplicate = UserNotification.find_recent_duplicate(
+                user=self.member,
+                notification_type='rental_update',
+                message='Rental moved.',
+            )
+
+        self.assertEqual(duplicate, first)
+        self.assertNotIn('"message"', queries.captured_queries[0]['sql'].split('WHERE', 1)[1])
+
+    def test_bulk_creation_merges_batch_and_recent_duplicates(self):
+        existing = UserNotification.objects.create(
+            user=self.member,
+            notification_type='rental_payment_received',
+            message='Payment received.',
+            related_object_id=42,
+        )
+        UserNotification.objects.filter(pk=existing.pk).update(
+            timestamp=existing.timestamp - timedelta(minutes=1),
+        )
+        batch = [
+            self._notification(self.member, action_url='/payments/42/'),
+            self._notification(self.staff[0]),
+            self._notification(self.staff[0], action_url='/payments/42/'),
+            self._notification(self.staff[1], message='Another payment.'),
+        ]
+
+        with self.assertNumQueries(3):
+            created = UserNotification.bulk_create_notifications(batch)
+
+        self.assertEqual(len(created), 2)
+        payments = UserNotification.objects.filter(notification_type='rental_payment_received')
+        self.assertEqual(payments.filter(user=self.staff[0]).get().action_url, '/payments/42/')
+        merged = payments.get(user=self.member)
+        self.assertEqual(merged.pk, existing.pk)
+        self.assertEqual(merged.action_url, '/payments/42/')
+        self.assertGreaterEqual(merged.timestamp, existing.timestamp)
+
+    def test_single_and_bulk_creation_merge_a_duplicate_the_same_way(self):
+        for create in (
+            lambda: UserNotification.objects.create(
+                user=self.member,
+                notification_type='rental_payment_received',
+                message='Payment received.',
+                related_object_id=42,
+                action_url='/payments/42/',
+            ),
+            lambda: UserNotification.bulk_create_notifications(
+                [self._notification(self.member, action_url='/payments/42/')]
+            ),
+        ):
+            existing = UserNotification.objects.create(
+                user=self.member,
+                notification_type='rental_payment_received',
+                message='Payment received.',
+                related_object_id=42,
+            )
+            stale = existing.timestamp - timedelta(minutes=1)
+            UserNotification.objects.filter(pk=existing.pk).update(timestamp=stale)
+
+            create()
+
+            merged = UserNotification.objects.get(user=self.member, notification_type='rental_payment_received')
+            self.assertEqual(merged.pk, existing.pk)
+            self.assertEqual(merged.action_url, '/payments/42/')
+            self.assertGreater(merged.timestamp, stale)
+            merged.delete()
+
+    def test_staff_fan_out_is_one_insert_and_is_not_repeated(self):
+        with self.assertNumQueries(3):
+            notify_staff('payment_verified', 'Payment BUF-TXN-1 verified.', 7)
+        notify_staff('payment_verified', 'Payment BUF-TXN-1 verified.', 7)
+
+        self.assertEqual(
+            sorted(
+                UserNotification.objects.filter(notification_type='payment_verified').values_list('user_id', flat=True)
+            ),
+            sorted(user.pk for user in self.staff),
+        )
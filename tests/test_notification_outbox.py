@@ -0,0 +1,154 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from machines.models import Machine, Rental
+from notifications import outbox
+from notifications.models import OutboxEvent, UserNotification
+from users.models import ActivityLog
+
+
+User = get_user_model()
+
+
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(
+            username='outbox-member',
+            email='outbox-member@example.com',
+            password='secret',
+            first_name='Outbox',
+            last_name='Member',
+        )
+        self.staff = [
+            User.objects.create_user(
+                username=f'outbox-staff-{index}',
+                email=f'outbox-staff-{index}@example.com',
+                password='secret',
+                is_staff=True,
+            )
+            for index in range(3)
+        ]
+        self.machine = Machine.objects.create(
+            name='Outbox Tractor',
+            machine_type='tractor',
+            status='available',
+            rental_fee_per_day=100,
+            current_price='100/day',
+        )
+
+    def _submit_rental(self):
+        day = timezone.localdate() + timedelta(days=4)
+        return Rental.objects.create(
+            machine=self.machine,
+            user=self.member,
+            start_date=day,
+            end_date=day,
+            status='pending',
+            workflow_state='requested',
+            payment_type='cash',
+        )
+
+    def test_submission_records_one_event_and_fans_out_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            rental = self._submit_rental()
+
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+        self.assertFalse(UserNotification.objects.filter(related_object_id=rental.pk).exists())
+
+        for callback in callbacks:
+            callback()
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.status, OutboxEvent.STATUS_DISPATCHED)
+        self.assertEqual(
+            UserNotification.objects.filter(notification_type='rental_new_request', related_object_id=rental.pk).count(),
+            len(self.staff),
+        )
+        self.assertTrue(
+            UserNotification.objects.filter(user=self.member, notification_type='rental_submitted').exists()
+        )
+        self.assertEqual(
+            ActivityLog.objects.get(related_model='machines.Rental', related_object_id=str(rental.pk)).created_at,
+            rental.created_at,
+        )
+
+    def test_rolled_back_changes_leave_nothing_to_dispatch(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self._submit_rental()
+                    raise RuntimeError('abort')
+            except RuntimeError:
+                pass
+
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertFalse(UserNotification.objects.filter(notification_type='rental_submitted').exists())
+
+    def test_failed_dispatch_is_retried_by_the_command(self):
+        with patch('notifications.outbox._deliver', side_effect=RuntimeError('database busy')):
+            with self.assertLogs('notifications.outbox', level='ERROR'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    self._submit_rental()
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.status, OutboxEvent.STATUS_PENDING)
+        self.assertEqual(event.last_error, 'database busy')
+        self.assertFalse(UserNotification.objects.filter(notification_type='rental_submitted').exists())
+
+        OutboxEvent.objects.update(available_at=timezone.now())
+        call_command('dispatch_outbox', stdout=StringIO())
+
+        event.refresh_from_db()
+        self.assertEqual(event.status, OutboxEvent.STATUS_DISPATCHED)
+        self.assertEqual(event.attempts, 2)
+        self.assertTrue(UserNotification.objects.filter(notification_type='rental_submitted').exists())
+
+    def test_one_bad_event_does_not_fail_the_rest_of_the_batch(self):
+        good = outbox.record('test', notifications=[
+            outbox.notification(self.member, 'rental_submitted', 'Good event'),
+        ])
+        bad = outbox.record('test', notifications=[
+            outbox.notification(self.member, 'rental_submitted', 'Bad event'),
+        ])
+        real_deliver = outbox._deliver
+
+        def deliver(events, staff_ids=None):
+            if any(event.pk == bad.pk for event in events):
+                raise RuntimeError('recipient deleted')
+            return real_deliver(events, staff_ids)
+
+        with patch('notifications.outbox._deliver', side_effect=deliver), \
+                self.assertLogs('notifications.outbox', level='ERROR'):
+            outcomes = outbox.dispatch_outbox_events()
+
+        self.assertEqual(outcomes, {'dispatched': 1, 'retried': 1, 'failed': 0})
+        good.refresh_from_db()
+        bad.refresh_from_db()
+        self.assertEqual(good.status, OutboxEvent.STATUS_DISPATCHED)
+        self.assertEqual(bad.status, OutboxEvent.STATUS_PENDING)
+        self.assertEqual(bad.last_error, 'recipient deleted')
+        self.assertEqual(
+            list(UserNotification.objects.filter(notification_type='rental_submitted').values_list('message', flat=True)),
+            ['Good event'],
+        )
+
+    def test_command_prunes_old_dispatched_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._submit_rental()
+        event = OutboxEvent.objects.get()
+        OutboxEvent.objects.filter(pk=event.pk).update(dispatched_at=timezone.now() - timedelta(days=30))
+        recent = outbox.record('test', notifications=[outbox.notification(self.member, 'rental_submitted', 'Recent')])
+        OutboxEvent.mark_dispatched([recent])
+
+        out = StringIO()
+        call_command('dispatch_outbox', stdout=out)
+
+        self.assertEqual(list(OutboxEvent.objects.values_list('pk', flat=True)), [recent.pk])
+        self.assertIn('1 pruned', out.getvalue())
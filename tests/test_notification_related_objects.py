@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from machines.models import Machine, Rental
+from notifications.context_processors import notifications_context
+from notifications.models import UserNotification
+
+
+User = get_user_model()
+
+
+class NotificationRelatedObjectTests(TestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(
+            username='related-member',
+            email='related-member@example.com',
+            password='secret',
+            first_name='Rita',
+            last_name='Member',
+        )
+        self.machine = Machine.objects.create(
+            name='Related Tractor',
+            machine_type='tractor',
+            status='available',
+            rental_fee_per_day=100,
+            current_price='100/day',
+        )
+        self.today = timezone.localdate()
+
+    def _notify_rentals(self, count, first_offset=1):
+        for offset in range(first_offset, first_offset + count):
+            day = self.today + timedelta(days=offset * 2)
+            rental = Rental.objects.create(
+                machine=self.machine,
+                user=self.member,
+                start_date=day,
+                end_date=day,
+                status='pending',
+                workflow_state='requested',
+                payment_type='cash',
+            )
+            UserNotification.objects.create(
+                user=self.member,
+                notification_type='rental_new_request',
+                message=f'New rental request #{rental.pk}.',
+                related_object_id=rental.pk,
+            )
+
+    def _fresh_notifications(self):
+        return UserNotification.objects.filter(user=self.member, notification_type='rental_new_request')
+
+    def test_resolver_fetches_each_target_model_once(self):
+        self._notify_rentals(4)
+        UserNotification.objects.create(
+            user=self.member,
+            notification_type='irrigation_approved',
+            message='Irrigation approved.',
+            related_object_id=999999,
+        )
+        notifications = list(UserNotification.objects.filter(user=self.member, related_object_id__isnull=False))
+
+        with self.assertNumQueries(2):
+            resolved = UserNotification.resolve_related_objects(notifications)
+        with self.assertNumQueries(0):
+            titles = [notification.display_title for notification in resolved]
+            details = [notification.display_detail for notification in resolved]
+
+        self.assertIn('Rental Request • Rita Member', titles)
+        self.assertIn('Related Tractor', details[0])
+
+    def test_resolved_titles_match_single_lookups(self):
+        self._notify_rentals(3)
+
+        expected = [(n.display_title, n.display_detail) for n in self._fresh_notifications().order_by('pk')]
+        resolved = UserNotification.resolve_related_objects(self._fresh_notifications().order_by('pk'))
+
+        self.assertEqual([(n.display_title, n.display_detail) for n in resolved], expected)
+
+    def test_navbar_context_cost_does_not_grow_with_notifications(self):
+        request = RequestFactory().get('/')
+        request.user = self.member
+
+        def render_cost():
+            with CaptureQueriesContext(connection) as queries:
+                context = notifications_context(request)
+                for group in context['recent_notification_groups']:
+                    group['primary'].display_title
+                    group['primary'].display_detail
+            return len(queries)
+
+        self._notify_rentals(1)
+        render_cost()  # fills the badge counters
+        few = render_cost()
+        self._notify_rentals(9, first_offset=2)
+        render_cost()  # new notifications drop the badge counters, refill them
+        many = render_cost()
+
+        self.assertEqual(few, many)
@@ -42,19 +42,20 @@ class OperatorOverviewPageTests(TestCase):
             status='available',
             rental_fee_per_day=Decimal('3000.00'),
         )
-        self.rental = Rental.objects.create(
-            machine=self.machine,
-            user=self.member,
-            assigned_operator=self.operator,
-            start_date=date.today() + timedelta(days=1),
-            end_date=date.today() + timedelta(days=2),
-            status='approved',
-            workflow_state='approved',
-            payment_type='cash',
-            payment_amount=Decimal('3000.00'),
-            payment_status='paid',
-            payment_verified=True,
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rental = Rental.objects.create(
+                machine=self.machine,
+                user=self.member,
+                assigned_operator=self.operator,
+                start_date=date.today() + timedelta(days=1),
+                end_date=date.today() + timedelta(days=2),
+                status='approved',
+                workflow_state='approved',
+                payment_type='cash',
+                payment_amount=Decimal('3000.00'),
+                payment_status='paid',
+                payment_verified=True,
+            )
         self.client.login(username='operator-overview-admin', password='secret123')
 
     def test_overview_page_shows_needed_actions_including_delete(self):
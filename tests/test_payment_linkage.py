@@ -0,0 +1,116 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+from django.utils import timezone
+
+from bufia.models import Payment
+from machines.admin_views import _get_rental_payments_map
+from machines.models import Machine, Rental, prefetch_latest_payments
+
+
+User = get_user_model()
+
+
+class RentalPaymentLinkageTests(TestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(
+            username='linkage-member',
+            email='linkage-member@example.com',
+            password='secret',
+        )
+        self.machine = Machine.objects.create(
+            name='Linkage Tractor',
+            machine_type='tractor',
+            status='available',
+            rental_fee_per_day=100,
+            current_price='100/day',
+        )
+        self.today = timezone.localdate()
+
+    def _create_rental(self, offset):
+        day = self.today + timedelta(days=offset)
+        return Rental.objects.create(
+            machine=self.machine,
+            user=self.member,
+            start_date=day,
+            end_date=day,
+            status='pending',
+            workflow_state='requested',
+            payment_type='cash',
+        )
+
+    def _create_payment(self, rental, **overrides):
+        values = {
+            'user': self.member,
+            'payment_type': 'rental',
+            'amount': Decimal('100.00'),
+            'currency': 'PHP',
+            'status': 'pending',
+            'content_type': ContentType.objects.get_for_model(Rental),
+            'object_id': rental.id,
+        }
+        values.update(overrides)
+        return Payment.objects.create(**values)
+
+    def test_pointer_follows_newest_payment(self):
+        rental = self._create_rental(1)
+        first = self._create_payment(rental)
+        second = self._create_payment(rental)
+
+        rental.refresh_from_db()
+        self.assertEqual(rental.latest_payment_id, second.id)
+        self.assertEqual(rental.get_transaction_id, second.internal_transaction_id)
+
+        second.delete()
+        rental.refresh_from_db()
+        self.assertEqual(rental.latest_payment_id, first.id)
+
+        first.delete()
+        rental.refresh_from_db()
+        self.assertIsNone(rental.latest_payment_id)
+        self.assertIsNone(rental.payment)
+
+    def test_in_memory_rental_still_sees_new_payment(self):
+        rental = self._create_rental(1)
+        with self.assertNumQueries(0):
+            self.assertIsNone(rental.payment)
+
+        payment = self._create_payment(rental, content_object=rental)
+
+        self.assertEqual(rental.payment, payment)
+
+    def test_saving_a_stale_rental_keeps_the_pointer(self):
+        rental = self._create_rental(1)
+        payment = self._create_payment(rental)
+
+        rental.status = 'approved'
+        rental.save()
+
+        rental.refresh_from_db()
+        self.assertEqual(rental.status, 'approved')
+        self.assertEqual(rental.latest_payment_id, payment.id)
+
+        # A full save of a row deleted meanwhile still inserts it, pointer and all.
+        Rental.objects.filter(pk=rental.pk).delete()
+        rental.save()
+        self.assertTrue(Rental.objects.filter(pk=rental.pk, latest_payment_id=payment.id).exists())
+
+    def test_list_resolves_payments_in_one_query(self):
+        rentals = [self._create_rental(offset) for offset in range(1, 6)]
+        for rental in rentals[:3]:
+            self._create_payment(rental)
+
+        rentals = list(Rental.objects.all())
+        with self.assertNumQueries(1):
+            prefetch_latest_payments(rentals)
+            transaction_ids = [rental.get_transaction_id for rental in rentals]
+        self.assertEqual(sum(1 for value in transaction_ids if value), 3)
+
+        rentals = list(Rental.objects.all())
+        # Payments, then their refunds; the user joins ride along.
+        with self.assertNumQueries(2):
+            payments_map = _get_rental_payments_map(rentals)
+        self.assertEqual(len(payments_map), 3)
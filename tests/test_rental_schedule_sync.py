@@ -0,0 +1,146 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from machines.models import Machine, Rental, RentalScheduleSync
+
+
+User = get_user_model()
+
+
+class RentalScheduleSyncTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='sync-admin',
+            email='sync-admin@example.com',
+            password='secret',
+            is_staff=True,
+        )
+        self.member = User.objects.create_user(
+            username='sync-member',
+            email='sync-member@example.com',
+            password='secret',
+        )
+        self.machine = Machine.objects.create(
+            name='Sync Test Tractor',
+            machine_type='tractor',
+            status='available',
+        )
+        self.today = timezone.localdate()
+
+    def _create_rental(self, start_offset, end_offset, machine=None):
+        rental = Rental.objects.create(
+            machine=machine or self.machine,
+            user=self.member,
+            start_date=self.today + timedelta(days=30),
+            end_date=self.today + timedelta(days=30),
+            status='approved',
+            workflow_state='approved',
+            payment_type='cash',
+        )
+        Rental.objects.filter(pk=rental.pk).update(
+            start_date=self.today + timedelta(days=start_offset),
+            end_date=self.today + timedelta(days=end_offset),
+        )
+        return rental
+
+    def test_sync_updates_changed_rows_in_batches(self):
+        overdue = self._create_rental(-5, -1)
+        blocked_ids = [self._create_rental(0, offset).id for offset in range(4)]
+        untouched = self._create_rental(10, 12)
+
+        # One SELECT plus one UPDATE per target state.
+        with self.assertNumQueries(3):
+            updated_ids = Rental.sync_overdue_workflow_states(today=self.today)
+
+        self.assertCountEqual(updated_ids, [overdue.id] + blocked_ids)
+        states = dict(Rental.objects.values_list('id', 'workflow_state'))
+        self.assertEqual(states[overdue.id], 'overdue')
+        self.assertEqual({states[rental_id] for rental_id in blocked_ids}, {'conflict_review'})
+        self.assertEqual(states[untouched.id], 'approved')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(Rental.sync_overdue_workflow_states(today=self.today), [])
+
+    def test_sync_can_be_limited_to_one_machine(self):
+        other_machine = Machine.objects.create(
+            name='Sync Other Tractor',
+            machine_type='tractor',
+            status='available',
+        )
+        overdue = self._create_rental(-3, -1)
+        other_overdue = self._create_rental(-3, -1, machine=other_machine)
+
+        updated_ids = Rental.sync_overdue_workflow_states(today=self.today, machine_ids=[self.machine.id])
+
+        self.assertEqual(updated_ids, [overdue.id])
+        other_overdue.refresh_from_db()
+        self.assertEqual(other_overdue.workflow_state, 'approved')
+
+    def test_conflict_review_returns_to_approved_once_overdue_is_returned(self):
+        overdue = self._create_rental(-3, -1)
+        blocked = self._create_rental(0, 0)
+        Rental.sync_overdue_workflow_states(today=self.today)
+
+        Rental.objects.filter(pk=overdue.pk).update(actual_return_at=timezone.now())
+        Rental.sync_overdue_workflow_states(today=self.today)
+
+        blocked.refresh_from_db()
+        self.assertEqual(blocked.workflow_state, 'approved')
+
+    def test_full_sync_runs_once_per_day(self):
+        self._create_rental(-3, -1)
+
+        with patch.object(Rental, 'sync_overdue_workflow_states', return_value=[]) as sync_mock:
+            Rental.ensure_schedule_states_current(today=self.today)
+            Rental.ensure_schedule_states_current(today=self.today)
+            Rental.ensure_schedule_states_current(today=self.today + timedelta(days=1))
+
+        self.assertEqual(sync_mock.call_count, 2)
+        self.assertEqual(
+            RentalScheduleSync.objects.get(key=RentalScheduleSync.DEFAULT_KEY).synced_on,
+            self.today + timedelta(days=1),
+        )
+
+    def test_failed_sync_releases_the_days_claim(self):
+        with patch.object(Rental, 'sync_overdue_workflow_states', side_effect=RuntimeError('sync crashed')):
+            with self.assertRaises(RuntimeError):
+                Rental.ensure_schedule_states_current(today=self.today)
+
+        self.assertFalse(RentalScheduleSync.objects.filter(synced_on=self.today).exists())
+
+        with patch.object(Rental, 'sync_overdue_workflow_states', return_value=[]) as sync_mock:
+            Rental.ensure_schedule_states_current(today=self.today)
+        sync_mock.assert_called_once_with(today=self.today)
+
+    def test_dashboard_reads_precomputed_state_after_first_view(self):
+        overdue = self._create_rental(-3, -1)
+        self.client.force_login(self.admin)
+
+        self.client.get(reverse('machines:admin_rental_dashboard'))
+        overdue.refresh_from_db()
+        self.assertEqual(overdue.workflow_state, 'overdue')
+
+        with patch.object(Rental, 'sync_overdue_workflow_states') as sync_mock:
+            response = self.client.get(reverse('machines:admin_rental_dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        sync_mock.assert_not_called()
+
+    def test_rental_save_resyncs_its_machine_after_commit(self):
+        overdue = self._create_rental(-3, -1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            overdue.refresh_from_db()
+            overdue.save()
+
+        overdue.refresh_from_db()
+        self.assertEqual(overdue.workflow_state, 'overdue')
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            overdue.save(update_fields=['operator_notes'])
+        self.assertEqual(callbacks, [])
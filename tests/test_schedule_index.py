@@ -0,0 +1,233 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from machines.models import Machine, Maintenance, Rental
+from machines.schedule_index import IntervalIndex, MachineScheduleIndex, ScheduleInterval, earliest_fit
+from machines.utils import AvailabilityChecker
+
+
+User = get_user_model()
+
+
+def _interval(start, end, object_id):
+    return ScheduleInterval(start, end, 'rental', object_id, 1, 'approved')
+
+
+class IntervalIndexTests(SimpleTestCase):
+    def test_overlapping_matches_brute_force(self):
+        base = date(2025, 1, 1)
+        intervals = [
+            _interval(base + timedelta(days=(index * 7) % 97), base + timedelta(days=(index * 7) % 97 + index % 5), index)
+            for index in range(60)
+        ]
+        index = IntervalIndex(intervals)
+
+        for offset in range(0, 110, 3):
+            probe_start = base + timedelta(days=offset)
+            probe_end = probe_start + timedelta(days=offset % 4)
+            expected = sorted(
+                (interval for interval in intervals if interval.start <= probe_end and interval.end >= probe_start),
+                key=lambda interval: (interval.start, interval.end),
+            )
+            self.assertEqual(index.overlapping(probe_start, probe_end), expected)
+
+    def test_inclusive_boundaries(self):
+        day = date(2025, 3, 10)
+        index = IntervalIndex([_interval(day, day, 1)])
+
+        self.assertEqual([row.object_id for row in index.overlapping(day, day)], [1])
+        self.assertEqual(index.overlapping(day + timedelta(days=1), day + timedelta(days=2)), [])
+        self.assertEqual(index.overlapping(day - timedelta(days=2), day - timedelta(days=1)), [])
+
+    def test_sweep_matches_point_queries(self):
+        base = date(2025, 1, 1)
+        intervals = [
+            _interval(base + timedelta(days=(index * 5) % 61), base + timedelta(days=(index * 5) % 61 + index % 4), index)
+            for index in range(40)
+        ]
+        index = IntervalIndex(intervals)
+        probes = [
+            (base + timedelta(days=offset), base + timedelta(days=offset + offset % 3), f'probe-{offset}')
+            for offset in range(0, 70, 2)
+        ]
+
+        swept = index.sweep(probes)
+
+        for start, end, key in probes:
+            self.assertEqual(swept[key], index.overlapping(start, end))
+
+    def test_empty_index(self):
+        self.assertEqual(IntervalIndex().overlapping(date(2025, 1, 1), date(2025, 1, 2)), [])
+
+    def test_earliest_fit_skips_gaps_that_are_too_short(self):
+        day = date(2025, 5, 1)
+        blocks = [
+            (day + timedelta(days=6), day + timedelta(days=8)),
+            (day, day + timedelta(days=2)),
+            (day + timedelta(days=1), day + timedelta(days=3)),
+        ]
+
+        self.assertEqual(earliest_fit(blocks, day, 1), day + timedelta(days=4))
+        self.assertEqual(earliest_fit(blocks, day, 2), day + timedelta(days=4))
+        self.assertEqual(earliest_fit(blocks, day, 3), day + timedelta(days=9))
+        self.assertEqual(earliest_fit([], day, 5), day)
+
+
+class MachineScheduleIndexTests(TestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(
+            username='index_member',
+            email='index_member@example.com',
+            password='secret',
+        )
+        self.machine = Machine.objects.create(
+            name='Index Tractor',
+            machine_type='tractor',
+            status='available',
+            rental_fee_per_day=100,
+            current_price='100/day',
+        )
+        self.today = timezone.localdate()
+
+    def _create_rental(self, start_date, end_date, **overrides):
+        values = {
+            'machine': self.machine,
+            'user': self.member,
+            'start_date': start_date,
+            'end_date': end_date,
+            'status': 'approved',
+            'workflow_state': 'approved',
+            'payment_type': 'cash',
+            'payment_verified': True,
+        }
+        values.update(overrides)
+        return Rental.objects.create(**values)
+
+    def test_terminal_rentals_do_not_block(self):
+        day = self.today + timedelta(days=5)
+        self._create_rental(day, day, workflow_state='completed')
+        settled = self._create_rental(day + timedelta(days=1), day + timedelta(days=1))
+        self._create_rental(day, day, status='pending', workflow_state='requested')
+        # Machine defaults decide payment_type on create, so apply the settled
+        # non-cash state directly.
+        Rental.objects.filter(pk=settled.pk).update(
+            start_date=day,
+            end_date=day,
+            payment_type='in_kind',
+            settlement_status='paid',
+        )
+
+        is_available, conflicts = Rental.check_availability(self.machine, day, day)
+
+        self.assertTrue(is_available)
+        self.assertEqual(list(conflicts), [])
+
+    def test_overdue_rental_blocks_until_today(self):
+        overdue = self._create_rental(
+            self.today - timedelta(days=6),
+            self.today - timedelta(days=3),
+        )
+
+        is_available, conflicts = Rental.check_availability_for_approval(self.machine, self.today, self.today)
+
+        self.assertFalse(is_available)
+        self.assertEqual([rental.id for rental in conflicts], [overdue.id])
+
+        Rental.objects.filter(pk=overdue.pk).update(actual_return_at=timezone.now())
+        is_available, _ = Rental.check_availability_for_approval(self.machine, self.today, self.today)
+        self.assertTrue(is_available)
+
+    def test_probe_uses_single_query_and_prebuilt_index(self):
+        for offset in range(0, 40, 4):
+            day = self.today + timedelta(days=offset)
+            self._create_rental(day, day + timedelta(days=1))
+        target = self.today + timedelta(days=9)
+
+        with self.assertNumQueries(1) as queries:
+            is_available, conflicts = Rental.check_availability(self.machine, target, target)
+        self.assertFalse(is_available)
+        self.assertIn('LIMIT 1', queries.captured_queries[0]['sql'])
+
+        schedule_index = MachineScheduleIndex.build([self.machine])
+        with self.assertNumQueries(0):
+            for offset in range(40):
+                day = self.today + timedelta(days=offset)
+                schedule_index.blocking_rental_ids(self.machine, day, day)
+
+    def test_single_probe_matches_the_index(self):
+        self._create_rental(self.today - timedelta(days=6), self.today - timedelta(days=3))
+        for offset in range(1, 21, 5):
+            day = self.today + timedelta(days=offset)
+            self._create_rental(day, day + timedelta(days=2))
+        schedule_index = MachineScheduleIndex.build([self.machine])
+
+        for offset in range(-8, 24):
+            start = self.today + timedelta(days=offset)
+            for end in (start, start + timedelta(days=3)):
+                _, conflicts = Rental.check_availability(self.machine, start, end)
+                self.assertEqual(
+                    [rental.id for rental in conflicts],
+                    schedule_index.blocking_rental_ids(self.machine, start, end),
+                )
+
+    def test_bulk_check_matches_single_checks_with_fixed_queries(self):
+        other_machine = Machine.objects.create(
+            name='Index Harvester',
+            machine_type='harvester',
+            status='available',
+            rental_fee_per_day=100,
+            current_price='100/day',
+        )
+        rentals = []
+        for offset in range(0, 30, 3):
+            day = self.today + timedelta(days=offset)
+            rentals.append(self._create_rental(day, day + timedelta(days=1)))
+            rentals.append(self._create_rental(day, day, machine=other_machine, status='pending', workflow_state='requested'))
+        # Stale data: force overlaps that model validation would normally reject.
+        first_id, overlapping_id = rentals[0].id, rentals[2].id
+        Rental.objects.filter(pk=overlapping_id).update(start_date=rentals[0].start_date, end_date=rentals[0].end_date)
+        Rental.objects.filter(machine=other_machine).update(status='approved', workflow_state='approved')
+        rentals = list(Rental.objects.filter(pk__in=[rental.pk for rental in rentals]))
+
+        with self.assertNumQueries(2):
+            conflicts_map = Rental.bulk_check_availability_for_approval(rentals)
+
+        for rental in rentals:
+            _, expected = Rental.check_availability_for_approval(
+                rental.machine_id,
+                rental.start_date,
+                rental.end_date,
+                exclude_rental_id=rental.id,
+            )
+            self.assertEqual(
+                sorted(conflict.id for conflict in conflicts_map[rental.id]),
+                sorted(conflict.id for conflict in expected),
+            )
+        self.assertEqual([conflict.id for conflict in conflicts_map[first_id]], [overlapping_id])
+
+    def test_availability_checker_reports_pending_and_maintenance(self):
+        pending_day = self.today + timedelta(days=2)
+        self._create_rental(pending_day, pending_day, status='pending', workflow_state='requested')
+        maintenance_start = timezone.now() + timedelta(days=10)
+        Maintenance.objects.create(
+            machine=self.machine,
+            description='Engine check',
+            start_date=maintenance_start,
+            end_date=maintenance_start + timedelta(days=1),
+        )
+
+        is_available, message = AvailabilityChecker.check_availability(self.machine, pending_day, pending_day)
+        self.assertFalse(is_available)
+        self.assertIn('Pending Approval', message)
+
+        maintenance_day = timezone.localtime(maintenance_start).date()
+        is_available, message = AvailabilityChecker.check_availability(self.machine, maintenance_day, maintenance_day)
+        self.assertFalse(is_available)
+        self.assertIn('scheduled maintenance', message)
+
+        free_day = self.today + timedelta(days=20)
+        is_available, _ = AvailabilityChecker.check_availability(self.machine, free_day, free_day)
+        self.assertTrue(is_available)
@@ -0,0 +1,119 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from machines.models import DryerCapacityDay, DryerRental, Machine, Rental
+from notifications.models import UserNotification
+
+
+User = get_user_model()
+
+
+class StatusChangeTrackingTests(TestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(
+            username='tracking-member',
+            email='tracking-member@example.com',
+            password='secret',
+        )
+        self.machine = Machine.objects.create(
+            name='Tracking Tractor',
+            machine_type='tractor',
+            status='available',
+            rental_fee_per_day=100,
+            current_price='100/day',
+        )
+        day = timezone.localdate() + timedelta(days=3)
+        Rental.objects.create(
+            machine=self.machine,
+            user=self.member,
+            start_date=day,
+            end_date=day,
+            status='pending',
+            workflow_state='requested',
+            payment_type='cash',
+        )
+
+    def _rental_row_reads(self, queries):
+        return [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "machines_rental" WHERE "machines_rental"."id" =' in query['sql']
+        ]
+
+    def test_status_change_is_detected_without_rereading_the_row(self):
+        rental = Rental.objects.get()
+
+        rental.status = 'approved'
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            rental.save()
+
+        # Only the dashboard rollup re-reads the row, locked for the save.
+        self.assertEqual(len(self._rental_row_reads(queries)), 1)
+        self.assertEqual(rental.stored_value('status'), 'approved')
+        self.assertTrue(
+            UserNotification.objects.filter(user=self.member, notification_type='rental_approved').exists()
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rental.save()
+        self.assertEqual(
+            UserNotification.objects.filter(user=self.member, notification_type='rental_approved').count(),
+            1,
+        )
+
+    def test_saves_that_skip_status_do_not_report_a_change(self):
+        rental = Rental.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            rental.status = 'approved'
+            rental.save(update_fields=['status'])
+
+            rental.purpose = 'Land preparation'
+            rental.save(update_fields=['purpose'])
+
+        self.assertIsNone(rental._old_status)
+        self.assertEqual(
+            UserNotification.objects.filter(user=self.member, notification_type='rental_approved').count(),
+            1,
+        )
+        self.assertEqual(rental.changed_fields(), {})
+
+    def test_dryer_capacity_moves_from_the_stored_row(self):
+        dryer = Machine.objects.create(
+            name='Tracking Flatbed',
+            machine_type='flatbed_dryer',
+            dryer_pricing_type='until_dried',
+            status='available',
+            rental_fee_per_day=0,
+            current_price='Until Dried',
+            flatbed_max_sack_capacity=Decimal('100.00'),
+        )
+        rental_date = timezone.localdate() + timedelta(days=2)
+        DryerRental.objects.create(
+            machine=dryer,
+            user=self.member,
+            rental_type='until_dried',
+            rental_date=rental_date,
+            goods_description='Palay',
+            quantity='30 sacks',
+            status='approved',
+        )
+
+        booking = DryerRental.objects.select_related('machine').get()
+        booking.quantity = '45 sacks'
+        with CaptureQueriesContext(connection) as queries:
+            booking.save()
+
+        # One locked read of the row for the ledger; nothing else re-reads it.
+        self.assertEqual(len([
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "machines_dryerrental" WHERE "machines_dryerrental"."id" =' in query['sql']
+        ]), 1)
+        self.assertEqual(
+            DryerCapacityDay.objects.get(machine=dryer, day=rental_date).used_sacks,
+            Decimal('45.00'),
+        )
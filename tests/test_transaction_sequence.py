@@ -0,0 +1,84 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from bufia.models import Payment, TransactionSequence
+from bufia.utils.transaction_id import TransactionIDGenerator
+
+
+User = get_user_model()
+
+
+class TransactionSequenceTests(TestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(
+            username='sequence-member',
+            email='sequence-member@example.com',
+            password='secret',
+        )
+        self.year = timezone.now().year
+
+    def _create_payment(self, **overrides):
+        values = {
+            'content_type': ContentType.objects.get_for_model(User),
+            'object_id': self.member.pk,
+            'user': self.member,
+            'payment_type': 'rental',
+            'amount': Decimal('100.00'),
+            'currency': 'PHP',
+            'status': 'pending',
+            'payment_provider': 'manual',
+        }
+        values.update(overrides)
+        return Payment.objects.create(**values)
+
+    def test_ids_are_sequential_and_blocks_are_contiguous(self):
+        first = TransactionIDGenerator.generate()
+        block = TransactionIDGenerator.reserve(3)
+        last = TransactionIDGenerator.generate()
+
+        self.assertEqual(first, f'BUF-TXN-{self.year}-00001')
+        self.assertEqual(block, [f'BUF-TXN-{self.year}-{n:05d}' for n in (2, 3, 4)])
+        self.assertEqual(last, f'BUF-TXN-{self.year}-00005')
+        self.assertEqual(TransactionSequence.objects.get(year=self.year).last_value, 5)
+
+    def test_counter_continues_after_ids_issued_before_it_existed(self):
+        self._create_payment(internal_transaction_id=f'BUF-TXN-{self.year}-00041')
+        self._create_payment(internal_transaction_id=f'BUF-TXN-{self.year - 1}-00090')
+        TransactionSequence.objects.all().delete()
+
+        self.assertEqual(TransactionIDGenerator.peek_next_sequence_number(self.year), 42)
+        self.assertEqual(TransactionIDGenerator.generate(), f'BUF-TXN-{self.year}-00042')
+
+    def test_generate_cost_does_not_grow_with_payment_count(self):
+        TransactionIDGenerator.generate()
+        with CaptureQueriesContext(connection) as few:
+            TransactionIDGenerator.generate()
+
+        for _ in range(20):
+            self._create_payment()
+        with CaptureQueriesContext(connection) as many:
+            TransactionIDGenerator.generate()
+
+        self.assertEqual(len(few), len(many))
+        self.assertFalse(any('bufia_payment' in query['sql'] for query in many.captured_queries))
+
+    def test_backfill_command_assigns_one_block_per_year(self):
+        payments = [self._create_payment() for _ in range(3)]
+        Payment.objects.filter(pk__in=[payment.pk for payment in payments]).update(internal_transaction_id=None)
+
+        call_command('generate_transaction_ids', dry_run=True, stdout=StringIO())
+        self.assertEqual(Payment.objects.filter(internal_transaction_id__isnull=True).count(), 3)
+
+        call_command('generate_transaction_ids', stdout=StringIO())
+        self.assertEqual(
+            sorted(Payment.objects.values_list('internal_transaction_id', flat=True)),
+            [f'BUF-TXN-{self.year}-{n:05d}' for n in range(4, 7)],
+        )
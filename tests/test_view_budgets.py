@@ -0,0 +1,30 @@
+from django.test import TestCase
+
+from core.benchmarks import SCENARIOS, compare_to_budgets, load_budgets, run_benchmarks, seed_dataset
+
+
+class ViewQueryBudgetTests(TestCase):
+    """Query-count guard for the hot rental pages on the small benchmark profile.
+
+    Timing and memory budgets are only enforced by ``manage.py benchmark_views``
+    because they depend on the machine running the suite.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset('small')
+
+    def test_every_scenario_has_a_budget(self):
+        budgets = load_budgets()
+
+        for profile in ('small', 'default'):
+            self.assertEqual(sorted(budgets[profile]), sorted(SCENARIOS))
+
+    def test_pages_stay_within_query_budgets(self):
+        results = run_benchmarks(self.dataset)
+
+        self.assertEqual(sorted(results), sorted(SCENARIOS))
+        self.assertEqual(
+            compare_to_budgets(results, load_budgets()['small'], metrics=('queries',)),
+            [],
+        )
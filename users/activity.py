@@ -28,7 +28,7 @@ def is_activity_admin(user):
     )
 
 
-def log_activity(
+def build_activity(
     *,
     activity_type,
     title,
@@ -60,7 +60,13 @@ def log_activity(
     if created_at is not None:
         create_kwargs['created_at'] = created_at
 
-    return ActivityLog.objects.create(**create_kwargs)
+    return ActivityLog(**create_kwargs)
+
+
+def log_activity(**kwargs):
+    activity = build_activity(**kwargs)
+    activity.save(force_insert=True)
+    return activity
 
 
 def get_recent_activities_for_user(user, limit=10):
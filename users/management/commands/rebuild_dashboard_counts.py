@@ -0,0 +1,29 @@
+"""
+Management command to rebuild the monthly dashboard chart counts.
+
+The counts are maintained by signals on rentals, members, irrigation
+requests, maintenance records and rice mill appointments; run this after
+bulk imports or raw queryset updates that bypass them.
+"""
+
+from django.core.management.base import BaseCommand
+from users.models import DashboardMonthlyCount
+
+
+class Command(BaseCommand):
+    help = 'Recompute DashboardMonthlyCount rows from the records the dashboard charts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--entity',
+            action='append',
+            dest='entities',
+            choices=list(DashboardMonthlyCount.SOURCES),
+            help='Only rebuild this entity (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        row_count = DashboardMonthlyCount.rebuild(entities=options['entities'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {row_count} dashboard count row(s).')
+        )
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:31
+
+from collections import Counter
+from datetime import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Mirrors DashboardMonthlyCount.SOURCES at the time of this migration.
+SOURCES = {
+    'rental': ('machines', 'Rental', 'created_at', 'user_id', 'status'),
+    'member': ('users', 'CustomUser', 'date_joined', None, None),
+    'irrigation': ('irrigation', 'WaterIrrigationRequest', 'requested_date', 'farmer_id', None),
+    'maintenance': ('machines', 'Maintenance', 'created_at', None, None),
+    'rice_mill': ('machines', 'RiceMillAppointment', 'created_at', 'user_id', None),
+}
+
+
+def backfill_dashboard_counts(apps, schema_editor):
+    DashboardMonthlyCount = apps.get_model('users', 'DashboardMonthlyCount')
+
+    totals = Counter()
+    for entity, (app_label, model_name, date_field, owner_field, status_field) in SOURCES.items():
+        model = apps.get_model(app_label, model_name)
+        names = [name for name in (date_field, owner_field, status_field) if name]
+        for row in model.objects.values(*names).iterator():
+            value = row[date_field]
+            if not value:
+                continue
+            if isinstance(value, datetime):
+                if timezone.is_aware(value):
+                    value = timezone.localtime(value)
+                value = value.date()
+            owner_id = row[owner_field] if owner_field else 0
+            status = row[status_field] if status_field else ''
+            totals[(entity, status or '', owner_id or 0, value.replace(day=1))] += 1
+
+    DashboardMonthlyCount.objects.bulk_create(
+        [
+            DashboardMonthlyCount(entity=entity, status=status, owner_id=owner_id, month=month, count=count)
+            for (entity, status, owner_id, month), count in sorted(totals.items())
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0034_add_membership_approval_banner_seen'),
+        ('machines', '0056_dryercapacityday'),
+        ('irrigation', '0009_alter_irrigationseasonrecord_payment_method'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardMonthlyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(choices=[('rental', 'Machine Rentals'), ('member', 'Members'), ('irrigation', 'Irrigation Requests'), ('maintenance', 'Maintenance'), ('rice_mill', 'Rice Mill Appointments')], max_length=20)),
+                ('status', models.CharField(blank=True, max_length=20)),
+                ('owner_id', models.PositiveIntegerField(default=0, help_text='Member the records belong to; 0 for entities not charted per member.')),
+                ('month', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Dashboard Monthly Count',
+                'verbose_name_plural': 'Dashboard Monthly Counts',
+                'ordering': ['month', 'entity', 'status'],
+                'indexes': [models.Index(fields=['month'], name='users_dashb_month_0c15c2_idx'), models.Index(fields=['owner_id', 'month'], name='users_dashb_owner_i_0b9d2d_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dashboardmonthlycount',
+            constraint=models.UniqueConstraint(fields=('entity', 'status', 'owner_id', 'month'), name='unique_dashboard_monthly_count'),
+        ),
+        migrations.RunPython(backfill_dashboard_counts, migrations.RunPython.noop),
+    ]
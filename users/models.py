@@ -1,10 +1,13 @@
 import os
-from datetime import date
+from collections import Counter, defaultdict, namedtuple
+from datetime import date, datetime
 from types import SimpleNamespace
 
+from django.apps import apps
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Sum
 from django.utils import timezone
 
 
@@ -641,3 +644,210 @@ class ActivityLog(models.Model):
 
     def __str__(self):
         return self.title
+
+
+DashboardCountKey = namedtuple('DashboardCountKey', ['entity', 'status', 'owner_id', 'month'])
+
+
+class DashboardMonthlyCount(models.Model):
+    """
+    Records per entity, status, owner and month for the dashboard charts.
+
+    Signals apply each record's contribution as an atomic delta when it is
+    created, deleted or moves to another status, owner or month, so a year
+    of chart data is one grouped read. ``rebuild`` recomputes the rows from
+    the source tables for backfills and repairs.
+    """
+    ENTITY_RENTAL = 'rental'
+    ENTITY_MEMBER = 'member'
+    ENTITY_IRRIGATION = 'irrigation'
+    ENTITY_MAINTENANCE = 'maintenance'
+    ENTITY_RICE_MILL = 'rice_mill'
+
+    ENTITY_CHOICES = [
+        (ENTITY_RENTAL, 'Machine Rentals'),
+        (ENTITY_MEMBER, 'Members'),
+        (ENTITY_IRRIGATION, 'Irrigation Requests'),
+        (ENTITY_MAINTENANCE, 'Maintenance'),
+        (ENTITY_RICE_MILL, 'Rice Mill Appointments'),
+    ]
+
+    # entity: (model label, month date field, owner field, status field)
+    SOURCES = {
+        ENTITY_RENTAL: ('machines.Rental', 'created_at', 'user', 'status'),
+        ENTITY_MEMBER: ('users.CustomUser', 'date_joined', None, None),
+        ENTITY_IRRIGATION: ('irrigation.WaterIrrigationRequest', 'requested_date', 'farmer', None),
+        ENTITY_MAINTENANCE: ('machines.Maintenance', 'created_at', None, None),
+        ENTITY_RICE_MILL: ('machines.RiceMillAppointment', 'created_at', 'user', None),
+    }
+
+    entity = models.CharField(max_length=20, choices=ENTITY_CHOICES)
+    status = models.CharField(max_length=20, blank=True)
+    owner_id = models.PositiveIntegerField(
+        default=0,
+        help_text='Member the records belong to; 0 for entities not charted per member.',
+    )
+    month = models.DateField()
+    count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['month', 'entity', 'status']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['entity', 'status', 'owner_id', 'month'],
+                name='unique_dashboard_monthly_count',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['month']),
+            models.Index(fields=['owner_id', 'month']),
+        ]
+        verbose_name = 'Dashboard Monthly Count'
+        verbose_name_plural = 'Dashboard Monthly Counts'
+
+    def __str__(self):
+        return f"{self.entity} {self.status or '-'} {self.owner_id} {self.month:%Y-%m}: {self.count}"
+
+    @staticmethod
+    def month_of(value):
+        """First day of the local month ``value`` falls in."""
+        if not value:
+            return None
+        if isinstance(value, datetime):
+            if timezone.is_aware(value):
+                value = timezone.localtime(value)
+            value = value.date()
+        return value.replace(day=1)
+
+    @classmethod
+    def entity_for(cls, model):
+        label = model._meta.label
+        for entity, source in cls.SOURCES.items():
+            if source[0] == label:
+                return entity
+        return None
+
+    @classmethod
+    def _make_key(cls, entity, when, owner_id=None, status=None):
+        month = cls.month_of(when)
+        if month is None:
+            return None
+        return DashboardCountKey(entity, status or '', owner_id or 0, month)
+
+    @classmethod
+    def key_for(cls, entity, instance, values=None):
+        """
+        The ``DashboardCountKey`` of the row ``instance`` counts towards.
+
+        ``values`` overrides fields of ``instance``; pass the row as locked
+        before a save or delete to get the row the record moves away from.
+        """
+        _, date_field, owner_field, status_field = cls.SOURCES[entity]
+        values = values or {}
+
+        def value(name):
+            if not name:
+                return None
+            if name in values:
+                return values[name]
+            return getattr(instance, instance._meta.get_field(name).attname)
+
+        return cls._make_key(entity, value(date_field), value(owner_field), value(status_field))
+
+    @classmethod
+    def apply_deltas(cls, deltas):
+        """
+        Add each ``{key: delta}`` to its row, creating missing rows.
+
+        Updates use ``F()`` expressions so concurrent writers never lose
+        each other's deltas.
+        """
+        deltas = {key: delta for key, delta in deltas.items() if key and delta}
+        if not deltas:
+            return
+        with transaction.atomic():
+            cls.objects.bulk_create(
+                [
+                    cls(entity=entity, status=status, owner_id=owner_id, month=month)
+                    for entity, status, owner_id, month in deltas
+                ],
+                ignore_conflicts=True,
+            )
+            now = timezone.now()
+            for (entity, status, owner_id, month), delta in deltas.items():
+                cls.objects.filter(entity=entity, status=status, owner_id=owner_id, month=month).update(
+                    count=F('count') + delta,
+                    updated_at=now,
+                )
+
+    @classmethod
+    def apply_change(cls, previous, current):
+        """Move one record from the ``previous`` row to the ``current`` one; either may be ``None``."""
+        cls.apply_changes([(previous, current)])
+
+    @classmethod
+    def apply_changes(cls, changes):
+        """Batched ``apply_change`` for ``(previous, current)`` pairs."""
+        deltas = Counter()
+        for previous, current in changes:
+            if previous == current:
+                continue
+            if previous:
+                deltas[previous] -= 1
+            if current:
+                deltas[current] += 1
+        cls.apply_deltas(deltas)
+
+    @classmethod
+    def rebuild(cls, entities=None):
+        """Recompute rows from the source tables; returns the number of rows written."""
+        entities = list(cls.SOURCES) if entities is None else list(entities)
+        totals = Counter()
+        for entity in entities:
+            label, date_field, owner_field, status_field = cls.SOURCES[entity]
+            model = apps.get_model(label)
+            owner_name = model._meta.get_field(owner_field).attname if owner_field else None
+            names = [name for name in (date_field, owner_name, status_field) if name]
+            for row in model._base_manager.values(*names).iterator():
+                key = cls._make_key(
+                    entity,
+                    row[date_field],
+                    row[owner_name] if owner_name else None,
+                    row[status_field] if status_field else None,
+                )
+                if key:
+                    totals[key] += 1
+
+        rows = [
+            cls(entity=entity, status=status, owner_id=owner_id, month=month, count=count)
+            for (entity, status, owner_id, month), count in sorted(totals.items())
+        ]
+        with transaction.atomic():
+            cls.objects.filter(entity__in=entities).delete()
+            cls.objects.bulk_create(rows, batch_size=500)
+        return len(rows)
+
+    @classmethod
+    def monthly_series(cls, month_starts, reference_date=None, owner_id=None):
+        """
+        Chart values per ``(entity, status)`` aligned with ``month_starts``.
+
+        Months after ``reference_date`` are counted in the reference month,
+        as records dated in the future belong to the current chart column.
+        """
+        if not month_starts:
+            return {}
+        reference_month = (reference_date or timezone.localdate()).replace(day=1)
+        positions = {month: index for index, month in enumerate(month_starts)}
+        rows = cls.objects.filter(month__gte=month_starts[0])
+        if owner_id is not None:
+            rows = rows.filter(owner_id=owner_id)
+
+        series = defaultdict(lambda: [0] * len(month_starts))
+        grouped = rows.order_by().values('entity', 'status', 'month').annotate(total=Sum('count'))
+        for row in grouped:
+            position = positions.get(min(row['month'], reference_month))
+            if position is not None:
+                series[(row['entity'], row['status'])][position] += row['total']
+        return series
@@ -1,10 +1,13 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from allauth.account.signals import user_signed_up
 from django.contrib.auth import get_user_model
+from irrigation.models import WaterIrrigationRequest
+from machines.models import Maintenance, Rental, RiceMillAppointment
 from notifications.models import UserNotification
 import datetime
 from .activity import log_activity
+from .models import DashboardMonthlyCount
 
 User = get_user_model()
 
@@ -112,3 +115,58 @@ def check_membership_status(sender, instance, created, **kwargs):
                     ),
                     is_read=False
                 )
+
+
+def _locked_dashboard_count_key(sender, instance):
+    """The count row of ``instance`` as its database row stands, locked until the save or delete commits."""
+    stored = instance.locked_stored_values()
+    if stored is None:
+        return None
+    return DashboardMonthlyCount.key_for(DashboardMonthlyCount.entity_for(sender), instance, values=stored)
+
+
+@receiver(pre_save, sender=Rental)
+@receiver(pre_save, sender=WaterIrrigationRequest)
+def track_dashboard_count_row(sender, instance, update_fields=None, **kwargs):
+    """Remember which dashboard count row a saved record leaves when its status, owner or month can change."""
+    instance._old_dashboard_count_key = None
+    if instance._state.adding or not sender.touches_tracked_fields(update_fields):
+        return
+    instance._old_dashboard_count_key = _locked_dashboard_count_key(sender, instance)
+
+
+@receiver(pre_delete, sender=Rental)
+@receiver(pre_delete, sender=WaterIrrigationRequest)
+def track_deleted_dashboard_count_row(sender, instance, **kwargs):
+    """Read the count row a deleted record leaves from the row itself, not from a possibly stale instance."""
+    instance._deleted_dashboard_count_key = _locked_dashboard_count_key(sender, instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Rental)
+@receiver(post_save, sender=WaterIrrigationRequest)
+@receiver(post_save, sender=Maintenance)
+@receiver(post_save, sender=RiceMillAppointment)
+def update_dashboard_counts(sender, instance, created, **kwargs):
+    """Count new records in the dashboard rollup and move changed ones between rows."""
+    entity = DashboardMonthlyCount.entity_for(sender)
+    if created:
+        DashboardMonthlyCount.apply_change(None, DashboardMonthlyCount.key_for(entity, instance))
+        return
+    previous = getattr(instance, '_old_dashboard_count_key', None)
+    if previous:
+        DashboardMonthlyCount.apply_change(previous, DashboardMonthlyCount.key_for(entity, instance))
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Rental)
+@receiver(post_delete, sender=WaterIrrigationRequest)
+@receiver(post_delete, sender=Maintenance)
+@receiver(post_delete, sender=RiceMillAppointment)
+def remove_dashboard_counts(sender, instance, **kwargs):
+    """Take a deleted record out of the dashboard rollup."""
+    if hasattr(instance, '_deleted_dashboard_count_key'):
+        previous = instance._deleted_dashboard_count_key
+    else:
+        previous = DashboardMonthlyCount.key_for(DashboardMonthlyCount.entity_for(sender), instance)
+    DashboardMonthlyCount.apply_change(previous, None)
@@ -16,7 +16,7 @@ from bufia.models import Payment
 from bufia.services.payments import record_membership_online_payment, sync_membership_payment_record
 from notifications.models import UserNotification
 from .decorators import verified_member_required
-from .models import ActivityLog, MembershipApplication, MembershipApplicationProof, Sector
+from .models import ActivityLog, DashboardMonthlyCount, MembershipApplication, MembershipApplicationProof, Sector
 from django.http import HttpResponse
 from machines.models import Machine, Rental, RiceMillAppointment, DryerRental
 from irrigation.models import CroppingSeason, IrrigationSeasonRecord
@@ -199,6 +199,118 @@ class DashboardPayloadTestCase(TestCase):
         self.assertGreater(payload['rental_approved_data'][3], 0)
         self.assertGreater(payload['user_data'][3], 0)
 
+    def _dashboard_rental(self, user, status='pending'):
+        machine = Machine.objects.create(
+            name=f'Dashboard Tractor {Machine.objects.count() + 1}',
+            machine_type='tractor_4wd',
+            status='available',
+            rental_fee_per_day=Decimal('2500.00'),
+        )
+        return Rental.objects.create(
+            user=user,
+            machine=machine,
+            start_date=datetime.date(2026, 4, 10),
+            end_date=datetime.date(2026, 4, 11),
+            status=status,
+            workflow_state='requested',
+            payment_type='cash',
+            payment_amount=Decimal('2500.00'),
+        )
+
+    def test_dashboard_counts_follow_status_changes_and_member_scope(self):
+        from .views import _build_dashboard_payload
+
+        admin_user = User.objects.create_user(
+            username='dashboard-admin-rollup',
+            email='dashboard-admin-rollup@example.com',
+            password='testpassword123',
+            is_superuser=True,
+            is_staff=True,
+        )
+        member = User.objects.create_user(
+            username='dashboard-member-rollup',
+            email='dashboard-member-rollup@example.com',
+            password='testpassword123',
+        )
+        other = User.objects.create_user(
+            username='dashboard-other-rollup',
+            email='dashboard-other-rollup@example.com',
+            password='testpassword123',
+        )
+        rental = self._dashboard_rental(member)
+        self._dashboard_rental(other)
+
+        rental.status = 'approved'
+        rental.save()
+
+        with patch('users.views.timezone.localdate', return_value=datetime.date(2026, 4, 30)):
+            admin_payload = _build_dashboard_payload(admin_user)
+            # Counters, recent rentals and a single read for every chart.
+            with self.assertNumQueries(5):
+                member_payload = _build_dashboard_payload(member)
+
+        self.assertEqual(sum(admin_payload['rental_pending_data']), 1)
+        self.assertEqual(sum(admin_payload['rental_approved_data']), 1)
+        self.assertEqual(sum(admin_payload['user_data']), 3)
+        self.assertEqual(sum(member_payload['rental_pending_data']), 0)
+        self.assertEqual(member_payload['rental_approved_data'][3], 1)
+        self.assertEqual(sum(member_payload['user_data']), 0)
+
+        rental.delete()
+        self.assertEqual(
+            DashboardMonthlyCount.objects.filter(entity='rental', status='approved', owner_id=member.pk).get().count,
+            0,
+        )
+
+    def test_stale_rental_save_moves_dashboard_count_from_the_stored_row(self):
+        member = User.objects.create_user(
+            username='dashboard-stale-member',
+            email='dashboard-stale-member@example.com',
+            password='testpassword123',
+        )
+        rental = self._dashboard_rental(member)
+        stale = Rental.objects.get(pk=rental.pk)
+        rental.status = 'approved'
+        rental.save()
+
+        stale.status = 'cancelled'
+        stale.save()
+
+        counts = dict(
+            DashboardMonthlyCount.objects.filter(entity='rental', owner_id=member.pk)
+            .values_list('status', 'count')
+        )
+        self.assertEqual(counts.get('pending', 0), 0)
+        self.assertEqual(counts.get('approved', 0), 0)
+        self.assertEqual(counts['cancelled'], 1)
+
+    def test_rebuild_matches_incremental_dashboard_counts(self):
+        member = User.objects.create_user(
+            username='dashboard-rebuild-member',
+            email='dashboard-rebuild-member@example.com',
+            password='testpassword123',
+        )
+        self._dashboard_rental(member)
+        completed = self._dashboard_rental(member)
+        completed.status = 'completed'
+        completed.save(update_fields=['status'])
+
+        def snapshot():
+            return sorted(
+                DashboardMonthlyCount.objects.filter(count__gt=0)
+                .values_list('entity', 'status', 'owner_id', 'month', 'count')
+            )
+
+        incremental = snapshot()
+        DashboardMonthlyCount.objects.update(count=0)
+        DashboardMonthlyCount.rebuild()
+
+        self.assertEqual(snapshot(), incremental)
+        self.assertIn(
+            ('rental', 'completed', member.pk, timezone.localdate().replace(day=1), 1),
+            incremental,
+        )
+
 
 class MembershipPaymentFlowTestCase(TestCase):
     def setUp(self):
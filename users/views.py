@@ -6,7 +6,7 @@ from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.sessions.models import Session
 from django.db.models import Q, Count
 from django.db.models.functions import TruncMonth, ExtractYear, ExtractMonth
-from django.db import transaction, connection
+from django.db import transaction
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from .forms import (
@@ -19,6 +19,7 @@ from .forms import (
 )
 from .models import (
     CustomUser,
+    DashboardMonthlyCount,
     MembershipApplication,
     MembershipApplicationProof,
     Sector,
@@ -58,59 +59,6 @@ def _calendar_year_month_starts(reference_date=None):
     ]
 
 
-def _get_monthly_counts_mysql_safe(queryset, date_field, start_date, reference_date=None):
-    """
-    Get monthly counts without using TruncMonth (which requires MySQL timezone tables).
-    Works by extracting year and month separately.
-    """
-    reference_date = reference_date or timezone.localdate()
-
-    if connection.vendor == 'mysql':
-        month_counts = defaultdict(int)
-        for value in queryset.values_list(date_field, flat=True):
-            if not value:
-                continue
-
-            if isinstance(value, datetime.datetime):
-                if timezone.is_aware(value):
-                    value = timezone.localtime(value)
-                value = value.date()
-
-            if value > reference_date:
-                value = reference_date
-
-            month_key = datetime.date(value.year, value.month, 1)
-            if month_key >= start_date:
-                month_counts[month_key] += 1
-
-        return [
-            {'month': month, 'count': month_counts[month]}
-            for month in sorted(month_counts)
-        ]
-
-    month_counts = defaultdict(int)
-    for value in queryset.values_list(date_field, flat=True):
-        if not value:
-            continue
-
-        if isinstance(value, datetime.datetime):
-            if timezone.is_aware(value):
-                value = timezone.localtime(value)
-            value = value.date()
-
-        if value > reference_date:
-            value = reference_date
-
-        month_key = datetime.date(value.year, value.month, 1)
-        if month_key >= start_date:
-            month_counts[month_key] += 1
-
-    return [
-        {'month': month, 'count': month_counts[month]}
-        for month in sorted(month_counts)
-    ]
-
-
 def _validate_membership_profile_photo(photo):
     if not photo:
         return
@@ -325,11 +273,6 @@ def _clear_user_sessions(user):
 def _build_dashboard_payload(user):
     current_date = timezone.localdate()
     month_starts = _calendar_year_month_starts(current_date)
-    twelve_months_ago = month_starts[0] if month_starts else current_date.replace(day=1)
-    twelve_months_ago_datetime = timezone.make_aware(
-        datetime.datetime.combine(twelve_months_ago, datetime.time.min),
-        timezone.get_current_timezone(),
-    )
     is_admin = user.is_superuser or user.role == User.SUPERUSER
 
     total_users = None
@@ -341,15 +284,6 @@ def _build_dashboard_payload(user):
     active_rentals = 0
     recent_rentals = []
 
-    months = []
-    rental_pending_data = []
-    rental_approved_data = []
-    rental_completed_data = []
-    user_data = []
-    irrigation_data = []
-    maintenance_data = []
-    ricemill_data = []
-
     if is_admin:
         cache_key = 'admin_dashboard_stats'
         cached_stats = cache.get(cache_key)
@@ -388,43 +322,6 @@ def _build_dashboard_payload(user):
         recent_rentals = list(
             Rental.objects.select_related('user', 'machine').order_by('-created_at')[:5]
         )
-
-        monthly_rentals_pending = _get_monthly_counts_mysql_safe(
-            Rental.objects.filter(created_at__gte=twelve_months_ago_datetime, status='pending'),
-            'created_at',
-            twelve_months_ago
-        )
-        monthly_rentals_approved = _get_monthly_counts_mysql_safe(
-            Rental.objects.filter(created_at__gte=twelve_months_ago_datetime, status='approved'),
-            'created_at',
-            twelve_months_ago
-        )
-        monthly_rentals_completed = _get_monthly_counts_mysql_safe(
-            Rental.objects.filter(created_at__gte=twelve_months_ago_datetime, status='completed'),
-            'created_at',
-            twelve_months_ago
-        )
-        monthly_users = _get_monthly_counts_mysql_safe(
-            User.objects.filter(date_joined__gte=twelve_months_ago_datetime),
-            'date_joined',
-            twelve_months_ago
-        )
-
-        monthly_irrigation = _get_monthly_counts_mysql_safe(
-            WaterIrrigationRequest.objects.filter(requested_date__gte=twelve_months_ago),
-            'requested_date',
-            twelve_months_ago
-        )
-        monthly_maintenance = _get_monthly_counts_mysql_safe(
-            Maintenance.objects.filter(created_at__gte=twelve_months_ago_datetime),
-            'created_at',
-            twelve_months_ago
-        )
-        monthly_ricemill = _get_monthly_counts_mysql_safe(
-            RiceMillAppointment.objects.filter(created_at__gte=twelve_months_ago_datetime),
-            'created_at',
-            twelve_months_ago
-        )
     else:
         total_machines = Machine.objects.count()
         available_machines = Machine.objects.filter(status='available').count()
@@ -432,73 +329,16 @@ def _build_dashboard_payload(user):
         recent_rentals = list(
             Rental.objects.select_related('machine').filter(user=user).order_by('-created_at')[:5]
         )
-        monthly_rentals_pending = _get_monthly_counts_mysql_safe(
-            Rental.objects.filter(user=user, created_at__gte=twelve_months_ago_datetime, status='pending'),
-            'created_at',
-            twelve_months_ago
-        )
-        monthly_rentals_approved = _get_monthly_counts_mysql_safe(
-            Rental.objects.filter(user=user, created_at__gte=twelve_months_ago_datetime, status='approved'),
-            'created_at',
-            twelve_months_ago
-        )
-        monthly_rentals_completed = _get_monthly_counts_mysql_safe(
-            Rental.objects.filter(user=user, created_at__gte=twelve_months_ago_datetime, status='completed'),
-            'created_at',
-            twelve_months_ago
-        )
-        monthly_users = []
-        monthly_irrigation = _get_monthly_counts_mysql_safe(
-            WaterIrrigationRequest.objects.filter(farmer=user, requested_date__gte=twelve_months_ago),
-            'requested_date',
-            twelve_months_ago
-        )
-        monthly_maintenance = []
-        monthly_ricemill = _get_monthly_counts_mysql_safe(
-            RiceMillAppointment.objects.filter(user=user, created_at__gte=twelve_months_ago_datetime),
-            'created_at',
-            twelve_months_ago
-        )
-
-    for month_date in month_starts:
-        months.append(month_date.strftime('%b'))
 
-        pending_count = next(
-            (item['count'] for item in monthly_rentals_pending if item['month'].month == month_date.month and item['month'].year == month_date.year),
-            0
-        )
-        approved_count = next(
-            (item['count'] for item in monthly_rentals_approved if item['month'].month == month_date.month and item['month'].year == month_date.year),
-            0
-        )
-        completed_count = next(
-            (item['count'] for item in monthly_rentals_completed if item['month'].month == month_date.month and item['month'].year == month_date.year),
-            0
-        )
-        member_count = next(
-            (item['count'] for item in monthly_users if item['month'].month == month_date.month and item['month'].year == month_date.year),
-            0
-        )
-        irrigation_count = next(
-            (item['count'] for item in monthly_irrigation if item['month'].month == month_date.month and item['month'].year == month_date.year),
-            0
-        )
-        maintenance_count = next(
-            (item['count'] for item in monthly_maintenance if item['month'].month == month_date.month and item['month'].year == month_date.year),
-            0
-        )
-        ricemill_count = next(
-            (item['count'] for item in monthly_ricemill if item['month'].month == month_date.month and item['month'].year == month_date.year),
-            0
-        )
+    # Admins chart every member's records; members only their own.
+    series = DashboardMonthlyCount.monthly_series(
+        month_starts,
+        current_date,
+        owner_id=None if is_admin else user.pk,
+    )
 
-        rental_pending_data.append(pending_count)
-        rental_approved_data.append(approved_count)
-        rental_completed_data.append(completed_count)
-        user_data.append(member_count)
-        irrigation_data.append(irrigation_count)
-        maintenance_data.append(maintenance_count)
-        ricemill_data.append(ricemill_count)
+    def chart(entity, status=''):
+        return list(series.get((entity, status), [0] * len(month_starts)))
 
     return {
         'is_admin': is_admin,
@@ -510,14 +350,14 @@ def _build_dashboard_payload(user):
         'available_machines': available_machines,
         'active_rentals': active_rentals,
         'recent_rentals': recent_rentals,
-        'months': months,
-        'rental_pending_data': rental_pending_data,
-        'rental_approved_data': rental_approved_data,
-        'rental_completed_data': rental_completed_data,
-        'user_data': user_data,
-        'irrigation_data': irrigation_data,
-        'maintenance_data': maintenance_data,
-        'ricemill_data': ricemill_data,
+        'months': [month_date.strftime('%b') for month_date in month_starts],
+        'rental_pending_data': chart(DashboardMonthlyCount.ENTITY_RENTAL, 'pending'),
+        'rental_approved_data': chart(DashboardMonthlyCount.ENTITY_RENTAL, 'approved'),
+        'rental_completed_data': chart(DashboardMonthlyCount.ENTITY_RENTAL, 'completed'),
+        'user_data': chart(DashboardMonthlyCount.ENTITY_MEMBER),
+        'irrigation_data': chart(DashboardMonthlyCount.ENTITY_IRRIGATION),
+        'maintenance_data': chart(DashboardMonthlyCount.ENTITY_MAINTENANCE),
+        'ricemill_data': chart(DashboardMonthlyCount.ENTITY_RICE_MILL),
     }
 
 def home(request):